@@ -0,0 +1,133 @@
+"""
+Callback-driven microphone capture for AudioLoop.listen_audio.
+
+PyAudio runs the stream in callback mode and hands each chunk to a
+preallocated single-producer/single-consumer ring. The PortAudio thread only
+stores a reference to the chunk and advances its write index; the asyncio side
+is woken with loop.call_soon_threadsafe and reads frames in order. No worker
+thread from the default executor is used per chunk.
+"""
+
+import asyncio
+
+
+class FrameRing:
+    """
+    Fixed-capacity SPSC ring of audio frames.
+
+    The producer (PortAudio callback thread) only writes `_write_index` and the
+    consumer (event loop) only writes `_read_index`. Each index is a single
+    attribute store, so no lock is needed under the GIL. When the ring is full
+    the incoming frame is dropped and counted as an overrun.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.capacity = capacity
+        self._slots = [None] * capacity
+        self._write_index = 0
+        self._read_index = 0
+        self.overruns = 0
+
+    def __len__(self):
+        return self._write_index - self._read_index
+
+    def push(self, frame) -> bool:
+        """Producer side. Returns False if the frame was dropped."""
+        if self._write_index - self._read_index >= self.capacity:
+            self.overruns += 1
+            return False
+        self._slots[self._write_index % self.capacity] = frame
+        self._write_index += 1
+        return True
+
+    def pop(self):
+        """Consumer side. Returns the oldest frame, or None if empty."""
+        if self._read_index == self._write_index:
+            return None
+        slot = self._read_index % self.capacity
+        frame = self._slots[slot]
+        self._slots[slot] = None
+        self._read_index += 1
+        return frame
+
+    def clear(self):
+        """Consumer side. Discards everything currently buffered."""
+        while self.pop() is not None:
+            pass
+
+
+class CallbackAudioCapture:
+    """Opens a PyAudio input stream in callback mode and exposes `await read()`."""
+
+    def __init__(self, pya, format, channels, rate, frames_per_buffer, input_device_index=None, capacity: int = 64):
+        self.pya = pya
+        self.format = format
+        self.channels = channels
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.input_device_index = input_device_index
+
+        self.ring = FrameRing(capacity)
+        self.stream = None
+        self.status_flags = 0  # Count of callbacks that reported input overflow/underflow
+
+        self._loop = None
+        self._data_ready = asyncio.Event()
+        self._continue_flag = None
+
+    def open(self, loop):
+        """Opens and starts the stream. `loop` is the event loop that consumes frames."""
+        import pyaudio
+        self._continue_flag = pyaudio.paContinue
+        self._loop = loop
+        self.stream = self.pya.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.rate,
+            input=True,
+            input_device_index=self.input_device_index,
+            frames_per_buffer=self.frames_per_buffer,
+            stream_callback=self._callback,
+        )
+        self.stream.start_stream()
+        return self.stream
+
+    def _callback(self, in_data, frame_count, time_info, status):
+        # Runs on the PortAudio thread: keep it to a push and a wake-up
+        if status:
+            self.status_flags += 1
+        self.ring.push(in_data)
+        try:
+            self._loop.call_soon_threadsafe(self._data_ready.set)
+        except RuntimeError:
+            # Loop already closed during shutdown
+            pass
+        return (None, self._continue_flag)
+
+    async def read(self):
+        """Returns the next captured frame, waiting if none is buffered."""
+        while True:
+            frame = self.ring.pop()
+            if frame is not None:
+                return frame
+            self._data_ready.clear()
+            # Re-check after clearing so a push between pop() and clear() isn't missed
+            frame = self.ring.pop()
+            if frame is not None:
+                return frame
+            await self._data_ready.wait()
+
+    def discard_pending(self):
+        """Drops buffered audio (e.g. while paused) so stale speech isn't sent later."""
+        self.ring.clear()
+
+    def close(self):
+        if self.ring.overruns or self.status_flags:
+            print(f"[AUDIO] Capture closed with {self.ring.overruns} ring overruns, {self.status_flags} PortAudio status flags.")
+        if self.stream:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
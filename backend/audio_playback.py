@@ -0,0 +1,202 @@
+"""
+Model audio playback for AudioLoop.play_audio.
+
+- JitterBuffer replaces the unbounded asyncio.Queue for incoming model audio.
+  It prebuffers up to a target depth (in milliseconds) before playback starts,
+  grows the target after underruns and slowly shrinks it again while playback
+  is smooth. Underrun/overrun counters are exposed through stats().
+- InterruptiblePlayer writes to the PortAudio stream in short slices so a
+  barge-in can stop playback mid-chunk instead of waiting for the whole chunk
+  to drain. It measures barge-in latency (interrupt -> write stopped).
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+
+class JitterBuffer:
+    """asyncio-side buffer of PCM chunks with a target depth in milliseconds."""
+
+    def __init__(self, sample_rate: int = 24000, sample_width: int = 2, channels: int = 1,
+                 target_ms: float = 120, min_target_ms: float = 60, max_target_ms: float = 500,
+                 max_depth_ms: float = 30000, adapt_step_ms: float = 40, decay_after_chunks: int = 200):
+        self.bytes_per_ms = sample_rate * sample_width * channels / 1000.0
+        self.target_ms = target_ms
+        self.min_target_ms = min_target_ms
+        self.max_target_ms = max_target_ms
+        self.max_depth_ms = max_depth_ms
+        self.adapt_step_ms = adapt_step_ms
+        self.decay_after_chunks = decay_after_chunks
+
+        self._chunks = deque()
+        self._bytes = 0
+        self._data_event = asyncio.Event()
+        self._prebuffering = True
+        self._starved = False
+        self._smooth_chunks = 0
+
+        self.underruns = 0
+        self.overruns = 0
+        self.dropped_chunks = 0
+        self.cleared_chunks = 0
+
+    @property
+    def depth_ms(self) -> float:
+        return self._bytes / self.bytes_per_ms
+
+    def qsize(self) -> int:
+        return len(self._chunks)
+
+    def empty(self) -> bool:
+        return not self._chunks
+
+    def put_nowait(self, data):
+        if self._starved:
+            # Audio kept coming after playback ran dry: that gap was audible
+            self._starved = False
+            self.underruns += 1
+            self.target_ms = min(self.target_ms + self.adapt_step_ms, self.max_target_ms)
+            self._smooth_chunks = 0
+
+        self._chunks.append(data)
+        self._bytes += len(data)
+
+        # Bound memory: drop the oldest audio if the model outruns playback by too much
+        while self.depth_ms > self.max_depth_ms and len(self._chunks) > 1:
+            dropped = self._chunks.popleft()
+            self._bytes -= len(dropped)
+            self.dropped_chunks += 1
+            self.overruns += 1
+
+        self._data_event.set()
+
+    def get_nowait(self):
+        if not self._chunks:
+            raise asyncio.QueueEmpty
+        return self._pop()
+
+    def _pop(self):
+        chunk = self._chunks.popleft()
+        self._bytes -= len(chunk)
+        self._smooth_chunks += 1
+        if self._smooth_chunks >= self.decay_after_chunks:
+            self._smooth_chunks = 0
+            self.target_ms = max(self.target_ms - self.adapt_step_ms, self.min_target_ms)
+        return chunk
+
+    async def _wait_for_data(self, timeout=None) -> bool:
+        self._data_event.clear()
+        if timeout is None:
+            await self._data_event.wait()
+            return True
+        try:
+            await asyncio.wait_for(self._data_event.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def get(self):
+        """Returns the next chunk, prebuffering to target_ms after a start or underrun."""
+        if not self._chunks and not self._prebuffering:
+            self._prebuffering = True
+            self._starved = True
+
+        while not self._chunks:
+            await self._wait_for_data()
+
+        if self._prebuffering:
+            # Wait for the target depth, but never longer than target_ms of wall time,
+            # so short replies still start promptly
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + self.target_ms / 1000.0
+            while self.depth_ms < self.target_ms:
+                remaining = deadline - loop.time()
+                if remaining <= 0 or not await self._wait_for_data(remaining):
+                    break
+            self._prebuffering = False
+            self._starved = False
+
+        return self._pop()
+
+    def clear(self) -> int:
+        """Drops all buffered audio (interruption / end of turn). Returns chunks dropped."""
+        count = len(self._chunks)
+        self._chunks.clear()
+        self._bytes = 0
+        self._prebuffering = True
+        self._starved = False
+        self.cleared_chunks += count
+        return count
+
+    def stats(self) -> dict:
+        return {
+            "depth_ms": round(self.depth_ms, 1),
+            "target_ms": self.target_ms,
+            "chunks": len(self._chunks),
+            "underruns": self.underruns,
+            "overruns": self.overruns,
+            "dropped_chunks": self.dropped_chunks,
+            "cleared_chunks": self.cleared_chunks,
+        }
+
+
+class InterruptiblePlayer:
+    """Writes PCM to a blocking PyAudio output stream in abortable slices."""
+
+    def __init__(self, stream, bytes_per_ms: float, slice_ms: float = 20, history: int = 50):
+        self.stream = stream
+        frame_bytes = 2
+        self.slice_bytes = max(frame_bytes, int(bytes_per_ms * slice_ms) // frame_bytes * frame_bytes)
+
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._writing = False
+        self._interrupt_time = None
+
+        self.interrupts = 0
+        self.aborted_writes = 0
+        self.last_barge_in_ms = None
+        self.barge_in_ms = deque(maxlen=history)
+
+    def write(self, data) -> bool:
+        """Runs in a worker thread. Returns False if playback was interrupted."""
+        with self._lock:
+            generation = self._generation
+            self._writing = True
+        try:
+            view = memoryview(data)
+            for offset in range(0, len(view), self.slice_bytes):
+                if self._generation != generation:
+                    self._record_abort()
+                    return False
+                self.stream.write(bytes(view[offset:offset + self.slice_bytes]))
+            return True
+        finally:
+            with self._lock:
+                self._writing = False
+
+    def _record_abort(self):
+        self.aborted_writes += 1
+        if self._interrupt_time is not None:
+            self.last_barge_in_ms = (time.perf_counter() - self._interrupt_time) * 1000.0
+            self.barge_in_ms.append(self.last_barge_in_ms)
+            self._interrupt_time = None
+
+    def interrupt(self):
+        """Stops the write in progress (if any) at the next slice boundary."""
+        with self._lock:
+            self._generation += 1
+            self.interrupts += 1
+            if self._writing:
+                self._interrupt_time = time.perf_counter()
+
+    def stats(self) -> dict:
+        samples = sorted(self.barge_in_ms)
+        return {
+            "interrupts": self.interrupts,
+            "aborted_writes": self.aborted_writes,
+            "last_barge_in_ms": round(self.last_barge_in_ms, 1) if self.last_barge_in_ms is not None else None,
+            "median_barge_in_ms": round(samples[len(samples) // 2], 1) if samples else None,
+        }
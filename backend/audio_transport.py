@@ -0,0 +1,90 @@
+"""
+Model audio transport to the frontend.
+
+The frontend only uses model audio to drive the visualizer, so by default the
+backend sends a compact summary (overall level + log-spaced spectrum bands,
+scaled to 0-255) at a capped rate instead of every PCM chunk.
+
+Transport modes (settings key "audio_transport"):
+- "visualizer": summary only, at most `max_rate_hz` emits per second (default).
+- "binary":     raw PCM bytes sent as a Socket.IO binary attachment.
+- "list":       legacy JSON list of byte values (large, kept for compatibility).
+"""
+
+import time
+
+import numpy as np
+
+from vad import pcm_view
+
+AUDIO_TRANSPORT_MODES = ("visualizer", "binary", "list")
+DEFAULT_AUDIO_TRANSPORT = "visualizer"
+
+
+class AudioVisualizerFeed:
+    """Rate-limited level/spectrum summaries of 16-bit mono PCM."""
+
+    def __init__(self, sample_rate: int = 24000, bands: int = 32, max_rate_hz: float = 30.0,
+                 min_freq: float = 60.0, max_freq: float = 12000.0, floor_db: float = -60.0):
+        self.sample_rate = sample_rate
+        self.bands = bands
+        self.min_interval = 1.0 / max_rate_hz if max_rate_hz > 0 else 0.0
+        self.min_freq = min_freq
+        self.max_freq = min(max_freq, sample_rate / 2)
+        self.floor_db = floor_db
+
+        self._last_emit = 0.0
+        self._frame_len = 0
+        self._window = None
+        self._band_edges = None
+
+        self.chunks_seen = 0
+        self.summaries_sent = 0
+
+    def _prepare(self, n: int):
+        if n == self._frame_len:
+            return
+        freqs = np.fft.rfftfreq(n, d=1.0 / self.sample_rate)
+        edges_hz = np.geomspace(self.min_freq, self.max_freq, self.bands + 1)
+        # Bin index boundaries for each band, at least one bin wide
+        edges = np.searchsorted(freqs, edges_hz)
+        edges = np.maximum(edges, np.arange(edges.size) + 1)
+        self._band_edges = np.minimum(edges, freqs.size - 1)
+        self._window = np.hanning(n).astype(np.float32)
+        self._frame_len = n
+
+    def _to_byte_scale(self, values_db):
+        scaled = (np.asarray(values_db) - self.floor_db) / -self.floor_db
+        return np.clip(scaled * 255.0, 0, 255).astype(np.uint8)
+
+    def compute(self, data) -> dict:
+        """Computes a summary for one PCM chunk, ignoring the rate limit."""
+        samples = pcm_view(data)
+        if samples.size < 2:
+            return {"level": 0, "bands": [0] * self.bands}
+
+        self._prepare(samples.size)
+        normalized = samples * (self._window / 32768.0)
+        magnitude = np.abs(np.fft.rfft(normalized)) * (2.0 / self._window.sum())
+
+        # Peak magnitude per band via reduceat over the band edges
+        band_mag = np.maximum.reduceat(magnitude, self._band_edges[:-1])
+        band_db = 20.0 * np.log10(np.maximum(band_mag, 1e-9))
+
+        rms = np.sqrt(np.mean(np.square(samples, dtype=np.float32))) / 32768.0
+        level_db = 20.0 * np.log10(max(float(rms), 1e-9))
+
+        return {
+            "level": int(self._to_byte_scale(level_db)),
+            "bands": self._to_byte_scale(band_db).tolist(),
+        }
+
+    def summarize(self, data, now: float = None):
+        """Returns a summary if the rate limit allows one, otherwise None."""
+        self.chunks_seen += 1
+        now = time.monotonic() if now is None else now
+        if now - self._last_emit < self.min_interval:
+            return None
+        self._last_emit = now
+        self.summaries_sent += 1
+        return self.compute(data)
@@ -0,0 +1,157 @@
+"""
+Offline latency/throughput benchmark for the AudioLoop voice pipeline.
+
+Drives the real listen_audio / send_realtime / receive_audio / play_audio
+tasks against the scripted FakeLiveSession with fake audio devices, so it
+needs no API key, network or sound card.
+
+Usage:
+    python benchmark_live.py                         # 5 turns, 300 ms model delay
+    python benchmark_live.py --turns 10 --response-delay-ms 800
+    python benchmark_live.py --tool-every 2 --json   # tool call on every 2nd turn
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+# A placeholder key keeps the client objects from failing without ever
+# contacting the API.
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from fake_live import FakeLiveClient, FakePyAudio, ScriptedTurn, TRIGGER_SPEECH
+
+
+def build_script(turns, response_delay_ms, audio_ms, tool_every):
+    script = []
+    for i in range(turns):
+        tool_calls = []
+        if tool_every and (i + 1) % tool_every == 0:
+            tool_calls = [{"name": "list_projects", "args": {}}]
+        script.append(ScriptedTurn(
+            trigger=TRIGGER_SPEECH,
+            response_delay_ms=response_delay_ms,
+            input_transcript=f"Pregunta {i + 1}",
+            output_transcript=f"Respuesta {i + 1}",
+            audio_ms=audio_ms,
+            tool_calls=tool_calls,
+        ))
+    return script
+
+
+async def run_benchmark(turns=5, response_delay_ms=300, audio_ms=1000, tool_every=0,
+                        settings=None, mic_pattern=FakePyAudio.DEFAULT_PATTERN, timeout=None,
+                        drop_after_turns=None):
+    """Runs AudioLoop against the fake session until all turns complete. Returns a report dict."""
+    import sara
+
+    live = FakeLiveClient(build_script(turns, response_delay_ms, audio_ms, tool_every),
+                          drop_after_turns=drop_after_turns)
+    devices = FakePyAudio(mic_pattern=mic_pattern)
+    cycle_s = sum(ms for _, ms in mic_pattern) / 1000.0
+    timeout = timeout or (turns * cycle_s + 30)
+
+    with tempfile.TemporaryDirectory() as project_root:
+        audio_loop = sara.AudioLoop(
+            video_mode="none",
+            live_connect=live.connect,
+            audio_interface=devices,
+            settings=settings or {},
+            project_root=project_root,
+        )
+        # Tools run without the confirmation prompt in the benchmark
+        audio_loop.update_permissions({"list_projects": False})
+
+        started = time.perf_counter()
+        run_task = asyncio.create_task(audio_loop.run())
+        try:
+            deadline = started + timeout
+            while time.perf_counter() < deadline:
+                if live.turns_completed >= turns and audio_loop.audio_in_queue.empty():
+                    # Let the last chunk finish playing
+                    await asyncio.sleep(0.5)
+                    break
+                if run_task.done():
+                    break
+                await asyncio.sleep(0.05)
+        finally:
+            audio_loop.stop()
+            run_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await run_task
+        elapsed = time.perf_counter() - started
+
+        session = live.session
+        output_bytes = sum(s.bytes_written for s in devices.output_streams)
+        return {
+            "turns_requested": turns,
+            "turns_completed": live.turns_completed,
+            "elapsed_s": round(elapsed, 2),
+            "connects": len(live.sessions),
+            "resumed_connects": sum(1 for handle in live.resumed_handles if handle),
+            "latency": audio_loop.latency.snapshot(),
+            "audio": audio_loop.get_audio_stats(),
+            "session": session.stats() if session else {},
+            "playback_seconds": round(output_bytes / 2 / sara.RECEIVE_SAMPLE_RATE, 2),
+        }
+
+
+def print_report(report):
+    print(f"\n{'='*60}")
+    print(f"Turns: {report['turns_completed']}/{report['turns_requested']} in {report['elapsed_s']}s "
+          f"({report['connects']} connect(s), {report['resumed_connects']} resumed, {report['playback_seconds']}s played)")
+    print(f"{'='*60}")
+    print(f"{'metric':28} {'count':>6} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for metric, snap in report["latency"].items():
+        print(f"{metric:28} {snap['count']:>6} {snap['p50_ms']:>8}ms {snap['p95_ms']:>8}ms {snap['p99_ms']:>8}ms")
+    playback = report["audio"].get("playback") or {}
+    print(f"\nPlayback: underruns={playback.get('underruns')} overruns={playback.get('overruns')} "
+          f"target={playback.get('target_ms')}ms")
+    print(f"Upstream: {report['session'].get('audio_chunks_received')} audio chunks, "
+          f"{report['session'].get('audio_bytes_received')} bytes")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline AudioLoop latency benchmark")
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--response-delay-ms", type=float, default=300)
+    parser.add_argument("--audio-ms", type=float, default=1000, help="Length of each scripted reply")
+    parser.add_argument("--tool-every", type=int, default=0, help="Add a tool call every N turns (0 = never)")
+    parser.add_argument("--vad-engine", type=str, default=None, choices=["energy", "spectral"])
+    parser.add_argument("--capture-mode", type=str, default=None, choices=["callback", "blocking"])
+    parser.add_argument("--drop-after", type=int, default=None, help="Drop the connection every N turns to measure reconnects")
+    parser.add_argument("--no-resumption", action="store_true", help="Reconnect with the rolling context instead of a resumption handle")
+    parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+
+    settings = {}
+    if args.vad_engine:
+        settings["vad_engine"] = args.vad_engine
+    if args.capture_mode:
+        settings["audio_capture_mode"] = args.capture_mode
+    if args.no_resumption:
+        settings["session_resumption"] = False
+
+    report = asyncio.run(run_benchmark(
+        turns=args.turns,
+        response_delay_ms=args.response_delay_ms,
+        audio_ms=args.audio_ms,
+        tool_every=args.tool_every,
+        settings=settings,
+        drop_after_turns=args.drop_after,
+    ))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if report["turns_completed"] >= args.turns else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
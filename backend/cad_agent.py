@@ -1,6 +1,8 @@
 import os
 import json
 import asyncio
+import functools
+import time
 from datetime import datetime
 from google import genai
 from google.genai import types
@@ -8,15 +10,51 @@ from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
+import metrics
+
 load_dotenv()
 
+CAD_ATTEMPTS = metrics.counter("sara_cad_attempts_total", "build123d script attempts (model call + local run)", ["mode"])
+CAD_REQUESTS = metrics.counter("sara_cad_requests_total", "CAD requests by result", ["mode", "result"])
+CAD_SECONDS = metrics.histogram(
+    "sara_cad_request_seconds", "CAD request duration, all attempts included", ["mode"],
+    buckets=(5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 180.0, 300.0, 600.0),
+)
+
+
+def _track_cad(mode):
+    """Counts a CAD request as success (a result was returned), failure or cancelled, and times it."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        async def run(self, *args, **kwargs):
+            started = time.perf_counter()
+            outcome = "failure"
+            try:
+                result = await fn(self, *args, **kwargs)
+                if result:
+                    outcome = "success"
+                return result
+            except asyncio.CancelledError:
+                # CadJobScheduler.cancel() cancels the job's task; that closes the stream or kills the script
+                outcome = "cancelled"
+                raise
+            finally:
+                CAD_REQUESTS.labels(mode=mode, result=outcome).inc()
+                CAD_SECONDS.labels(mode=mode).observe(time.perf_counter() - started)
+        return run
+    return wrap
+
+
 class CadAgent:
-    def __init__(self, on_thought=None, on_status=None):
+    def __init__(self, on_thought=None, on_status=None, worker_pool=None, script_limits=None, cache=None):
         self.client = genai.Client(http_options={"api_version": "v1beta"}, api_key=os.getenv("GEMINI_API_KEY"))
         # Using Gemini 2.5 Pro for thinking/streaming support
         self.model = "gemini-3-pro-preview"
         self.on_thought = on_thought  # Callback for streaming thoughts 
         self.on_status = on_status  # Callback for retry status info
+        self.worker_pool = worker_pool  # cad_workers.CadWorkerPool, or None for one process per script
+        self.script_limits = script_limits  # cad_workers.ScriptLimits for the one-process-per-script path
+        self.cache = cache  # cad_cache.CadCache, or None to always ask the model and run the script
         
         self.system_instruction = """
 You are a Python-based 3D CAD Engineer using the `build123d` library.
@@ -60,6 +98,112 @@ export_stl(result_part, 'output.stl')
 ```
 """
 
+    async def _stream_code(self, prompt):
+        """Streams the model's answer, forwarding thoughts to on_thought. Returns the answer text."""
+        raw_content = ""
+        stream = await self.client.aio.models.generate_content_stream(
+            model=self.model,
+            contents=prompt,
+            config=types.GenerateContentConfig(
+                system_instruction=self.system_instruction,
+                temperature=1.0,
+                thinking_config=types.ThinkingConfig(include_thoughts=True)
+            )
+        )
+        try:
+            async for chunk in stream:
+                if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+                    for part in chunk.candidates[0].content.parts:
+                        if not part.text:
+                            continue
+                        elif part.thought:
+                            # Stream thought to callback
+                            if self.on_thought:
+                                self.on_thought(part.text)
+                        else:
+                            # Accumulate answer text
+                            raw_content += part.text
+        finally:
+            # On cancel this closes the HTTP stream now instead of when the generator is collected
+            aclose = getattr(stream, "aclose", None)
+            if aclose:
+                await aclose()
+        return raw_content
+
+    async def _run_script(self, script_path, work_dir):
+        """Runs the generated script; returns a cad_workers.ScriptResult (returncode/stdout/stderr)."""
+        import cad_workers
+
+        if self.worker_pool is not None:
+            result = await self.worker_pool.run_script(script_path, cwd=work_dir)
+        else:
+            result = await cad_workers.run_script_subprocess(script_path, cwd=work_dir, limits=self.script_limits)
+        print(f"[CadAgent DEBUG] [EXEC] Script finished in {result.seconds:.2f}s (exit code {result.returncode}).")
+        return result
+
+    async def _build(self, code, script_path, output_stl, work_dir):
+        """
+        Writes the script (output path injected) and produces its STL: from the mesh cache when this
+        exact script already ran, else by running it. Returns (proc, cad_data); cad_data is None
+        unless the STL exists.
+        """
+        import cad_workers
+
+        # Fix for Windows paths in python strings: escape backslashes
+        safe_output_path = output_stl.replace("\\", "\\\\")
+        with open(script_path, "w") as f:
+            # Inject output path into the script
+            f.write(code.replace("output.stl", safe_output_path))
+
+        stl_data = await asyncio.to_thread(self.cache.get_mesh, code) if self.cache is not None else None
+        if stl_data is not None:
+            print(f"[CadAgent DEBUG] [CACHE] Mesh cache hit; not running the script.")
+            with open(output_stl, "wb") as f:
+                f.write(stl_data)
+            return cad_workers.ScriptResult(0), self._stl_result(output_stl, stl_data)
+
+        print(f"[CadAgent DEBUG] [EXEC] Running local script: {script_path}")
+        # Execute Locally (on a warm build123d worker when the pool is enabled)
+        proc = await self._run_script(script_path, work_dir)
+        if proc.returncode != 0 or not os.path.exists(output_stl):
+            return proc, None
+        print(f"[CadAgent DEBUG] [file] '{output_stl}' found.")
+        with open(output_stl, "rb") as f:
+            stl_data = f.read()
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put_mesh, code, stl_data)
+        return proc, self._stl_result(output_stl, stl_data)
+
+    @staticmethod
+    def _stl_result(output_stl, stl_data):
+        import base64
+        return {
+            "format": "stl",
+            "data": base64.b64encode(stl_data).decode('utf-8'),
+            "file_path": output_stl
+        }
+
+    def _cache_key(self, mode, prompt, base_script=None):
+        if self.cache is None:
+            return None
+        return self.cache.prompt_key(mode, prompt, self.model, self.system_instruction, base_script)
+
+    async def _build_cached(self, cache_key, script_path, output_stl, work_dir):
+        """The result for a request seen before, without asking the model; None on a miss."""
+        if cache_key is None:
+            return None
+        code = await asyncio.to_thread(self.cache.get_script, cache_key)
+        if code is None:
+            return None
+        print(f"[CadAgent DEBUG] [CACHE] Script cache hit; not asking the model.")
+        proc, cad_data = await self._build(code, script_path, output_stl, work_dir)
+        if cad_data is None:
+            # e.g. build123d changed underneath it; fall back to the model
+            print(f"[CadAgent DEBUG] [CACHE] Cached script no longer builds (exit code {proc.returncode}); dropping it.")
+            await asyncio.to_thread(self.cache.forget_script, cache_key)
+        return cad_data
+
+    @_track_cad("generate")
     async def generate_prototype(self, prompt: str, output_dir: Optional[str] = None):
         """
         Generates 3D geometry by asking Gemini for a script, then running it LOCALLY.
@@ -67,6 +211,10 @@ export_stl(result_part, 'output.stl')
             prompt: User's description of the model to generate.
             output_dir: Directory to save the script and STL. If None, uses temp dir.
         """
+        return await self._generate(prompt, output_dir)
+
+    async def _generate(self, prompt, output_dir):
+        # Untracked, so iterate_prototype's fallback counts as one (iterate) request
         print(f"[CadAgent DEBUG] [START] Generation started for: '{prompt}'")
         
         try:
@@ -83,11 +231,18 @@ export_stl(result_part, 'output.stl')
             output_stl = os.path.join(work_dir, f"output_{timestamp}.stl")
             script_path = os.path.join(work_dir, "current_design.py")
 
+            # Same request as before: reuse its script (and mesh) without asking the model
+            cache_key = self._cache_key("generate", prompt)
+            cad_data = await self._build_cached(cache_key, script_path, output_stl, work_dir)
+            if cad_data:
+                return cad_data
+
             max_retries = 3
             current_prompt = f"You are a build123d expert. Write a generic python script to create a 3D model of: {prompt}. Ensure you export to 'output.stl'. Unscaled."
             
             for attempt in range(max_retries):
                 print(f"[CadAgent DEBUG] Attempt {attempt + 1}/{max_retries}")
+                CAD_ATTEMPTS.labels(mode="generate").inc()
                 
                 # Emit status update
                 if self.on_status:
@@ -100,28 +255,7 @@ export_stl(result_part, 'output.stl')
                     self.on_status(status_info)
                 
                 # 1. Ask Gemini for the code with streaming and thinking
-                raw_content = ""
-                stream = await self.client.aio.models.generate_content_stream(
-                    model=self.model,
-                    contents=current_prompt,
-                    config=types.GenerateContentConfig(
-                        system_instruction=self.system_instruction,
-                        temperature=1.0,
-                        thinking_config=types.ThinkingConfig(include_thoughts=True)
-                    )
-                )
-                async for chunk in stream:
-                    if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
-                        for part in chunk.candidates[0].content.parts:
-                            if not part.text:
-                                continue
-                            elif part.thought:
-                                # Stream thought to callback
-                                if self.on_thought:
-                                    self.on_thought(part.text)
-                            else:
-                                # Accumulate answer text
-                                raw_content += part.text
+                raw_content = await self._stream_code(current_prompt)
                 
                 if not raw_content:
                     print("[CadAgent DEBUG] [ERR] Empty response from model.")
@@ -141,35 +275,9 @@ export_stl(result_part, 'output.stl')
                         print("[CadAgent DEBUG] [ERR] Could not extract python code.")
                         return None
                 
-                # 3. Save to Local File in cad_outputs folder
-                # Fix for Windows paths in python strings: escape backslashes
-                safe_output_path = output_stl.replace("\\", "\\\\")
-                
-                with open(script_path, "w") as f:
-                    # Inject output path into the script
-                    code_with_path = code.replace("output.stl", safe_output_path)
-                    f.write(code_with_path)
-                    
-                print(f"[CadAgent DEBUG] [EXEC] Running local script: {script_path}")
-                
-                # 4. Execute Locally
-                import subprocess
-                import sys
-                
-                # Use the current Python interpreter (unified environment with build123d + mediapipe)
-                try:
-                    proc = await asyncio.to_thread(
-                        subprocess.run,
-                        [sys.executable, script_path],
-                        capture_output=True,
-                        text=True
-                    )
-                    stdout, stderr = proc.stdout, proc.stderr
-                except Exception as e:
-                     print(f"[CadAgent DEBUG] [ERR] Subprocess run failed: {e}")
-                     proc = type('obj', (object,), {'returncode': 1})
-                     stdout = ""
-                     stderr = str(e)
+                # 3-4. Save to Local File in cad_outputs folder and execute it (skipped on a mesh cache hit)
+                proc, cad_data = await self._build(code, script_path, output_stl, work_dir)
+                stdout, stderr = proc.stdout, proc.stderr
                 
                 if proc.returncode != 0:
                     error_msg = stderr
@@ -201,19 +309,10 @@ Original request: {prompt}
                 print(f"[CadAgent DEBUG] [OK] Script executed successfully.")
                 
                 # 5. Read Output
-                if os.path.exists(output_stl):
-                    print(f"[CadAgent DEBUG] [file] '{output_stl}' found.")
-                    with open(output_stl, "rb") as f:
-                        stl_data = f.read()
-                        
-                    import base64
-                    b64_stl = base64.b64encode(stl_data).decode('utf-8')
-                    
-                    return {
-                        "format": "stl",
-                        "data": b64_stl,
-                        "file_path": output_stl
-                    }
+                if cad_data:
+                    if cache_key is not None:
+                        await asyncio.to_thread(self.cache.put_script, cache_key, code)
+                    return cad_data
                 else:
                      print(f"[CadAgent DEBUG] [ERR] '{output_stl}' was not generated.")
                      # If script ran but no output, treat as failure and retry?
@@ -238,6 +337,7 @@ Original request: {prompt}
             traceback.print_exc()
             return None
 
+    @_track_cad("iterate")
     async def iterate_prototype(self, prompt: str, output_dir: Optional[str] = None):
         """
         Iterates on the existing design by reading 'current_design.py' and applying changes.
@@ -283,10 +383,16 @@ Original request: {prompt}
             )
         else:
              print("[CadAgent DEBUG] [WARN] No existing script found. Falling back to fresh generation.")
-             return await self.generate_prototype(prompt)
+             return await self._generate(prompt, output_dir)
 
         try:
 
+            # Same change to the same design as before: reuse its script (and mesh) without asking the model
+            cache_key = self._cache_key("iterate", prompt, existing_code)
+            cad_data = await self._build_cached(cache_key, script_path, output_stl, work_dir)
+            if cad_data:
+                return cad_data
+
             max_retries = 3
             current_prompt = f"""
 You are iterating on an existing 3D model script.
@@ -304,6 +410,7 @@ Ensure you still export to 'output.stl'.
             
             for attempt in range(max_retries):
                 print(f"[CadAgent DEBUG] Iteration Attempt {attempt + 1}/{max_retries}")
+                CAD_ATTEMPTS.labels(mode="iterate").inc()
                 
                 # Emit status update
                 if self.on_status:
@@ -316,28 +423,7 @@ Ensure you still export to 'output.stl'.
                     self.on_status(status_info)
                 
                 # 1. Ask Gemini for the code with streaming and thinking
-                raw_content = ""
-                stream = await self.client.aio.models.generate_content_stream(
-                    model=self.model,
-                    contents=current_prompt,
-                    config=types.GenerateContentConfig(
-                        system_instruction=self.system_instruction,
-                        temperature=1.0,
-                        thinking_config=types.ThinkingConfig(include_thoughts=True)
-                    )
-                )
-                async for chunk in stream:
-                    if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
-                        for part in chunk.candidates[0].content.parts:
-                            if not part.text:
-                                continue
-                            elif part.thought:
-                                # Stream thought to callback
-                                if self.on_thought:
-                                    self.on_thought(part.text)
-                            else:
-                                # Accumulate answer text
-                                raw_content += part.text
+                raw_content = await self._stream_code(current_prompt)
                 
                 if not raw_content:
                     print("[CadAgent DEBUG] [ERR] Empty response from model.")
@@ -357,38 +443,10 @@ Ensure you still export to 'output.stl'.
                         print("[CadAgent DEBUG] [ERR] Could not extract python code.")
                         return None
                 
-                # 3. Save to Local File in cad_outputs folder
+                # 3-4. Save to Local File in cad_outputs folder and execute it (skipped on a mesh cache hit)
                 # Overwrite the script so the next iteration builds on this one
-                
-                # Fix for Windows paths in python strings: escape backslashes
-                safe_output_path = output_stl.replace("\\", "\\\\")
-                
-                with open(script_path, "w") as f:
-                    # Inject output path into the script
-                    code_with_path = code.replace("output.stl", safe_output_path)
-                    f.write(code_with_path)
-                    
-                print(f"[CadAgent DEBUG] [EXEC] Running local script: {script_path}")
-                
-                # 4. Execute Locally
-                import subprocess
-                import sys
-                
-                # Use asyncio.to_thread for Windows compatibility (asyncio.create_subprocess_exec
-                # throws NotImplementedError on Windows with certain event loop policies)
-                try:
-                    proc = await asyncio.to_thread(
-                        subprocess.run,
-                        [sys.executable, script_path],
-                        capture_output=True,
-                        text=True
-                    )
-                    stdout, stderr = proc.stdout, proc.stderr
-                except Exception as e:
-                    print(f"[CadAgent DEBUG] [ERR] Subprocess run failed: {e}")
-                    proc = type('obj', (object,), {'returncode': 1})()
-                    stdout = ""
-                    stderr = str(e)
+                proc, cad_data = await self._build(code, script_path, output_stl, work_dir)
+                stdout, stderr = proc.stdout, proc.stderr
                 
                 if proc.returncode != 0:
                     error_msg = stderr
@@ -407,19 +465,10 @@ Ensure you still export to 'output.stl'.
                 print(f"[CadAgent DEBUG] [OK] Script executed successfully.")
                 
                 # 5. Read Output
-                if os.path.exists(output_stl):
-                    print(f"[CadAgent DEBUG] [file] '{output_stl}' found.")
-                    with open(output_stl, "rb") as f:
-                        stl_data = f.read()
-                        
-                    import base64
-                    b64_stl = base64.b64encode(stl_data).decode('utf-8')
-                    
-                    return {
-                        "format": "stl",
-                        "data": b64_stl,
-                        "file_path": output_stl
-                    }
+                if cad_data:
+                    if cache_key is not None:
+                        await asyncio.to_thread(self.cache.put_script, cache_key, code)
+                    return cad_data
                 else:
                      print(f"[CadAgent DEBUG] [ERR] '{output_stl}' was not generated.")
                      current_prompt = f"The script executed successfully but '{output_stl}' was not found. Ensure you call `export_stl(result_part, 'output.stl')` at the end."
@@ -0,0 +1,236 @@
+"""
+Content-addressed cache for CAD scripts and the meshes they produce.
+
+Asking for the same model twice used to repeat the whole pipeline: a
+model call with thinking, then a build123d run. Repeat requests like
+"a 20mm calibration cube" are common. There are now two levels, both on
+disk so they survive restarts:
+
+- scripts: a request maps to the script that last built it successfully.
+  The key is the normalized prompt (case, whitespace and trailing
+  punctuation ignored) + mode + model + a hash of the system
+  instruction. Iterations also include a hash of the design being
+  changed, since "make it taller" means something different for every
+  design. A hit skips the model call.
+- meshes: a script maps to its STL bytes. The key is the script with the
+  'output.stl' placeholder + the installed build123d version. A hit skips
+  the execution. This also covers the model returning a script that
+  already ran.
+
+A hit on both levels returns without any model call or script run.
+
+Each level is a directory of files named by key. The least recently used
+entries are evicted once a level goes over its bounds. Use is tracked by
+file mtime, so the order survives restarts. Writes go through a temporary
+file and os.replace, so a crash can't leave a half-written entry.
+Methods block on disk I/O; CadAgent calls them through asyncio.to_thread.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+import metrics
+
+CAD_CACHE_LOOKUPS = metrics.counter("sara_cad_cache_lookups_total", "CAD cache lookups", ["level", "result"])
+CAD_CACHE_BYTES = metrics.gauge("sara_cad_cache_bytes", "Bytes stored per CAD cache level", ["level"])
+
+KEY_VERSION = "1"  # Bump to invalidate every key if the key recipe changes
+
+
+def _sha256(text) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _package_version(name) -> str:
+    try:
+        return metadata.version(name)
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def normalize_prompt(prompt) -> str:
+    return " ".join(prompt.lower().split()).rstrip(".!?")
+
+
+class DiskLRU:
+    """Files named by key under `root`, least recently used evicted first once over max_bytes/max_entries."""
+
+    def __init__(self, root, suffix, max_bytes=None, max_entries=None):
+        self.root = root
+        self.suffix = suffix
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> size, least recently used first
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._load()
+
+    def _path(self, key) -> str:
+        return os.path.join(self.root, key + self.suffix)
+
+    def _load(self):
+        found = []
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            if name.endswith(".tmp"):
+                # Left by a crash mid-write
+                self._remove(path)
+            elif name.endswith(self.suffix):
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                found.append((stat.st_mtime, name[:-len(self.suffix)], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self.bytes += size
+        self._evict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key):
+        """The stored bytes, or None. A hit makes the entry most recently used."""
+        with self._lock:
+            if key not in self._entries:
+                return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)
+        except OSError:
+            self.discard(key)
+            return None
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return data
+
+    def put(self, key, data: bytes):
+        if self.max_bytes and len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        staged = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(staged, "wb") as f:
+            f.write(data)
+        os.replace(staged, path)
+        with self._lock:
+            self.bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def discard(self, key):
+        with self._lock:
+            size = self._entries.pop(key, None)
+            if size is not None:
+                self.bytes -= size
+        self._remove(self._path(key))
+
+    def _evict(self):
+        while self._entries and ((self.max_bytes and self.bytes > self.max_bytes)
+                                 or (self.max_entries and len(self._entries) > self.max_entries)):
+            key, size = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+            self._remove(self._path(key))
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+        }
+
+
+class CadCache:
+    """Prompt -> script and script -> STL caches under one directory."""
+
+    def __init__(self, root, max_mesh_bytes=256 * 1024 * 1024, max_scripts=2000):
+        self.root = root
+        self.scripts = DiskLRU(os.path.join(root, "scripts"), ".py", max_entries=max_scripts)
+        self.meshes = DiskLRU(os.path.join(root, "meshes"), ".stl", max_bytes=max_mesh_bytes)
+        self.build123d_version = _package_version("build123d")
+        self.hits = {"script": 0, "mesh": 0}
+        self.misses = {"script": 0, "mesh": 0}
+        self._update_gauges()
+
+    def prompt_key(self, mode, prompt, model, system_instruction, base_script=None) -> str:
+        parts = [KEY_VERSION, mode, normalize_prompt(prompt), model, _sha256(system_instruction),
+                 _sha256(base_script.strip()) if base_script else ""]
+        return _sha256("\0".join(parts))
+
+    def mesh_key(self, script) -> str:
+        return _sha256("\0".join([KEY_VERSION, self.build123d_version, script.strip()]))
+
+    def _count(self, level, hit):
+        (self.hits if hit else self.misses)[level] += 1
+        CAD_CACHE_LOOKUPS.labels(level=level, result="hit" if hit else "miss").inc()
+
+    def _update_gauges(self):
+        CAD_CACHE_BYTES.labels(level="script").set(self.scripts.bytes)
+        CAD_CACHE_BYTES.labels(level="mesh").set(self.meshes.bytes)
+
+    def get_script(self, key):
+        data = self.scripts.get(key)
+        self._count("script", data is not None)
+        return data.decode("utf-8") if data is not None else None
+
+    def put_script(self, key, script):
+        self.scripts.put(key, script.encode("utf-8"))
+        self._update_gauges()
+
+    def forget_script(self, key):
+        self.scripts.discard(key)
+        self._update_gauges()
+
+    def get_mesh(self, script):
+        data = self.meshes.get(self.mesh_key(script))
+        self._count("mesh", data is not None)
+        return data
+
+    def put_mesh(self, script, stl_data: bytes):
+        self.meshes.put(self.mesh_key(script), stl_data)
+        self._update_gauges()
+
+    def stats(self) -> dict:
+        return {
+            "root": self.root,
+            "build123d": self.build123d_version,
+            "hits": dict(self.hits),
+            "misses": dict(self.misses),
+            "scripts": self.scripts.stats(),
+            "meshes": self.meshes.stats(),
+        }
+
+
+_caches = {}
+
+
+def shared_cache(root, max_mesh_bytes=256 * 1024 * 1024, max_scripts=2000) -> CadCache:
+    """One CadCache per directory for the whole process (sessions share it)."""
+    root = os.path.abspath(root)
+    if root not in _caches:
+        _caches[root] = CadCache(root, max_mesh_bytes=max_mesh_bytes, max_scripts=max_scripts)
+    return _caches[root]
+
+
+def open_caches() -> dict:
+    return dict(_caches)
@@ -0,0 +1,242 @@
+"""
+CAD job scheduler: one job per generate/iterate request, each in its own workspace.
+
+Both CAD paths used to write the project's `cad/current_design.py` in
+place. A voice `generate_cad` overlapping an `iterate_cad` event clobbered
+each other's script, and could return the other request's STL.
+
+Now every request is a CadJob:
+
+- Each job has an ID and runs in `cad/.jobs/<id>/`. An iterate job copies
+  the current design into its workspace when it starts, not when it is
+  queued, so it builds on whatever finished before it.
+- At most `max_concurrent` jobs run at once. Waiting jobs run highest
+  priority first, FIFO within a priority.
+- A job's result becomes the current design only when it succeeds. Its
+  STL is moved next to the other designs and its script replaces
+  `cad/current_design.py`, with the absolute output path turned back
+  into 'output.stl'. If two jobs finish, the later one wins.
+- The workspace is deleted when the job ends, whatever the outcome.
+- Every status change (queued, running, done, failed, cancelled) is
+  reported through `on_event`. The server forwards it to the session as
+  `cad_job`.
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import shutil
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+
+import metrics
+from cad_workers import CadJobCancelled
+
+CAD_JOBS = metrics.counter("sara_cad_jobs_total", "CAD jobs by mode and final status", ["mode", "status"])
+CAD_JOB_WAIT_SECONDS = metrics.histogram(
+    "sara_cad_job_wait_seconds", "Time CAD jobs spent queued before running",
+    buckets=(0.1, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0),
+)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+DESIGN_SCRIPT = "current_design.py"
+JOBS_DIR = ".jobs"
+
+
+@dataclass
+class CadJob:
+    """One generate/iterate request and where it stands."""
+    mode: str
+    prompt: str
+    cad_dir: str
+    priority: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.monotonic)
+    started_at: float = None
+    finished_at: float = None
+    error: str = None
+    future: asyncio.Future = None
+    task: asyncio.Task = None
+
+    @property
+    def workspace(self) -> str:
+        return os.path.join(self.cad_dir, JOBS_DIR, self.id)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    def to_dict(self) -> dict:
+        now = time.monotonic()
+        queued_until = self.started_at or self.finished_at or now
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "prompt": self.prompt,
+            "priority": self.priority,
+            "status": self.status,
+            "queued_s": round(queued_until - self.submitted_at, 2),
+            "run_s": round((self.finished_at or now) - self.started_at, 2) if self.started_at else None,
+            "error": self.error,
+        }
+
+
+class CadJobScheduler:
+    """Runs CAD jobs, at most `max_concurrent` at a time; highest priority first, FIFO within a priority."""
+
+    def __init__(self, run_job, max_concurrent: int = 2, on_event=None, history: int = 20):
+        self.run_job = run_job  # async (job) -> result dict or None; must write into job.workspace
+        self.max_concurrent = max(1, max_concurrent)
+        self.on_event = on_event
+        self._queue = []  # (-priority, seq, job)
+        self._seq = itertools.count()
+        self._jobs = {}  # queued and running, by id
+        self._recent = deque(maxlen=history)
+
+    @property
+    def running(self) -> list:
+        return [job for job in self._jobs.values() if job.status == RUNNING]
+
+    @property
+    def queued(self) -> list:
+        return [job for _, _, job in sorted(self._queue) if job.status == QUEUED]
+
+    def submit(self, mode, prompt, cad_dir, priority: int = 0) -> CadJob:
+        """Queues a job; await `job.future` for its result (CadJobCancelled if it is cancelled)."""
+        job = CadJob(mode=mode, prompt=prompt, cad_dir=cad_dir, priority=priority)
+        job.future = asyncio.get_running_loop().create_future()
+        # Nobody may await a fire-and-forget job; don't warn about its unretrieved exception
+        job.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._jobs[job.id] = job
+        heapq.heappush(self._queue, (-priority, next(self._seq), job))
+        print(f"[CadJobs] Queued {mode} job {job.id} (priority {priority}): '{prompt}'")
+        self._emit(job)
+        self._pump()
+        return job
+
+    async def run(self, mode, prompt, cad_dir, priority: int = 0):
+        """Submits a job and waits for it. Cancelling the caller cancels the job."""
+        job = self.submit(mode, prompt, cad_dir, priority)
+        try:
+            return await asyncio.shield(job.future)
+        except asyncio.CancelledError:
+            self.cancel(job.id)
+            raise
+
+    def cancel(self, job_id=None) -> int:
+        """Cancels one job, or every queued and running job. Returns how many were cancelled."""
+        jobs = [self._jobs[job_id]] if job_id in self._jobs else [] if job_id else list(self._jobs.values())
+        for job in jobs:
+            if job.status == QUEUED:
+                # Left in the heap; _pump skips it
+                self._finish(job, CANCELLED)
+                job.future.set_exception(CadJobCancelled(f"CAD job {job.id} cancelled"))
+            elif job.task is not None:
+                job.task.cancel()
+        return len(jobs)
+
+    def _pump(self):
+        while self._queue and len(self.running) < self.max_concurrent:
+            _, _, job = heapq.heappop(self._queue)
+            if job.status != QUEUED:
+                continue
+            job.status = RUNNING
+            job.started_at = time.monotonic()
+            CAD_JOB_WAIT_SECONDS.observe(job.started_at - job.submitted_at)
+            print(f"[CadJobs] Running {job.mode} job {job.id} in {job.workspace}")
+            self._emit(job)
+            job.task = asyncio.create_task(self._run(job), name=f"cad-job-{job.id}")
+            job.task.add_done_callback(lambda task, job=job: self._task_done(job))
+
+    def _task_done(self, job):
+        # A task cancelled before its first step never enters _run
+        if not job.finished:
+            self._finish(job, CANCELLED)
+            job.future.set_exception(CadJobCancelled(f"CAD job {job.id} cancelled"))
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            self._pump()
+
+    async def _run(self, job):
+        try:
+            self._prepare(job)
+            result = await self.run_job(job)
+            if result:
+                self._promote(job, result)
+                self._finish(job, DONE)
+            else:
+                self._finish(job, FAILED, "The CAD agent could not produce a model")
+            job.future.set_result(result)
+        except (asyncio.CancelledError, CadJobCancelled):
+            self._finish(job, CANCELLED)
+            job.future.set_exception(CadJobCancelled(f"CAD job {job.id} cancelled"))
+        except Exception as e:
+            print(f"[CadJobs] [ERR] Job {job.id} failed: {e}")
+            self._finish(job, FAILED, str(e))
+            job.future.set_exception(e)
+        finally:
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            self._pump()
+
+    def _prepare(self, job):
+        os.makedirs(job.workspace, exist_ok=True)
+        base = os.path.join(job.cad_dir, DESIGN_SCRIPT)
+        if job.mode == "iterate" and os.path.exists(base):
+            shutil.copy2(base, os.path.join(job.workspace, DESIGN_SCRIPT))
+
+    def _promote(self, job, result):
+        """Makes a finished job's STL and script the project's current design."""
+        stl = result.get("file_path")
+        if stl and os.path.exists(stl):
+            name, ext = os.path.splitext(os.path.basename(stl))
+            dest = os.path.join(job.cad_dir, name + ext)
+            if os.path.exists(dest):
+                dest = os.path.join(job.cad_dir, f"{name}_{job.id}{ext}")
+            os.replace(stl, dest)
+            result["file_path"] = dest
+
+        script = os.path.join(job.workspace, DESIGN_SCRIPT)
+        if os.path.exists(script):
+            with open(script, "r") as f:
+                code = f.read()
+            if stl:
+                # CadAgent injected the escaped absolute path in place of 'output.stl'
+                code = code.replace(stl.replace("\\", "\\\\"), "output.stl")
+            staged = os.path.join(job.workspace, DESIGN_SCRIPT + ".promote")
+            with open(staged, "w") as f:
+                f.write(code)
+            os.replace(staged, os.path.join(job.cad_dir, DESIGN_SCRIPT))
+        print(f"[CadJobs] Job {job.id} is now the current design ({result.get('file_path')})")
+
+    def _finish(self, job, status, error=None):
+        job.status = status
+        job.error = error
+        job.finished_at = time.monotonic()
+        self._jobs.pop(job.id, None)
+        self._recent.append(job)
+        CAD_JOBS.labels(mode=job.mode, status=status).inc()
+        print(f"[CadJobs] Job {job.id} {status}" + (f": {error}" if error else ""))
+        self._emit(job)
+
+    def _emit(self, job):
+        if self.on_event:
+            try:
+                self.on_event(job.to_dict())
+            except Exception as e:
+                print(f"[CadJobs] [ERR] Event callback failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "running": [job.to_dict() for job in self.running],
+            "queued": [job.to_dict() for job in self.queued],
+            "recent": [job.to_dict() for job in reversed(self._recent)],
+        }
@@ -0,0 +1,570 @@
+"""
+Warm worker processes for CadAgent script execution.
+
+Every CAD attempt used to run `sys.executable current_design.py` in a fresh
+process. Each of those processes imported build123d/OCP again, which takes
+seconds, just to run a few lines of geometry. That happened up to 3 times
+per request.
+
+CadWorkerPool keeps `size` worker processes alive with build123d already
+imported. A worker is this file run as a script, so no server module is
+re-imported; multiprocessing's spawn mode would re-run server.py as
+__mp_main__. The pool and a worker talk in JSON lines over the worker's
+stdin/stdout:
+
+    worker -> {"ready": true, "pid": ..., "import_seconds": ..., "errors": {...}}
+    pool   -> {"script": "/abs/current_design.py", "cwd": "/abs/project/cad"}
+    worker -> {"returncode": 0, "stdout": "...", "stderr": "...", "seconds": ...}
+
+Each job is isolated the way a fresh `python script.py` run would be:
+
+- a new __main__ namespace;
+- cwd, sys.argv and sys.path[0] set for the script, restored afterwards;
+- stdout/stderr captured, including native output from OCCT on fds 1/2;
+- SystemExit mapped to a return code;
+- the traceback formatted like the interpreter does.
+
+A worker is replaced after `max_jobs_per_worker` jobs, to bound any state
+leaking through modules, and immediately if it crashes (e.g. a segfault
+in OCP).
+
+ScriptLimits bound a runaway loft or boolean:
+
+- The wall-clock timeout is enforced by the parent. On expiry it kills
+  the worker's whole process group (each worker runs in its own session)
+  and starts a replacement.
+- RLIMIT_CPU and RLIMIT_AS are set around each job inside the worker.
+  RLIMIT_CPU counts the worker's lifetime CPU time, so the soft limit is
+  what the worker has used so far plus the budget. RLIMIT_AS is the
+  current address space (OCP alone maps hundreds of MB) plus the budget.
+  Going over the CPU limit kills the worker with SIGXCPU. Going over the
+  memory limit raises MemoryError inside the script.
+- Cancelling run_script() (CadJobScheduler.cancel, the `cancel_cad` event) kills
+  the process group the same way.
+
+RLIMITs need the POSIX `resource` module. On Windows only the timeout
+and cancellation apply.
+
+run_script_subprocess() is the old one-process-per-script path. It is
+used when the pool is disabled (cad_worker_pool = 0), and while no worker
+is alive because none could be started. A failed spawn is retried with
+backoff, and the pool is used again as soon as a worker is up.
+"""
+
+import asyncio
+import builtins
+import gc
+import io
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from dataclasses import dataclass
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import metrics
+
+CAD_SCRIPT_SECONDS = metrics.histogram(
+    "sara_cad_script_seconds", "Time to run one generated CAD script", ["runner"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+CAD_WORKER_RESTARTS = metrics.counter("sara_cad_worker_restarts_total", "CAD worker replacements", ["reason"])
+
+WORKER_SCRIPT = os.path.abspath(__file__)
+DEFAULT_PRELOAD = ("build123d",)
+SPAWN_RETRY_MIN = 1.0  # Seconds before retrying a failed worker spawn; doubles per failure
+SPAWN_RETRY_MAX = 60.0
+
+
+@dataclass
+class ScriptLimits:
+    """Per-script budgets; None or 0 disables a limit."""
+    timeout: float = 60.0
+    cpu_seconds: int = 120
+    memory_mb: int = 4096
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            timeout=settings.get("cad_script_timeout_s", 60),
+            cpu_seconds=settings.get("cad_script_cpu_s", 120),
+            memory_mb=settings.get("cad_script_memory_mb", 4096),
+        )
+
+
+@dataclass
+class ScriptResult:
+    """Outcome of running one CAD script (mirrors subprocess.CompletedProcess)."""
+    returncode: int
+    stdout: str = ""
+    stderr: str = ""
+    seconds: float = 0.0
+    worker_pid: int = None
+    crashed: bool = False
+    timed_out: bool = False
+
+
+class CadJobCancelled(Exception):
+    """Raised by CadJobScheduler when a CAD job is cancelled on request (not by task shutdown)."""
+
+
+def _new_session_kwargs() -> dict:
+    """Popen arguments that put the child in its own process group, so a kill reaches anything it started."""
+    if os.name == "nt":
+        return {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    return {"start_new_session": True}
+
+
+def _kill_group(proc):
+    if proc.poll() is not None:
+        return
+    try:
+        if os.name == "nt":
+            proc.kill()
+        else:
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, OSError):
+        pass
+
+
+def _timeout_message(limits) -> str:
+    return f"TimeoutError: the script ran longer than {limits.timeout:g} s and was stopped. Use simpler geometry."
+
+
+def _describe_exit(returncode) -> str:
+    sigxcpu = getattr(signal, "SIGXCPU", None)
+    if sigxcpu is not None and returncode in (-sigxcpu, -signal.SIGKILL):
+        return "the script exceeded its CPU time limit (or was killed)"
+    return f"exit code {returncode}"
+
+
+def _set_limits(cpu_seconds, memory_mb, fresh=False):
+    """Lowers the soft RLIMIT_CPU/RLIMIT_AS; returns the previous soft limits for _restore_limits."""
+    if resource is None:
+        return {}
+    saved = {}
+    budgets = []
+    if cpu_seconds:
+        used = 0
+        if not fresh:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            used = usage.ru_utime + usage.ru_stime
+        budgets.append((resource.RLIMIT_CPU, int(used + cpu_seconds) + 1))
+    if memory_mb and hasattr(resource, "RLIMIT_AS"):
+        budgets.append((resource.RLIMIT_AS, (0 if fresh else _address_space()) + memory_mb * 1024 * 1024))
+    for limit, soft in budgets:
+        old_soft, hard = resource.getrlimit(limit)
+        if hard != resource.RLIM_INFINITY:
+            soft = min(soft, hard)
+        try:
+            resource.setrlimit(limit, (soft, hard))
+            saved[limit] = old_soft
+        except (ValueError, OSError):
+            pass
+    return saved
+
+
+def _restore_limits(saved):
+    for limit, soft in saved.items():
+        resource.setrlimit(limit, (soft, resource.getrlimit(limit)[1]))
+
+
+def _address_space() -> int:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[0]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _spawn_isolated(script_path, cwd, limits) -> subprocess.Popen:
+    """One fresh interpreter for the script, in its own process group and under the RLIMITs."""
+    preexec = None
+    if resource is not None:
+        # Applied in the child before exec, so they cover build123d's import too
+        def preexec():
+            _set_limits(limits.cpu_seconds, limits.memory_mb, fresh=True)
+    return subprocess.Popen(
+        [sys.executable, script_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=cwd,
+        preexec_fn=preexec,
+        **_new_session_kwargs(),
+    )
+
+
+def _communicate(proc, timeout):
+    """Blocking: (stdout, stderr, timed_out). On timeout the process group is killed."""
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout or None)
+        return stdout, stderr, False
+    except subprocess.TimeoutExpired:
+        _kill_group(proc)
+        stdout, stderr = proc.communicate()
+        return stdout, stderr, True
+
+
+async def run_script_subprocess(script_path, cwd=None, limits=None) -> ScriptResult:
+    """Runs the script in a fresh interpreter (cold build123d import every time)."""
+    limits = limits or ScriptLimits()
+    started = time.perf_counter()
+    proc = None
+    # asyncio.create_subprocess_exec raises NotImplementedError on Windows with some loop policies
+    try:
+        proc = await asyncio.to_thread(_spawn_isolated, script_path, cwd, limits)
+        stdout, stderr, timed_out = await asyncio.to_thread(_communicate, proc, limits.timeout)
+        if timed_out:
+            stderr = (stderr or "") + _timeout_message(limits)
+        result = ScriptResult(proc.returncode, stdout, stderr, time.perf_counter() - started, timed_out=timed_out)
+    except asyncio.CancelledError:
+        # The thread in communicate() returns once the group is gone
+        if proc is not None:
+            _kill_group(proc)
+        raise
+    except Exception as e:
+        print(f"[CadAgent DEBUG] [ERR] Subprocess run failed: {e}")
+        result = ScriptResult(1, "", str(e), time.perf_counter() - started)
+    CAD_SCRIPT_SECONDS.labels(runner="subprocess").observe(result.seconds)
+    return result
+
+
+class WorkerCrashed(RuntimeError):
+    def __init__(self, returncode):
+        super().__init__(f"CAD worker exited unexpectedly (exit code {returncode})")
+        self.returncode = returncode
+
+
+class _Worker:
+    """Parent-side handle of one worker process. Its methods block; call them from a thread."""
+
+    def __init__(self, python, preload):
+        self.proc = subprocess.Popen(
+            [python, "-u", WORKER_SCRIPT, *preload],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+            **_new_session_kwargs(),
+        )
+        self.pid = self.proc.pid
+        self.jobs = 0
+        self.ready = None
+        self.kill_reason = None
+
+    @property
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def _read(self) -> dict:
+        line = self.proc.stdout.readline()
+        if not line:
+            raise WorkerCrashed(self.proc.wait())
+        return json.loads(line)
+
+    def wait_ready(self) -> dict:
+        if self.ready is None:
+            self.ready = self._read()
+        return self.ready
+
+    def execute(self, job) -> dict:
+        self.wait_ready()
+        try:
+            self.proc.stdin.write(json.dumps(job) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            raise WorkerCrashed(self.proc.wait())
+        return self._read()
+
+    def kill(self, reason):
+        """Kills the worker's process group; a blocked execute() then raises WorkerCrashed. Safe from any thread."""
+        self.kill_reason = reason
+        _kill_group(self.proc)
+
+    def close(self, timeout: float = 5.0):
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.proc.wait(timeout)
+        except subprocess.TimeoutExpired:
+            _kill_group(self.proc)
+            self.proc.wait()
+
+
+class CadWorkerPool:
+    """Pre-warmed build123d worker processes, one script at a time each."""
+
+    def __init__(self, size: int = 2, max_jobs_per_worker: int = 25, limits=None, preload=DEFAULT_PRELOAD,
+                 python=None):
+        self.size = max(1, size)
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.limits = limits or ScriptLimits()
+        self.preload = tuple(preload)
+        self.python = python or sys.executable
+        self._idle = None
+        self._workers = set()
+        self._started = False
+        self.broken = None  # Last spawn error while no worker is alive; scripts then run one process each
+        self._spawn_backoff = SPAWN_RETRY_MIN
+        self.spawn_failures = 0
+        self._retries = set()
+
+        self.jobs = 0
+        self.crashes = 0
+        self.recycled = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.job_seconds = 0.0
+        self.last_import_seconds = None
+
+    def start(self):
+        """Spawns the workers in the background (call from the event loop). Safe to call repeatedly."""
+        if self._started:
+            return
+        self._started = True
+        self._idle = asyncio.Queue()
+        for _ in range(self.size):
+            asyncio.create_task(self._add_worker())
+
+    async def _add_worker(self):
+        try:
+            worker = await asyncio.to_thread(self._spawn)
+        except Exception as e:
+            self.spawn_failures += 1
+            delay, self._spawn_backoff = self._spawn_backoff, min(self._spawn_backoff * 2, SPAWN_RETRY_MAX)
+            if not self._workers:
+                print(f"[CadAgent DEBUG] [ERR] Could not start a CAD worker: {e}. "
+                      f"Running one process per script until a worker starts (retry in {delay:g}s).")
+                self.broken = str(e)
+                # Wake anyone waiting for a worker; they fall back to run_script_subprocess
+                self._idle.put_nowait(None)
+            else:
+                print(f"[CadAgent DEBUG] [ERR] Could not start a replacement CAD worker: {e} (retry in {delay:g}s).")
+            retry = asyncio.create_task(self._add_worker_later(delay))
+            self._retries.add(retry)
+            retry.add_done_callback(self._retries.discard)
+            return
+        if not self._started:
+            # Closed while it was starting
+            await asyncio.to_thread(worker.close)
+            return
+        self.broken = None
+        self._spawn_backoff = SPAWN_RETRY_MIN
+        self._workers.add(worker)
+        self._idle.put_nowait(worker)
+
+    async def _add_worker_later(self, delay):
+        await asyncio.sleep(delay)
+        if self._started:
+            await self._add_worker()
+
+    def _spawn(self) -> _Worker:
+        worker = _Worker(self.python, self.preload)
+        ready = worker.wait_ready()
+        self.last_import_seconds = ready.get("import_seconds")
+        for name, error in ready.get("errors", {}).items():
+            print(f"[CadAgent DEBUG] [WARN] CAD worker could not preload {name}: {error}")
+        print(f"[CadAgent DEBUG] CAD worker {worker.pid} warm (imports took {ready.get('import_seconds', 0):.2f}s).")
+        return worker
+
+    def _retire(self, worker):
+        self._workers.discard(worker)
+        asyncio.create_task(asyncio.to_thread(worker.close))
+        asyncio.create_task(self._add_worker())
+
+    async def _execute(self, worker, job) -> ScriptResult:
+        crashed = False
+        try:
+            reply = await asyncio.to_thread(worker.execute, job)
+            return ScriptResult(reply["returncode"], reply.get("stdout", ""), reply.get("stderr", ""),
+                                reply.get("seconds", 0.0), worker.pid)
+        except WorkerCrashed as e:
+            crashed = True
+            returncode = e.returncode if e.returncode else 1
+            if worker.kill_reason == "timeout":
+                self.timeouts += 1
+                print(f"[CadAgent DEBUG] [ERR] CAD script timed out after {self.limits.timeout:g}s; killed worker {worker.pid}.")
+                return ScriptResult(returncode, "", _timeout_message(self.limits), self.limits.timeout, worker.pid,
+                                    timed_out=True)
+            if worker.kill_reason == "cancelled":
+                self.cancelled += 1
+                return ScriptResult(returncode, "", "Cancelled", 0.0, worker.pid)
+            self.crashes += 1
+            message = f"CAD worker crashed: {_describe_exit(returncode)}"
+            print(f"[CadAgent DEBUG] [ERR] CAD worker {worker.pid} crashed: {_describe_exit(returncode)}")
+            return ScriptResult(returncode, "", message, 0.0, worker.pid, crashed=True)
+        finally:
+            worker.jobs += 1
+            self.jobs += 1
+            if crashed or not worker.alive:
+                CAD_WORKER_RESTARTS.labels(reason=worker.kill_reason or "crash").inc()
+                self._retire(worker)
+            elif worker.jobs >= self.max_jobs_per_worker:
+                self.recycled += 1
+                CAD_WORKER_RESTARTS.labels(reason="recycle").inc()
+                self._retire(worker)
+            else:
+                self._idle.put_nowait(worker)
+
+    async def run_script(self, script_path, cwd=None) -> ScriptResult:
+        """Runs a script file on a warm worker and returns its result. Cancelling kills the worker."""
+        if self.broken:
+            return await run_script_subprocess(script_path, cwd, self.limits)
+        self.start()
+        worker = await self._idle.get()
+        while worker is None:
+            if not self._workers:
+                # Still no worker alive: pass the wake-up on and run this script in its own process
+                self._idle.put_nowait(None)
+                return await run_script_subprocess(script_path, cwd, self.limits)
+            # Left over from when no worker was alive; live workers come back to the queue
+            worker = await self._idle.get()
+        job = {
+            "script": os.path.abspath(script_path),
+            "cwd": os.path.abspath(cwd) if cwd else None,
+            "cpu_seconds": self.limits.cpu_seconds,
+            "memory_mb": self.limits.memory_mb,
+        }
+        # The blocking read can't be interrupted; killing the worker ends it, then _execute retires the worker
+        execution = asyncio.ensure_future(self._execute(worker, job))
+        try:
+            result = await asyncio.wait_for(asyncio.shield(execution), self.limits.timeout or None)
+        except asyncio.TimeoutError:
+            worker.kill("timeout")
+            result = await execution
+        except asyncio.CancelledError:
+            worker.kill("cancelled")
+            raise
+        self.job_seconds += result.seconds
+        CAD_SCRIPT_SECONDS.labels(runner="pool").observe(result.seconds)
+        return result
+
+    async def close(self):
+        for retry in list(self._retries):
+            retry.cancel()
+        workers, self._workers = list(self._workers), set()
+        await asyncio.gather(*(asyncio.to_thread(worker.close) for worker in workers))
+        self._started = False
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size,
+            "workers": len(self._workers),
+            "idle": self._idle.qsize() if self._idle else 0,
+            "jobs": self.jobs,
+            "crashes": self.crashes,
+            "recycled": self.recycled,
+            "timeouts": self.timeouts,
+            "cancelled": self.cancelled,
+            "avg_job_ms": round(self.job_seconds / self.jobs * 1000.0, 1) if self.jobs else None,
+            "import_seconds": self.last_import_seconds,
+            "broken": self.broken,
+            "spawn_failures": self.spawn_failures,
+        }
+
+
+_shared_pool = None
+
+
+def shared_pool(size: int = 2, max_jobs_per_worker: int = 25, limits=None) -> CadWorkerPool:
+    """The process-wide pool (created on first call; later calls return the same pool)."""
+    global _shared_pool
+    if _shared_pool is None:
+        _shared_pool = CadWorkerPool(size=size, max_jobs_per_worker=max_jobs_per_worker, limits=limits)
+    return _shared_pool
+
+
+# --- Worker process side ---
+
+def _run_job(job) -> dict:
+    path = job["script"]
+    cwd = job.get("cwd") or os.path.dirname(path)
+    out, err = io.StringIO(), io.StringIO()
+    saved_cwd, saved_argv, saved_path = os.getcwd(), list(sys.argv), list(sys.path)
+    saved_streams = sys.stdout, sys.stderr
+    # Native output (OCCT messages) goes straight to fds 1/2
+    native = tempfile.TemporaryFile()
+    saved_fds = os.dup(1), os.dup(2)
+    os.dup2(native.fileno(), 1)
+    os.dup2(native.fileno(), 2)
+    namespace = {"__name__": "__main__", "__file__": path, "__builtins__": builtins}
+    returncode = 0
+    saved_limits = _set_limits(job.get("cpu_seconds"), job.get("memory_mb"))
+    started = time.perf_counter()
+    try:
+        os.chdir(cwd)
+        sys.argv = [path]
+        sys.path.insert(0, os.path.dirname(path))
+        sys.stdout, sys.stderr = out, err
+        with open(path, encoding="utf-8") as f:
+            code = compile(f.read(), path, "exec")
+        exec(code, namespace)
+    except SystemExit as e:
+        if e.code is None or isinstance(e.code, int):
+            returncode = e.code or 0
+        else:
+            print(e.code, file=err)
+            returncode = 1
+    except BaseException as e:
+        # Like the interpreter: only the script's frames, not this function's
+        tb = e.__traceback__.tb_next if e.__traceback__ else None
+        err.write("".join(traceback.format_exception(type(e), e, tb)))
+        returncode = 1
+    finally:
+        seconds = time.perf_counter() - started
+        _restore_limits(saved_limits)
+        sys.stdout, sys.stderr = saved_streams
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        for fd in saved_fds:
+            os.close(fd)
+        os.chdir(saved_cwd)
+        sys.argv, sys.path[:] = saved_argv, saved_path
+        namespace.clear()
+        gc.collect()
+    native.seek(0)
+    native_output = native.read().decode("utf-8", errors="replace")
+    native.close()
+    return {"returncode": returncode, "stdout": out.getvalue() + native_output, "stderr": err.getvalue(),
+            "seconds": seconds}
+
+
+def worker_main(preload):
+    # The protocol keeps the original stdout; fd 1 itself goes to stderr so stray native output can't corrupt it
+    protocol = os.fdopen(os.dup(1), "w", encoding="utf-8", buffering=1)
+    os.dup2(2, 1)
+
+    def send(message):
+        protocol.write(json.dumps(message) + "\n")
+        protocol.flush()
+
+    started = time.perf_counter()
+    errors = {}
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception as e:
+            errors[name] = f"{type(e).__name__}: {e}"
+    send({"ready": True, "pid": os.getpid(), "import_seconds": round(time.perf_counter() - started, 3),
+          "errors": errors})
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        send(_run_job(json.loads(line)))
+
+
+if __name__ == "__main__":
+    worker_main(sys.argv[1:])
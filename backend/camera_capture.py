@@ -0,0 +1,148 @@
+"""
+Camera frame pipeline for video_mode="camera" (AudioLoop.get_frames).
+
+- The capture backend is chosen per platform (AVFoundation on macOS, DirectShow
+  on Windows, V4L2 on Linux), falling back to OpenCV's default backend.
+- Frames stay in OpenCV: BGR is resized with INTER_AREA into a reused buffer
+  and JPEG-encoded directly (no RGB conversion, no PIL round trip).
+- A 32x24 grayscale thumbnail (also a reused buffer) is compared with the
+  last frame sent. Frames whose mean absolute difference is below
+  `change_threshold` are not sent.
+- AdaptiveFrameRate runs faster while the user is speaking, slower while
+  idle, and backs off while the outbound queue is backed up.
+"""
+
+import base64
+import sys
+
+import cv2
+import numpy as np
+
+
+def capture_backend(platform: str = None) -> int:
+    """OpenCV VideoCapture API preference for this platform."""
+    platform = platform or sys.platform
+    if platform == "darwin":
+        return cv2.CAP_AVFOUNDATION
+    if platform.startswith("win"):
+        return cv2.CAP_DSHOW
+    if platform.startswith("linux"):
+        return cv2.CAP_V4L2
+    return cv2.CAP_ANY
+
+
+def open_camera(index: int = 0):
+    """Opens the camera with the platform backend, falling back to CAP_ANY. Returns None if unavailable."""
+    backend = capture_backend()
+    for api in (backend, cv2.CAP_ANY) if backend != cv2.CAP_ANY else (cv2.CAP_ANY,):
+        cap = cv2.VideoCapture(index, api)
+        if cap.isOpened():
+            # Keep only the newest frame in the driver queue; we read rarely
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            return cap
+        cap.release()
+    return None
+
+
+class CameraFramePipeline:
+    """Resize, change detection and JPEG encoding for camera frames."""
+
+    THUMB_SIZE = (32, 24)
+
+    def __init__(self, max_edge: int = 1024, jpeg_quality: int = 80, change_threshold: float = 3.0):
+        self.max_edge = max_edge
+        self.encode_params = [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality]
+        self.change_threshold = change_threshold
+
+        # Reused buffers (reallocated only if the camera resolution changes)
+        self._resized = None
+        self._gray = None
+        self._thumb = np.empty((self.THUMB_SIZE[1], self.THUMB_SIZE[0]), dtype=np.uint8)
+        self._last_thumb = None
+
+        self.frames_read = 0
+        self.sent = 0
+        self.skipped_unchanged = 0
+        self.last_difference = None
+        self.bytes_sent = 0
+
+    def _target_size(self, frame):
+        h, w = frame.shape[:2]
+        scale = min(1.0, self.max_edge / float(max(h, w)))
+        return max(1, int(w * scale)), max(1, int(h * scale))
+
+    def _resize(self, frame):
+        size = self._target_size(frame)
+        if size == (frame.shape[1], frame.shape[0]):
+            return frame
+        if self._resized is None or self._resized.shape[:2] != (size[1], size[0]):
+            self._resized = np.empty((size[1], size[0], 3), dtype=np.uint8)
+        cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+        return self._resized
+
+    def difference(self, frame) -> float:
+        """Mean absolute thumbnail difference to the last sent frame (255 if there is none)."""
+        if self._gray is None or self._gray.shape != frame.shape[:2]:
+            self._gray = np.empty(frame.shape[:2], dtype=np.uint8)
+        cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        cv2.resize(self._gray, self.THUMB_SIZE, dst=self._thumb, interpolation=cv2.INTER_AREA)
+        if self._last_thumb is None:
+            return 255.0
+        return float(cv2.absdiff(self._thumb, self._last_thumb).mean())
+
+    def process(self, frame, force: bool = False):
+        """Returns a Live API image payload for a BGR frame, or None if the scene hasn't changed."""
+        self.frames_read += 1
+        resized = self._resize(frame)
+        self.last_difference = self.difference(resized)
+        if not force and self.last_difference < self.change_threshold:
+            self.skipped_unchanged += 1
+            return None
+
+        ok, buf = cv2.imencode(".jpg", resized, self.encode_params)
+        if not ok:
+            return None
+        if self._last_thumb is None:
+            self._last_thumb = self._thumb.copy()
+        else:
+            self._last_thumb[...] = self._thumb
+        self.sent += 1
+        self.bytes_sent += buf.size
+        return {"mime_type": "image/jpeg", "data": base64.b64encode(buf).decode("ascii")}
+
+    def read(self, cap, force: bool = False):
+        """Reads and processes one frame (runs in a worker thread). Raises EOFError if the camera stopped."""
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            raise EOFError("camera returned no frame")
+        return self.process(frame, force=force)
+
+    def reset(self):
+        self._last_thumb = None
+
+    def stats(self) -> dict:
+        return {
+            "frames_read": self.frames_read,
+            "sent": self.sent,
+            "skipped_unchanged": self.skipped_unchanged,
+            "last_difference": round(self.last_difference, 2) if self.last_difference is not None else None,
+            "bytes_sent": self.bytes_sent,
+        }
+
+
+class AdaptiveFrameRate:
+    """Capture interval from speaking state and outbound backpressure."""
+
+    def __init__(self, speaking_fps: float = 1.0, idle_fps: float = 0.25, max_interval: float = 10.0):
+        self.speaking_interval = 1.0 / speaking_fps
+        self.idle_interval = 1.0 / idle_fps
+        self.max_interval = max_interval
+        self._backoff = 1.0
+
+    def interval(self, speaking: bool, backlog: bool) -> float:
+        if backlog:
+            self._backoff = min(self._backoff * 2, 16.0)
+        else:
+            self._backoff = max(self._backoff / 2, 1.0)
+        base = self.speaking_interval if speaking else self.idle_interval
+        return min(base * self._backoff, max(self.max_interval, base))
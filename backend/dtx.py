@@ -0,0 +1,121 @@
+"""
+Discontinuous transmission (DTX) for the mic uplink in AudioLoop.listen_audio.
+
+Without it every 64 ms PCM chunk is uploaded, including the long silences
+between requests. SilenceSuppressor uses the local VAD decision to hold back
+silent chunks:
+
+- speech: chunks are sent as usual.
+- pre-roll: the last `preroll_ms` of silent chunks are kept in a ring. On a
+  speech onset they are sent before the current chunk. The local VAD confirms
+  speech a few chunks late, so without this the first syllable would be
+  clipped.
+- hangover: sending continues for `hangover_ms` after the local VAD reports
+  silence. Gemini's server-side activity detection needs that trailing
+  silence to end the user's turn.
+- keep-alive: while suppressed, one silent chunk (real background noise,
+  i.e. a comfort frame) is sent every `keepalive_s`. The audio stream never
+  goes completely quiet. Use 0 to disable.
+
+Everything is counted in bytes, so stats() reports the upstream bytes saved
+for the session.
+"""
+
+from collections import deque
+
+
+class SilenceSuppressor:
+    """Decides which mic chunks are uploaded, given the VAD result for each chunk."""
+
+    def __init__(self, chunk_ms: float, preroll_ms: float = 300, hangover_ms: float = 1000,
+                 keepalive_s: float = 2.0):
+        self.chunk_ms = chunk_ms
+        self.preroll_ms = preroll_ms
+        self.hangover_ms = hangover_ms
+        self.keepalive_s = keepalive_s
+        self._preroll = deque(maxlen=max(0, int(round(preroll_ms / chunk_ms))))
+        self.hangover_chunks = max(0, int(round(hangover_ms / chunk_ms)))
+        self.keepalive_chunks = int(round(keepalive_s * 1000.0 / chunk_ms)) if keepalive_s > 0 else 0
+
+        self._transmitting = False
+        self._silent_run = 0       # Consecutive silent chunks while transmitting
+        self._since_sent = 0       # Chunks suppressed since the last upload
+
+        self.chunks_in = 0
+        self.chunks_sent = 0
+        self.chunks_suppressed = 0
+        self.keepalives = 0
+        self.preroll_flushed = 0
+        self.bytes_in = 0
+        self.bytes_sent = 0
+
+    @property
+    def transmitting(self) -> bool:
+        return self._transmitting
+
+    def process(self, data, speech: bool) -> list:
+        """Returns the chunks to upload now (oldest first); empty while suppressing."""
+        self.chunks_in += 1
+        self.bytes_in += len(data)
+
+        if speech:
+            self._silent_run = 0
+            if self._transmitting:
+                return self._send([data])
+            # Onset: flush the pre-roll so the start of speech isn't clipped
+            self._transmitting = True
+            chunks = list(self._preroll)
+            self._preroll.clear()
+            self.preroll_flushed += len(chunks)
+            chunks.append(data)
+            return self._send(chunks)
+
+        if self._transmitting:
+            self._silent_run += 1
+            if self._silent_run <= self.hangover_chunks:
+                return self._send([data])
+            self._transmitting = False
+            self._silent_run = 0
+
+        self._since_sent += 1
+        if self.keepalive_chunks and self._since_sent >= self.keepalive_chunks:
+            # Comfort frame; not kept for pre-roll so it isn't sent twice
+            self.keepalives += 1
+            return self._send([data])
+
+        if self._preroll.maxlen:
+            if len(self._preroll) == self._preroll.maxlen:
+                self.chunks_suppressed += 1
+            self._preroll.append(data)
+        else:
+            self.chunks_suppressed += 1
+        return []
+
+    def _send(self, chunks) -> list:
+        self._since_sent = 0
+        self.chunks_sent += len(chunks)
+        self.bytes_sent += sum(len(c) for c in chunks)
+        return chunks
+
+    def reset(self):
+        """Starts a new session: counters and state are cleared."""
+        self.__init__(self.chunk_ms, self.preroll_ms, self.hangover_ms, self.keepalive_s)
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes read from the mic but never uploaded (chunks still held in the pre-roll count as saved)."""
+        return self.bytes_in - self.bytes_sent
+
+    def stats(self) -> dict:
+        return {
+            "transmitting": self._transmitting,
+            "chunks_in": self.chunks_in,
+            "chunks_sent": self.chunks_sent,
+            "chunks_suppressed": self.chunks_suppressed + len(self._preroll),
+            "keepalives": self.keepalives,
+            "preroll_flushed": self.preroll_flushed,
+            "bytes_in": self.bytes_in,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.bytes_saved,
+            "saved_ratio": round(self.bytes_saved / self.bytes_in, 3) if self.bytes_in else 0.0,
+        }
@@ -0,0 +1,242 @@
+"""
+Per-client outbound Socket.IO queues for server.py.
+
+AudioLoop callbacks used to call asyncio.create_task(sio.emit(...)) for
+every event. Nothing bounded that: python-engineio queues packets per
+socket without limit, so a frontend that sleeps or lags made tasks and
+payloads pile up in memory.
+
+EmitDispatcher gives every connected client its own ClientEmitQueue, drained
+by one task per client. server.py sends every event through it, so a client
+gets events in the order they were emitted. put() never blocks, and each
+event type has a policy:
+
+    latest    -> only the newest payload per key is kept (audio levels,
+                 browser frames, progress). A replaced payload is counted as
+                 dropped, and the new one takes its place at the back of
+                 the queue.
+    lossless  -> must be delivered (chat, status, errors, confirmations, CAD
+                 results). Never dropped. If more than `max_lossless` are
+                 waiting, the client is not keeping up: the queue is closed,
+                 the overflow is logged and counted, and `on_overflow(sid)`
+                 disconnects the client. The frontend then reconnects and
+                 reattaches to its session.
+
+The sender also watches the client's engine.io packet queue. While more
+than `max_transport_backlog` packets are still waiting there, it holds off,
+so backlog builds up here, where it is coalesced and bounded.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import OrderedDict
+
+LATEST = "latest"
+LOSSLESS = "lossless"
+
+# Event -> policy; events not listed are lossless
+DEFAULT_POLICIES = {
+    "audio_data": LATEST,
+    "browser_frame": LATEST,
+    "auth_frame": LATEST,
+    "slicing_progress": LATEST,
+    "print_status_update": LATEST,
+    "audio_stats": LATEST,
+    "latency_stats": LATEST,
+    "biometric_frame": LATEST,
+}
+
+
+def coalesce_key(event, data):
+    """Key under which latest-wins payloads replace each other (per printer for print status)."""
+    if event in ("print_status_update", "slicing_progress") and isinstance(data, dict):
+        return (event, data.get("printer") or data.get("host"))
+    return event
+
+
+class ClientEmitQueue:
+    """Bounded outbound queue for one client, drained by its own task."""
+
+    def __init__(self, sid, send, policies=None, max_lossless: int = 256,
+                 backlog=None, max_transport_backlog: int = 32, stall_interval: float = 0.05,
+                 on_overflow=None):
+        self.sid = sid
+        self._send = send                  # async send(event, data, sid)
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self._queue = OrderedDict()        # key -> (event, data, queued_at), in send order
+        self._seq = itertools.count()      # Keys for lossless entries
+        self._lossless = 0
+        self.max_lossless = max_lossless
+        self.on_overflow = on_overflow     # on_overflow(sid): the client fell too far behind
+        self.overflowed = False
+        self._backlog = backlog            # backlog(sid) -> packets waiting in the transport
+        self.max_transport_backlog = max_transport_backlog
+        self.stall_interval = stall_interval
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = {}
+        self.errors = 0
+        self.stalls = 0
+        self.max_depth = 0
+        self.last_wait = 0.0
+
+    def __len__(self):
+        return len(self._queue)
+
+    def _drop(self, event):
+        self.dropped[event] = self.dropped.get(event, 0) + 1
+
+    def put(self, event, data=None):
+        """Queues an event for this client. Never blocks."""
+        if self.overflowed:
+            return
+        now = time.perf_counter()
+        if self.policies.get(event, LOSSLESS) == LATEST:
+            key = (LATEST, coalesce_key(event, data))
+            if self._queue.pop(key, None) is not None:
+                self._drop(event)
+        else:
+            if self.max_lossless and self._lossless >= self.max_lossless:
+                self._overflow(event)
+                return
+            key = (LOSSLESS, next(self._seq))
+            self._lossless += 1
+        self._queue[key] = (event, data, now)
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(self))
+        self._wakeup.set()
+
+    def _overflow(self, event):
+        print(f"[SERVER] [EMIT] Client {self.sid} has {self._lossless} undelivered events; "
+              f"disconnecting it instead of dropping '{event}'.")
+        self.overflowed = True
+        self.close()
+        if self.on_overflow:
+            try:
+                self.on_overflow(self.sid)
+            except Exception as e:
+                print(f"[SERVER] [EMIT] Overflow callback failed for {self.sid}: {e}")
+
+    def _pop(self):
+        key, entry = self._queue.popitem(last=False)
+        if key[0] == LOSSLESS:
+            self._lossless -= 1
+        return entry
+
+    def _transport_busy(self) -> bool:
+        if self._backlog is None:
+            return False
+        try:
+            return self._backlog(self.sid) > self.max_transport_backlog
+        except Exception:
+            return False
+
+    async def run(self):
+        while True:
+            if not len(self):
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            if self._transport_busy():
+                # The client isn't reading; let latest-wins events coalesce here
+                self.stalls += 1
+                await asyncio.sleep(self.stall_interval)
+                continue
+            event, data, queued_at = self._pop()
+            self.last_wait = time.perf_counter() - queued_at
+            try:
+                await self._send(event, data, self.sid)
+                self.sent += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.errors += 1
+                print(f"[SERVER] [EMIT] Failed to send '{event}' to {self.sid}: {e}")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        self._queue.clear()
+        self._lossless = 0
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self),
+            "lossless_depth": self._lossless,
+            "latest_depth": len(self._queue) - self._lossless,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": sum(self.dropped.values()),
+            "dropped_by_event": dict(self.dropped),
+            "errors": self.errors,
+            "stalls": self.stalls,
+            "overflowed": self.overflowed,
+            "last_wait_ms": round(self.last_wait * 1000.0, 2),
+        }
+
+
+class EmitDispatcher:
+    """One ClientEmitQueue per connected client."""
+
+    def __init__(self, send, policies=None, max_lossless: int = 256, backlog=None, max_transport_backlog: int = 32,
+                 on_overflow=None):
+        self._send = send
+        self.on_overflow = on_overflow
+        self.policies = DEFAULT_POLICIES if policies is None else policies
+        self.max_lossless = max_lossless
+        self._backlog = backlog
+        self.max_transport_backlog = max_transport_backlog
+        self._clients = {}
+
+    def __contains__(self, sid):
+        return sid in self._clients
+
+    def add_client(self, sid) -> ClientEmitQueue:
+        queue = self._clients.get(sid)
+        if queue is None:
+            queue = ClientEmitQueue(sid, self._send, policies=self.policies, max_lossless=self.max_lossless,
+                                    backlog=self._backlog, max_transport_backlog=self.max_transport_backlog,
+                                    on_overflow=self.on_overflow)
+            self._clients[sid] = queue
+            queue.start()
+        return queue
+
+    def remove_client(self, sid):
+        queue = self._clients.pop(sid, None)
+        if queue is not None:
+            queue.close()
+
+    def emit(self, event, data=None, to=None):
+        """Queues an event for the clients in `to` (an iterable of sids; None = every client).
+
+        Sids that are not connected (add_client not called, or already removed) are skipped.
+        """
+        sids = list(self._clients) if to is None else list(to)
+        for sid in sids:
+            queue = self._clients.get(sid)
+            if queue is not None:
+                queue.put(event, data)
+
+    def client_stats(self, sid):
+        queue = self._clients.get(sid)
+        return queue.stats() if queue is not None else None
+
+    def stats(self) -> dict:
+        clients = {sid: queue.stats() for sid, queue in self._clients.items()}
+        return {
+            "clients": len(clients),
+            "depth": sum(c["depth"] for c in clients.values()),
+            "dropped": sum(c["dropped"] for c in clients.values()),
+            "per_client": clients,
+        }
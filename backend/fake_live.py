@@ -0,0 +1,381 @@
+"""
+Offline stand-ins for the Gemini Live API and PyAudio devices.
+
+Used to benchmark and regression-test AudioLoop without an API key, network
+or sound card:
+
+- FakeLiveClient / FakeLiveSession implement the `send`, `receive` and
+  `send_tool_response` surface AudioLoop uses on a Live session. Replies are
+  scripted (ScriptedTurn) with canned audio, transcriptions, tool calls and
+  configurable delays. Turns are triggered like the real service does it: a
+  server-side energy VAD over the uploaded mic audio detects end of speech.
+  Sessions can issue resumption handles and drop the connection after a
+  number of turns, to exercise AudioLoop's reconnect path.
+- FakePyAudio provides input/output streams (blocking and callback mode) that
+  run at real-time pace. The mic plays a repeating speech/silence pattern.
+
+AudioLoop accepts these through `live_connect=FakeLiveClient(...).connect`
+and `audio_interface=FakePyAudio(...)`.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+from google.genai import types
+
+from vad import EnergyVAD
+
+TRIGGER_SPEECH = "speech"        # user speech ended (server-side VAD)
+TRIGGER_TEXT = "text"            # a text message sent with end_of_turn=True
+TRIGGER_IMMEDIATE = "immediate"  # as soon as the previous turn finished
+
+_DROPPED = object()
+
+
+def synth_tone(duration_ms: float, sample_rate: int, freq: float = 160.0, harmonics: int = 8, amplitude: int = 6000) -> bytes:
+    """Voiced-sounding test signal: a fundamental with 1/k harmonics, 16-bit mono."""
+    n = int(sample_rate * duration_ms / 1000.0)
+    t = np.arange(n) / sample_rate
+    wave = sum(np.sin(2 * np.pi * freq * k * t) / k for k in range(1, harmonics + 1))
+    return (amplitude * wave / np.max(np.abs(wave))).astype("<i2").tobytes()
+
+
+@dataclass
+class ScriptedTurn:
+    """One scripted model reply."""
+    trigger: str = TRIGGER_SPEECH
+    response_delay_ms: float = 300
+    input_transcript: Optional[str] = None
+    output_transcript: Optional[str] = "Listo."
+    audio_ms: float = 1000
+    audio_chunk_ms: float = 40
+    # None paces audio chunks in real time; 0 sends them as fast as possible
+    chunk_interval_ms: Optional[float] = None
+    # [{"name": "list_projects", "args": {}}]; the reply waits for send_tool_response
+    tool_calls: List[Dict] = field(default_factory=list)
+    tool_response_timeout_ms: float = 10000
+
+
+class FakeLiveSession:
+    """Scripted stand-in for a google.genai Live session."""
+
+    def __init__(self, turns: List[ScriptedTurn], loop_turns: bool = False,
+                 input_rate: int = 16000, output_rate: int = 24000,
+                 server_vad_silence_ms: float = 300, server_vad_threshold: int = 500,
+                 resumption: bool = False, drop_after_turns: Optional[int] = None):
+        self.turns = turns
+        self.loop_turns = loop_turns
+        self.input_rate = input_rate
+        self.output_rate = output_rate
+        # Send session_resumption_update after every turn (the client asked for handles)
+        self.resumption = resumption
+        # Simulate a lost connection once this many turns completed
+        self.drop_after_turns = drop_after_turns
+
+        self._messages = asyncio.Queue()
+        self._triggers = asyncio.Queue()
+        self._tool_responses = asyncio.Queue()
+        self._driver = None
+
+        # Server-side VAD over uploaded mic audio, measured in audio time
+        self._vad = EnergyVAD(threshold=server_vad_threshold)
+        self._vad_silence_samples = int(input_rate * server_vad_silence_ms / 1000.0)
+        self._in_speech = False
+        self._silent_samples = 0
+
+        self.audio_chunks_received = 0
+        self.audio_bytes_received = 0
+        self.images_received = 0
+        self.texts_received = 0
+        self.tool_responses_received = 0
+        self.turns_completed = 0
+        self.turn_log = []
+        self.context_texts = []
+
+    # --- Session surface used by AudioLoop ---
+
+    async def send(self, input=None, end_of_turn=False):
+        if isinstance(input, dict):
+            mime_type = input.get("mime_type", "")
+            if mime_type.startswith("audio/"):
+                self._on_audio(input.get("data", b""))
+            elif mime_type.startswith("image/"):
+                self.images_received += 1
+        elif input is not None:
+            self.texts_received += 1
+            if not end_of_turn:
+                self.context_texts.append(input)
+            if end_of_turn:
+                self._triggers.put_nowait((TRIGGER_TEXT, time.perf_counter()))
+
+    async def send_tool_response(self, function_responses=None):
+        responses = function_responses or []
+        self.tool_responses_received += len(responses)
+        self._tool_responses.put_nowait(responses)
+
+    async def receive(self):
+        """Yields messages until the current turn completes (like the real SDK)."""
+        while True:
+            msg = await self._messages.get()
+            if msg is _DROPPED:
+                raise ConnectionError("fake Live connection dropped")
+            yield msg
+            if msg.server_content and msg.server_content.turn_complete:
+                return
+
+    # --- Script driver ---
+
+    def _on_audio(self, data):
+        self.audio_chunks_received += 1
+        self.audio_bytes_received += len(data)
+        samples = len(data) // 2
+        if self._vad.process(data):
+            self._in_speech = True
+            self._silent_samples = 0
+        elif self._in_speech:
+            self._silent_samples += samples
+            if self._silent_samples >= self._vad_silence_samples:
+                self._in_speech = False
+                self._silent_samples = 0
+                self._triggers.put_nowait((TRIGGER_SPEECH, time.perf_counter()))
+
+    async def _wait_trigger(self, trigger):
+        if trigger == TRIGGER_IMMEDIATE:
+            return time.perf_counter()
+        while True:
+            kind, at = await self._triggers.get()
+            if kind == trigger:
+                return at
+
+    def _emit(self, **kwargs):
+        self._messages.put_nowait(types.LiveServerMessage(**kwargs))
+
+    def _emit_content(self, **kwargs):
+        self._emit(server_content=types.LiveServerContent(**kwargs))
+
+    async def _play_turn(self, index, turn: ScriptedTurn):
+        triggered_at = await self._wait_trigger(turn.trigger)
+        record = {"turn": index, "trigger": turn.trigger, "triggered_at": triggered_at}
+        await asyncio.sleep(turn.response_delay_ms / 1000.0)
+
+        if turn.input_transcript:
+            self._emit_content(input_transcription=types.Transcription(text=turn.input_transcript))
+
+        if turn.tool_calls:
+            calls = [
+                types.FunctionCall(id=f"fake-{index}-{i}", name=call["name"], args=call.get("args", {}))
+                for i, call in enumerate(turn.tool_calls)
+            ]
+            tool_sent_at = time.perf_counter()
+            self._emit(tool_call=types.LiveServerToolCall(function_calls=calls))
+            try:
+                await asyncio.wait_for(self._tool_responses.get(), turn.tool_response_timeout_ms / 1000.0)
+                record["tool_roundtrip_ms"] = (time.perf_counter() - tool_sent_at) * 1000.0
+            except asyncio.TimeoutError:
+                record["tool_roundtrip_ms"] = None
+
+        record["first_audio_at"] = time.perf_counter()
+        audio = synth_tone(turn.audio_ms, self.output_rate, freq=180.0)
+        chunk_bytes = max(2, int(self.output_rate * turn.audio_chunk_ms / 1000.0) * 2)
+        interval = turn.audio_chunk_ms if turn.chunk_interval_ms is None else turn.chunk_interval_ms
+        for offset in range(0, len(audio), chunk_bytes):
+            blob = types.Blob(data=audio[offset:offset + chunk_bytes], mime_type=f"audio/pcm;rate={self.output_rate}")
+            self._emit_content(model_turn=types.Content(role="model", parts=[types.Part(inline_data=blob)]))
+            if interval:
+                await asyncio.sleep(interval / 1000.0)
+
+        if turn.output_transcript:
+            self._emit_content(output_transcription=types.Transcription(text=turn.output_transcript))
+        self._emit_content(turn_complete=True)
+
+        record["completed_at"] = time.perf_counter()
+        self.turn_log.append(record)
+        self.turns_completed += 1
+
+        if self.resumption:
+            self._emit(session_resumption_update=types.LiveServerSessionResumptionUpdate(
+                new_handle=f"fake-handle-{id(self)}-{self.turns_completed}", resumable=True))
+        if self.drop_after_turns and self.turns_completed >= self.drop_after_turns:
+            self._messages.put_nowait(_DROPPED)
+            # Stop scripting; the client has to reconnect
+            await asyncio.Event().wait()
+
+    async def _drive(self):
+        turns = itertools.cycle(self.turns) if self.loop_turns else iter(self.turns)
+        for index, turn in enumerate(turns):
+            await self._play_turn(index, turn)
+
+    def start(self):
+        self._driver = asyncio.create_task(self._drive())
+
+    async def close(self):
+        if self._driver:
+            self._driver.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._driver
+
+    def stats(self) -> dict:
+        return {
+            "audio_chunks_received": self.audio_chunks_received,
+            "audio_bytes_received": self.audio_bytes_received,
+            "images_received": self.images_received,
+            "texts_received": self.texts_received,
+            "tool_responses_received": self.tool_responses_received,
+            "turns_completed": self.turns_completed,
+        }
+
+
+class FakeLiveClient:
+    """Provides `connect()` with the same async-context-manager shape as client.aio.live.connect."""
+
+    def __init__(self, turns: List[ScriptedTurn], **session_kwargs):
+        self.turns = turns
+        self.session_kwargs = session_kwargs
+        self.sessions = []
+        self.resumed_handles = []   # Handle passed to each connect (None = fresh session)
+
+    @property
+    def turns_completed(self) -> int:
+        return sum(s.turns_completed for s in self.sessions)
+
+    @property
+    def session(self) -> Optional[FakeLiveSession]:
+        return self.sessions[-1] if self.sessions else None
+
+    @contextlib.asynccontextmanager
+    async def connect(self, model=None, config=None):
+        resumption = getattr(config, "session_resumption", None)
+        self.resumed_handles.append(resumption.handle if resumption else None)
+        # A new connection continues the script where the last one stopped
+        turns = self.turns if self.session_kwargs.get("loop_turns") else self.turns[self.turns_completed:]
+        session = FakeLiveSession(turns, resumption=resumption is not None,
+                                  **self.session_kwargs)
+        self.sessions.append(session)
+        session.start()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+# --- Fake audio devices ---
+
+class _FakeStreamBase:
+    def __init__(self, rate, frames_per_buffer, speed):
+        self.rate = rate
+        self.frames_per_buffer = frames_per_buffer
+        self.speed = speed
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeInputStream(_FakeStreamBase):
+    """Mic that plays a repeating [(kind, ms), ...] pattern of "speech"/"silence"."""
+
+    def __init__(self, rate, frames_per_buffer, pattern, speed=1.0, stream_callback=None):
+        super().__init__(rate, frames_per_buffer, speed)
+        self.stream_callback = stream_callback
+        self.chunks_produced = 0
+        self._chunks = self._generate(pattern)
+        self._thread = None
+        self._running = False
+
+    def _generate(self, pattern):
+        chunk_bytes = self.frames_per_buffer * 2
+        speech = synth_tone(1000, self.rate, freq=440.0, harmonics=4)
+        buffer = bytearray()
+        for kind, ms in itertools.cycle(pattern):
+            n = int(self.rate * ms / 1000.0) * 2
+            if kind == "speech":
+                buffer += (speech * (n // len(speech) + 1))[:n]
+            else:
+                buffer += bytes(n)
+            while len(buffer) >= chunk_bytes:
+                yield bytes(buffer[:chunk_bytes])
+                del buffer[:chunk_bytes]
+
+    @property
+    def chunk_seconds(self):
+        return self.frames_per_buffer / self.rate / self.speed
+
+    def read(self, num_frames, exception_on_overflow=True):
+        time.sleep(self.chunk_seconds)
+        self.chunks_produced += 1
+        return next(self._chunks)
+
+    def _run_callback(self):
+        next_at = time.perf_counter()
+        while self._running:
+            next_at += self.chunk_seconds
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            self.chunks_produced += 1
+            self.stream_callback(next(self._chunks), self.frames_per_buffer, None, 0)
+
+    def start_stream(self):
+        if self.stream_callback and not self._running:
+            self._running = True
+            self._thread = threading.Thread(target=self._run_callback, daemon=True)
+            self._thread.start()
+
+    def stop_stream(self):
+        self._running = False
+
+    def close(self):
+        self.stop_stream()
+        super().close()
+
+
+class FakeOutputStream(_FakeStreamBase):
+    """Speaker that consumes audio at real-time pace."""
+
+    def __init__(self, rate, frames_per_buffer, speed=1.0):
+        super().__init__(rate, frames_per_buffer, speed)
+        self.bytes_written = 0
+        self.writes = 0
+
+    def write(self, data):
+        time.sleep(len(data) / 2 / self.rate / self.speed)
+        self.bytes_written += len(data)
+        self.writes += 1
+
+
+class FakePyAudio:
+    """The subset of pyaudio.PyAudio that AudioLoop uses."""
+
+    DEFAULT_PATTERN = (("silence", 500), ("speech", 1200), ("silence", 3500))
+
+    def __init__(self, mic_pattern=DEFAULT_PATTERN, speed: float = 1.0):
+        self.mic_pattern = mic_pattern
+        self.speed = speed
+        self.input_streams = []
+        self.output_streams = []
+
+    def get_default_input_device_info(self):
+        return self.get_device_info_by_index(0)
+
+    def get_device_count(self):
+        return 1
+
+    def get_device_info_by_index(self, index):
+        return {"index": 0, "name": "Fake Device", "maxInputChannels": 1, "maxOutputChannels": 1}
+
+    def open(self, format=None, channels=1, rate=16000, input=False, output=False,
+             input_device_index=None, output_device_index=None, frames_per_buffer=1024,
+             stream_callback=None, **kwargs):
+        if input:
+            stream = FakeInputStream(rate, frames_per_buffer, self.mic_pattern, self.speed, stream_callback)
+            self.input_streams.append(stream)
+            return stream
+        stream = FakeOutputStream(rate, frames_per_buffer, self.speed)
+        self.output_streams.append(stream)
+        return stream
@@ -0,0 +1,102 @@
+"""
+Mailbox for camera frames coming from the renderer.
+
+listen_audio only forwards a frame when the VAD detects the start of speech,
+so most frames the renderer sends are never used. The mailbox keeps only the
+last `window` frames, as the raw JPEG bytes received from Socket.IO (no copy,
+no task per frame). A frame is base64-encoded only when it is actually
+forwarded, and only once.
+
+With window=1 it is a latest-only mailbox. A larger window lets
+KeyframeSelector pick the sharpest recent frame.
+
+Counters: received, dropped (left the window or was passed over without
+being sent), sent, encoded.
+"""
+
+import base64
+from collections import deque
+
+DEFAULT_MIME_TYPE = "image/jpeg"
+
+
+class FrameMailbox:
+    """Holds the most recent frames; encoding is deferred to take()."""
+
+    def __init__(self, window: int = 1, mime_type: str = DEFAULT_MIME_TYPE):
+        self.mime_type = mime_type
+        self._frames = deque(maxlen=max(1, window))
+        self._last_taken = None   # (frame, encoded payload) of the last frame forwarded
+
+        self.received = 0
+        self.dropped = 0
+        self.sent = 0
+        self.encoded = 0
+
+    @property
+    def window(self) -> int:
+        return self._frames.maxlen
+
+    def put(self, frame):
+        """Stores a frame (bytes-like or an already base64-encoded str). Safe to call per frame."""
+        if len(self._frames) == self._frames.maxlen:
+            self.dropped += 1
+        self._frames.append(frame)
+        self.received += 1
+
+    def has_frame(self) -> bool:
+        """True if take() would return a payload."""
+        return bool(self._frames) or self._last_taken is not None
+
+    def recent(self) -> list:
+        """Frames in the window, oldest first."""
+        return list(self._frames)
+
+    def _encode(self, frame) -> dict:
+        if self._last_taken is not None and self._last_taken[0] is frame:
+            return self._last_taken[1]
+        if isinstance(frame, str):
+            data = frame
+        else:
+            data = base64.b64encode(frame).decode("ascii")
+            self.encoded += 1
+        payload = {"mime_type": self.mime_type, "data": data}
+        self._last_taken = (frame, payload)
+        return payload
+
+    def take(self, frame=None):
+        """Returns the Live API payload for `frame` (default: newest) and empties the window.
+
+        Returns None if there is nothing to send. If no new frame arrived since the
+        last take, the last forwarded frame is sent again.
+        """
+        if frame is None:
+            if self._frames:
+                frame = self._frames[-1]
+            elif self._last_taken is not None:
+                frame = self._last_taken[0]
+            else:
+                return None
+        # Everything else in the window was passed over
+        self.dropped += sum(1 for f in self._frames if f is not frame)
+        self._frames.clear()
+        self.sent += 1
+        return self._encode(frame)
+
+    def skip(self):
+        """Discards the window without sending (e.g. the scene hasn't changed)."""
+        self.dropped += len(self._frames)
+        self._frames.clear()
+
+    def clear(self):
+        self._frames.clear()
+        self._last_taken = None
+
+    def stats(self) -> dict:
+        return {
+            "received": self.received,
+            "dropped": self.dropped,
+            "sent": self.sent,
+            "encoded": self.encoded,
+            "window": self.window,
+        }
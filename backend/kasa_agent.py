@@ -1,5 +1,37 @@
 import asyncio
-from kasa import Discover, SmartDevice, SmartBulb, SmartPlug
+import functools
+import importlib
+import time
+
+import metrics
+
+_kasa = None
+
+async def load_kasa():
+    """python-kasa, imported in a worker thread on first use (the import takes ~0.3 s)."""
+    global _kasa
+    if _kasa is None:
+        _kasa = await asyncio.to_thread(importlib.import_module, "kasa")
+    return _kasa
+
+KASA_COMMAND_SECONDS = metrics.histogram(
+    "sara_kasa_command_seconds", "Kasa device command latency", ["command", "result"],
+)
+
+
+def _timed_command(fn):
+    """Records the command's latency, labelled by its True/False result."""
+    @functools.wraps(fn)
+    async def run(self, *args, **kwargs):
+        started = time.perf_counter()
+        ok = False
+        try:
+            ok = await fn(self, *args, **kwargs)
+            return ok
+        finally:
+            KASA_COMMAND_SECONDS.labels(command=fn.__name__, result="ok" if ok else "failed").observe(
+                time.perf_counter() - started)
+    return run
 
 class KasaAgent:
     def __init__(self, known_devices=None):
@@ -28,7 +60,8 @@ class KasaAgent:
             # We can't know the exact class (Bulb/Plug) without connecting, 
             # but Discover.discover_single might work, or just SmartDevice(ip)
             # SmartDevice is the base class.
-            dev = await Discover.discover_single(ip)
+            kasa = await load_kasa()
+            dev = await kasa.Discover.discover_single(ip)
             if dev:
                 await dev.update()
                 self.devices[ip] = dev
@@ -42,7 +75,8 @@ class KasaAgent:
         """Discovers devices on the local network."""
         print("Discovering Kasa devices (Broadcast)...")
         # Use explicit broadcast and slightly longer timeout for Windows reliability
-        found_devices = await Discover.discover(target="255.255.255.255", timeout=5)
+        kasa = await load_kasa()
+        found_devices = await kasa.Discover.discover(target="255.255.255.255", timeout=5)
         print(f"[KasaAgent] Raw discovery found {len(found_devices)} devices.")
         
         # We don't wipe self.devices completely, we merge/update
@@ -124,6 +158,7 @@ class KasaAgent:
         }
         return colors.get(color_name, None)
 
+    @_timed_command
     async def turn_on(self, target):
         """Turns on the device (Target: IP or Alias)."""
         dev = self._resolve_device(target)
@@ -139,7 +174,8 @@ class KasaAgent:
         # Fallback: Try to discover single if it looks like an IP
         if target.count(".") == 3:
              try:
-                dev = await Discover.discover_single(target)
+                kasa = await load_kasa()
+                dev = await kasa.Discover.discover_single(target)
                 if dev:
                     self.devices[target] = dev
                     await dev.turn_on()
@@ -149,6 +185,7 @@ class KasaAgent:
                  pass
         return False
 
+    @_timed_command
     async def turn_off(self, target):
         """Turns off the device (Target: IP or Alias)."""
         dev = self._resolve_device(target)
@@ -163,7 +200,8 @@ class KasaAgent:
         
         if target.count(".") == 3:
              try:
-                dev = await Discover.discover_single(target)
+                kasa = await load_kasa()
+                dev = await kasa.Discover.discover_single(target)
                 if dev:
                     self.devices[target] = dev
                     await dev.turn_off()
@@ -173,6 +211,7 @@ class KasaAgent:
                  pass
         return False
 
+    @_timed_command
     async def set_brightness(self, target, brightness):
         """Sets brightness (0-100)."""
         dev = self._resolve_device(target)
@@ -185,6 +224,7 @@ class KasaAgent:
                  print(f"Error setting brightness for {target}: {e}")
         return False
 
+    @_timed_command
     async def set_color(self, target, color_input):
         """Sets color by name or direct HSV tuple."""
         dev = self._resolve_device(target)
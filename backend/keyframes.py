@@ -0,0 +1,100 @@
+"""
+Keyframe selection for the frame forwarded on VAD speech start.
+
+Instead of whatever frame happens to be newest, listen_audio picks from the
+last few frames in the FrameMailbox:
+
+- sharpness: variance of the Laplacian on a half-size grayscale decode.
+  Motion blur and focus hunting score low.
+- change: a 64-bit difference hash (dHash) of the chosen frame is compared
+  with the last frame uploaded. If they are within `change_threshold` bits,
+  the scene hasn't changed and nothing is sent. This saves the upload and
+  the image input tokens.
+
+Scoring only runs at speech start, off the event loop, over at most `window`
+small JPEGs.
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+
+def decode_gray(frame):
+    """JPEG bytes (or base64 str) -> half-resolution grayscale image, or None if undecodable."""
+    if isinstance(frame, str):
+        frame = base64.b64decode(frame)
+    buf = np.frombuffer(frame, dtype=np.uint8)
+    if buf.size == 0:
+        return None
+    return cv2.imdecode(buf, cv2.IMREAD_REDUCED_GRAYSCALE_2)
+
+
+def sharpness(gray) -> float:
+    """Variance of the Laplacian: higher means more in-focus edges."""
+    return float(cv2.Laplacian(gray, cv2.CV_64F).var())
+
+
+def dhash(gray, size: int = 8) -> int:
+    """Difference hash: size*size bits comparing horizontally adjacent pixels."""
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class KeyframeSelector:
+    """Chooses the sharpest recent frame and suppresses uploads of an unchanged scene."""
+
+    def __init__(self, change_threshold: int = 6):
+        self.change_threshold = change_threshold
+        self._last_hash = None
+
+        self.selections = 0
+        self.skipped_unchanged = 0
+        self.undecodable = 0
+        self.last_sharpness = None
+
+    def reset(self):
+        """Forget the last upload (new session: the model has no image context yet)."""
+        self._last_hash = None
+
+    def choose(self, frames):
+        """Returns the frame to send from `frames` (oldest first), or None to skip. Thread-safe to call off-loop."""
+        best = None
+        for frame in frames:
+            gray = decode_gray(frame)
+            if gray is None:
+                self.undecodable += 1
+                continue
+            score = sharpness(gray)
+            # Ties go to the newer frame
+            if best is None or score >= best[1]:
+                best = (frame, score, gray)
+
+        if best is None:
+            # Nothing decodable: fall back to the newest frame, unscored
+            return frames[-1] if frames else None
+
+        frame, score, gray = best
+        frame_hash = dhash(gray)
+        if self._last_hash is not None and hamming(frame_hash, self._last_hash) <= self.change_threshold:
+            self.skipped_unchanged += 1
+            return None
+
+        self._last_hash = frame_hash
+        self.selections += 1
+        self.last_sharpness = round(score, 1)
+        return frame
+
+    def stats(self) -> dict:
+        return {
+            "keyframes_selected": self.selections,
+            "skipped_unchanged": self.skipped_unchanged,
+            "undecodable": self.undecodable,
+            "last_sharpness": self.last_sharpness,
+        }
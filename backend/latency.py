@@ -0,0 +1,144 @@
+"""
+End-to-end voice latency tracing.
+
+AudioLoop marks a handful of points per conversational turn and the tracer
+turns them into rolling latency histograms (p50/p95/p99):
+
+    speech_end          VAD decides the user stopped talking (listen_audio)
+    last_audio_sent     last mic chunk handed to the session (send_realtime)
+    first_response      first response.data of the reply (receive_audio)
+    first_playback      first stream.write of the reply (play_audio)
+
+Recorded metrics:
+    voice_to_voice        speech_end     -> first_playback  (the headline number)
+    speech_to_response    speech_end     -> first_response
+    upstream_to_response  last_audio_sent -> first_response (network + model)
+    response_to_playback  first_response -> first_playback  (local buffering)
+    tool_call / tool:<name>  tool call receipt -> tool response sent
+"""
+
+import math
+import time
+from collections import deque
+
+
+class RollingHistogram:
+    """Keeps the last `maxlen` samples (seconds) and reports percentiles in ms."""
+
+    def __init__(self, maxlen: int = 500):
+        self.samples = deque(maxlen=maxlen)
+        self.count = 0
+
+    def add(self, seconds: float):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def percentile(self, p: float):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        # Nearest-rank percentile
+        rank = max(1, math.ceil(p / 100.0 * len(ordered)))
+        return ordered[min(rank, len(ordered)) - 1]
+
+    def snapshot(self) -> dict:
+        def ms(value):
+            return round(value * 1000.0, 1) if value is not None else None
+        return {
+            "count": self.count,
+            "last_ms": ms(self.samples[-1]) if self.samples else None,
+            "p50_ms": ms(self.percentile(50)),
+            "p95_ms": ms(self.percentile(95)),
+            "p99_ms": ms(self.percentile(99)),
+        }
+
+
+class LatencyTracer:
+    """Per-turn timestamps for the voice pipeline, aggregated into histograms."""
+
+    def __init__(self, maxlen: int = 500, clock=time.perf_counter):
+        self.maxlen = maxlen
+        self.clock = clock
+        self.histograms = {}
+        self._reset_turn()
+
+    def _reset_turn(self):
+        self._turn_open = False
+        self._speech_end = None
+        self._last_audio_sent = None
+        self._first_response = None
+        self._first_playback = None
+        self._recorded = set()
+
+    def record(self, metric: str, seconds: float):
+        if seconds is None or seconds < 0:
+            return
+        hist = self.histograms.get(metric)
+        if hist is None:
+            hist = self.histograms[metric] = RollingHistogram(self.maxlen)
+        hist.add(seconds)
+
+    def _record_once(self, metric: str, start, end):
+        if start is None or end is None or metric in self._recorded:
+            return
+        self._recorded.add(metric)
+        self.record(metric, end - start)
+
+    def _emit(self):
+        # Marks can arrive in any order (the server may answer before the local
+        # VAD confirms silence), so record each metric once both ends are known
+        if self._speech_end is None:
+            return
+        self._record_once("speech_to_response", self._speech_end, self._first_response)
+        self._record_once("upstream_to_response", self._last_audio_sent, self._first_response)
+        self._record_once("response_to_playback", self._first_response, self._first_playback)
+        self._record_once("voice_to_voice", self._speech_end, self._first_playback)
+
+    # --- Turn marks ---
+
+    def mark_speech_start(self):
+        """User started speaking: opens a new turn."""
+        self._reset_turn()
+        self._turn_open = True
+
+    def mark_speech_end(self, at: float = None):
+        """User stopped speaking. `at` lets the caller backdate to when silence began."""
+        if not self._turn_open:
+            self.mark_speech_start()
+        self._speech_end = self.clock() if at is None else at
+        if self._first_response is not None and self._first_response < self._speech_end:
+            # Audio that arrived while the user was still talking is not the reply
+            self._first_response = None
+            self._first_playback = None
+            self._last_audio_sent = None
+        self._emit()
+
+    def mark_audio_sent(self):
+        # Only the chunks sent before the reply matter
+        if self._turn_open and self._first_response is None:
+            self._last_audio_sent = self.clock()
+
+    def mark_response(self):
+        if not self._turn_open or self._first_response is not None:
+            return
+        self._first_response = self.clock()
+        self._emit()
+
+    def mark_playback(self):
+        if self._first_response is None or self._first_playback is not None:
+            return
+        self._first_playback = self.clock()
+        self._emit()
+
+    # --- Tool calls ---
+
+    def tool_started(self) -> float:
+        return self.clock()
+
+    def tool_finished(self, name: str, started_at: float):
+        elapsed = self.clock() - started_at
+        self.record("tool_call", elapsed)
+        self.record(f"tool:{name}", elapsed)
+
+    def snapshot(self) -> dict:
+        return {metric: hist.snapshot() for metric, hist in sorted(self.histograms.items())}
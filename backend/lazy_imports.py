@@ -0,0 +1,214 @@
+"""
+Cold-start helpers for server.py: an import-time profiler and background imports.
+
+Importing server.py used to pull in sara.py, and with it google.genai,
+PyAudio, cv2, mss, mediapipe (through authenticator and
+generate_biometric) and python-kasa. It also built the genai client, the
+Live config and every agent, all before uvicorn accepted a connection.
+Those modules are now loaded on first use:
+
+- sara (and google.genai with it) loads in a worker thread right after
+  startup. start_audio awaits it.
+- mediapipe, cv2 and numpy load when face auth or biometric capture is
+  first used.
+- python-kasa loads when a Kasa device is first touched.
+- The AudioLoop agents are created on first access.
+
+ImportProfiler works like `python -X importtime`, without restarting the
+process. It wraps builtins.__import__ and times every module imported
+for the first time. The result is a tree of self and cumulative times.
+server.py installs it as its first statement and logs the breakdown at
+startup, then again once the background imports finish.
+"""
+
+import asyncio
+import builtins
+import importlib
+import importlib.util
+import sys
+import threading
+import time
+
+
+class _Node:
+    __slots__ = ("name", "cumulative", "children")
+
+    def __init__(self, name):
+        self.name = name
+        self.cumulative = 0.0
+        self.children = []
+
+    @property
+    def self_time(self) -> float:
+        return self.cumulative - sum(child.cumulative for child in self.children)
+
+
+class ImportProfiler:
+    """Times first-time imports as a tree (-X importtime style)."""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.roots = []
+        self.started = clock()
+        self._original = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def installed(self) -> bool:
+        return self._original is not None
+
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+        return self
+
+    def uninstall(self):
+        if self._original is not None and builtins.__import__ == self._import:
+            builtins.__import__ = self._original
+        self._original = None
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original or builtins.__import__
+        absolute = name
+        if level:
+            try:
+                absolute = importlib.util.resolve_name("." * level + name, (globals or {}).get("__package__"))
+            except (ImportError, ValueError):
+                pass
+        if absolute not in sys.modules:
+            with self.measure(absolute):
+                original(name, globals, locals, (), level)
+        if fromlist:
+            # `from pkg import submodule` loads the submodule inside __import__ without another
+            # __import__ call; load it first so it gets its own node instead of inflating pkg
+            module = sys.modules.get(absolute)
+            if module is not None and hasattr(module, "__path__"):
+                for item in fromlist:
+                    submodule = f"{absolute}.{item}"
+                    if item == "*" or submodule in sys.modules or hasattr(module, item):
+                        continue
+                    try:
+                        with self.measure(submodule):
+                            original(submodule)
+                    except ModuleNotFoundError:
+                        # Not a submodule; __import__ below raises the usual error if the name is missing
+                        pass
+        return original(name, globals, locals, fromlist, level)
+
+    def measure(self, name):
+        """Context manager that records `name` as one node (for importlib.import_module calls)."""
+        return _Measure(self, name)
+
+    def _push(self, name):
+        node = _Node(name)
+        self._stack().append((node, self.clock()))
+        return node
+
+    def _pop(self, node, failed):
+        stack = self._stack()
+        _, started = stack.pop()
+        node.cumulative = self.clock() - started
+        if failed:
+            # Optional dependencies that aren't installed; their time stays with the parent
+            return
+        if stack:
+            stack[-1][0].children.append(node)
+        else:
+            with self._lock:
+                self.roots.append(node)
+
+    def find(self, name):
+        for root in self.roots:
+            if root.name == name:
+                return root
+        return None
+
+    def report(self, roots=None, min_ms: float = 10.0, max_depth: int = 3, limit: int = 40) -> list:
+        """Lines of `self ms | cumulative ms | module`, in import order, hiding small imports."""
+        roots = self.roots if roots is None else roots
+        lines = []
+
+        def walk(node, depth):
+            if len(lines) >= limit or node.cumulative * 1000.0 < min_ms:
+                return
+            lines.append(f"{node.self_time * 1000.0:9.1f} | {node.cumulative * 1000.0:10.1f} | {'  ' * depth}{node.name}")
+            if depth + 1 < max_depth:
+                for child in node.children:
+                    walk(child, depth + 1)
+
+        for root in list(roots):
+            walk(root, 0)
+        return lines
+
+    def total(self, roots=None) -> float:
+        return sum(node.cumulative for node in (self.roots if roots is None else roots))
+
+    def log(self, title, roots=None, prefix="[SERVER] [STARTUP]", **kwargs):
+        lines = self.report(roots, **kwargs)
+        print(f"{prefix} {title}: {self.total(roots) * 1000.0:.0f} ms in imports")
+        print(f"{prefix}   self ms | cumulative | module")
+        for line in lines:
+            print(f"{prefix} {line}")
+
+
+class _Measure:
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.node = self.profiler._push(self.name)
+        return self.node
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profiler._pop(self.node, failed=exc_type is not None)
+        return False
+
+
+class BackgroundImport:
+    """Imports a heavy module in a worker thread; `await get()` returns it once loaded."""
+
+    def __init__(self, name, profiler=None):
+        self.name = name
+        self.profiler = profiler
+        self.seconds = None
+        self._future = None
+
+    @property
+    def module(self):
+        """The module if it is already loaded, else None (never blocks)."""
+        module = sys.modules.get(self.name)
+        if module is not None and (self._future is None or self._future.done()):
+            return module
+        return None
+
+    def _load(self):
+        started = time.perf_counter()
+        if self.profiler and self.profiler.installed:
+            with self.profiler.measure(self.name):
+                module = importlib.import_module(self.name)
+        else:
+            module = importlib.import_module(self.name)
+        self.seconds = time.perf_counter() - started
+        return module
+
+    def start(self):
+        """Starts the import (call from the event loop). Safe to call repeatedly."""
+        if self._future is None:
+            self._future = asyncio.ensure_future(asyncio.to_thread(self._load))
+        return self._future
+
+    async def get(self):
+        module = self.module
+        if module is not None:
+            return module
+        # shield: a cancelled caller must not cancel the shared import
+        return await asyncio.shield(self.start())
@@ -0,0 +1,175 @@
+"""
+Event-loop lag monitor and blocking-call detector for server.py.
+
+Audio glitches come from the event loop being blocked by synchronous
+work: file appends in ProjectManager.log_chat, save_settings, directory
+walks, cv2 calls, VAD math. Nothing showed where those stalls happen.
+
+LoopLagMonitor has two halves:
+
+- A heartbeat coroutine on the loop sleeps `interval` and measures how
+  late it wakes up. That lateness is the loop lag: every callback queued
+  at that moment waited at least that long. Every sample goes into a
+  rolling histogram and the sara_event_loop_lag_seconds metric.
+- A watchdog thread watches the heartbeat. When the loop is more than
+  `threshold` late, it samples the loop thread's stack with
+  sys._current_frames(). A blocked loop can't report on itself, so this
+  has to happen from outside while the block is still going on.
+
+When the heartbeat wakes up late, the stall is logged with its duration
+and the sample: the task's coroutine, the coroutine frame (file:line)
+that made the blocking call, and the innermost frame. The most recent
+stalls and a count per location are kept for /loop_stats.
+"""
+
+import asyncio
+import inspect
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter as Tally, deque
+
+import metrics
+from latency import RollingHistogram
+
+LOOP_LAG = metrics.histogram(
+    "sara_event_loop_lag_seconds", "How late the event loop heartbeat woke up",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = metrics.counter("sara_event_loop_stalls_total", "Event loop blocks longer than the stall threshold")
+
+
+def _frame_location(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{frame.f_lineno} in {code.co_name}"
+
+
+def describe_stack(frame, depth: int = 12) -> dict:
+    """Names the coroutine and line a blocked loop thread is stuck in."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    # frames[0] is the innermost call; coroutine frames sit between the task step and the blocking call
+    coroutines = [f for f in frames if f.f_code.co_flags & inspect.CO_COROUTINE]
+    return {
+        "blocking_call": _frame_location(frames[0]) if frames else None,
+        "coroutine": getattr(coroutines[-1].f_code, "co_qualname", coroutines[-1].f_code.co_name) if coroutines else None,
+        "location": _frame_location(coroutines[0]) if coroutines else (_frame_location(frames[0]) if frames else None),
+        "stack": [line.rstrip() for line in traceback.format_stack(frames[0], limit=depth)] if frames else [],
+    }
+
+
+class LoopLagMonitor:
+    """Measures event-loop lag and samples the stack of long blocks."""
+
+    def __init__(self, interval: float = 0.05, threshold: float = 0.1, max_stalls: int = 20,
+                 stack_depth: int = 12, log=True):
+        self.interval = interval
+        self.threshold = threshold
+        self.stack_depth = stack_depth
+        self.log = log
+        self.lag = RollingHistogram(maxlen=1200)
+        self.recent_stalls = deque(maxlen=max_stalls)
+        self.by_location = Tally()
+
+        self._loop = None
+        self._loop_thread = None
+        self._heartbeat = None
+        self._sample = None         # (heartbeat it belongs to, stack description)
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+        self.stalls = 0
+        self.blocked_seconds = 0.0
+        self.max_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        """Starts the heartbeat task and the watchdog thread (call from the loop)."""
+        if self.running:
+            return self._task
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stop.clear()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+        self._thread = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._thread.start()
+        return self._task
+
+    def stop(self):
+        self._stop.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            previous = self._heartbeat
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._heartbeat = now
+            lag = max(0.0, now - previous - self.interval)
+            self.lag.add(lag)
+            LOOP_LAG.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag >= self.threshold:
+                sample = self._sample
+                self._record_stall(lag, sample[1] if sample and sample[0] == previous else None)
+
+    def _watch(self):
+        # Polls often enough to catch a block shortly after it crosses the threshold
+        period = max(0.005, min(self.interval, self.threshold) / 2)
+        while not self._stop.wait(period):
+            beat = self._heartbeat
+            if beat is None or (self._sample and self._sample[0] == beat):
+                continue
+            if time.monotonic() - beat - self.interval < self.threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            try:
+                info = describe_stack(frame, self.stack_depth)
+                task = asyncio.current_task(self._loop)
+                info["task"] = task.get_name() if task else None
+            except Exception as e:
+                info = {"error": str(e)}
+            finally:
+                del frame
+            self._sample = (beat, info)
+
+    def _record_stall(self, lag, sample):
+        self.stalls += 1
+        self.blocked_seconds += lag
+        LOOP_STALLS.inc()
+        stall = {"time": time.time(), "lag_ms": round(lag * 1000.0, 1)}
+        if sample:
+            stall.update(sample)
+            self.by_location[sample.get("location")] += 1
+        self.recent_stalls.append(stall)
+        if self.log:
+            where = ""
+            if sample and sample.get("location"):
+                where = f" in {sample.get('coroutine')} at {sample['location']} (blocking call: {sample.get('blocking_call')})"
+            print(f"[SERVER] [LOOP] Event loop blocked for {lag * 1000:.0f} ms{where}")
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "interval_ms": round(self.interval * 1000.0, 1),
+            "threshold_ms": round(self.threshold * 1000.0, 1),
+            "lag": self.lag.snapshot(),
+            "max_lag_ms": round(self.max_lag * 1000.0, 1),
+            "stalls": self.stalls,
+            "blocked_ms": round(self.blocked_seconds * 1000.0, 1),
+            "top_locations": [{"location": loc, "stalls": n} for loc, n in self.by_location.most_common(10)],
+            "recent_stalls": list(self.recent_stalls),
+        }
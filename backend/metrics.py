@@ -0,0 +1,275 @@
+"""
+Process-wide metrics in the Prometheus text exposition format.
+
+server.py serves REGISTRY.render() on /metrics. The modules that own the
+measurements declare their metrics at import time and update them in place:
+
+    LIVE_MESSAGES = metrics.counter("sara_live_messages_total", "Messages received from the Live API")
+    LIVE_MESSAGES.inc()
+
+    KASA_SECONDS = metrics.histogram("sara_kasa_command_seconds", "Kasa command latency",
+                                     ["command", "result"])
+    KASA_SECONDS.labels(command="turn_on", result="ok").observe(0.12)
+
+Counters only go up; rates (messages per second, emits per second, auth
+frames per second) come from rate() on the Prometheus side. Gauges that
+mirror live state (queue depths) are filled in by collectors, callbacks
+that run right before each render.
+
+Declaring the same metric twice returns the existing one, so modules can be
+re-imported (tests, reloads). No dependency on prometheus_client.
+"""
+
+import math
+import threading
+import time
+
+# Prometheus client defaults, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        return repr(value)
+    return str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Child:
+    """A metric bound to one set of label values."""
+
+    def __init__(self, metric, key):
+        self._metric = metric
+        self._key = key
+
+    def inc(self, amount: float = 1.0):
+        self._metric._inc(self._key, amount)
+
+    def dec(self, amount: float = 1.0):
+        self._metric._inc(self._key, -amount)
+
+    def set(self, value: float):
+        self._metric._set(self._key, value)
+
+    def observe(self, value: float):
+        self._metric._observe(self._key, value)
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    """Context manager that observes the elapsed seconds."""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._target.observe(time.perf_counter() - self._started)
+        return False
+
+
+class Metric:
+    type = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs) -> _Child:
+        if kwargs:
+            if values or set(kwargs) != set(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            values = tuple(kwargs[name] for name in self.labelnames)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return _Child(self, tuple(str(v) for v in values))
+
+    def _unlabelled(self) -> _Child:
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use .labels()")
+        return _Child(self, ())
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def samples(self):
+        """(suffix, label text, value) tuples for rendering."""
+        with self._lock:
+            items = sorted(self._values.items())
+        return [("", _label_text(self.labelnames, key), value) for key, value in items]
+
+    def value(self, **labels):
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            return self._values.get(key)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def _inc(self, key, amount):
+        if amount < 0:
+            raise ValueError("Counters can only go up")
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def inc(self, amount: float = 1.0):
+        self._unlabelled().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._unlabelled().dec(amount)
+
+    def set(self, value: float):
+        self._unlabelled().set(value)
+
+    def _inc(self, key, amount):
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _set(self, key, value):
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(float(b) for b in buckets if b != math.inf))
+
+    def observe(self, value: float):
+        self._unlabelled().observe(value)
+
+    def time(self):
+        return _Timer(self._unlabelled())
+
+    def _observe(self, key, value):
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (non-cumulative), sum, count
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+        out = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                out.append(("_bucket", _label_text(self.labelnames, key, [("le", _format_value(bound))]), cumulative))
+            out.append(("_bucket", _label_text(self.labelnames, key, [("le", "+Inf")]), count))
+            out.append(("_sum", _label_text(self.labelnames, key), total))
+            out.append(("_count", _label_text(self.labelnames, key), count))
+        return out
+
+    def value(self, **labels):
+        """(count, sum) for the label set, or None."""
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            state = self._values.get(key)
+            return (state[2], state[1]) if state else None
+
+
+class Registry:
+    """Named metrics plus collectors, rendered as Prometheus text."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} already registered as {metric.type} {metric.labelnames}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def add_collector(self, collect):
+        """Registers collect(), called before every render to refresh gauges from live state."""
+        self._collectors.append(collect)
+
+    def render(self) -> str:
+        for collect in list(self._collectors):
+            try:
+                collect()
+            except Exception as e:
+                print(f"[SERVER] [METRICS] Collector failed: {e}")
+        lines = []
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name, documentation, labelnames=()) -> Counter:
+    return REGISTRY.counter(name, documentation, labelnames)
+
+
+def gauge(name, documentation, labelnames=()) -> Gauge:
+    return REGISTRY.gauge(name, documentation, labelnames)
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.histogram(name, documentation, labelnames, buckets)
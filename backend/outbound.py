@@ -0,0 +1,120 @@
+"""
+Priority-aware outbound queue for AudioLoop.send_realtime.
+
+Replaces the single asyncio.Queue(maxsize=10) shared by mic audio and video
+frames. Messages are routed into lanes by mime type and always dequeued in
+priority order, so 2 KB PCM chunks never wait behind a large JPEG payload:
+
+    audio  -> realtime PCM from listen_audio         (highest priority)
+    image  -> camera/screen frames, drop-oldest       (keeps only the newest)
+    text   -> text/context messages, lossless         (lowest priority)
+
+put() never blocks the producer; a full lane drops its oldest entry instead.
+Each lane reports depth, throughput, drops and queue wait times.
+"""
+
+import asyncio
+import time
+from collections import deque
+
+LANE_AUDIO = "audio"
+LANE_IMAGE = "image"
+LANE_TEXT = "text"
+
+# Lane name -> max entries (0 = unbounded), in priority order
+DEFAULT_LANES = (
+    (LANE_AUDIO, 100),  # ~6 s of 64 ms chunks
+    (LANE_IMAGE, 2),
+    (LANE_TEXT, 0),
+)
+
+
+def classify(msg) -> str:
+    """Returns the lane for an outbound message."""
+    if isinstance(msg, dict):
+        mime_type = msg.get("mime_type", "")
+        if mime_type.startswith("audio/"):
+            return LANE_AUDIO
+        if mime_type.startswith("image/"):
+            return LANE_IMAGE
+    return LANE_TEXT
+
+
+class _Lane:
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self.items = deque()
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.last_wait = 0.0
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.items),
+            "maxsize": self.maxsize,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "avg_wait_ms": round(self.wait_total / self.sent * 1000.0, 2) if self.sent else 0.0,
+            "max_wait_ms": round(self.wait_max * 1000.0, 2),
+            "last_wait_ms": round(self.last_wait * 1000.0, 2),
+        }
+
+
+class OutboundScheduler:
+    """Multi-lane queue with the asyncio.Queue surface AudioLoop uses (put/get/qsize/empty)."""
+
+    def __init__(self, lanes=DEFAULT_LANES):
+        self._lanes = [_Lane(name, maxsize) for name, maxsize in lanes]
+        self._by_name = {lane.name: lane for lane in self._lanes}
+        self._data_event = asyncio.Event()
+
+    def lane(self, name) -> _Lane:
+        return self._by_name[name]
+
+    def put_nowait(self, msg):
+        lane = self._by_name.get(classify(msg), self._lanes[-1])
+        if lane.maxsize and len(lane.items) >= lane.maxsize:
+            lane.items.popleft()
+            lane.dropped += 1
+        lane.items.append((time.monotonic(), msg))
+        lane.enqueued += 1
+        self._data_event.set()
+
+    async def put(self, msg):
+        # Never blocks: lanes are drop-oldest when bounded
+        self.put_nowait(msg)
+
+    def get_nowait(self):
+        for lane in self._lanes:
+            if lane.items:
+                enqueued_at, msg = lane.items.popleft()
+                wait = time.monotonic() - enqueued_at
+                lane.sent += 1
+                lane.wait_total += wait
+                lane.last_wait = wait
+                if wait > lane.wait_max:
+                    lane.wait_max = wait
+                return msg
+        raise asyncio.QueueEmpty
+
+    async def get(self):
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self._data_event.clear()
+                await self._data_event.wait()
+
+    def qsize(self) -> int:
+        return sum(len(lane.items) for lane in self._lanes)
+
+    def empty(self) -> bool:
+        return self.qsize() == 0
+
+    def stats(self) -> dict:
+        return {lane.name: lane.stats() for lane in self._lanes}
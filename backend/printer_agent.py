@@ -8,8 +8,10 @@ Supported Printer Types:
 """
 
 import asyncio
+import functools
 import os
 import subprocess
+import time
 import json
 import platform
 from typing import Dict, List, Optional, Any
@@ -19,6 +21,16 @@ from enum import Enum
 import aiohttp
 from zeroconf import Zeroconf, ServiceBrowser, ServiceListener
 
+import metrics
+
+SLICE_SECONDS = metrics.histogram(
+    "sara_slicing_seconds", "STL to G-code slicing duration", ["result"],
+    buckets=(1.0, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0),
+)
+PRINTER_POLL_SECONDS = metrics.histogram(
+    "sara_printer_poll_seconds", "Printer status request latency", ["printer_type", "result"],
+)
+
 
 class PrinterType(Enum):
     OCTOPRINT = "octoprint"
@@ -108,12 +120,18 @@ class PrinterAgent:
         self._zeroconf: Optional[Zeroconf] = None
         self._error_tracker = set() # Track hosts with errors to prevent log spam
         
-        # Detect slicer path and profiles directory
-        self.slicer_path = self._detect_slicer_path()
-        self._orca_profiles_dir = self._detect_orca_profiles_dir()
+        # Slicer path and OrcaSlicer profiles directory are probed on first use (see the properties below)
         
         # Ensure profiles directory exists
         os.makedirs(profiles_dir, exist_ok=True)
+
+    @functools.cached_property
+    def slicer_path(self) -> Optional[str]:
+        return self._detect_slicer_path()
+
+    @functools.cached_property
+    def _orca_profiles_dir(self) -> Optional[str]:
+        return self._detect_orca_profiles_dir()
     
     def _detect_orca_profiles_dir(self) -> Optional[str]:
         """Detect OrcaSlicer profiles directory."""
@@ -571,6 +589,16 @@ class PrinterAgent:
         Returns:
             Path to generated G-code file, or None on failure
         """
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await self._slice_stl(stl_path, output_path, profile_path,
+                                           progress_callback, root_path, printer_name)
+            return result
+        finally:
+            SLICE_SECONDS.labels(result="ok" if result else "failed").observe(time.perf_counter() - started)
+
+    async def _slice_stl(self, stl_path, output_path, profile_path, progress_callback, root_path, printer_name):
         if not self.slicer_path:
             print("[PRINTER] Error: Slicer not found")
             return None
@@ -852,11 +880,20 @@ class PrinterAgent:
             return None
             
         if printer.printer_type == PrinterType.OCTOPRINT:
-            return await self._status_octoprint(printer)
+            fetch = self._status_octoprint
         elif printer.printer_type == PrinterType.MOONRAKER:
-            return await self._status_moonraker(printer)
+            fetch = self._status_moonraker
         else:
             return None
+
+        started = time.perf_counter()
+        status = None
+        try:
+            status = await fetch(printer)
+            return status
+        finally:
+            PRINTER_POLL_SECONDS.labels(printer_type=printer.printer_type.value,
+                                        result="ok" if status else "failed").observe(time.perf_counter() - started)
             
     async def _status_octoprint(self, printer: Printer) -> Optional[PrintStatus]:
         """Get status from OctoPrint."""
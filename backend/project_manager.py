@@ -4,42 +4,75 @@ import shutil
 import time
 from pathlib import Path
 
+SCRATCH_PROJECT = "temp"
+# Per-session scratch projects live under projects/.scratch/. safe_project_name drops
+# the dot, so no project a user creates can ever land in (or be cleared with) this folder.
+SCRATCH_DIR = ".scratch"
+
+
+def safe_project_name(name: str) -> str:
+    # Sanitize name to be safe for filesystem
+    return "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
+
+
+def scratch_project_name(session_name=None) -> str:
+    """Scratch project of a session: '.scratch/<session>', or 'temp' when there is only one session."""
+    if not session_name:
+        return SCRATCH_PROJECT
+    return f"{SCRATCH_DIR}/{safe_project_name(str(session_name)) or 'session'}"
+
+
+def clear_scratch_projects(workspace_root: str):
+    """Deletes 'temp' and every session's scratch project. Call once at process start, before any session exists."""
+    projects_dir = Path(workspace_root) / "projects"
+    for name in (SCRATCH_PROJECT, SCRATCH_DIR):
+        path = projects_dir / name
+        if path.is_dir():
+            print(f"[ProjectManager] Clearing scratch project(s) {name}...")
+            shutil.rmtree(path, ignore_errors=True)
+
+
 class ProjectManager:
-    def __init__(self, workspace_root: str):
+    def __init__(self, workspace_root: str, scratch_project: str = SCRATCH_PROJECT):
         self.workspace_root = Path(workspace_root)
         self.projects_dir = self.workspace_root / "projects"
-        self.current_project = "temp"
+        # Other sessions may be using their own scratch projects under the same root; never clear them here
+        self.scratch_project = scratch_project
+        self.current_project = scratch_project
         
         # Ensure projects root exists
         if not self.projects_dir.exists():
             self.projects_dir.mkdir(parents=True)
             
-        # Clear temp project on startup if it exists
-        temp_path = self.projects_dir / "temp"
-        if temp_path.exists():
-            print("[ProjectManager] Clearing temp project...")
-            shutil.rmtree(temp_path)
-            
-        # Ensure temp project receives fresh creation
-        self.create_project("temp")
+        # Kept if it exists: a reconnecting session picks up where it left off
+        self._make_project_dir(self.projects_dir / scratch_project)
+
+    @property
+    def in_scratch_project(self) -> bool:
+        return self.current_project == self.scratch_project
+
+    @staticmethod
+    def _make_project_dir(project_path) -> bool:
+        if project_path.exists():
+            return False
+        project_path.mkdir(parents=True)
+        (project_path / "cad").mkdir()
+        (project_path / "browser").mkdir()
+        return True
 
     def create_project(self, name: str):
         """Creates a new project directory with subfolders."""
-        # Sanitize name to be safe for filesystem
-        safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
+        safe_name = safe_project_name(name)
         project_path = self.projects_dir / safe_name
         
-        if not project_path.exists():
-            project_path.mkdir()
-            (project_path / "cad").mkdir()
-            (project_path / "browser").mkdir()
+        if self._make_project_dir(project_path):
             print(f"[ProjectManager] Created project: {safe_name}")
             return True, f"Project '{safe_name}' created."
         return False, f"Project '{safe_name}' already exists."
 
     def switch_project(self, name: str):
         """Switches the active project context."""
-        safe_name = "".join([c for c in name if c.isalnum() or c in (' ', '-', '_')]).strip()
+        safe_name = safe_project_name(name)
         project_path = self.projects_dir / safe_name
         
         if project_path.exists():
@@ -50,7 +83,7 @@ class ProjectManager:
 
     def list_projects(self):
         """Returns a list of available projects."""
-        return [d.name for d in self.projects_dir.iterdir() if d.is_dir()]
+        return [d.name for d in self.projects_dir.iterdir() if d.is_dir() and d.name != SCRATCH_DIR]
 
     def get_current_project_path(self):
         return self.projects_dir / self.current_project
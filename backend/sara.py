@@ -1,17 +1,12 @@
 import asyncio
-import base64
-import io
 import os
 import sys
 import traceback
 from dotenv import load_dotenv
-import cv2
 import pyaudio
-import PIL.Image
-import mss
 import argparse
-import math
-import struct
+import concurrent.futures
+import functools
 import time
 
 from google import genai
@@ -23,8 +18,30 @@ if sys.version_info < (3, 11, 0):
     asyncio.ExceptionGroup = exceptiongroup.ExceptionGroup
 
 from tools import tools_list
+from vad import create_vad
+from dtx import SilenceSuppressor
+from audio_capture import CallbackAudioCapture
+from audio_playback import JitterBuffer, InterruptiblePlayer
+from outbound import OutboundScheduler, LANE_AUDIO, LANE_IMAGE
+from latency import LatencyTracer
+from session_recording import SessionRecorder
+from tool_dispatch import ToolDispatcher
+from frame_mailbox import FrameMailbox
+from keyframes import KeyframeSelector
+from screen_capture import ScreenCapture, ScreenPacer
+from camera_capture import CameraFramePipeline, AdaptiveFrameRate, open_camera
+from tool_confirmation import ConfirmationBroker, APPROVED, CANCELLED, TIMEOUT, WITHDRAWN
+from session_resumption import SessionResumption, RollingContext
+from transcript import TranscriptBuilder
+import metrics
 from pathlib import Path
 
+LIVE_MESSAGES = metrics.counter("sara_live_messages_total", "Messages received from the Live API")
+TOOL_CALL_SECONDS = metrics.histogram(
+    "sara_tool_call_seconds", "Tool handler latency per tool", ["tool", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+
 
 
 FORMAT = pyaudio.paInt16
@@ -37,7 +54,14 @@ MODEL = "models/gemini-2.5-flash-native-audio-preview-12-2025"
 DEFAULT_MODE = "camera"
 
 load_dotenv()
-client = genai.Client(http_options={"api_version": "v1beta"}, api_key=os.getenv("GEMINI_API_KEY"))
+_client = None
+
+def get_client():
+    """The genai client, built on first use (the first Live connect)."""
+    global _client
+    if _client is None:
+        _client = genai.Client(http_options={"api_version": "v1beta"}, api_key=os.getenv("GEMINI_API_KEY"))
+    return _client
 
 # Function definitions
 generate_cad = {
@@ -225,32 +249,43 @@ def reload_system_prompt(settings=None):
     if config:
         config.system_instruction = load_system_prompt(settings)
 
-# --- CONFIG UPDATE: Enabled Transcription ---
-config = types.LiveConnectConfig(
-    response_modalities=["AUDIO"],
-    # We switch these from [] to {} to enable them with default settings
-    output_audio_transcription={}, 
-    input_audio_transcription={},
-    system_instruction=load_system_prompt(SETTINGS),
-    tools=tools,
-    speech_config=types.SpeechConfig(
-        voice_config=types.VoiceConfig(
-            prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                voice_name="Kore"
+# Built on first connect (reads the system prompt), see get_config()
+config = None
+
+def get_config():
+    global config
+    if config is None:
+        # --- CONFIG UPDATE: Enabled Transcription ---
+        config = types.LiveConnectConfig(
+            response_modalities=["AUDIO"],
+            # We switch these from [] to {} to enable them with default settings
+            output_audio_transcription={}, 
+            input_audio_transcription={},
+            system_instruction=load_system_prompt(SETTINGS),
+            tools=tools,
+            speech_config=types.SpeechConfig(
+                voice_config=types.VoiceConfig(
+                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                        voice_name="Kore"
+                    )
+                )
             )
         )
-    )
-)
+    return config
+
+_pya = None
 
-pya = pyaudio.PyAudio()
+def get_pyaudio():
+    """The shared PyAudio instance, initialised on first use (PortAudio scans every device)."""
+    global _pya
+    if _pya is None:
+        _pya = pyaudio.PyAudio()
+    return _pya
 
-from cad_agent import CadAgent
-from web_agent import WebAgent
 from kasa_agent import KasaAgent
-from printer_agent import PrinterAgent
 
 class AudioLoop:
-    def __init__(self, video_mode=DEFAULT_MODE, on_audio_data=None, on_video_frame=None, on_cad_data=None, on_web_data=None, on_transcription=None, on_tool_confirmation=None, on_cad_status=None, on_cad_thought=None, on_project_update=None, on_device_update=None, on_error=None, input_device_index=None, input_device_name=None, output_device_index=None, kasa_agent=None, settings=None):
+    def __init__(self, video_mode=DEFAULT_MODE, on_audio_data=None, on_video_frame=None, on_cad_data=None, on_web_data=None, on_transcription=None, on_tool_confirmation=None, on_tool_confirmation_closed=None, on_cad_status=None, on_cad_thought=None, on_cad_job=None, on_project_update=None, on_device_update=None, on_error=None, input_device_index=None, input_device_name=None, output_device_index=None, kasa_agent=None, settings=None, live_connect=None, audio_interface=None, project_root=None, session_name=None):
         self.video_mode = video_mode
         self.on_audio_data = on_audio_data
         self.on_video_frame = on_video_frame
@@ -258,8 +293,10 @@ class AudioLoop:
         self.on_web_data = on_web_data
         self.on_transcription = on_transcription
         self.on_tool_confirmation = on_tool_confirmation 
+        self.on_tool_confirmation_closed = on_tool_confirmation_closed
         self.on_cad_status = on_cad_status
         self.on_cad_thought = on_cad_thought
+        self.on_cad_job = on_cad_job
         self.on_project_update = on_project_update
         self.on_device_update = on_device_update
         self.on_error = on_error
@@ -268,15 +305,21 @@ class AudioLoop:
         self.output_device_index = output_device_index
         self.settings = settings or {}
 
+        # Injection points for offline runs (fake Live session / fake audio devices)
+        self.live_connect = live_connect
+        # PyAudio is initialised off the event loop when run() starts, unless one was injected
+        self.pya = audio_interface
+
         self.audio_in_queue = None
         self.out_queue = None
         self.paused = False
 
-        self.chat_buffer = {"sender": None, "text": ""} # For aggregating chunks
-        
-        # Track last transcription text to calculate deltas (Gemini sends cumulative text)
-        self._last_input_transcription = ""
-        self._last_output_transcription = ""
+        # Transcription deltas, batched frontend emits and chat log entries
+        self.transcript = TranscriptBuilder(
+            on_emit=self.on_transcription,
+            on_turn=self.log_turn,
+            emit_interval_s=self.settings.get("transcript_emit_interval_ms", 50) / 1000.0,
+        )
 
         self.audio_in_queue = None
         self.out_queue = None
@@ -284,19 +327,8 @@ class AudioLoop:
 
         self.session = None
         
-        # Create CadAgent with thought callback
-        def handle_cad_thought(thought_text):
-            if self.on_cad_thought:
-                self.on_cad_thought(thought_text)
-        
-        def handle_cad_status(status_info):
-            if self.on_cad_status:
-                self.on_cad_status(status_info)
-        
-        self.cad_agent = CadAgent(on_thought=handle_cad_thought, on_status=handle_cad_status)
-        self.web_agent = WebAgent()
+        # cad_agent, web_agent and printer_agent are created on first use (see the properties below)
         self.kasa_agent = kasa_agent if kasa_agent else KasaAgent()
-        self.printer_agent = PrinterAgent()
 
         self.send_text_task = None
         self.stop_event = asyncio.Event()
@@ -304,22 +336,69 @@ class AudioLoop:
         self.stop_event = asyncio.Event()
         
         self.permissions = {} # Default Empty (Will treat unset as True)
-        self._pending_confirmations = {}
+        # Confirmations are waited on outside receive_audio so the Live stream keeps flowing
+        self.confirmations = ConfirmationBroker(
+            on_request=self._request_confirmation,
+            on_closed=self._close_confirmation,
+            on_wait=self._on_confirmation_wait,
+            timeout=self.settings.get("tool_confirmation_timeout_s", 60),
+        )
+        self._tool_tasks = set()
 
-        # Video buffering state
-        self._latest_image_payload = None
+        # Tool name -> handler registry; independent calls run concurrently
+        self.tool_dispatcher = ToolDispatcher(on_call_finished=self._on_tool_finished)
+        self._register_tools()
+
+        # Video buffering state: recent renderer frames, encoded only when forwarded
+        self.keyframes = None
+        if self.settings.get("keyframe_selection", True):
+            self.keyframes = KeyframeSelector(change_threshold=self.settings.get("keyframe_change_threshold", 6))
+        self.frames = FrameMailbox(window=self.settings.get("keyframe_window", 5) if self.keyframes else 1)
         # VAD State
         self._is_speaking = False
         self._silence_start_time = None
+        self.vad = create_vad(self.settings, sample_rate=SEND_SAMPLE_RATE)
+        # Upstream silence suppression (None = every mic chunk is sent)
+        self.dtx = None
+        if self.settings.get("dtx_enabled", True):
+            self.dtx = SilenceSuppressor(
+                chunk_ms=CHUNK_SIZE * 1000.0 / SEND_SAMPLE_RATE,
+                preroll_ms=self.settings.get("dtx_preroll_ms", 300),
+                hangover_ms=self.settings.get("dtx_hangover_ms", 1000),
+                keepalive_s=self.settings.get("dtx_keepalive_s", 2.0),
+            )
+        self.latency = LatencyTracer()
+
+        # Screen / camera streaming (set up in get_screen / get_frames)
+        self.screen = None
+        self.camera = None
+
+        # Mic capture (set up in listen_audio)
+        self.audio_stream = None
+        self._capture = None
+        # Speaker playback (set up in play_audio)
+        self._player = None
+        # Session recorder (one file per connection when session_recording_dir is set)
+        self.recorder = None
+
+        # Reconnects resume the Live session by handle, or fall back to a rolling context message
+        self.resumption = SessionResumption(enabled=self.settings.get("session_resumption", True))
+        self.context = RollingContext(token_budget=self.settings.get("reconnect_context_tokens", 2000))
+        self._resuming_with = None      # Handle passed to the current connect, if any
+        self._disconnected_at = None    # Latency clock time the last session dropped
         
         # Initialize ProjectManager
-        from project_manager import ProjectManager
+        from project_manager import ProjectManager, scratch_project_name
         # Assuming we are running from backend/ or root? 
         # Using abspath of current file to find root
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        # If ada.py is in backend/, project root is one up
-        project_root = os.path.dirname(current_dir)
-        self.project_manager = ProjectManager(project_root)
+        if project_root is None:
+            current_dir = os.path.dirname(os.path.abspath(__file__))
+            # If ada.py is in backend/, project root is one up
+            project_root = os.path.dirname(current_dir)
+        # Each session gets its own scratch project; the server clears them all once at startup
+        self.project_manager = ProjectManager(project_root, scratch_project_name(session_name))
+        # Older turns are folded into the reconnect context's summary as it fills up
+        self.context.extend(self.project_manager.get_recent_chat_history(limit=50))
         
         # Sync Initial Project State
         if self.on_project_update:
@@ -328,14 +407,91 @@ class AudioLoop:
             # We will handle this by calling it in run() or just print for now.
             pass
 
+    @functools.cached_property
+    def cad_agent(self):
+        from cad_agent import CadAgent
+
+        # Create CadAgent with thought callback
+        def handle_cad_thought(thought_text):
+            if self.on_cad_thought:
+                self.on_cad_thought(thought_text)
+
+        def handle_cad_status(status_info):
+            if self.on_cad_status:
+                self.on_cad_status(status_info)
+
+        import cad_workers
+        limits = cad_workers.ScriptLimits.from_settings(self.settings)
+        worker_pool = None
+        if self.settings.get("cad_worker_pool", 2) > 0:
+            worker_pool = cad_workers.shared_pool(
+                size=self.settings.get("cad_worker_pool", 2),
+                max_jobs_per_worker=self.settings.get("cad_worker_max_jobs", 25),
+                limits=limits,
+            )
+        cache = None
+        if self.settings.get("cad_cache_enabled", True):
+            import cad_cache
+            cache = cad_cache.shared_cache(
+                self.settings.get("cad_cache_dir") or str(self.project_manager.workspace_root / "cad_cache"),
+                max_mesh_bytes=self.settings.get("cad_cache_max_mb", 256) * 1024 * 1024,
+                max_scripts=self.settings.get("cad_cache_max_scripts", 2000),
+            )
+        return CadAgent(on_thought=handle_cad_thought, on_status=handle_cad_status, worker_pool=worker_pool,
+                        script_limits=limits, cache=cache)
+
+    @functools.cached_property
+    def cad_jobs(self):
+        from cad_jobs import CadJobScheduler
+        return CadJobScheduler(
+            self._run_cad_job,
+            max_concurrent=self.settings.get("cad_max_concurrent_jobs", 2),
+            on_event=self._on_cad_job_event,
+        )
+
+    async def _run_cad_job(self, job):
+        if job.mode == "iterate":
+            return await self.cad_agent.iterate_prototype(job.prompt, output_dir=job.workspace)
+        return await self.cad_agent.generate_prototype(job.prompt, output_dir=job.workspace)
+
+    def _on_cad_job_event(self, event):
+        if self.on_cad_job:
+            self.on_cad_job(event)
+        # The CAD window leaves its loading state once nothing is left running
+        if event["status"] == "cancelled" and event["run_s"] is not None and not self.cad_jobs.running:
+            if self.on_cad_status:
+                self.on_cad_status({"status": "cancelled", "attempt": None, "max_attempts": None, "error": None})
+
+    async def run_cad_job(self, mode, prompt, priority=0):
+        """Runs a generate/iterate request as a CAD job in the current project; raises CadJobCancelled if cancelled."""
+        cad_dir = str(self.project_manager.get_current_project_path() / "cad")
+        return await self.cad_jobs.run(mode, prompt, cad_dir, priority=priority)
+
+    def cancel_cad(self, job_id=None) -> int:
+        """Cancels one CAD job, or all of them (the `cancel_cad` event). Returns how many were cancelled."""
+        # Don't create the scheduler just to find it idle
+        if "cad_jobs" not in self.__dict__:
+            return 0
+        return self.cad_jobs.cancel(job_id)
+
+    @functools.cached_property
+    def web_agent(self):
+        from web_agent import WebAgent
+        return WebAgent()
+
+    @functools.cached_property
+    def printer_agent(self):
+        from printer_agent import PrinterAgent
+        return PrinterAgent()
+
+    def log_turn(self, sender, text):
+        """Writes a finished turn to the project history and the reconnect context."""
+        self.project_manager.log_chat(sender, text)
+        self.context.add_turn(sender, text)
+
     def flush_chat(self):
-        """Forces the current chat buffer to be written to log."""
-        if self.chat_buffer["sender"] and self.chat_buffer["text"].strip():
-            self.project_manager.log_chat(self.chat_buffer["sender"], self.chat_buffer["text"])
-            self.chat_buffer = {"sender": None, "text": ""}
-        # Reset transcription tracking for new turn
-        self._last_input_transcription = ""
-        self._last_output_transcription = ""
+        """Forces the current chat entry to be written to log (turn boundary)."""
+        self.transcript.end_turn()
 
     def update_permissions(self, new_perms):
         print(f"[SARA DEBUG] [CONFIG] Updating tool permissions: {new_perms}")
@@ -347,60 +503,81 @@ class AudioLoop:
     def stop(self):
         self.stop_event.set()
         
-    def resolve_tool_confirmation(self, request_id, confirmed):
+    def resolve_tool_confirmation(self, request_id, confirmed, decisions=None):
         print(f"[SARA DEBUG] [RESOLVE] resolve_tool_confirmation called. ID: {request_id}, Confirmed: {confirmed}")
-        if request_id in self._pending_confirmations:
-            future = self._pending_confirmations[request_id]
-            if not future.done():
-                print(f"[SARA DEBUG] [RESOLVE] Future found and pending. Setting result to: {confirmed}")
-                future.set_result(confirmed)
-            else:
-                 print(f"[SARA DEBUG] [WARN] Request {request_id} future already done. Result: {future.result()}")
-        else:
-            print(f"[SARA DEBUG] [WARN] Confirmation Request {request_id} not found in pending dict. Keys: {list(self._pending_confirmations.keys())}")
+        if not self.confirmations.resolve(request_id, confirmed, decisions):
+            print(f"[SARA DEBUG] [WARN] Confirmation Request {request_id} not found (already answered, timed out or cancelled).")
 
     def clear_audio_queue(self):
-        """Clears the queue of pending audio chunks to stop playback immediately."""
+        """Clears pending audio and aborts the chunk being played to stop playback immediately."""
         try:
-            count = 0
-            while not self.audio_in_queue.empty():
-                self.audio_in_queue.get_nowait()
-                count += 1
+            count = self.audio_in_queue.clear() if self.audio_in_queue else 0
+            if self._player:
+                self._player.interrupt()
             if count > 0:
                 print(f"[SARA DEBUG] [AUDIO] Cleared {count} chunks from playback queue due to interruption.")
         except Exception as e:
             print(f"[SARA DEBUG] [ERR] Failed to clear audio queue: {e}")
 
-    async def send_frame(self, frame_data):
-        # Update the latest frame payload
-        if isinstance(frame_data, bytes):
-            b64_data = base64.b64encode(frame_data).decode('utf-8')
-        else:
-            b64_data = frame_data 
+    def get_audio_stats(self):
+        """Returns capture/playback buffer counters, barge-in latency and outbound lane metrics."""
+        return {
+            "capture_overruns": self._capture.ring.overruns if self._capture else 0,
+            "playback": self.audio_in_queue.stats() if self.audio_in_queue else None,
+            "player": self._player.stats() if self._player else None,
+            "outbound": self.out_queue.stats() if self.out_queue else None,
+            "screen": self.screen.stats() if self.screen else None,
+            "camera": self.camera.stats() if self.camera else None,
+            "resumption": {**self.resumption.stats(), "context": self.context.stats()},
+            "transcript": self.transcript.stats(),
+            "dtx": self.dtx.stats() if self.dtx else None,
+            "frames": {**self.frames.stats(), **(self.keyframes.stats() if self.keyframes else {})},
+        }
+
+    def post_frame(self, frame_data):
+        """Stores the newest frame (raw JPEG bytes or base64 str). listen_audio pulls it on speech start."""
+        self.frames.put(frame_data)
 
-        # Store as the designated "next frame to send"
-        self._latest_image_payload = {"mime_type": "image/jpeg", "data": b64_data}
-        # No event signal needed - listen_audio pulls it
+    async def send_frame(self, frame_data):
+        self.post_frame(frame_data)
+
+    async def _select_frame(self):
+        """Frame payload to forward on speech start: the sharpest recent frame, or None if the scene is unchanged."""
+        if not self.keyframes:
+            return self.frames.take()
+        frames = self.frames.recent()
+        if not frames:
+            # No new frames since the last upload
+            return None
+        # Decoding a handful of JPEGs is cheap, but keep it off the event loop
+        frame = await asyncio.to_thread(self.keyframes.choose, frames)
+        if frame is None:
+            self.frames.skip()
+            return None
+        return self.frames.take(frame)
 
     async def send_realtime(self):
         while True:
             msg = await self.out_queue.get()
             await self.session.send(input=msg, end_of_turn=False)
+            if isinstance(msg, dict) and msg.get("mime_type") == "audio/pcm":
+                self.latency.mark_audio_sent()
 
-    async def listen_audio(self):
-        mic_info = pya.get_default_input_device_info()
+    def _resolve_input_device(self):
+        """Resolves input_device_name / input_device_index to a PyAudio device index."""
+        mic_info = self.pya.get_default_input_device_info()
 
         # Resolve Input Device by Name if provided
         resolved_input_device_index = None
         
         if self.input_device_name:
             print(f"[SARA] Attempting to find input device matching: '{self.input_device_name}'")
-            count = pya.get_device_count()
+            count = self.pya.get_device_count()
             best_match = None
             
             for i in range(count):
                 try:
-                    info = pya.get_device_info_by_index(i)
+                    info = self.pya.get_device_info_by_index(i)
                     if info['maxInputChannels'] > 0:
                         name = info.get('name', '')
                         # Simple case-insensitive check
@@ -429,66 +606,93 @@ class AudioLoop:
 
         if resolved_input_device_index is None:
              print("[SARA] Using Default Input Device")
+             resolved_input_device_index = mic_info["index"]
+
+        return resolved_input_device_index
+
+    async def listen_audio(self):
+        input_device_index = self._resolve_input_device()
+        capture_mode = self.settings.get("audio_capture_mode", "callback")
 
         try:
-            self.audio_stream = await asyncio.to_thread(
-                pya.open,
-                format=FORMAT,
-                channels=CHANNELS,
-                rate=SEND_SAMPLE_RATE,
-                input=True,
-                input_device_index=resolved_input_device_index if resolved_input_device_index is not None else mic_info["index"],
-                frames_per_buffer=CHUNK_SIZE,
-            )
+            if capture_mode == "callback":
+                # PortAudio pushes chunks into a ring buffer; no executor round trip per read
+                self._capture = CallbackAudioCapture(
+                    self.pya,
+                    format=FORMAT,
+                    channels=CHANNELS,
+                    rate=SEND_SAMPLE_RATE,
+                    frames_per_buffer=CHUNK_SIZE,
+                    input_device_index=input_device_index,
+                )
+                self.audio_stream = await asyncio.to_thread(self._capture.open, asyncio.get_running_loop())
+            else:
+                self._capture = None
+                self.audio_stream = await asyncio.to_thread(
+                    self.pya.open,
+                    format=FORMAT,
+                    channels=CHANNELS,
+                    rate=SEND_SAMPLE_RATE,
+                    input=True,
+                    input_device_index=input_device_index,
+                    frames_per_buffer=CHUNK_SIZE,
+                )
         except OSError as e:
             print(f"[SARA] [ERR] Failed to open audio input stream: {e}")
             print("[SARA] [WARN] Audio features will be disabled. Please check microphone permissions.")
             return
 
+        print(f"[SARA] Audio capture mode: {capture_mode}")
+
         if __debug__:
             kwargs = {"exception_on_overflow": False}
         else:
             kwargs = {}
         
         # VAD Constants
-        VAD_THRESHOLD = 800 # Adj based on mic sensitivity (800 is conservative for 16-bit)
         SILENCE_DURATION = 0.5 # Seconds of silence to consider "done speaking"
+        print(f"[SARA] Using VAD engine: {self.vad.name}")
         
         while True:
             if self.paused:
+                if self._capture:
+                    self._capture.discard_pending()
                 await asyncio.sleep(0.1)
                 continue
 
             try:
-                data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
+                if self._capture:
+                    data = await self._capture.read()
+                else:
+                    data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
                 
-                # 1. Send Audio
+                speech_detected = self.vad.process(data)
+                rms = self.vad.level
+
+                # 1. Send Audio (silent stretches are held back when DTX is on)
                 if self.out_queue:
-                    await self.out_queue.put({"data": data, "mime_type": "audio/pcm"})
+                    chunks = self.dtx.process(data, speech_detected) if self.dtx else (data,)
+                    for chunk in chunks:
+                        await self.out_queue.put({"data": chunk, "mime_type": "audio/pcm"})
                 
                 # 2. VAD Logic for Video
-                # rms = audioop.rms(data, 2)
-                # Replacement for audioop.rms(data, 2)
-                count = len(data) // 2
-                if count > 0:
-                    shorts = struct.unpack(f"<{count}h", data)
-                    sum_squares = sum(s**2 for s in shorts)
-                    rms = int(math.sqrt(sum_squares / count))
-                else:
-                    rms = 0
                 
-                if rms > VAD_THRESHOLD:
+                if speech_detected:
                     # Speech Detected
                     self._silence_start_time = None
                     
                     if not self._is_speaking:
                         # NEW Speech Utterance Started
                         self._is_speaking = True
+                        self.latency.mark_speech_start()
                         print(f"[SARA DEBUG] [VAD] Speech Detected (RMS: {rms}). Sending Video Frame.")
                         
                         # Send ONE frame
-                        if self._latest_image_payload and self.out_queue:
-                            await self.out_queue.put(self._latest_image_payload)
+                        payload = await self._select_frame()
+                        if payload and self.out_queue:
+                            await self.out_queue.put(payload)
+                        elif self.frames.has_frame():
+                            print(f"[SARA DEBUG] [VAD] Scene unchanged since last upload. Not sending a frame.")
                         else:
                             print(f"[SARA DEBUG] [VAD] No video frame available to send.")
                             
@@ -501,6 +705,10 @@ class AudioLoop:
                         elif time.time() - self._silence_start_time > SILENCE_DURATION:
                             # Silence confirmed, reset state
                             print(f"[SARA DEBUG] [VAD] Silence detected. Resetting speech state.")
+                            # Backdate speech end to when the silence actually began: before
+                            # the SILENCE_DURATION wait and before the VAD's hangover ran out
+                            silence_elapsed = time.time() - self._silence_start_time + self.vad.hangover_seconds
+                            self.latency.mark_speech_end(at=self.latency.clock() - silence_elapsed)
                             self._is_speaking = False
                             self._silence_start_time = None
 
@@ -514,7 +722,7 @@ class AudioLoop:
             self.on_cad_status("generating")
             
         # Auto-create project if stuck in temp
-        if self.project_manager.current_project == "temp":
+        if self.project_manager.in_scratch_project:
             import datetime
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             new_project_name = f"Project_{timestamp}"
@@ -531,11 +739,17 @@ class AudioLoop:
                 except Exception as e:
                     print(f"[SARA DEBUG] [ERR] Failed to notify auto-project: {e}")
 
-        # Get project cad folder path
-        cad_output_dir = str(self.project_manager.get_current_project_path() / "cad")
-        
-        # Call the secondary agent with project path
-        cad_data = await self.cad_agent.generate_prototype(prompt, output_dir=cad_output_dir)
+        # Run the secondary agent as a CAD job in the project's cad folder
+        from cad_workers import CadJobCancelled
+        try:
+            cad_data = await self.run_cad_job("generate", prompt)
+        except CadJobCancelled:
+            print(f"[SARA DEBUG] [CAD] Generation cancelled by the user.")
+            try:
+                await self.session.send(input="System Notification: The user cancelled the CAD generation.", end_of_turn=True)
+            except Exception as e:
+                print(f"[SARA DEBUG] [ERR] Failed to send cancellation notification: {e}")
+            return
         
         if cad_data:
             print(f"[SARA DEBUG] [OK] CadAgent returned data successfully.")
@@ -575,7 +789,7 @@ class AudioLoop:
         print(f"[SARA DEBUG] [FS] Writing file: '{path}'")
         
         # Auto-create project if stuck in temp
-        if self.project_manager.current_project == "temp":
+        if self.project_manager.in_scratch_project:
             import datetime
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             new_project_name = f"Project_{timestamp}"
@@ -677,486 +891,427 @@ class AudioLoop:
         except Exception as e:
              print(f"[SARA DEBUG] [ERR] Failed to send web agent result to model: {e}")
 
+    # --- Tool calls ---
+
+    def _register_tools(self):
+        """Registers every Live API tool with the dispatcher (timeouts in seconds)."""
+        d = self.tool_dispatcher
+        # Tools that read or change the current project run in call order
+        project = "project"
+
+        # Fire-and-forget: these start a background task and answer right away
+        d.register("generate_cad", self._tool_generate_cad)
+        d.register("run_web_agent", self._tool_run_web_agent)
+        d.register("write_file", self._tool_write_file, serial=project)
+        d.register("read_directory", self._tool_read_directory)
+        d.register("read_file", self._tool_read_file)
+
+        d.register("create_project", self._tool_create_project, serial=project)
+        d.register("switch_project", self._tool_switch_project, serial=project)
+        d.register("list_projects", self._tool_list_projects, serial=project)
+
+        d.register("list_smart_devices", self._tool_list_smart_devices, timeout=5)
+        # Different lights change concurrently; commands to the same light keep their order
+        d.register("control_light", self._tool_control_light, timeout=10,
+                   serial=lambda fc: f"kasa:{fc.args.get('target')}")
+
+        d.register("discover_printers", self._tool_discover_printers, timeout=20)
+        d.register("print_stl", self._tool_print_stl, timeout=300, serial=project)
+        d.register("get_print_status", self._tool_get_print_status, timeout=10)
+        d.register("iterate_cad", self._tool_iterate_cad, timeout=300, serial=project)
+
+        d.set_timeouts(self.settings.get("tool_timeouts"))
+
+    def _needs_confirmation(self, fc):
+        # Check Permissions (Default to True if not set)
+        if not self.permissions.get(fc.name, True):
+            print(f"[SARA DEBUG] [TOOL] Permission check: '{fc.name}' -> AUTO-ALLOW")
+            return False
+        return self.on_tool_confirmation is not None
+
+    def _request_confirmation(self, request):
+        print(f"[SARA DEBUG] [STOP] Requesting confirmation for '{request['tool']}' (ID: {request['id']})")
+        self.on_tool_confirmation(request)
+
+    def _close_confirmation(self, request_id, reason):
+        if self.on_tool_confirmation_closed:
+            self.on_tool_confirmation_closed({"id": request_id, "reason": reason})
+
+    def _on_confirmation_wait(self, tool, seconds, decision):
+        print(f"[SARA DEBUG] [CONFIRM] '{tool}' {decision} after {seconds:.1f}s")
+        self.latency.record("tool_confirmation", seconds)
+        self.latency.record(f"confirm:{tool}", seconds)
+
+    async def handle_tool_call(self, tool_call):
+        """Confirms and runs the calls of one tool_call message. Returns FunctionResponses in call order."""
+        calls = []
+        for fc in tool_call.function_calls:
+            if fc.name in self.tool_dispatcher:
+                calls.append(fc)
+            else:
+                print(f"[SARA DEBUG] [WARN] Ignoring unknown tool '{fc.name}'")
+
+        # One prompt for every call that needs approval, then all approved calls run concurrently
+        ask = [fc for fc in calls if self._needs_confirmation(fc)]
+        decisions = {id(fc): decision for fc, decision in zip(ask, await self.confirmations.confirm(ask))}
+
+        results = {}
+        approved = []
+        for fc in calls:
+            decision = decisions.get(id(fc), APPROVED)
+            if decision == APPROVED:
+                approved.append(fc)
+            elif decision == TIMEOUT:
+                results[id(fc)] = "The user did not answer the confirmation request in time, so the tool was not run."
+            elif decision == WITHDRAWN:
+                results[id(fc)] = "The confirmation request was withdrawn because other calls in it were cancelled, so the tool was not run."
+            elif decision != CANCELLED:
+                print(f"[SARA DEBUG] [DENY] Tool call '{fc.name}' denied by user.")
+                results[id(fc)] = "User denied the request to use this tool."
+
+        for fc, result in zip(approved, await self.tool_dispatcher.run(approved)):
+            results[id(fc)] = result
+
+        function_responses = []
+        for fc in calls:
+            result = results.get(id(fc))
+            if result is not None:
+                function_responses.append(types.FunctionResponse(
+                    id=fc.id, name=fc.name, response={"result": result}
+                ))
+        return function_responses
+
+    async def _run_tool_call(self, session, tool_call):
+        """Background task: confirm, execute and answer one tool_call without blocking receive_audio."""
+        tool_started_at = self.latency.tool_started()
+        try:
+            function_responses = await self.handle_tool_call(tool_call)
+            if function_responses:
+                await session.send_tool_response(function_responses=function_responses)
+                for function_response in function_responses:
+                    self.latency.tool_finished(function_response.name, tool_started_at)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[SARA DEBUG] [ERR] Tool call failed: {e}")
+            traceback.print_exc()
+
+    def _spawn_tool_call(self, tool_call):
+        task = asyncio.create_task(self._run_tool_call(self.session, tool_call))
+        self._tool_tasks.add(task)
+        task.add_done_callback(self._tool_tasks.discard)
+
+    def _cancel_tool_calls(self):
+        """Session ended: drop pending confirmations and in-flight tool calls (their answers can't be delivered)."""
+        self.confirmations.cancel_all()
+        for task in list(self._tool_tasks):
+            task.cancel()
+        self._tool_tasks.clear()
+
+    def _on_tool_finished(self, name, seconds, outcome):
+        TOOL_CALL_SECONDS.labels(tool=name, outcome=outcome).observe(seconds)
+        print(f"[SARA DEBUG] [TOOL] '{name}' finished in {seconds * 1000:.0f} ms ({outcome})")
+
+    def _kasa_device_info(self, ip, dev):
+        """Frontend representation of a cached Kasa device."""
+        dev_type = "unknown"
+        if dev.is_bulb: dev_type = "bulb"
+        elif dev.is_plug: dev_type = "plug"
+        elif dev.is_strip: dev_type = "strip"
+        elif dev.is_dimmer: dev_type = "dimmer"
+
+        return {
+            "ip": ip,
+            "alias": dev.alias,
+            "model": dev.model,
+            "type": dev_type,
+            "is_on": dev.is_on,
+            "brightness": dev.brightness if dev.is_bulb or dev.is_dimmer else None,
+            "hsv": dev.hsv if dev.is_bulb and dev.is_color else None,
+            "has_color": dev.is_color if dev.is_bulb else False,
+            "has_brightness": dev.is_dimmable if dev.is_bulb or dev.is_dimmer else False
+        }
+
+    async def _tool_generate_cad(self, fc):
+        prompt = fc.args.get("prompt", "")
+        print(f"\n[SARA DEBUG] --------------------------------------------------")
+        print(f"[SARA DEBUG] [TOOL] Tool Call Detected: 'generate_cad'")
+        print(f"[SARA DEBUG] [IN] Arguments: prompt='{prompt}'")
+
+        asyncio.create_task(self.handle_cad_request(prompt))
+        # No function response needed - model already acknowledged when user asked
+        return None
+
+    async def _tool_run_web_agent(self, fc):
+        prompt = fc.args.get("prompt", "")
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'run_web_agent' with prompt='{prompt}'")
+        asyncio.create_task(self.handle_web_agent_request(prompt))
+        return "Web Navigation started. Do not reply to this message."
+
+    async def _tool_write_file(self, fc):
+        path = fc.args["path"]
+        content = fc.args["content"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'write_file' path='{path}'")
+        asyncio.create_task(self.handle_write_file(path, content))
+        return "Writing file..."
+
+    async def _tool_read_directory(self, fc):
+        path = fc.args["path"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'read_directory' path='{path}'")
+        asyncio.create_task(self.handle_read_directory(path))
+        return "Reading directory..."
+
+    async def _tool_read_file(self, fc):
+        path = fc.args["path"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'read_file' path='{path}'")
+        asyncio.create_task(self.handle_read_file(path))
+        return "Reading file..."
+
+    async def _tool_create_project(self, fc):
+        name = fc.args["name"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'create_project' name='{name}'")
+        success, msg = self.project_manager.create_project(name)
+        if success:
+            # Auto-switch to the newly created project
+            self.project_manager.switch_project(name)
+            msg += f" Switched to '{name}'."
+            if self.on_project_update:
+                self.on_project_update(name)
+        return msg
+
+    async def _tool_switch_project(self, fc):
+        name = fc.args["name"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'switch_project' name='{name}'")
+        success, msg = self.project_manager.switch_project(name)
+        if success:
+            if self.on_project_update:
+                self.on_project_update(name)
+            # Gather project context and send to AI (silently, no response expected)
+            context = self.project_manager.get_project_context()
+            print(f"[SARA DEBUG] [PROJECT] Sending project context to AI ({len(context)} chars)")
+            try:
+                await self.session.send(input=f"System Notification: {msg}\n\n{context}", end_of_turn=False)
+            except Exception as e:
+                print(f"[SARA DEBUG] [ERR] Failed to send project context: {e}")
+        return msg
+
+    async def _tool_list_projects(self, fc):
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'list_projects'")
+        projects = self.project_manager.list_projects()
+        return f"Available projects: {', '.join(projects)}"
+
+    async def _tool_list_smart_devices(self, fc):
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'list_smart_devices'")
+        # Use cached devices directly for speed
+        dev_summaries = []
+        frontend_list = []
+        for ip, d in self.kasa_agent.devices.items():
+            info = self._kasa_device_info(ip, d)
+            frontend_list.append(info)
+            # Format for Model
+            summary = f"{d.alias} (IP: {ip}, Type: {info['type']})"
+            summary += " [ON]" if d.is_on else " [OFF]"
+            dev_summaries.append(summary)
+
+        result_str = "No devices found in cache."
+        if dev_summaries:
+            result_str = "Found Devices (Cached):\n" + "\n".join(dev_summaries)
+
+        # Trigger frontend update
+        if self.on_device_update:
+            self.on_device_update(frontend_list)
+        return result_str
+
+    async def _tool_control_light(self, fc):
+        target = fc.args["target"]
+        action = fc.args["action"]
+        brightness = fc.args.get("brightness")
+        color = fc.args.get("color")
+
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'control_light' Target='{target}' Action='{action}'")
+
+        result_msg = f"Action '{action}' on '{target}' failed."
+        success = False
+
+        if action == "turn_on":
+            success = await self.kasa_agent.turn_on(target)
+            if success:
+                result_msg = f"Turned ON '{target}'."
+        elif action == "turn_off":
+            success = await self.kasa_agent.turn_off(target)
+            if success:
+                result_msg = f"Turned OFF '{target}'."
+        elif action == "set":
+            success = True
+            result_msg = f"Updated '{target}':"
+
+        # Apply extra attributes if 'set' or if we just turned it on and want to set them too
+        if success or action == "set":
+            if brightness is not None:
+                sb = await self.kasa_agent.set_brightness(target, brightness)
+                if sb:
+                    result_msg += f" Set brightness to {brightness}."
+            if color is not None:
+                sc = await self.kasa_agent.set_color(target, color)
+                if sc:
+                    result_msg += f" Set color to {color}."
+
+        # Notify Frontend of State Change
+        if success:
+            # KasaAgent updates its internal state on control, so we can rebuild the list
+            if self.on_device_update:
+                self.on_device_update([self._kasa_device_info(ip, dev) for ip, dev in self.kasa_agent.devices.items()])
+        else:
+            # Report Error
+            if self.on_error:
+                self.on_error(result_msg)
+        return result_msg
+
+    async def _tool_discover_printers(self, fc):
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'discover_printers'")
+        printers = await self.printer_agent.discover_printers()
+        # Format for model
+        if printers:
+            printer_list = []
+            for p in printers:
+                printer_list.append(f"{p['name']} ({p['host']}:{p['port']}, type: {p['printer_type']})")
+            return "Found Printers:\n" + "\n".join(printer_list)
+        return "No printers found on network. Ensure printers are on and running OctoPrint/Moonraker."
+
+    async def _tool_print_stl(self, fc):
+        stl_path = fc.args["stl_path"]
+        printer = fc.args["printer"]
+        profile = fc.args.get("profile")
+
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'print_stl' STL='{stl_path}' Printer='{printer}'")
+
+        # Resolve 'current' to project STL
+        if stl_path.lower() == "current":
+            stl_path = "output.stl" # Let printer agent resolve it in root_path
+
+        # Get current project path
+        project_path = str(self.project_manager.get_current_project_path())
+
+        result = await self.printer_agent.print_stl(
+            stl_path,
+            printer,
+            profile,
+            root_path=project_path
+        )
+        return result.get("message", "Unknown result")
+
+    async def _tool_get_print_status(self, fc):
+        printer = fc.args["printer"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'get_print_status' Printer='{printer}'")
+
+        status = await self.printer_agent.get_print_status(printer)
+        if not status:
+            return f"Could not get status for printer '{printer}'. Ensure it is discovered first."
+
+        result_str = f"Printer: {status.printer}\n"
+        result_str += f"State: {status.state}\n"
+        result_str += f"Progress: {status.progress_percent:.1f}%\n"
+        if status.time_remaining:
+            result_str += f"Time Remaining: {status.time_remaining}\n"
+        if status.time_elapsed:
+            result_str += f"Time Elapsed: {status.time_elapsed}\n"
+        if status.filename:
+            result_str += f"File: {status.filename}\n"
+        if status.temperatures:
+            temps = status.temperatures
+            if "hotend" in temps:
+                result_str += f"Hotend: {temps['hotend']['current']:.0f}°C / {temps['hotend']['target']:.0f}°C\n"
+            if "bed" in temps:
+                result_str += f"Bed: {temps['bed']['current']:.0f}°C / {temps['bed']['target']:.0f}°C"
+        return result_str
+
+    async def _tool_iterate_cad(self, fc):
+        prompt = fc.args["prompt"]
+        print(f"[SARA DEBUG] [TOOL] Tool Call: 'iterate_cad' Prompt='{prompt}'")
+
+        # Emit status
+        if self.on_cad_status:
+            self.on_cad_status("generating")
+
+        # Iterate on the design as a CAD job in the project's cad folder
+        from cad_workers import CadJobCancelled
+        try:
+            cad_data = await self.run_cad_job("iterate", prompt)
+        except CadJobCancelled:
+            print(f"[SARA DEBUG] [CAD] Iteration cancelled by the user.")
+            return f"The user cancelled the design iteration: {prompt}"
+
+        if not cad_data:
+            print(f"[SARA DEBUG] [ERR] CadAgent iteration returned None.")
+            return f"Failed to iterate design with prompt: {prompt}"
+
+        print(f"[SARA DEBUG] [OK] CadAgent iteration returned data successfully.")
+
+        # Dispatch to frontend
+        if self.on_cad_data:
+            print(f"[SARA DEBUG] [SEND] Dispatching iterated CAD data to frontend...")
+            self.on_cad_data(cad_data)
+            print(f"[SARA DEBUG] [SENT] Dispatch complete.")
+
+        # Save to Project
+        self.project_manager.save_cad_artifact(cad_data["file_path"], f"Iteration: {prompt}")
+
+        return f"Successfully iterated design: {prompt}. The updated 3D model is now displayed."
+
     async def receive_audio(self):
         "Background task to reads from the websocket and write pcm chunks to the output queue"
         try:
             while True:
                 turn = self.session.receive()
                 async for response in turn:
+                    LIVE_MESSAGES.inc()
                     # 1. Handle Audio Data
                     if data := response.data:
+                        self.latency.mark_response()
+                        if self._disconnected_at is not None:
+                            # Dead air from losing the connection until the model is heard again
+                            seconds = self.latency.clock() - self._disconnected_at
+                            self._disconnected_at = None
+                            self.latency.record("reconnect_to_first_audio", seconds)
+                            print(f"[SARA DEBUG] [RECONNECT] First model audio {seconds * 1000:.0f} ms after the connection was lost.")
                         self.audio_in_queue.put_nowait(data)
                         # NOTE: 'continue' removed here to allow processing transcription/tools in same packet
 
                     # 2. Handle Transcription (User & Model)
                     if response.server_content:
                         if response.server_content.input_transcription:
-                            transcript = response.server_content.input_transcription.text
-                            if transcript:
-                                # Skip if this is an exact duplicate event
-                                if transcript != self._last_input_transcription:
-                                    # Calculate delta (Gemini may send cumulative or chunk-based text)
-                                    delta = transcript
-                                    if transcript.startswith(self._last_input_transcription):
-                                        delta = transcript[len(self._last_input_transcription):]
-                                    self._last_input_transcription = transcript
-                                    
-                                    # Only send if there's new text
-                                    if delta:
-                                        # User is speaking, so interrupt model playback!
-                                        self.clear_audio_queue()
-
-                                        # Send to frontend (Streaming)
-                                        if self.on_transcription:
-                                             self.on_transcription({"sender": "User", "text": delta})
-                                        
-                                        # Buffer for Logging
-                                        if self.chat_buffer["sender"] != "User":
-                                            # Flush previous if exists
-                                            if self.chat_buffer["sender"] and self.chat_buffer["text"].strip():
-                                                self.project_manager.log_chat(self.chat_buffer["sender"], self.chat_buffer["text"])
-                                            # Start new
-                                            self.chat_buffer = {"sender": "User", "text": delta}
-                                        else:
-                                            # Append
-                                            self.chat_buffer["text"] += delta
-                        
+                            # Deltas are batched to the frontend and logged at turn boundaries
+                            delta = self.transcript.feed("User", response.server_content.input_transcription.text)
+                            if delta:
+                                # User is speaking, so interrupt model playback!
+                                self.clear_audio_queue()
+
                         if response.server_content.output_transcription:
-                            transcript = response.server_content.output_transcription.text
-                            if transcript:
-                                # Skip if this is an exact duplicate event
-                                if transcript != self._last_output_transcription:
-                                    # Calculate delta (Gemini may send cumulative or chunk-based text)
-                                    delta = transcript
-                                    if transcript.startswith(self._last_output_transcription):
-                                        delta = transcript[len(self._last_output_transcription):]
-                                    self._last_output_transcription = transcript
-                                    
-                                    # Only send if there's new text
-                                    if delta:
-                                        # Send to frontend (Streaming)
-                                        if self.on_transcription:
-                                             self.on_transcription({"sender": "SARA", "text": delta})
-                                        
-                                        # Buffer for Logging
-                                        if self.chat_buffer["sender"] != "SARA":
-                                            # Flush previous
-                                            if self.chat_buffer["sender"] and self.chat_buffer["text"].strip():
-                                                self.project_manager.log_chat(self.chat_buffer["sender"], self.chat_buffer["text"])
-                                            # Start new
-                                            self.chat_buffer = {"sender": "SARA", "text": delta}
-                                        else:
-                                            # Append
-                                            self.chat_buffer["text"] += delta
-                        
-                        # Flush buffer on turn completion if needed, 
-                        # but usually better to wait for sender switch or explicit end.
-                        # We can also check turn_complete signal if available in response.server_content.model_turn etc
+                            self.transcript.feed("SARA", response.server_content.output_transcription.text)
+
+                        # The chat entry is logged on a speaker switch or by flush_chat() when the turn ends
 
                     # 3. Handle Tool Calls
+                    # Runs as its own task: confirmation and slow tools must not stall the stream
                     if response.tool_call:
                         print("The tool was called")
-                        function_responses = []
-                        for fc in response.tool_call.function_calls:
-                            if fc.name in ["generate_cad", "run_web_agent", "write_file", "read_directory", "read_file", "create_project", "switch_project", "list_projects", "list_smart_devices", "control_light", "discover_printers", "print_stl", "get_print_status", "iterate_cad"]:
-                                prompt = fc.args.get("prompt", "") # Prompt is not present for all tools
-                                
-                                # Check Permissions (Default to True if not set)
-                                confirmation_required = self.permissions.get(fc.name, True)
-                                
-                                if not confirmation_required:
-                                    print(f"[SARA DEBUG] [TOOL] Permission check: '{fc.name}' -> AUTO-ALLOW")
-                                    # Skip confirmation block and jump to execution
-                                    pass
-                                else:
-                                    # Confirmation Logic
-                                    if self.on_tool_confirmation:
-                                        import uuid
-                                        request_id = str(uuid.uuid4())
-                                    print(f"[SARA DEBUG] [STOP] Requesting confirmation for '{fc.name}' (ID: {request_id})")
-                                    
-                                    future = asyncio.Future()
-                                    self._pending_confirmations[request_id] = future
-                                    
-                                    self.on_tool_confirmation({
-                                        "id": request_id, 
-                                        "tool": fc.name, 
-                                        "args": fc.args
-                                    })
-                                    
-                                    try:
-                                        # Wait for user response
-                                        confirmed = await future
-
-                                    finally:
-                                        self._pending_confirmations.pop(request_id, None)
-
-                                    print(f"[SARA DEBUG] [CONFIRM] Request {request_id} resolved. Confirmed: {confirmed}")
-
-                                    if not confirmed:
-                                        print(f"[SARA DEBUG] [DENY] Tool call '{fc.name}' denied by user.")
-                                        function_response = types.FunctionResponse(
-                                            id=fc.id,
-                                            name=fc.name,
-                                            response={
-                                                "result": "User denied the request to use this tool.",
-                                            }
-                                        )
-                                        function_responses.append(function_response)
-                                        continue
-
-                                    if not confirmed:
-                                        print(f"[SARA DEBUG] [DENY] Tool call '{fc.name}' denied by user.")
-                                        function_response = types.FunctionResponse(
-                                            id=fc.id,
-                                            name=fc.name,
-                                            response={
-                                                "result": "User denied the request to use this tool.",
-                                            }
-                                        )
-                                        function_responses.append(function_response)
-                                        continue
-
-                                # If confirmed (or no callback configured, or auto-allowed), proceed
-                                if fc.name == "generate_cad":
-                                    print(f"\n[SARA DEBUG] --------------------------------------------------")
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call Detected: 'generate_cad'")
-                                    print(f"[SARA DEBUG] [IN] Arguments: prompt='{prompt}'")
-                                    
-                                    asyncio.create_task(self.handle_cad_request(prompt))
-                                    # No function response needed - model already acknowledged when user asked
-                                
-                                elif fc.name == "run_web_agent":
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'run_web_agent' with prompt='{prompt}'")
-                                    asyncio.create_task(self.handle_web_agent_request(prompt))
-                                    
-                                    result_text = "Web Navigation started. Do not reply to this message."
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id,
-                                        name=fc.name,
-                                        response={
-                                            "result": result_text,
-                                        }
-                                    )
-                                    print(f"[SARA DEBUG] [RESPONSE] Sending function response: {function_response}")
-                                    function_responses.append(function_response)
-
-
-
-                                elif fc.name == "write_file":
-                                    path = fc.args["path"]
-                                    content = fc.args["content"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'write_file' path='{path}'")
-                                    asyncio.create_task(self.handle_write_file(path, content))
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": "Writing file..."}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "read_directory":
-                                    path = fc.args["path"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'read_directory' path='{path}'")
-                                    asyncio.create_task(self.handle_read_directory(path))
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": "Reading directory..."}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "read_file":
-                                    path = fc.args["path"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'read_file' path='{path}'")
-                                    asyncio.create_task(self.handle_read_file(path))
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": "Reading file..."}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "create_project":
-                                    name = fc.args["name"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'create_project' name='{name}'")
-                                    success, msg = self.project_manager.create_project(name)
-                                    if success:
-                                        # Auto-switch to the newly created project
-                                        self.project_manager.switch_project(name)
-                                        msg += f" Switched to '{name}'."
-                                        if self.on_project_update:
-                                            self.on_project_update(name)
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": msg}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "switch_project":
-                                    name = fc.args["name"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'switch_project' name='{name}'")
-                                    success, msg = self.project_manager.switch_project(name)
-                                    if success:
-                                        if self.on_project_update:
-                                            self.on_project_update(name)
-                                        # Gather project context and send to AI (silently, no response expected)
-                                        context = self.project_manager.get_project_context()
-                                        print(f"[SARA DEBUG] [PROJECT] Sending project context to AI ({len(context)} chars)")
-                                        try:
-                                            await self.session.send(input=f"System Notification: {msg}\n\n{context}", end_of_turn=False)
-                                        except Exception as e:
-                                            print(f"[SARA DEBUG] [ERR] Failed to send project context: {e}")
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": msg}
-                                    )
-                                    function_responses.append(function_response)
-                                
-                                elif fc.name == "list_projects":
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'list_projects'")
-                                    projects = self.project_manager.list_projects()
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": f"Available projects: {', '.join(projects)}"}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "list_smart_devices":
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'list_smart_devices'")
-                                    # Use cached devices directly for speed
-                                    # devices_dict is {ip: SmartDevice}
-                                    
-                                    dev_summaries = []
-                                    frontend_list = []
-                                    
-                                    for ip, d in self.kasa_agent.devices.items():
-                                        dev_type = "unknown"
-                                        if d.is_bulb: dev_type = "bulb"
-                                        elif d.is_plug: dev_type = "plug"
-                                        elif d.is_strip: dev_type = "strip"
-                                        elif d.is_dimmer: dev_type = "dimmer"
-                                        
-                                        # Format for Model
-                                        info = f"{d.alias} (IP: {ip}, Type: {dev_type})"
-                                        if d.is_on:
-                                            info += " [ON]"
-                                        else:
-                                            info += " [OFF]"
-                                        dev_summaries.append(info)
-                                        
-                                        # Format for Frontend
-                                        frontend_list.append({
-                                            "ip": ip,
-                                            "alias": d.alias,
-                                            "model": d.model,
-                                            "type": dev_type,
-                                            "is_on": d.is_on,
-                                            "brightness": d.brightness if d.is_bulb or d.is_dimmer else None,
-                                            "hsv": d.hsv if d.is_bulb and d.is_color else None,
-                                            "has_color": d.is_color if d.is_bulb else False,
-                                            "has_brightness": d.is_dimmable if d.is_bulb or d.is_dimmer else False
-                                        })
-                                    
-                                    result_str = "No devices found in cache."
-                                    if dev_summaries:
-                                        result_str = "Found Devices (Cached):\n" + "\n".join(dev_summaries)
-                                    
-                                    # Trigger frontend update
-                                    if self.on_device_update:
-                                        self.on_device_update(frontend_list)
-
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "control_light":
-                                    target = fc.args["target"]
-                                    action = fc.args["action"]
-                                    brightness = fc.args.get("brightness")
-                                    color = fc.args.get("color")
-                                    
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'control_light' Target='{target}' Action='{action}'")
-                                    
-                                    result_msg = f"Action '{action}' on '{target}' failed."
-                                    success = False
-                                    
-                                    if action == "turn_on":
-                                        success = await self.kasa_agent.turn_on(target)
-                                        if success:
-                                            result_msg = f"Turned ON '{target}'."
-                                    elif action == "turn_off":
-                                        success = await self.kasa_agent.turn_off(target)
-                                        if success:
-                                            result_msg = f"Turned OFF '{target}'."
-                                    elif action == "set":
-                                        success = True
-                                        result_msg = f"Updated '{target}':"
-                                    
-                                    # Apply extra attributes if 'set' or if we just turned it on and want to set them too
-                                    if success or action == "set":
-                                        if brightness is not None:
-                                            sb = await self.kasa_agent.set_brightness(target, brightness)
-                                            if sb:
-                                                result_msg += f" Set brightness to {brightness}."
-                                        if color is not None:
-                                            sc = await self.kasa_agent.set_color(target, color)
-                                            if sc:
-                                                result_msg += f" Set color to {color}."
-
-                                    # Notify Frontend of State Change
-                                    if success:
-                                        # We don't need full discovery, just refresh known state or push update
-                                        # But for simplicity, let's get the standard list representation
-                                        # KasaAgent updates its internal state on control, so we can rebuild the list
-                                        
-                                        # Quick rebuild of list from internal dict
-                                        updated_list = []
-                                        for ip, dev in self.kasa_agent.devices.items():
-                                            # We need to ensure we have the correct dict structure expected by frontend
-                                            # We duplicate logic from KasaAgent.discover_devices a bit, but that's okay for now or we can add a helper
-                                            # Ideally KasaAgent has a 'get_devices_list()' method.
-                                            # Use the cached objects in self.kasa_agent.devices
-                                            
-                                            dev_type = "unknown"
-                                            if dev.is_bulb: dev_type = "bulb"
-                                            elif dev.is_plug: dev_type = "plug"
-                                            elif dev.is_strip: dev_type = "strip"
-                                            elif dev.is_dimmer: dev_type = "dimmer"
-
-                                            d_info = {
-                                                "ip": ip,
-                                                "alias": dev.alias,
-                                                "model": dev.model,
-                                                "type": dev_type,
-                                                "is_on": dev.is_on,
-                                                "brightness": dev.brightness if dev.is_bulb or dev.is_dimmer else None,
-                                                "hsv": dev.hsv if dev.is_bulb and dev.is_color else None,
-                                                "has_color": dev.is_color if dev.is_bulb else False,
-                                                "has_brightness": dev.is_dimmable if dev.is_bulb or dev.is_dimmer else False
-                                            }
-                                            updated_list.append(d_info)
-                                            
-                                        if self.on_device_update:
-                                            self.on_device_update(updated_list)
-                                    else:
-                                        # Report Error
-                                        if self.on_error:
-                                            self.on_error(result_msg)
-
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_msg}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "discover_printers":
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'discover_printers'")
-                                    printers = await self.printer_agent.discover_printers()
-                                    # Format for model
-                                    if printers:
-                                        printer_list = []
-                                        for p in printers:
-                                            printer_list.append(f"{p['name']} ({p['host']}:{p['port']}, type: {p['printer_type']})")
-                                        result_str = "Found Printers:\n" + "\n".join(printer_list)
-                                    else:
-                                        result_str = "No printers found on network. Ensure printers are on and running OctoPrint/Moonraker."
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "print_stl":
-                                    stl_path = fc.args["stl_path"]
-                                    printer = fc.args["printer"]
-                                    profile = fc.args.get("profile")
-                                    
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'print_stl' STL='{stl_path}' Printer='{printer}'")
-                                    
-                                    # Resolve 'current' to project STL
-                                    if stl_path.lower() == "current":
-                                        stl_path = "output.stl" # Let printer agent resolve it in root_path
-
-                                    # Get current project path
-                                    project_path = str(self.project_manager.get_current_project_path())
-                                    
-                                    result = await self.printer_agent.print_stl(
-                                        stl_path, 
-                                        printer, 
-                                        profile, 
-                                        root_path=project_path
-                                    )
-                                    result_str = result.get("message", "Unknown result")
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "get_print_status":
-                                    printer = fc.args["printer"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'get_print_status' Printer='{printer}'")
-                                    
-                                    status = await self.printer_agent.get_print_status(printer)
-                                    if status:
-                                        result_str = f"Printer: {status.printer}\n"
-                                        result_str += f"State: {status.state}\n"
-                                        result_str += f"Progress: {status.progress_percent:.1f}%\n"
-                                        if status.time_remaining:
-                                            result_str += f"Time Remaining: {status.time_remaining}\n"
-                                        if status.time_elapsed:
-                                            result_str += f"Time Elapsed: {status.time_elapsed}\n"
-                                        if status.filename:
-                                            result_str += f"File: {status.filename}\n"
-                                        if status.temperatures:
-                                            temps = status.temperatures
-                                            if "hotend" in temps:
-                                                result_str += f"Hotend: {temps['hotend']['current']:.0f}°C / {temps['hotend']['target']:.0f}°C\n"
-                                            if "bed" in temps:
-                                                result_str += f"Bed: {temps['bed']['current']:.0f}°C / {temps['bed']['target']:.0f}°C"
-                                    else:
-                                        result_str = f"Could not get status for printer '{printer}'. Ensure it is discovered first."
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-
-                                elif fc.name == "iterate_cad":
-                                    prompt = fc.args["prompt"]
-                                    print(f"[SARA DEBUG] [TOOL] Tool Call: 'iterate_cad' Prompt='{prompt}'")
-                                    
-                                    # Emit status
-                                    if self.on_cad_status:
-                                        self.on_cad_status("generating")
-                                    
-                                    # Get project cad folder path
-                                    cad_output_dir = str(self.project_manager.get_current_project_path() / "cad")
-                                    
-                                    # Call CadAgent to iterate on the design
-                                    cad_data = await self.cad_agent.iterate_prototype(prompt, output_dir=cad_output_dir)
-                                    
-                                    if cad_data:
-                                        print(f"[SARA DEBUG] [OK] CadAgent iteration returned data successfully.")
-                                        
-                                        # Dispatch to frontend
-                                        if self.on_cad_data:
-                                            print(f"[SARA DEBUG] [SEND] Dispatching iterated CAD data to frontend...")
-                                            self.on_cad_data(cad_data)
-                                            print(f"[SARA DEBUG] [SENT] Dispatch complete.")
-                                        
-                                        # Save to Project
-                                        self.project_manager.save_cad_artifact("output.stl", f"Iteration: {prompt}")
-                                        
-                                        result_str = f"Successfully iterated design: {prompt}. The updated 3D model is now displayed."
-                                    else:
-                                        print(f"[SARA DEBUG] [ERR] CadAgent iteration returned None.")
-                                        result_str = f"Failed to iterate design with prompt: {prompt}"
-                                    
-                                    function_response = types.FunctionResponse(
-                                        id=fc.id, name=fc.name, response={"result": result_str}
-                                    )
-                                    function_responses.append(function_response)
-                        if function_responses:
-                            await self.session.send_tool_response(function_responses=function_responses)
+                        self._spawn_tool_call(response.tool_call)
+
+                    if response.tool_call_cancellation:
+                        print(f"[SARA DEBUG] [TOOL] Server cancelled tool calls: {response.tool_call_cancellation.ids}")
+                        self.confirmations.cancel_calls(response.tool_call_cancellation.ids)
+
+                    # 4. Session lifecycle
+                    if response.session_resumption_update:
+                        self.resumption.update(response.session_resumption_update)
+
+                    if response.go_away:
+                        print(f"[SARA DEBUG] [CONNECT] Server will close the session in {response.go_away.time_left}. Will resume on reconnect.")
                 
                 # Turn/Response Loop Finished
                 self.flush_chat()
 
-                while not self.audio_in_queue.empty():
-                    self.audio_in_queue.get_nowait()
+                self.audio_in_queue.clear()
         except Exception as e:
             print(f"Error in receive_audio: {e}")
             traceback.print_exc()
@@ -1165,66 +1320,146 @@ class AudioLoop:
 
     async def play_audio(self):
         stream = await asyncio.to_thread(
-            pya.open,
+            self.pya.open,
             format=FORMAT,
             channels=CHANNELS,
             rate=RECEIVE_SAMPLE_RATE,
             output=True,
             output_device_index=self.output_device_index,
         )
+        self._player = InterruptiblePlayer(stream, self.audio_in_queue.bytes_per_ms)
         while True:
             bytestream = await self.audio_in_queue.get()
             if self.on_audio_data:
                 self.on_audio_data(bytestream)
-            await asyncio.to_thread(stream.write, bytestream)
+            self.latency.mark_playback()
+            await asyncio.to_thread(self._player.write, bytestream)
 
     async def get_frames(self):
-        cap = await asyncio.to_thread(cv2.VideoCapture, 0, cv2.CAP_AVFOUNDATION)
-        while True:
-            if self.paused:
-                await asyncio.sleep(0.1)
-                continue
-            frame = await asyncio.to_thread(self._get_frame, cap)
-            if frame is None:
-                break
-            await asyncio.sleep(1.0)
-            if self.out_queue:
-                await self.out_queue.put(frame)
-        cap.release()
-
-    def _get_frame(self, cap):
-        ret, frame = cap.read()
-        if not ret:
-            return None
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = PIL.Image.fromarray(frame_rgb)
-        img.thumbnail([1024, 1024])
-        image_io = io.BytesIO()
-        img.save(image_io, format="jpeg")
-        image_io.seek(0)
-        image_bytes = image_io.read()
-        return {"mime_type": "image/jpeg", "data": base64.b64encode(image_bytes).decode()}
-
-    async def _get_screen(self):
-        pass 
+        cap = await asyncio.to_thread(open_camera, self.settings.get("camera_index", 0))
+        if cap is None:
+            print("[SARA] [ERR] Could not open camera. Video features disabled.")
+            return
+        self.camera = CameraFramePipeline(
+            max_edge=self.settings.get("camera_max_edge", 1024),
+            jpeg_quality=self.settings.get("camera_jpeg_quality", 80),
+            change_threshold=self.settings.get("camera_change_threshold", 3.0),
+        )
+        rate = AdaptiveFrameRate(
+            speaking_fps=self.settings.get("camera_fps_speaking", 1.0),
+            idle_fps=self.settings.get("camera_fps_idle", 0.25),
+        )
+        print(f"[SARA] Camera capture backend: {cap.getBackendName()}")
+        try:
+            while True:
+                if self.paused:
+                    await asyncio.sleep(0.1)
+                    continue
+                backlog = self._outbound_backlog()
+                if not backlog:
+                    try:
+                        frame = await asyncio.to_thread(self.camera.read, cap)
+                    except EOFError:
+                        print("[SARA] [WARN] Camera stopped delivering frames.")
+                        break
+                    if frame and self.out_queue:
+                        await self.out_queue.put(frame)
+
+                # Sleep in short steps so the start of speech switches to the fast rate at once
+                was_speaking = self._is_speaking
+                deadline = time.monotonic() + rate.interval(was_speaking, backlog)
+                while time.monotonic() < deadline and not (self._is_speaking and not was_speaking):
+                    await asyncio.sleep(0.05)
+        finally:
+            cap.release()
+
+    def _outbound_backlog(self):
+        """True while the last screen frame is still queued or the mic audio lane is backed up."""
+        if not self.out_queue:
+            return False
+        return bool(self.out_queue.lane(LANE_IMAGE).items) or len(self.out_queue.lane(LANE_AUDIO).items) > 10
+
     async def get_screen(self):
-         pass
+        self.screen = ScreenCapture(
+            monitor=self.settings.get("screen_monitor", 1),
+            max_edge=self.settings.get("screen_max_edge", 1280),
+            jpeg_quality=self.settings.get("screen_jpeg_quality", 70),
+            min_changed=self.settings.get("screen_min_change", 0.005),
+        )
+        pacer = ScreenPacer(
+            interval=self.settings.get("screen_interval_s", 1.0),
+            max_interval=self.settings.get("screen_max_interval_s", 8.0),
+        )
+        # mss handles belong to the thread that created them
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen")
+        loop = asyncio.get_running_loop()
+        print(f"[SARA] Screen capture: monitor {self.screen.monitor}, max edge {self.screen.max_edge}px")
+        try:
+            while True:
+                if self.paused:
+                    await asyncio.sleep(0.1)
+                    continue
+                backlog = self._outbound_backlog()
+                interval = pacer.update(backlog)
+                if not backlog:
+                    try:
+                        payload = await loop.run_in_executor(executor, self.screen.capture)
+                    except Exception as e:
+                        print(f"[SARA] [ERR] Screen capture failed: {e}")
+                        payload = None
+                    if payload and self.out_queue:
+                        await self.out_queue.put(payload)
+                await asyncio.sleep(interval)
+        finally:
+            executor.submit(self.screen.close)
+            executor.shutdown(wait=False)
+
+    def _connect(self):
+        """Opens the Live session context (real API unless a live_connect factory was given)."""
+        self._resuming_with = self.resumption.usable_handle()
+        connect_config = self.resumption.connect_config(get_config())
+        if self.live_connect:
+            return self.live_connect(model=MODEL, config=connect_config)
+        return get_client().aio.live.connect(model=MODEL, config=connect_config)
 
     async def run(self, start_message=None):
         retry_delay = 1
         is_reconnect = False
+        if self.pya is None:
+            self.pya = await asyncio.to_thread(get_pyaudio)
         
         while not self.stop_event.is_set():
+            connected = False
             try:
                 print(f"[SARA DEBUG] [CONNECT] Connecting to Gemini Live API...")
                 async with (
-                    client.aio.live.connect(model=MODEL, config=config) as session,
+                    self._connect() as session,
                     asyncio.TaskGroup() as tg,
                 ):
+                    connected = True
                     self.session = session
-
-                    self.audio_in_queue = asyncio.Queue()
-                    self.out_queue = asyncio.Queue(maxsize=10)
+                    # The new session has seen no frames yet
+                    if self.keyframes:
+                        self.keyframes.reset()
+                    if self.dtx:
+                        self.dtx.reset()
+
+                    recording_dir = self.settings.get("session_recording_dir")
+                    if recording_dir:
+                        self.recorder = SessionRecorder.in_directory(recording_dir, metadata={
+                            "model": MODEL,
+                            "send_sample_rate": SEND_SAMPLE_RATE,
+                            "receive_sample_rate": RECEIVE_SAMPLE_RATE,
+                            "reconnect": is_reconnect,
+                        })
+                        print(f"[SARA DEBUG] [RECORD] Recording session to {self.recorder.path}")
+                        self.session = self.recorder.wrap(session)
+
+                    self.audio_in_queue = JitterBuffer(
+                        sample_rate=RECEIVE_SAMPLE_RATE,
+                        target_ms=self.settings.get("playback_target_ms", 120),
+                    )
+                    self.out_queue = OutboundScheduler()
 
                     tg.create_task(self.send_realtime())
                     tg.create_task(self.listen_audio())
@@ -1250,20 +1485,18 @@ class AudioLoop:
                     
                     else:
                         print(f"[SARA DEBUG] [RECONNECT] Connection restored.")
-                        # Restore Context
-                        print(f"[SARA DEBUG] [RECONNECT] Fetching recent chat history to restore context...")
-                        history = self.project_manager.get_recent_chat_history(limit=10)
-                        
-                        context_msg = "System Notification: Connection was lost and just re-established. Here is the recent chat history to help you resume seamlessly:\n\n"
-                        for entry in history:
-                            sender = entry.get('sender', 'Unknown')
-                            text = entry.get('text', '')
-                            context_msg += f"[{sender}]: {text}\n"
-                        
-                        context_msg += "\nPlease acknowledge the reconnection to the user (e.g. 'I lost connection for a moment, but I'm back...') and resume what you were doing."
-                        
-                        print(f"[SARA DEBUG] [RECONNECT] Sending restoration context to model...")
-                        await self.session.send(input=context_msg, end_of_turn=True)
+                        if self._disconnected_at is not None:
+                            self.latency.record("reconnect_to_connected", self.latency.clock() - self._disconnected_at)
+                        if self._resuming_with:
+                            # The server restored the conversation from the handle
+                            self.resumption.mark_resumed()
+                            print(f"[SARA DEBUG] [RECONNECT] Resumed the previous Live session.")
+                        else:
+                            # Restore Context: rolling summary + recent turns, without spending a model turn
+                            context_msg = self.context.build_message()
+                            if context_msg:
+                                print(f"[SARA DEBUG] [RECONNECT] Sending restoration context to model (~{self.context.tokens} tokens)...")
+                                await self.session.send(input=context_msg, end_of_turn=False)
 
                     # Reset retry delay on successful connection
                     retry_delay = 1
@@ -1291,14 +1524,35 @@ class AudioLoop:
                 
                 if self.stop_event.is_set():
                     break
+
+                if self._disconnected_at is None:
+                    self._disconnected_at = self.latency.clock()
+                if self._resuming_with and not connected:
+                    print(f"[SARA DEBUG] [RECONNECT] Could not resume the previous session. Starting a new one.")
+                    self.resumption.reject()
                 
-                print(f"[SARA DEBUG] [RETRY] Reconnecting in {retry_delay} seconds...")
-                await asyncio.sleep(retry_delay)
+                if self.resumption.usable_handle() and retry_delay == 1:
+                    # The session can be resumed as is: skip the first backoff step
+                    print(f"[SARA DEBUG] [RETRY] Reconnecting now...")
+                else:
+                    print(f"[SARA DEBUG] [RETRY] Reconnecting in {retry_delay} seconds...")
+                    await asyncio.sleep(retry_delay)
                 retry_delay = min(retry_delay * 2, 10) # Exponential backoff capped at 10s
                 is_reconnect = True # Next loop will be a reconnect
                 
             finally:
                 # Cleanup before retry
+                self._cancel_tool_calls()
+                if self.dtx and self.dtx.bytes_in:
+                    dtx = self.dtx.stats()
+                    print(f"[SARA DEBUG] [DTX] Session uplink: sent {dtx['bytes_sent']} of {dtx['bytes_in']} mic bytes, saved {dtx['bytes_saved']} ({dtx['saved_ratio']:.0%}).")
+                if self.recorder:
+                    self.recorder.close()
+                    self.recorder = None
+                if self._capture:
+                    self._capture.close()
+                    self._capture = None
+                    self.audio_stream = None
                 if hasattr(self, 'audio_stream') and self.audio_stream:
                     try:
                         self.audio_stream.close()
@@ -1337,5 +1591,7 @@ if __name__ == "__main__":
         choices=["camera", "screen", "none"],
     )
     args = parser.parse_args()
+    from project_manager import clear_scratch_projects
+    clear_scratch_projects(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
     main = AudioLoop(video_mode=args.mode)
     asyncio.run(main.run())
\ No newline at end of file
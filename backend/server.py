@@ -1,6 +1,10 @@
 import sys
 import asyncio
 
+# Time every import from here on; the breakdown is logged at startup (see lazy_imports.py)
+from lazy_imports import ImportProfiler, BackgroundImport
+import_profiler = ImportProfiler().install()
+
 # Fix for asyncio subprocess support on Windows
 # MUST BE SET BEFORE OTHER IMPORTS
 if sys.platform == 'win32':
@@ -9,15 +13,15 @@ if sys.platform == 'win32':
 import socketio
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 import asyncio
 import threading
 import sys
 import os
 import json
+import time
 from datetime import datetime
 from pathlib import Path
-import cv2
-import numpy as np
 
 # Initialize logging system - MUST BE BEFORE OTHER IMPORTS THAT GENERATE LOGS
 from logger import init_logger
@@ -27,14 +31,38 @@ init_logger(log_dir="../logs", log_file_prefix="sara_backend")
 
 # Ensure we can import SARA
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-import sara
-from authenticator import FaceAuthenticator
 from kasa_agent import KasaAgent
-from generate_biometric import BiometricGeneratorSocket
+from session_registry import SessionRegistry, SessionLimitError
+from project_manager import clear_scratch_projects
+from emit_queue import EmitDispatcher
+from loop_monitor import LoopLagMonitor
+import cad_workers
+import metrics
+
+# Heavy modules, imported in a worker thread on first use (sara is preloaded right after startup)
+sara_module = BackgroundImport("sara", profiler=import_profiler)
+authenticator_module = BackgroundImport("authenticator", profiler=import_profiler)
+biometric_module = BackgroundImport("generate_biometric", profiler=import_profiler)
+
+SIO_EMITS = metrics.counter("sara_socketio_emits_total", "Socket.IO events emitted, per event", ["event"])
+AUTH_FRAMES = metrics.counter("sara_auth_frames_total", "Face authentication camera frames sent to the frontend")
+OUT_QUEUE_DEPTH = metrics.gauge("sara_out_queue_depth", "Items waiting in the Live upstream queue", ["session"])
+AUDIO_IN_QUEUE_DEPTH = metrics.gauge("sara_audio_in_queue_depth", "Audio chunks waiting for playback", ["session"])
+EMIT_OVERFLOWS = metrics.counter("sara_emit_overflows_total", "Clients disconnected because their emit queue overflowed")
+EMIT_QUEUE_DEPTH = metrics.gauge("sara_emit_queue_depth", "Events waiting in the per-client emit queues", ["sid"])
+ACTIVE_SESSIONS = metrics.gauge("sara_sessions_active", "Running operator sessions")
+
+class InstrumentedAsyncServer(socketio.AsyncServer):
+    """AsyncServer that counts every emit per event name."""
+
+    async def emit(self, event, *args, **kwargs):
+        SIO_EMITS.labels(event=event).inc()
+        return await super().emit(event, *args, **kwargs)
 
 # Create a Socket.IO server
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+sio = InstrumentedAsyncServer(async_mode='asgi', cors_allowed_origins='*')
 app = FastAPI()
 app_socketio = socketio.ASGIApp(sio, app)
 
@@ -43,11 +71,11 @@ import signal
 # --- SHUTDOWN HANDLER ---
 def signal_handler(sig, frame):
     print(f"\n[SERVER] Caught signal {sig}. Exiting gracefully...")
-    # Clean up audio loop
-    if audio_loop:
+    # Clean up audio loops
+    for session in sessions:
         try:
-            print("[SERVER] Stopping Audio Loop...")
-            audio_loop.stop() 
+            print(f"[SERVER] Stopping Audio Loop (session '{session.name}')...")
+            session.stop() 
         except:
             pass
     # Force kill
@@ -58,8 +86,6 @@ signal.signal(signal.SIGINT, signal_handler)
 signal.signal(signal.SIGTERM, signal_handler)
 
 # Global state
-audio_loop = None
-loop_task = None
 authenticator = None
 kasa_agent = KasaAgent()
 biometric_generator = None
@@ -82,7 +108,55 @@ DEFAULT_SETTINGS = {
     "kasa_devices": [], # List of {ip, alias, model}
     "camera_flipped": False, # Invert cursor horizontal direction
     "timezone": "UTC", # User's timezone
-    "location": "Ubicación desconocida" # User's location
+    "location": "Ubicación desconocida", # User's location
+    "vad_engine": "spectral", # Voice activity detector: "energy" or "spectral"
+    "vad_threshold": 800, # RMS threshold on 16-bit mic samples
+    "audio_capture_mode": "callback", # Mic capture: "callback" (ring buffer) or "blocking" (thread per read)
+    "audio_transport": "visualizer", # Model audio to frontend: "visualizer", "binary" or "list"
+    "playback_target_ms": 120, # Initial jitter buffer depth before model audio starts playing
+    "session_recording_dir": "", # Record each Live session here for offline replay (empty = off)
+    "tool_timeouts": {}, # Per-tool timeout overrides in seconds, e.g. {"print_stl": 600}
+    "tool_confirmation_timeout_s": 60, # Unanswered tool confirmations are denied after this long (0 = wait forever)
+    "keyframe_selection": True, # On speech start send the sharpest recent camera frame, skip if the scene is unchanged
+    "keyframe_window": 5, # Recent frames considered for keyframe selection
+    "keyframe_change_threshold": 6, # dHash bit distance (of 64) at or below which a frame counts as unchanged
+    "screen_monitor": 1, # mss monitor index for screen mode (0 = all monitors)
+    "screen_max_edge": 1280, # Screen frames are downscaled to this long edge before encoding
+    "screen_jpeg_quality": 70,
+    "screen_interval_s": 1.0, # Base capture interval; backs off up to screen_max_interval_s under backpressure
+    "screen_max_interval_s": 8.0,
+    "screen_min_change": 0.005, # Fraction of 32px tiles that must change before a new frame is sent
+    "camera_index": 0, # Backend camera for video_mode "camera"
+    "camera_max_edge": 1024,
+    "camera_jpeg_quality": 80,
+    "camera_fps_speaking": 1.0, # Camera frame rate while the user is speaking
+    "camera_fps_idle": 0.25, # ... and while idle
+    "camera_change_threshold": 3.0, # Mean thumbnail difference (0-255) below which a frame is not sent
+    "dtx_enabled": True, # Hold back silent mic chunks instead of uploading them
+    "dtx_preroll_ms": 300, # Silence kept and sent ahead of a speech onset so it isn't clipped
+    "dtx_hangover_ms": 1000, # Keep sending this long after speech so the server VAD can end the turn
+    "dtx_keepalive_s": 2.0, # One comfort frame per interval while suppressed (0 = none)
+    "max_sessions": 4, # Concurrent operator sessions (one AudioLoop each, 0 = no limit); read at startup
+    "session_grace_s": 60, # A session whose last client disconnected keeps running this long so the client can reattach
+    "emit_queue_max": 256, # Undelivered must-deliver events per client before that client is disconnected
+    "emit_transport_backlog": 32, # Hold back sends while a client has more packets than this unread
+    "session_resumption": True, # Resume the Live session by handle after a disconnect
+    "reconnect_context_tokens": 2000, # Budget for the summary + recent turns sent when a session can't be resumed
+    "transcript_emit_interval_ms": 50, # Transcription deltas are batched into one frontend event per interval
+    "loop_monitor_enabled": True, # Measure event loop lag and sample the stack of long blocks (/loop_stats); read at startup
+    "loop_monitor_interval_ms": 50, # Heartbeat period of the loop monitor
+    "loop_stall_threshold_ms": 100, # Blocks longer than this are logged with the offending coroutine and line
+    "preload_on_startup": True, # Import sara (genai, audio) in the background right after startup instead of on the first start_audio
+    "cad_max_concurrent_jobs": 2, # CAD requests run at once per session; more wait in a queue (priority, then FIFO)
+    "cad_worker_pool": 2, # Warm build123d worker processes for CAD scripts (0 = a fresh interpreter per script); read at startup
+    "cad_worker_max_jobs": 25, # Scripts a CAD worker runs before it is replaced
+    "cad_script_timeout_s": 60, # Wall-clock limit per CAD script run; the process group is killed after it
+    "cad_script_cpu_s": 120, # RLIMIT_CPU budget per CAD script run (POSIX only)
+    "cad_script_memory_mb": 4096, # RLIMIT_AS budget per CAD script run; warm workers get it on top of what build123d already maps (POSIX only)
+    "cad_cache_enabled": True, # Reuse scripts for repeated CAD requests and meshes for scripts that already ran
+    "cad_cache_dir": "", # Where the CAD cache lives (empty = <workspace>/cad_cache)
+    "cad_cache_max_mb": 256, # Mesh cache size; least recently used STLs are evicted beyond it
+    "cad_cache_max_scripts": 2000 # Script cache entries; least recently used are evicted beyond it
 }
 
 SETTINGS = DEFAULT_SETTINGS.copy()
@@ -119,6 +193,117 @@ authenticator = None
 kasa_agent = KasaAgent(known_devices=SETTINGS.get("kasa_devices"))
 # tool_permissions is now SETTINGS["tool_permissions"]
 
+# One AudioLoop per operator session, keyed by session name (default: the client's sid)
+sessions = SessionRegistry(max_sessions=SETTINGS.get("max_sessions", 4))
+
+def session_room(sid):
+    """Room of the client's session (the client itself if it has none)."""
+    session = sessions.for_sid(sid)
+    return session.room if session else sid
+
+def active_loops():
+    return [session.loop for session in sessions if session.loop]
+
+async def join_session(sid, session):
+    if session.expiry_task and not session.expiry_task.done():
+        print(f"[SERVER] Client {sid} reattached to session '{session.name}'.")
+        session.expiry_task.cancel()
+    session.expiry_task = None
+    sessions.attach(sid, session)
+    await sio.enter_room(sid, session.room)
+
+async def leave_session(sid):
+    """Detaches a client; a session left without clients is stopped after the grace period."""
+    session = sessions.detach(sid)
+    if session:
+        await sio.leave_room(sid, session.room)
+        if not session.sids and not session.expiry_task:
+            grace = SETTINGS.get("session_grace_s", 60)
+            print(f"[SERVER] Last client left session '{session.name}'. Stopping it in {grace}s unless a client reattaches.")
+            session.expiry_task = asyncio.create_task(expire_session(session, grace))
+    return session
+
+async def expire_session(session, grace):
+    """Keeps a session without clients alive for `grace` seconds, so a reload or a short network drop can reattach."""
+    await asyncio.sleep(grace)
+    if sessions.get(session.name) is session and not session.sids:
+        print(f"[SERVER] Session '{session.name}' had no clients for {grace}s. Stopping it.")
+        session.expiry_task = None
+        await end_session(session)
+
+async def end_session(session):
+    # Its scratch project stays on disk; it is cleared at the next server start
+    session.stop()
+    sessions.remove(session.name)
+    await sio.close_room(session.room)
+
+def session_clients(sid):
+    """Clients of the sid's session (just the client itself if it has none)."""
+    session = sessions.for_sid(sid)
+    return set(session.sids) if session else {sid}
+
+def transport_backlog(sid):
+    """Packets still waiting in the client's engine.io queue."""
+    eio_sid = sio.manager.eio_sid_from_sid(sid, '/')
+    socket = sio.eio.sockets.get(eio_sid) if eio_sid else None
+    return socket.queue.qsize() if socket else 0
+
+async def send_to_client(event, data, sid):
+    await sio.emit(event, data, room=sid)
+
+# Bounded per-client queues; every event a handler sends goes through them (see emit_queue.py)
+def disconnect_slow_client(sid):
+    """A client fell max_lossless events behind: drop the connection rather than the events."""
+    EMIT_OVERFLOWS.inc()
+    asyncio.create_task(sio.disconnect(sid))
+
+emitter = EmitDispatcher(
+    send=send_to_client,
+    on_overflow=disconnect_slow_client,
+    max_lossless=SETTINGS.get("emit_queue_max", 256),
+    backlog=transport_backlog,
+    max_transport_backlog=SETTINGS.get("emit_transport_backlog", 32),
+)
+
+def room_clients(room):
+    """Sids currently in `room`: a session's room or a single client's sid."""
+    for session in sessions:
+        if session.room == room:
+            return set(session.sids)
+    return set() if room.startswith("session:") else {room}
+
+def emit(event, data=None, room=None):
+    """Queues an event for a room (a session room or a sid; None = every client).
+
+    Everything goes through the client's emit queue, so each client gets its
+    events in the order they were emitted.
+    """
+    emitter.emit(event, data, to=None if room is None else room_clients(room))
+
+def collect_queue_metrics():
+    """Refreshes the queue depth gauges right before /metrics renders."""
+    for gauge in (OUT_QUEUE_DEPTH, AUDIO_IN_QUEUE_DEPTH, EMIT_QUEUE_DEPTH):
+        gauge.clear()
+    for session in sessions:
+        loop = session.loop
+        if loop is None:
+            continue
+        if loop.out_queue is not None:
+            OUT_QUEUE_DEPTH.labels(session=session.name).set(loop.out_queue.qsize())
+        if loop.audio_in_queue is not None:
+            AUDIO_IN_QUEUE_DEPTH.labels(session=session.name).set(loop.audio_in_queue.qsize())
+    for sid, client in emitter.stats()["per_client"].items():
+        EMIT_QUEUE_DEPTH.labels(sid=sid).set(client["depth"])
+    ACTIVE_SESSIONS.set(sum(1 for session in sessions if session.running))
+
+metrics.REGISTRY.add_collector(collect_queue_metrics)
+
+# Event loop lag + stack samples of long blocks (see loop_monitor.py)
+loop_monitor = LoopLagMonitor(
+    interval=SETTINGS.get("loop_monitor_interval_ms", 50) / 1000.0,
+    threshold=SETTINGS.get("loop_stall_threshold_ms", 100) / 1000.0,
+)
+
 @app.on_event("startup")
 async def startup_event():
     import sys
@@ -132,44 +317,126 @@ async def startup_event():
     except Exception as e:
         print(f"[SERVER DEBUG] Error checking loop: {e}")
 
+    # Scratch projects left by the previous run; sessions only create their own from here on
+    clear_scratch_projects(PROJECT_ROOT)
+
+    if SETTINGS.get("loop_monitor_enabled", True):
+        loop_monitor.start()
+        print(f"[SERVER] Event loop monitor started (stall threshold {loop_monitor.threshold * 1000:.0f} ms).")
+
+    print(f"[SERVER] [STARTUP] Ready for connections {(time.perf_counter() - import_profiler.started) * 1000:.0f} ms after server.py started importing.")
+    import_profiler.log("Server imports")
+    if SETTINGS.get("preload_on_startup", True):
+        asyncio.create_task(preload_modules())
+    else:
+        import_profiler.uninstall()
+
+    # build123d/OCP import in the worker processes, not here; the first CAD request finds them warm
+    if SETTINGS.get("cad_worker_pool", 2) > 0:
+        cad_workers.shared_pool(
+            size=SETTINGS.get("cad_worker_pool", 2),
+            max_jobs_per_worker=SETTINGS.get("cad_worker_max_jobs", 25),
+            limits=cad_workers.ScriptLimits.from_settings(SETTINGS),
+        ).start()
+
+    # Known devices are contacted in the background so startup doesn't wait on the network
     print("[SERVER] Startup: Initializing Kasa Agent...")
-    await kasa_agent.initialize()
+    asyncio.create_task(kasa_agent.initialize())
+
+async def preload_modules():
+    """Imports sara (google-genai, audio, agents) off the event loop so the first start_audio doesn't wait."""
+    try:
+        await sara_module.get()
+        print(f"[SERVER] [STARTUP] Preloaded sara in {sara_module.seconds * 1000:.0f} ms (background).")
+        root = import_profiler.find("sara")
+        if root:
+            import_profiler.log("Background import of sara", roots=[root])
+    except Exception as e:
+        print(f"[SERVER] [STARTUP] Preloading sara failed: {e}")
+    finally:
+        import_profiler.uninstall()
 
 @app.get("/status")
 async def status():
     return {"status": "running", "service": "S.A.R.A Backend"}
 
+@app.get("/latency")
+async def latency():
+    """Rolling p50/p95/p99 voice pipeline and tool call latencies (ms), per session."""
+    metrics = {session.name: session.loop.latency.snapshot() for session in sessions if session.loop}
+    return {"active": bool(metrics), "sessions": metrics}
+
+@app.get("/sessions")
+async def list_sessions():
+    return sessions.stats()
+
+@app.get("/emit_stats")
+async def emit_stats():
+    """Per-client outbound queue depth and drop counters."""
+    return emitter.stats()
+
+@app.get("/loop_stats")
+async def loop_stats():
+    """Event loop lag percentiles and the most recent stalls with their stack samples."""
+    return loop_monitor.stats()
+
+@app.get("/cad_workers")
+async def cad_worker_stats():
+    """Warm CAD worker pool: workers, jobs, crashes and recycles."""
+    pool = cad_workers.shared_pool() if SETTINGS.get("cad_worker_pool", 2) > 0 else None
+    return pool.stats() if pool else {"enabled": False}
+
+@app.get("/cad_jobs")
+async def cad_jobs():
+    """Running, queued and recent CAD jobs per session."""
+    return {session.name: session.loop.cad_jobs.stats() for session in sessions
+            if session.loop and "cad_jobs" in session.loop.__dict__}
+
+@app.get("/cad_cache")
+async def cad_cache_stats():
+    """Hits, misses and size of the CAD script and mesh caches."""
+    import cad_cache
+    return [cache.stats() for cache in cad_cache.open_caches().values()]
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
 @sio.event
 async def connect(sid, environ):
     print(f"Client connected: {sid}")
-    await sio.emit('status', {'msg': 'Connected to S.A.R.A Backend'}, room=sid)
+    emitter.add_client(sid)
+    emit('status', {'msg': 'Connected to S.A.R.A Backend'}, room=sid)
 
     global authenticator
     
     # Callback for Auth Status
     async def on_auth_status(is_auth):
         print(f"[SERVER] Auth status change: {is_auth}")
-        await sio.emit('auth_status', {'authenticated': is_auth})
+        emit('auth_status', {'authenticated': is_auth})
 
     # Callback for Auth Camera Frames
     async def on_auth_frame(frame_b64):
-        await sio.emit('auth_frame', {'image': frame_b64})
-
-    # Initialize Authenticator if not already done
-    if authenticator is None:
-        authenticator = FaceAuthenticator(
-            reference_image_path="reference.jpg",
-            on_status_change=on_auth_status,
-            on_frame=on_auth_frame
-        )
+        AUTH_FRAMES.inc()
+        emitter.emit('auth_frame', {'image': frame_b64})
+
+    # Initialize Authenticator if not already done (mediapipe/cv2 only load when face auth is on)
+    if authenticator is None and SETTINGS.get("face_auth_enabled", False):
+        FaceAuthenticator = (await authenticator_module.get()).FaceAuthenticator
+        if authenticator is None:
+            authenticator = FaceAuthenticator(
+                reference_image_path="reference.jpg",
+                on_status_change=on_auth_status,
+                on_frame=on_auth_frame
+            )
     
     # Check if already authenticated or needs to start
-    if authenticator.authenticated:
-        await sio.emit('auth_status', {'authenticated': True})
+    if authenticator and authenticator.authenticated:
+        emit('auth_status', {'authenticated': True})
     else:
         # Check Settings for Auth
         if SETTINGS.get("face_auth_enabled", False):
-            await sio.emit('auth_status', {'authenticated': False})
+            emit('auth_status', {'authenticated': False})
             # Start the auth loop in background
             asyncio.create_task(authenticator.start_authentication_loop())
         else:
@@ -177,7 +444,7 @@ async def connect(sid, environ):
             print("Face Auth Disabled. Auto-authenticating.")
             # We don't change authenticator state to true to avoid confusion if re-enabled? 
             # Or we should just tell client it's auth'd.
-            await sio.emit('auth_status', {'authenticated': True})
+            emit('auth_status', {'authenticated': True})
 
 @sio.event
 async def disconnect(sid):
@@ -185,17 +452,21 @@ async def disconnect(sid):
 
 @sio.event
 async def start_audio(sid, data=None):
-    global audio_loop, loop_task
-    
     # Optional: Block if not authenticated
     # Only block if auth is ENABLED and not authenticated
     if SETTINGS.get("face_auth_enabled", False):
         if authenticator and not authenticator.authenticated:
             print("Blocked start_audio: Not authenticated.")
-            await sio.emit('error', {'msg': 'Authentication Required'})
+            emit('error', {'msg': 'Authentication Required'}, room=sid)
             return
 
-    print("Starting Audio Loop...")
+    # Usually preloaded at startup; waits here if the background import hasn't finished yet
+    sara = await sara_module.get()
+    from audio_transport import AudioVisualizerFeed, DEFAULT_AUDIO_TRANSPORT
+
+    # Clients passing the same session name share one AudioLoop (default: one session per client)
+    session_name = str((data or {}).get('session') or sid)
+    print(f"Starting Audio Loop for session '{session_name}'...")
     
     device_index = None
     device_name = None
@@ -207,44 +478,79 @@ async def start_audio(sid, data=None):
             
     print(f"Using input device: Name='{device_name}', Index={device_index}")
     
-    if audio_loop:
-        if loop_task and (loop_task.done() or loop_task.cancelled()):
-             print("Audio loop task appeared finished/cancelled. Clearing and restarting...")
-             audio_loop = None
-             loop_task = None
+    session = sessions.get(session_name)
+    if session:
+        if not session.running:
+             print(f"Audio loop task for session '{session_name}' appeared finished/cancelled. Clearing and restarting...")
+             await end_session(session)
         else:
-             print("Audio loop already running. Re-connecting client to session.")
-             await sio.emit('status', {'msg': 'S.A.R.A Already Running'})
+             print(f"Audio loop already running. Connecting client {sid} to session '{session_name}'.")
+             if sessions.for_sid(sid) is not session:
+                 await leave_session(sid)
+                 await join_session(sid, session)
+             emit('status', {'msg': 'S.A.R.A Already Running'}, room=sid)
              return
 
+    if sessions.for_sid(sid):
+        # A client drives one session at a time
+        await leave_session(sid)
+    try:
+        session = sessions.create(session_name)
+    except (SessionLimitError, ValueError) as e:
+        print(f"Blocked start_audio: {e}")
+        emit('error', {'msg': str(e)}, room=sid)
+        return
+    await join_session(sid, session)
+    room = session.room
 
     # Callback to send audio data to frontend
+    audio_transport = SETTINGS.get("audio_transport", DEFAULT_AUDIO_TRANSPORT)
+    audio_feed = AudioVisualizerFeed(sample_rate=sara.RECEIVE_SAMPLE_RATE)
+    print(f"Audio transport to frontend: {audio_transport}")
+
     def on_audio_data(data_bytes):
         # We need to schedule this on the event loop
-        # This is high frequency, so we might want to downsample or batch if it's too much
-        asyncio.create_task(sio.emit('audio_data', {'data': list(data_bytes)}))
+        if audio_transport == "binary":
+            # bytes are sent as a Socket.IO binary attachment (no JSON int list)
+            emitter.emit('audio_data', {
+                'data': bytes(data_bytes),
+                'format': 'pcm_s16le',
+                'rate': sara.RECEIVE_SAMPLE_RATE
+            }, to=session.sids)
+        elif audio_transport == "list":
+            emitter.emit('audio_data', {'data': list(data_bytes)}, to=session.sids)
+        else:
+            # Visualizer-only: compact 0-255 spectrum bands at a capped rate
+            summary = audio_feed.summarize(data_bytes)
+            if summary:
+                emitter.emit('audio_data', {'data': summary['bands'], 'level': summary['level']}, to=session.sids)
 
     # Callback to send CAL data to frontend
     def on_cad_data(data):
         info = f"{len(data.get('vertices', []))} vertices" if 'vertices' in data else f"{len(data.get('data', ''))} bytes (STL)"
         print(f"Sending CAD data to frontend: {info}")
-        asyncio.create_task(sio.emit('cad_data', data))
+        emitter.emit('cad_data', data, to=session.sids)
 
     # Callback to send Browser data to frontend
     def on_web_data(data):
         print(f"Sending Browser data to frontend: {len(data.get('log', ''))} chars logs")
-        asyncio.create_task(sio.emit('browser_frame', data))
+        emitter.emit('browser_frame', data, to=session.sids)
         
     # Callback to send Transcription data to frontend
     def on_transcription(data):
         # data = {"sender": "User"|"SARA", "text": "..."}
-        asyncio.create_task(sio.emit('transcription', data))
+        emitter.emit('transcription', data, to=session.sids)
 
     # Callback to send Confirmation Request to frontend
     def on_tool_confirmation(data):
         # data = {"id": "uuid", "tool": "tool_name", "args": {...}}
         print(f"Requesting confirmation for tool: {data.get('tool')}")
-        asyncio.create_task(sio.emit('tool_confirmation_request', data))
+        emitter.emit('tool_confirmation_request', data, to=session.sids)
+
+    # Callback to dismiss a confirmation prompt that timed out or was cancelled
+    def on_tool_confirmation_closed(data):
+        # data = {"id": "uuid", "reason": "timeout" | "cancelled"}
+        emitter.emit('tool_confirmation_closed', data, to=session.sids)
 
     # Callback to send CAD status to frontend
     def on_cad_status(status):
@@ -253,44 +559,51 @@ async def start_audio(sid, data=None):
         # - a dict with {status, attempt, max_attempts, error} (from CadAgent)
         if isinstance(status, dict):
             print(f"Sending CAD Status: {status.get('status')} (attempt {status.get('attempt')}/{status.get('max_attempts')})")
-            asyncio.create_task(sio.emit('cad_status', status))
+            emitter.emit('cad_status', status, to=session.sids)
         else:
             # Legacy: simple string
             print(f"Sending CAD Status: {status}")
-            asyncio.create_task(sio.emit('cad_status', {'status': status}))
+            emitter.emit('cad_status', {'status': status}, to=session.sids)
 
     # Callback to send CAD thoughts to frontend (streaming)
     def on_cad_thought(thought_text):
-        asyncio.create_task(sio.emit('cad_thought', {'text': thought_text}))
+        emitter.emit('cad_thought', {'text': thought_text}, to=session.sids)
+
+    # Callback to send CAD job status (queued/running/done/failed/cancelled) to frontend
+    def on_cad_job(job):
+        print(f"Sending CAD job {job['id']}: {job['status']}")
+        emitter.emit('cad_job', job, to=session.sids)
 
     # Callback to send Project Update to frontend
     def on_project_update(project_name):
         print(f"Sending Project Update: {project_name}")
-        asyncio.create_task(sio.emit('project_update', {'project': project_name}))
+        emitter.emit('project_update', {'project': project_name}, to=session.sids)
 
     # Callback to send Device Update to frontend
     def on_device_update(devices):
         # devices is a list of dicts
         print(f"Sending Kasa Device Update: {len(devices)} devices")
-        asyncio.create_task(sio.emit('kasa_devices', devices))
+        emitter.emit('kasa_devices', devices, to=session.sids)
 
     # Callback to send Error to frontend
     def on_error(msg):
         print(f"Sending Error to frontend: {msg}")
-        asyncio.create_task(sio.emit('error', {'msg': msg}))
+        emitter.emit('error', {'msg': msg}, to=session.sids)
 
     # Initialize SARA
     try:
         print(f"Initializing AudioLoop with device_index={device_index}")
-        audio_loop = sara.AudioLoop(
+        audio_loop = session.loop = sara.AudioLoop(
             video_mode="none", 
             on_audio_data=on_audio_data,
             on_cad_data=on_cad_data,
             on_web_data=on_web_data,
             on_transcription=on_transcription,
             on_tool_confirmation=on_tool_confirmation,
+            on_tool_confirmation_closed=on_tool_confirmation_closed,
             on_cad_status=on_cad_status,
             on_cad_thought=on_cad_thought,
+            on_cad_job=on_cad_job,
             on_project_update=on_project_update,
             on_device_update=on_device_update,
             on_error=on_error,
@@ -298,7 +611,9 @@ async def start_audio(sid, data=None):
             input_device_index=device_index,
             input_device_name=device_name,
             kasa_agent=kasa_agent,
-            settings=SETTINGS
+            settings=SETTINGS,
+            project_root=PROJECT_ROOT,
+            session_name=session.name
         )
         print("AudioLoop initialized successfully.")
 
@@ -311,26 +626,27 @@ async def start_audio(sid, data=None):
             audio_loop.set_paused(True)
 
         print("Creating asyncio task for AudioLoop.run()")
-        loop_task = asyncio.create_task(audio_loop.run())
+        session.task = asyncio.create_task(audio_loop.run())
         
         # Add a done callback to catch silent failures in the loop
         def handle_loop_exit(task):
             try:
                 task.result()
             except asyncio.CancelledError:
-                print("Audio Loop Cancelled")
+                print(f"Audio Loop Cancelled (session '{session_name}')")
             except Exception as e:
-                print(f"Audio Loop Crashed: {e}")
-                # You could emit 'error' here if you have context
+                print(f"Audio Loop Crashed (session '{session_name}'): {e}")
+                emitter.emit('error', {'msg': f"S.A.R.A stopped: {e}"}, to=session.sids)
         
-        loop_task.add_done_callback(handle_loop_exit)
+        session.task.add_done_callback(handle_loop_exit)
         
         print("Emitting 'SARA Started'")
-        await sio.emit('status', {'msg': 'SARA Started'})
+        emit('status', {'msg': 'SARA Started'}, room=room)
 
         # Load saved printers
         saved_printers = SETTINGS.get("printers", [])
-        if saved_printers and audio_loop.printer_agent:
+        if saved_printers:
+            # Only now is PrinterAgent built; sessions without saved printers build it on first use
             print(f"[SERVER] Loading {len(saved_printers)} saved printers...")
             for p in saved_printers:
                 audio_loop.printer_agent.add_printer_manually(
@@ -342,22 +658,26 @@ async def start_audio(sid, data=None):
                 )
         
         # Start Printer Monitor
-        asyncio.create_task(monitor_printers_loop())
+        session.monitor_task = asyncio.create_task(monitor_printers_loop(session))
         
     except Exception as e:
         print(f"CRITICAL ERROR STARTING SARA: {e}")
         import traceback
         traceback.print_exc()
-        await sio.emit('error', {'msg': f"Failed to start: {str(e)}"})
-        audio_loop = None # Ensure we can try again
+        emit('error', {'msg': f"Failed to start: {str(e)}"}, room=room)
+        await end_session(session) # Ensure we can try again
 
 
-async def monitor_printers_loop():
-    """Background task to query printer status periodically."""
-    print("[SERVER] Starting Printer Monitor Loop")
-    while audio_loop and audio_loop.printer_agent:
+async def monitor_printers_loop(session):
+    """Background task to query printer status periodically for one session."""
+    print(f"[SERVER] Starting Printer Monitor Loop (session '{session.name}')")
+    while sessions.get(session.name) is session:
         try:
-            agent = audio_loop.printer_agent
+            # Reading session.loop.printer_agent would build it; wait until something else has
+            if "printer_agent" not in session.loop.__dict__:
+                await asyncio.sleep(5)
+                continue
+            agent = session.loop.printer_agent
             if not agent.printers:
                 await asyncio.sleep(5)
                 continue
@@ -374,7 +694,7 @@ async def monitor_printers_loop():
                         pass # Ignore errors for now
                     elif res:
                         # res is PrintStatus object
-                        await sio.emit('print_status_update', res.to_dict())
+                        emitter.emit('print_status_update', res.to_dict(), to=session.sids)
                         
         except asyncio.CancelledError:
             print("[SERVER] Printer Monitor Cancelled")
@@ -386,62 +706,79 @@ async def monitor_printers_loop():
 
 @sio.event
 async def stop_audio(sid):
-    global audio_loop
-    if audio_loop:
-        audio_loop.stop() 
-        print("Stopping Audio Loop")
-        audio_loop = None
-        await sio.emit('status', {'msg': 'S.A.R.A Stopped'})
+    session = sessions.for_sid(sid)
+    if session:
+        print(f"Stopping Audio Loop (session '{session.name}')")
+        emit('status', {'msg': 'S.A.R.A Stopped'}, room=session.room)
+        await end_session(session)
 
 @sio.event
 async def pause_audio(sid):
-    global audio_loop
+    audio_loop = sessions.loop_for(sid)
     if audio_loop:
         audio_loop.set_paused(True)
         print("Pausing Audio")
-        await sio.emit('status', {'msg': 'Audio Paused'})
+        emit('status', {'msg': 'Audio Paused'}, room=session_room(sid))
 
 @sio.event
 async def resume_audio(sid):
-    global audio_loop
+    audio_loop = sessions.loop_for(sid)
     if audio_loop:
         audio_loop.set_paused(False)
         print("Resuming Audio")
-        await sio.emit('status', {'msg': 'Audio Resumed'})
+        emit('status', {'msg': 'Audio Resumed'}, room=session_room(sid))
+
+@sio.event
+async def get_audio_stats(sid):
+    """Returns jitter buffer underrun/overrun counters and barge-in latency."""
+    audio_loop = sessions.loop_for(sid)
+    if not audio_loop:
+        emit('audio_stats', {'emit': emitter.client_stats(sid)}, room=sid)
+        return
+    emit('audio_stats', {**audio_loop.get_audio_stats(), 'emit': emitter.client_stats(sid)}, room=sid)
+
+@sio.event
+async def get_latency_stats(sid):
+    """Returns rolling voice pipeline latency percentiles."""
+    audio_loop = sessions.loop_for(sid)
+    metrics = audio_loop.latency.snapshot() if audio_loop else {}
+    emit('latency_stats', metrics, room=sid)
+
+@sio.event
+async def get_sessions(sid):
+    """Lists running sessions, the session cap and the session this client is attached to."""
+    current = sessions.for_sid(sid)
+    emit('sessions', {**sessions.stats(), "current": current.name if current else None}, room=sid)
 
 @sio.event
 async def confirm_tool(sid, data):
-    # data: { "id": "...", "confirmed": True/False }
+    # data: { "id": "...", "confirmed": True/False, "decisions": {call_id: True/False} (optional, batches) }
     request_id = data.get('id')
     confirmed = data.get('confirmed', False)
+    decisions = data.get('decisions')
     
     print(f"[SERVER DEBUG] Received confirmation response for {request_id}: {confirmed}")
     
+    audio_loop = sessions.loop_for(sid)
     if audio_loop:
-        audio_loop.resolve_tool_confirmation(request_id, confirmed)
+        audio_loop.resolve_tool_confirmation(request_id, confirmed, decisions)
     else:
         print("Audio loop not active, cannot resolve confirmation.")
 
 @sio.event
 async def shutdown(sid, data=None):
     """Gracefully shutdown the server when the application closes."""
-    global audio_loop, loop_task, authenticator
+    global authenticator
     
     print("[SERVER] ========================================")
     print("[SERVER] SHUTDOWN SIGNAL RECEIVED FROM FRONTEND")
     print("[SERVER] ========================================")
     
-    # Stop audio loop
-    if audio_loop:
-        print("[SERVER] Stopping Audio Loop...")
-        audio_loop.stop()
-        audio_loop = None
-    
-    # Cancel the loop task if running
-    if loop_task and not loop_task.done():
-        print("[SERVER] Cancelling loop task...")
-        loop_task.cancel()
-        loop_task = None
+    # Stop every session's audio loop and cancel its tasks
+    for session in sessions:
+        print(f"[SERVER] Stopping Audio Loop (session '{session.name}')...")
+        session.stop()
+        sessions.remove(session.name)
     
     # Stop authenticator if running
     if authenticator:
@@ -458,6 +795,7 @@ async def user_input(sid, data):
     text = data.get('text')
     print(f"[SERVER DEBUG] User input received: '{text}'")
     
+    audio_loop = sessions.loop_for(sid)
     if not audio_loop:
         print("[SERVER DEBUG] [Error] Audio loop is None. Cannot send text.")
         return
@@ -471,15 +809,15 @@ async def user_input(sid, data):
         
         # Log User Input to Project History
         if audio_loop and audio_loop.project_manager:
-            audio_loop.project_manager.log_chat("User", text)
+            audio_loop.log_turn("User", text)
             
         # Use the same 'send' method that worked for audio, as 'send_realtime_input' and 'send_client_content' seem unstable in this env
         # INJECT VIDEO FRAME IF AVAILABLE (VAD-style logic for Text Input)
-        if audio_loop and audio_loop._latest_image_payload:
+        if audio_loop.frames.has_frame():
             print(f"[SERVER DEBUG] Piggybacking video frame with text input.")
             try:
                 # Send frame first
-                await audio_loop.session.send(input=audio_loop._latest_image_payload, end_of_turn=False)
+                await audio_loop.session.send(input=audio_loop.frames.take(), end_of_turn=False)
             except Exception as e:
                 print(f"[SERVER DEBUG] Failed to send piggyback frame: {e}")
                 
@@ -496,13 +834,14 @@ from pathlib import Path
 async def video_frame(sid, data):
     # data should contain 'image' which is binary (blob) or base64 encoded
     image_data = data.get('image')
+    audio_loop = sessions.loop_for(sid)
     if image_data and audio_loop:
-        # We don't await this because we don't want to block the socket handler
-        # But send_frame is async, so we create a task
-        asyncio.create_task(audio_loop.send_frame(image_data))
+        # Latest-only mailbox: no task and no encoding per frame
+        audio_loop.post_frame(image_data)
 
 @sio.event
 async def save_memory(sid, data):
+    room = session_room(sid)
     try:
         messages = data.get('messages', [])
         if not messages:
@@ -533,14 +872,16 @@ async def save_memory(sid, data):
                 sender = msg.get('sender', 'Unknown')
                 text = msg.get('text', '')
         print(f"Conversation saved to {filename}")
-        await sio.emit('status', {'msg': 'Memory Saved Successfully'})
+        emit('status', {'msg': 'Memory Saved Successfully'}, room=room)
 
     except Exception as e:
         print(f"Error saving memory: {e}")
-        await sio.emit('error', {'msg': f"Failed to save memory: {str(e)}"})
+        emit('error', {'msg': f"Failed to save memory: {str(e)}"}, room=room)
 
 @sio.event
 async def upload_memory(sid, data):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     print(f"Received memory upload request")
     try:
         memory_text = data.get('memory', '')
@@ -550,12 +891,12 @@ async def upload_memory(sid, data):
 
         if not audio_loop:
              print("[SERVER DEBUG] [Error] Audio loop is None. Cannot load memory.")
-             await sio.emit('error', {'msg': "System not ready (Audio Loop inactive)"})
+             emit('error', {'msg': "System not ready (Audio Loop inactive)"}, room=room)
              return
         
         if not audio_loop.session:
              print("[SERVER DEBUG] [Error] Session is None. Cannot load memory.")
-             await sio.emit('error', {'msg': "System not ready (No active session)"})
+             emit('error', {'msg': "System not ready (No active session)"}, room=room)
              return
 
         # Send to model
@@ -564,19 +905,19 @@ async def upload_memory(sid, data):
         
         await audio_loop.session.send(input=context_msg, end_of_turn=True)
         print("Memory context sent successfully.")
-        await sio.emit('status', {'msg': 'Memory Loaded into Context'})
+        emit('status', {'msg': 'Memory Loaded into Context'}, room=room)
 
     except Exception as e:
         print(f"Error uploading memory: {e}")
-        await sio.emit('error', {'msg': f"Failed to upload memory: {str(e)}"})
+        emit('error', {'msg': f"Failed to upload memory: {str(e)}"}, room=room)
 
 @sio.event
 async def discover_kasa(sid):
     print(f"Received discover_kasa request")
     try:
         devices = await kasa_agent.discover_devices()
-        await sio.emit('kasa_devices', devices)
-        await sio.emit('status', {'msg': f"Found {len(devices)} Kasa devices"})
+        emit('kasa_devices', devices)
+        emit('status', {'msg': f"Found {len(devices)} Kasa devices"})
         
         # Save to settings
         # devices is a list of full device info dicts. minimizing for storage.
@@ -598,67 +939,71 @@ async def discover_kasa(sid):
         
     except Exception as e:
         print(f"Error discovering kasa: {e}")
-        await sio.emit('error', {'msg': f"Kasa Discovery Failed: {str(e)}"})
+        emit('error', {'msg': f"Kasa Discovery Failed: {str(e)}"})
 
 @sio.event
 async def iterate_cad(sid, data):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     # data: { prompt: "make it bigger" }
     prompt = data.get('prompt')
     print(f"Received iterate_cad request: '{prompt}'")
     
     if not audio_loop or not audio_loop.cad_agent:
-        await sio.emit('error', {'msg': "CAD Agent not available"})
+        emit('error', {'msg': "CAD Agent not available"}, room=room)
         return
 
     try:
         # Notify user work has started
-        await sio.emit('status', {'msg': 'Iterating design...'})
-        await sio.emit('cad_status', {'status': 'generating'})
+        emit('status', {'msg': 'Iterating design...'}, room=room)
+        emit('cad_status', {'status': 'generating'}, room=room)
         
-        # Call the agent with project path
-        cad_output_dir = str(audio_loop.project_manager.get_current_project_path() / "cad")
-        result = await audio_loop.cad_agent.iterate_prototype(prompt, output_dir=cad_output_dir)
+        # Runs as a CAD job in the project's cad folder (queued behind other CAD requests)
+        result = await audio_loop.run_cad_job("iterate", prompt, priority=data.get('priority', 0))
         
         if result:
             info = f"{len(result.get('data', ''))} bytes (STL)"
             print(f"Sending updated CAD data: {info}")
-            await sio.emit('cad_data', result)
+            emit('cad_data', result, room=room)
             # Save to Project
             if 'file_path' in result:
                 saved_path = audio_loop.project_manager.save_cad_artifact(result['file_path'], prompt)
                 if saved_path:
                     print(f"[SERVER] Saved iterated CAD to {saved_path}")
 
-            await sio.emit('status', {'msg': 'Design updated'})
+            emit('status', {'msg': 'Design updated'}, room=room)
         else:
-            await sio.emit('error', {'msg': 'Failed to update design'})
+            emit('error', {'msg': 'Failed to update design'}, room=room)
             
+    except cad_workers.CadJobCancelled:
+        emit('status', {'msg': 'Design iteration cancelled'}, room=room)
     except Exception as e:
         print(f"Error iterating CAD: {e}")
-        await sio.emit('error', {'msg': f"Iteration Error: {str(e)}"})
+        emit('error', {'msg': f"Iteration Error: {str(e)}"}, room=room)
 
 @sio.event
 async def generate_cad(sid, data):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     # data: { prompt: "make a cube" }
     prompt = data.get('prompt')
     print(f"Received generate_cad request: '{prompt}'")
     
     if not audio_loop or not audio_loop.cad_agent:
-        await sio.emit('error', {'msg': "CAD Agent not available"})
+        emit('error', {'msg': "CAD Agent not available"}, room=room)
         return
 
     try:
-        await sio.emit('status', {'msg': 'Generating new design...'})
-        await sio.emit('cad_status', {'status': 'generating'})
+        emit('status', {'msg': 'Generating new design...'}, room=room)
+        emit('cad_status', {'status': 'generating'}, room=room)
         
-        # Use generate_prototype based on prompt with project path
-        cad_output_dir = str(audio_loop.project_manager.get_current_project_path() / "cad")
-        result = await audio_loop.cad_agent.generate_prototype(prompt, output_dir=cad_output_dir)
+        # Runs as a CAD job in the project's cad folder (queued behind other CAD requests)
+        result = await audio_loop.run_cad_job("generate", prompt, priority=data.get('priority', 0))
         
         if result:
             info = f"{len(result.get('data', ''))} bytes (STL)"
             print(f"Sending newly generated CAD data: {info}")
-            await sio.emit('cad_data', result)
+            emit('cad_data', result, room=room)
 
 
             # Save to Project
@@ -667,26 +1012,41 @@ async def generate_cad(sid, data):
                 if saved_path:
                     print(f"[SERVER] Saved generated CAD to {saved_path}")
 
-            await sio.emit('status', {'msg': 'Design generated'})
+            emit('status', {'msg': 'Design generated'}, room=room)
         else:
-            await sio.emit('error', {'msg': 'Failed to generate design'})
+            emit('error', {'msg': 'Failed to generate design'}, room=room)
             
+    except cad_workers.CadJobCancelled:
+        emit('status', {'msg': 'Design generation cancelled'}, room=room)
     except Exception as e:
         print(f"Error generating CAD: {e}")
-        await sio.emit('error', {'msg': f"Generation Error: {str(e)}"})
+        emit('error', {'msg': f"Generation Error: {str(e)}"}, room=room)
+
+@sio.event
+async def cancel_cad(sid, data=None):
+    """Cancels one CAD job ({job_id}) or all of the session's: the Gemini stream is closed and a running script is killed."""
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
+    job_id = (data or {}).get('job_id')
+    cancelled = audio_loop.cancel_cad(job_id) if audio_loop else 0
+    print(f"[SERVER] cancel_cad: {cancelled} CAD request(s) cancelled.")
+    if not cancelled:
+        emit('status', {'msg': 'No CAD job is running'}, room=room)
 
 @sio.event
 async def prompt_web_agent(sid, data):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     # data: { prompt: "find xyz" }
     prompt = data.get('prompt')
     print(f"Received web agent prompt: '{prompt}'")
     
     if not audio_loop or not audio_loop.web_agent:
-        await sio.emit('error', {'msg': "Web Agent not available"})
+        emit('error', {'msg': "Web Agent not available"}, room=room)
         return
 
     try:
-        await sio.emit('status', {'msg': 'Web Agent running...'})
+        emit('status', {'msg': 'Web Agent running...'}, room=room)
         
         # We assume web_agent has a run method or similar.
         # This might block the loop if not strictly async or offloaded.
@@ -700,14 +1060,16 @@ async def prompt_web_agent(sid, data):
         # Based on typical agent design, run() is the entry point.
         await audio_loop.web_agent.run(prompt)
         
-        await sio.emit('status', {'msg': 'Web Agent finished'})
+        emit('status', {'msg': 'Web Agent finished'}, room=room)
         
     except Exception as e:
         print(f"Error running Web Agent: {e}")
-        await sio.emit('error', {'msg': f"Web Agent Error: {str(e)}"})
+        emit('error', {'msg': f"Web Agent Error: {str(e)}"}, room=room)
 
 @sio.event
 async def discover_printers(sid):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     print("Received discover_printers request")
     
     # If audio_loop isn't ready yet, return saved printers from settings
@@ -725,23 +1087,25 @@ async def discover_printers(sid):
                     "camera_url": p.get("camera_url")
                 })
             print(f"[SERVER] Returning {len(printer_list)} saved printers (audio_loop not ready)")
-            await sio.emit('printer_list', printer_list)
+            emit('printer_list', printer_list, room=room)
             return
         else:
-            await sio.emit('printer_list', [])
-            await sio.emit('status', {'msg': "Connect to S.A.R.A to enable printer discovery"})
+            emit('printer_list', [], room=room)
+            emit('status', {'msg': "Connect to S.A.R.A to enable printer discovery"}, room=room)
             return
         
     try:
         printers = await audio_loop.printer_agent.discover_printers()
-        await sio.emit('printer_list', printers)
-        await sio.emit('status', {'msg': f"Found {len(printers)} printers"})
+        emit('printer_list', printers, room=room)
+        emit('status', {'msg': f"Found {len(printers)} printers"}, room=room)
     except Exception as e:
         print(f"Error discovering printers: {e}")
-        await sio.emit('error', {'msg': f"Printer Discovery Failed: {str(e)}"})
+        emit('error', {'msg': f"Printer Discovery Failed: {str(e)}"}, room=room)
 
 @sio.event
 async def add_printer(sid, data):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     # data: { host: "192.168.1.50", name: "My Printer", type: "moonraker" }
     raw_host = data.get('host')
     name = data.get('name') or raw_host
@@ -758,7 +1122,7 @@ async def add_printer(sid, data):
     print(f"Received add_printer request: {host}:{port} ({ptype})")
     
     if not audio_loop or not audio_loop.printer_agent:
-        await sio.emit('error', {'msg': "Printer Agent not available"})
+        emit('error', {'msg': "Printer Agent not available"}, room=room)
         return
         
     try:
@@ -810,20 +1174,22 @@ async def add_printer(sid, data):
              
         # Refresh list for everyone
         printers = [p.to_dict() for p in audio_loop.printer_agent.printers.values()]
-        await sio.emit('printer_list', printers)
-        await sio.emit('status', {'msg': f"Added printer: {name}"})
+        emit('printer_list', printers, room=room)
+        emit('status', {'msg': f"Added printer: {name}"}, room=room)
         
     except Exception as e:
         print(f"Error adding printer: {e}")
-        await sio.emit('error', {'msg': f"Failed to add printer: {str(e)}"})
+        emit('error', {'msg': f"Failed to add printer: {str(e)}"}, room=room)
 
 @sio.event
 async def print_stl(sid, data):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     print(f"Received print_stl request: {data}")
     # data: { stl_path: "path/to.stl" | "current", printer: "name_or_ip", profile: "optional" }
     
     if not audio_loop or not audio_loop.printer_agent:
-        await sio.emit('error', {'msg': "Printer Agent not available"})
+        emit('error', {'msg': "Printer Agent not available"}, room=room)
         return
         
     try:
@@ -832,10 +1198,10 @@ async def print_stl(sid, data):
         profile = data.get('profile')
         
         if not printer_name:
-             await sio.emit('error', {'msg': "No printer specified"})
+             emit('error', {'msg': "No printer specified"}, room=room)
              return
              
-        await sio.emit('status', {'msg': f"Preparing print for {printer_name}..."})
+        emit('status', {'msg': f"Preparing print for {printer_name}..."}, room=room)
         
         # Get current project path for resolution
         current_project_path = None
@@ -856,23 +1222,23 @@ async def print_stl(sid, data):
                 stl_filename = os.path.basename(resolved_stl)
                 
                 print(f"[SERVER] Opening STL in CAD module: {stl_filename}")
-                await sio.emit('cad_data', {
+                emit('cad_data', {
                     'format': 'stl',
                     'data': stl_b64,
                     'filename': stl_filename
-                })
+                }, room=room)
             except Exception as e:
                 print(f"[SERVER] Warning: Could not preview STL: {e}")
         
         # Progress Callback
         async def on_slicing_progress(percent, message):
-            await sio.emit('slicing_progress', {
+            emitter.emit('slicing_progress', {
                 'printer': printer_name,
                 'percent': percent,
                 'message': message
-            })
+            }, to=session_clients(sid))
             if percent < 100:
-                 await sio.emit('status', {'msg': f"Slicing: {percent}%"})
+                 emit('status', {'msg': f"Slicing: {percent}%"}, room=room)
 
         result = await audio_loop.printer_agent.print_stl(
             stl_path, 
@@ -882,27 +1248,29 @@ async def print_stl(sid, data):
             root_path=current_project_path
         )
         
-        await sio.emit('print_result', result)
-        await sio.emit('status', {'msg': f"Print Job: {result.get('status', 'unknown')}"})
+        emit('print_result', result, room=room)
+        emit('status', {'msg': f"Print Job: {result.get('status', 'unknown')}"}, room=room)
         
     except Exception as e:
         print(f"Error printing STL: {e}")
-        await sio.emit('error', {'msg': f"Print Failed: {str(e)}"})
+        emit('error', {'msg': f"Print Failed: {str(e)}"}, room=room)
 
 @sio.event
 async def get_slicer_profiles(sid):
+    audio_loop = sessions.loop_for(sid)
+    room = session_room(sid)
     """Get available OrcaSlicer profiles for manual selection."""
     print("Received get_slicer_profiles request")
     if not audio_loop or not audio_loop.printer_agent:
-        await sio.emit('error', {'msg': "Printer Agent not available"})
+        emit('error', {'msg': "Printer Agent not available"}, room=room)
         return
     
     try:
         profiles = audio_loop.printer_agent.get_available_profiles()
-        await sio.emit('slicer_profiles', profiles)
+        emit('slicer_profiles', profiles, room=room)
     except Exception as e:
         print(f"Error getting slicer profiles: {e}")
-        await sio.emit('error', {'msg': f"Failed to get profiles: {str(e)}"})
+        emit('error', {'msg': f"Failed to get profiles: {str(e)}"}, room=room)
 
 @sio.event
 async def control_kasa(sid, data):
@@ -928,22 +1296,22 @@ async def control_kasa(sid, data):
             success = await kasa_agent.set_color(ip, (h, s, v))
         
         if success:
-            await sio.emit('kasa_update', {
+            emit('kasa_update', {
                 'ip': ip,
                 'is_on': True if action == "on" else (False if action == "off" else None),
                 'brightness': data.get('value') if action == "brightness" else None,
             })
  
         else:
-             await sio.emit('error', {'msg': f"Failed to control device {ip}"})
+             emit('error', {'msg': f"Failed to control device {ip}"})
 
     except Exception as e:
          print(f"Error controlling kasa: {e}")
-         await sio.emit('error', {'msg': f"Kasa Control Error: {str(e)}"})
+         emit('error', {'msg': f"Kasa Control Error: {str(e)}"})
 
 @sio.event
 async def get_settings(sid):
-    await sio.emit('settings', SETTINGS)
+    emit('settings', SETTINGS)
 
 @sio.event
 async def update_settings(sid, data):
@@ -953,14 +1321,14 @@ async def update_settings(sid, data):
     # Handle specific keys if needed
     if "tool_permissions" in data:
         SETTINGS["tool_permissions"].update(data["tool_permissions"])
-        if audio_loop:
+        for audio_loop in active_loops():
             audio_loop.update_permissions(SETTINGS["tool_permissions"])
             
     if "face_auth_enabled" in data:
         SETTINGS["face_auth_enabled"] = data["face_auth_enabled"]
         # If turned OFF, maybe emit auth status true?
         if not data["face_auth_enabled"]:
-            await sio.emit('auth_status', {'authenticated': True})
+            emit('auth_status', {'authenticated': True})
             # Stop auth loop if running?
             if authenticator:
                 authenticator.stop() 
@@ -977,12 +1345,31 @@ async def update_settings(sid, data):
         SETTINGS["location"] = data["location"]
         print(f"[SERVER] Location set to: {data['location']}")
         # Actualizar system prompt en sara.py
-        from sara import reload_system_prompt
-        reload_system_prompt(SETTINGS)
+        sara = await sara_module.get()
+        sara.reload_system_prompt(SETTINGS)
+    
+    if "vad_engine" in data or "vad_threshold" in data:
+        for key in ("vad_engine", "vad_threshold"):
+            if key in data:
+                SETTINGS[key] = data[key]
+        print(f"[SERVER] VAD set to: {SETTINGS.get('vad_engine')} (threshold {SETTINGS.get('vad_threshold')})")
+        sara = await sara_module.get()
+        for audio_loop in active_loops():
+            audio_loop.vad = sara.create_vad(SETTINGS, sample_rate=sara.SEND_SAMPLE_RATE)
+
+    if "tool_timeouts" in data and isinstance(data["tool_timeouts"], dict):
+        SETTINGS["tool_timeouts"] = data["tool_timeouts"]
+        for audio_loop in active_loops():
+            audio_loop.tool_dispatcher.set_timeouts(SETTINGS["tool_timeouts"])
+
+    if "tool_confirmation_timeout_s" in data:
+        SETTINGS["tool_confirmation_timeout_s"] = data["tool_confirmation_timeout_s"]
+        for audio_loop in active_loops():
+            audio_loop.confirmations.timeout = SETTINGS["tool_confirmation_timeout_s"]
     
     save_settings()
     # Broadcast new full settings
-    await sio.emit('settings', SETTINGS)
+    emit('settings', SETTINGS)
 
 
 # --- BIOMETRIC CAPTURE EVENTS ---
@@ -1007,6 +1394,11 @@ async def biometric_command(sid, data):
     print(f"[BIOMETRIC DEBUG] SID: {sid}")
     print(f"[BIOMETRIC DEBUG] biometric_generator existe: {biometric_generator is not None}")
     print(f"[BIOMETRIC DEBUG] biometric_client_sid: {biometric_client_sid}")
+
+    # mediapipe, cv2 and numpy load in a worker thread on the first biometric command
+    BiometricGeneratorSocket = (await biometric_module.get()).BiometricGeneratorSocket
+    import cv2
+    import numpy as np
     
     try:
         if command == 'start_capture':
@@ -1020,15 +1412,15 @@ async def biometric_command(sid, data):
                 # Crear generador con callbacks
                 def on_frame(frame_b64):
                     print(f"[BIOMETRIC DEBUG] Callback on_frame llamado, tamaño: {len(frame_b64) if frame_b64 else 0}")
-                    asyncio.create_task(sio.emit('biometric_frame', {'image': frame_b64}))
+                    emit('biometric_frame', {'image': frame_b64})
                 
                 def on_face_detected(detected):
                     print(f"[BIOMETRIC DEBUG] Callback on_face_detected llamado: {detected}")
-                    asyncio.create_task(sio.emit('face_detected', {'detected': detected}))
+                    emit('face_detected', {'detected': detected})
                 
                 def on_status(status_data):
                     print(f"[BIOMETRIC DEBUG] Callback on_status llamado: {status_data}")
-                    asyncio.create_task(sio.emit('biometric_status', status_data))
+                    emit('biometric_status', status_data)
                 
                 biometric_generator = BiometricGeneratorSocket(
                     on_frame_callback=on_frame,
@@ -1045,7 +1437,7 @@ async def biometric_command(sid, data):
                 print(f"[BIOMETRIC DEBUG] start_capture() retornó: {success}")
                 if not success:
                     print(f"[BIOMETRIC DEBUG] ERROR: No se pudo iniciar la captura")
-                    await sio.emit('error', {'msg': 'No se pudo iniciar la captura de video'})
+                    emit('error', {'msg': 'No se pudo iniciar la captura de video'})
                     return
             else:
                 print(f"[BIOMETRIC DEBUG] La captura ya está corriendo")
@@ -1059,17 +1451,17 @@ async def biometric_command(sid, data):
             angle = data.get('angle', 'frontal')
             
             if not biometric_generator:
-                await sio.emit('error', {'msg': 'El generador biométrico no está inicializado'})
+                emit('error', {'msg': 'El generador biométrico no está inicializado'})
                 return
             
             if not biometric_generator.is_running:
-                await sio.emit('error', {'msg': 'La captura no está iniciada'})
+                emit('error', {'msg': 'La captura no está iniciada'})
                 return
             
             # Capturar frame actual
             ret, frame = biometric_generator.cap.read()
             if not ret:
-                await sio.emit('error', {'msg': 'No se pudo capturar el frame'})
+                emit('error', {'msg': 'No se pudo capturar el frame'})
                 return
             
             # Detectar rostro y extraer landmarks
@@ -1077,7 +1469,7 @@ async def biometric_command(sid, data):
             landmarks = biometric_generator._extract_landmarks(rgb_frame)
             
             if landmarks is None:
-                await sio.emit('error', {'msg': 'No se detectó rostro en la foto'})
+                emit('error', {'msg': 'No se detectó rostro en la foto'})
                 return
             
             # Guardar foto
@@ -1113,7 +1505,7 @@ async def biometric_command(sid, data):
             biometric_generator.captured_landmarks.append(landmarks)
             
             print(f"[BIOMETRIC] Foto capturada: {angle}")
-            await sio.emit('biometric_status', {
+            emit('biometric_status', {
                 'state': 'photo_captured',
                 'angle': angle,
                 'message': f'Foto capturada: {angle}'
@@ -1122,11 +1514,11 @@ async def biometric_command(sid, data):
         elif command == 'complete_capture':
             # Completar el proceso de generación de perfil
             if not biometric_generator:
-                await sio.emit('error', {'msg': 'El generador biométrico no está inicializado'})
+                emit('error', {'msg': 'El generador biométrico no está inicializado'})
                 return
             
             if not biometric_generator.captured_photos:
-                await sio.emit('error', {'msg': 'No hay fotos capturadas'})
+                emit('error', {'msg': 'No hay fotos capturadas'})
                 return
             
             try:
@@ -1164,7 +1556,7 @@ async def biometric_command(sid, data):
                     cv2.imwrite(reference_path, cv2.imread(frontal_photo["path"]))
                 
                 # Emitir estado de éxito
-                await sio.emit('biometric_status', {
+                emit('biometric_status', {
                     'state': 'success',
                     'user_name': biometric_generator.user_name,
                     'profile_dir': biometric_generator.profile_dir,
@@ -1182,7 +1574,7 @@ async def biometric_command(sid, data):
                 
             except Exception as e:
                 print(f"[BIOMETRIC] Error al completar perfil: {e}")
-                await sio.emit('error', {'msg': f'Error al completar perfil: {str(e)}'})
+                emit('error', {'msg': f'Error al completar perfil: {str(e)}'})
         
         elif command == 'cancel_capture':
             # Cancelar el proceso de captura
@@ -1194,23 +1586,23 @@ async def biometric_command(sid, data):
                 biometric_generator = None
                 biometric_client_sid = None
                 print(f"[BIOMETRIC DEBUG] Enviando biometric_status cancelled")
-                await sio.emit('biometric_status', {
+                emit('biometric_status', {
                     'state': 'cancelled',
                     'message': 'Captura cancelada'
                 })
                 print("[BIOMETRIC] Captura cancelada")
             else:
                 print(f"[BIOMETRIC DEBUG] ERROR: biometric_generator es None")
-                await sio.emit('error', {'msg': 'El generador biométrico no está inicializado'})
+                emit('error', {'msg': 'El generador biométrico no está inicializado'})
         
         else:
-            await sio.emit('error', {'msg': f'Comando desconocido: {command}'})
+            emit('error', {'msg': f'Comando desconocido: {command}'})
     
     except Exception as e:
         print(f"[BIOMETRIC] Error al procesar comando: {e}")
         import traceback
         traceback.print_exc()
-        await sio.emit('error', {'msg': f'Error en comando biométrico: {str(e)}'})
+        emit('error', {'msg': f'Error en comando biométrico: {str(e)}'})
 
 
 @sio.event
@@ -1219,6 +1611,8 @@ async def disconnect(sid):
     
     # Si el cliente desconectado era el cliente biométrico, limpiar
     global biometric_generator, biometric_client_sid
+    await leave_session(sid)
+    emitter.remove_client(sid)
     if biometric_client_sid == sid and biometric_generator:
         print("[BIOMETRIC] Cliente biométrico desconectado, limpiando...")
         biometric_generator.stop_capture()
@@ -1229,7 +1623,7 @@ async def disconnect(sid):
 # Deprecated/Mapped for compatibility if frontend still uses specific events
 @sio.event
 async def get_tool_permissions(sid):
-    await sio.emit('tool_permissions', SETTINGS["tool_permissions"])
+    emit('tool_permissions', SETTINGS["tool_permissions"])
 
 @sio.event
 async def update_tool_permissions(sid, data):
@@ -1237,14 +1631,15 @@ async def update_tool_permissions(sid, data):
     SETTINGS["tool_permissions"].update(data)
     save_settings()
     
-    if audio_loop:
+    for audio_loop in active_loops():
         audio_loop.update_permissions(SETTINGS["tool_permissions"])
     # Broadcast update to all
-    await sio.emit('tool_permissions', SETTINGS["tool_permissions"])
+    emit('tool_permissions', SETTINGS["tool_permissions"])
 
 if __name__ == "__main__":
     uvicorn.run(
-        "server:app_socketio",
+        # The app object, not "server:app_socketio": an import string would run this module a second time
+        app_socketio,
         host="127.0.0.1",
         port=8000,
         reload=False, # Reload enabled causes spawn of worker which might miss the event loop policy patch
@@ -0,0 +1,523 @@
+"""
+Record and replay full AudioLoop sessions.
+
+Recording (enable with the `session_recording_dir` setting) wraps the Live
+session and writes everything that crosses it to a gzip file, one file per
+connection:
+
+    mic          PCM chunks sent upstream (raw bytes)
+    video        camera/screen frames sent upstream (decoded JPEG bytes)
+    text         text messages sent upstream
+    server       every LiveServerMessage received
+    tool_result  function responses sent back to the model
+
+Each record is a fixed header (kind, timestamp, meta length, payload length),
+a JSON meta block and a binary payload. Bytes fields inside server messages
+(model audio) are stored in the payload instead of as base64.
+
+Replay feeds a recording back through a real AudioLoop: server messages are
+re-delivered on the recorded timeline (or as fast as possible) and the mic
+plays the recorded PCM. Tools are not executed during replay: each tool
+call is answered with the function responses recorded for its call id, so
+a replay has no side effects and the model sees the results it saw live.
+Calls that were never answered in the recording (cancelled or interrupted)
+get no response in the replay either.
+
+Usage:
+    python session_recording.py info recordings/session-20250101-120000.rec
+    python session_recording.py replay recordings/session-20250101-120000.rec --speed 0 --profile
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import gzip
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+from google.genai import types
+
+FORMAT_VERSION = 1
+
+KIND_HEADER = "header"
+KIND_MIC = "mic"
+KIND_VIDEO = "video"
+KIND_TEXT = "text"
+KIND_SERVER = "server"
+KIND_TOOL_RESULT = "tool_result"
+
+_KIND_CODES = {KIND_HEADER: 0, KIND_MIC: 1, KIND_VIDEO: 2, KIND_TEXT: 3, KIND_SERVER: 4, KIND_TOOL_RESULT: 5}
+_CODE_KINDS = {code: kind for kind, code in _KIND_CODES.items()}
+
+# kind code, seconds since start, meta length, payload length
+_RECORD = struct.Struct("<BdII")
+
+
+def _pack_blobs(value, blobs):
+    """Replaces bytes values with {"__blob__": i} references, collecting the bytes in `blobs`."""
+    if isinstance(value, (bytes, bytearray)):
+        blobs.append(bytes(value))
+        return {"__blob__": len(blobs) - 1}
+    if isinstance(value, dict):
+        return {k: _pack_blobs(v, blobs) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_pack_blobs(v, blobs) for v in value]
+    return value
+
+
+def _unpack_blobs(value, blobs):
+    if isinstance(value, dict):
+        if len(value) == 1 and "__blob__" in value:
+            return blobs[value["__blob__"]]
+        return {k: _unpack_blobs(v, blobs) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_unpack_blobs(v, blobs) for v in value]
+    return value
+
+
+def _dump_model(obj):
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(exclude_none=True)
+    return obj
+
+
+@dataclass
+class RecordedEvent:
+    kind: str
+    t: float
+    meta: dict
+    payload: bytes = b""
+
+    def blobs(self) -> List[bytes]:
+        blobs, offset = [], 0
+        for size in self.meta.get("blob_sizes", []):
+            blobs.append(self.payload[offset:offset + size])
+            offset += size
+        return blobs
+
+    def server_message(self) -> types.LiveServerMessage:
+        return types.LiveServerMessage.model_validate(_unpack_blobs(self.meta["msg"], self.blobs()))
+
+    def function_responses(self) -> List[types.FunctionResponse]:
+        return [types.FunctionResponse.model_validate(_unpack_blobs(r, self.blobs())) for r in self.meta["responses"]]
+
+
+class SessionRecorder:
+    """Writes a session recording. Errors disable recording instead of breaking the session."""
+
+    def __init__(self, path: str, metadata: Optional[dict] = None, clock=time.perf_counter, compresslevel: int = 5):
+        self.path = path
+        self.clock = clock
+        self._file = gzip.open(path, "wb", compresslevel=compresslevel)
+        self._start = clock()
+        self.records = 0
+        self.bytes_in = 0
+        self.failed = False
+        header = {"version": FORMAT_VERSION, "created": time.time()}
+        header.update(metadata or {})
+        self._write(KIND_HEADER, header)
+
+    @classmethod
+    def in_directory(cls, directory: str, metadata: Optional[dict] = None, **kwargs):
+        """Creates a new timestamped recording file in `directory`."""
+        os.makedirs(directory, exist_ok=True)
+        name = time.strftime("session-%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"{name}.rec")
+        suffix = 1
+        while os.path.exists(path):
+            suffix += 1
+            path = os.path.join(directory, f"{name}-{suffix}.rec")
+        return cls(path, metadata=metadata, **kwargs)
+
+    def _write(self, kind, meta, blobs=()):
+        if self.failed or self._file is None:
+            return
+        try:
+            if blobs:
+                meta["blob_sizes"] = [len(b) for b in blobs]
+            meta_bytes = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+            payload = b"".join(blobs)
+            self._file.write(_RECORD.pack(_KIND_CODES[kind], self.clock() - self._start, len(meta_bytes), len(payload)))
+            self._file.write(meta_bytes)
+            self._file.write(payload)
+            self.records += 1
+            self.bytes_in += _RECORD.size + len(meta_bytes) + len(payload)
+        except Exception as e:
+            print(f"[RECORD] [ERR] Recording disabled: {e}")
+            self.failed = True
+
+    def record_send(self, input, end_of_turn=False):
+        if isinstance(input, dict):
+            mime_type = input.get("mime_type", "")
+            data = input.get("data", b"")
+            if mime_type.startswith("audio/"):
+                self._write(KIND_MIC, {"mime_type": mime_type}, [data])
+                return
+            if mime_type.startswith("image/"):
+                if isinstance(data, str):
+                    data = base64.b64decode(data)
+                self._write(KIND_VIDEO, {"mime_type": mime_type}, [data])
+                return
+        self._write(KIND_TEXT, {"text": str(input), "end_of_turn": bool(end_of_turn)})
+
+    def record_server_message(self, msg):
+        blobs = []
+        packed = _pack_blobs(_dump_model(msg), blobs)
+        self._write(KIND_SERVER, {"msg": packed}, blobs)
+
+    def record_tool_response(self, function_responses):
+        blobs = []
+        packed = [_pack_blobs(_dump_model(r), blobs) for r in function_responses or []]
+        self._write(KIND_TOOL_RESULT, {"responses": packed}, blobs)
+
+    def wrap(self, session):
+        return RecordingSession(session, self)
+
+    def close(self):
+        if self._file is not None:
+            try:
+                self._file.close()
+            except Exception as e:
+                print(f"[RECORD] [ERR] Failed to close {self.path}: {e}")
+            self._file = None
+            print(f"[RECORD] Saved {self.records} records to {self.path}")
+
+    def stats(self) -> dict:
+        return {"path": self.path, "records": self.records, "bytes": self.bytes_in, "failed": self.failed}
+
+
+class RecordingSession:
+    """Live session proxy that records traffic in both directions."""
+
+    def __init__(self, session, recorder: SessionRecorder):
+        self._session = session
+        self.recorder = recorder
+
+    async def send(self, input=None, end_of_turn=False):
+        self.recorder.record_send(input, end_of_turn)
+        return await self._session.send(input=input, end_of_turn=end_of_turn)
+
+    async def send_tool_response(self, function_responses=None):
+        self.recorder.record_tool_response(function_responses)
+        return await self._session.send_tool_response(function_responses=function_responses)
+
+    async def receive(self):
+        async for msg in self._session.receive():
+            self.recorder.record_server_message(msg)
+            yield msg
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+
+def read_recording(path: str) -> List[RecordedEvent]:
+    """Loads every record from a recording file. A truncated tail (crash mid-write) is ignored."""
+    events = []
+    with gzip.open(path, "rb") as f:
+        while True:
+            try:
+                header = f.read(_RECORD.size)
+            except EOFError:
+                break
+            if len(header) < _RECORD.size:
+                break
+            code, t, meta_len, payload_len = _RECORD.unpack(header)
+            try:
+                meta_bytes = f.read(meta_len)
+                payload = f.read(payload_len)
+            except EOFError:
+                break
+            if len(meta_bytes) < meta_len or len(payload) < payload_len:
+                break
+            events.append(RecordedEvent(_CODE_KINDS[code], t, json.loads(meta_bytes), payload))
+    return events
+
+
+def summarize(events: List[RecordedEvent]) -> dict:
+    counts, sizes = {}, {}
+    for event in events:
+        counts[event.kind] = counts.get(event.kind, 0) + 1
+        sizes[event.kind] = sizes.get(event.kind, 0) + len(event.payload)
+    header = events[0].meta if events and events[0].kind == KIND_HEADER else {}
+    return {
+        "header": header,
+        "duration_s": round(events[-1].t, 2) if events else 0.0,
+        "counts": counts,
+        "payload_bytes": sizes,
+    }
+
+
+# --- Replay ---
+
+class ReplayLiveSession:
+    """Re-delivers recorded server messages on the recorded timeline (speed 0 = as fast as possible)."""
+
+    def __init__(self, events: List[RecordedEvent], speed: float = 1.0):
+        self.speed = speed
+        self._server_events = [e for e in events if e.kind == KIND_SERVER]
+        self._messages = asyncio.Queue()
+        self._driver = None
+        self._delivered_all = False
+
+        self.messages_delivered = 0
+        self.messages_received = 0
+        self.audio_chunks_sent = 0
+        self.images_sent = 0
+        self.texts_sent = 0
+        self.tool_responses_sent = 0
+
+    @property
+    def finished(self) -> bool:
+        """All recorded server messages were delivered and consumed by receive()."""
+        return self._delivered_all and self._messages.empty()
+
+    async def send(self, input=None, end_of_turn=False):
+        if isinstance(input, dict):
+            mime_type = input.get("mime_type", "")
+            if mime_type.startswith("audio/"):
+                self.audio_chunks_sent += 1
+            elif mime_type.startswith("image/"):
+                self.images_sent += 1
+        elif input is not None:
+            self.texts_sent += 1
+
+    async def send_tool_response(self, function_responses=None):
+        self.tool_responses_sent += len(function_responses or [])
+
+    async def receive(self):
+        while True:
+            msg = await self._messages.get()
+            self.messages_received += 1
+            yield msg
+            if msg.server_content and msg.server_content.turn_complete:
+                return
+
+    async def _drive(self):
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        for event in self._server_events:
+            if self.speed:
+                delay = start + event.t / self.speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            else:
+                # Yield so receive_audio keeps pace instead of seeing one huge backlog
+                await asyncio.sleep(0)
+            self._messages.put_nowait(event.server_message())
+            self.messages_delivered += 1
+        self._delivered_all = True
+
+    def start(self):
+        self._driver = asyncio.create_task(self._drive())
+
+    async def close(self):
+        if self._driver and not self._driver.done():
+            self._driver.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._driver
+
+    def stats(self) -> dict:
+        return {
+            "server_messages": len(self._server_events),
+            "messages_delivered": self.messages_delivered,
+            "messages_received": self.messages_received,
+            "audio_chunks_sent": self.audio_chunks_sent,
+            "images_sent": self.images_sent,
+            "texts_sent": self.texts_sent,
+            "tool_responses_sent": self.tool_responses_sent,
+        }
+
+
+class ReplayLiveClient:
+    """connect() factory for AudioLoop(live_connect=...)."""
+
+    def __init__(self, events: List[RecordedEvent], speed: float = 1.0):
+        self.events = events
+        self.speed = speed
+        self.sessions = []
+
+    @property
+    def session(self) -> Optional[ReplayLiveSession]:
+        return self.sessions[-1] if self.sessions else None
+
+    @contextlib.asynccontextmanager
+    async def connect(self, model=None, config=None):
+        session = ReplayLiveSession(self.events, self.speed)
+        self.sessions.append(session)
+        session.start()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+class RecordedToolResults:
+    """Stands in for AudioLoop.handle_tool_call: answers tool calls with the recorded function responses."""
+
+    def __init__(self, events: List[RecordedEvent]):
+        self._responses = {}
+        for event in events:
+            if event.kind == KIND_TOOL_RESULT:
+                for response in event.function_responses():
+                    self._responses[response.id] = response
+        self.answered = 0
+        self.unanswered = 0
+
+    async def handle_tool_call(self, tool_call):
+        function_responses = []
+        for fc in tool_call.function_calls:
+            response = self._responses.get(fc.id)
+            if response is None:
+                self.unanswered += 1
+                print(f"[SARA DEBUG] [REPLAY] No recorded result for '{fc.name}' (ID: {fc.id}), not answering")
+                continue
+            self.answered += 1
+            function_responses.append(response)
+        return function_responses
+
+    def stats(self) -> dict:
+        return {
+            "recorded": len(self._responses),
+            "answered": self.answered,
+            "unanswered": self.unanswered,
+        }
+
+
+def recorded_mic(events: List[RecordedEvent]) -> bytes:
+    return b"".join(e.payload for e in events if e.kind == KIND_MIC)
+
+
+# Device pace used for "as fast as possible" replays; PortAudio-style blocking
+# streams still need some pacing or the mic thread would starve the event loop
+FAST_DEVICE_SPEED = 50.0
+
+
+def _replay_devices(events, speed):
+    from fake_live import FakeInputStream, FakePyAudio
+
+    pcm = recorded_mic(events)
+
+    class ReplayInputStream(FakeInputStream):
+        def _generate(self, pattern):
+            chunk_bytes = self.frames_per_buffer * 2
+            for offset in range(0, len(pcm) - chunk_bytes + 1, chunk_bytes):
+                yield pcm[offset:offset + chunk_bytes]
+            silence = bytes(chunk_bytes)
+            while True:
+                yield silence
+
+    class ReplayPyAudio(FakePyAudio):
+        def open(self, rate=16000, input=False, frames_per_buffer=1024, stream_callback=None, **kwargs):
+            if not input:
+                return super().open(rate=rate, frames_per_buffer=frames_per_buffer, **kwargs)
+            stream = ReplayInputStream(rate, frames_per_buffer, None, self.speed, stream_callback)
+            self.input_streams.append(stream)
+            return stream
+
+    return ReplayPyAudio(speed=speed or FAST_DEVICE_SPEED)
+
+
+async def replay(path: str, speed: float = 1.0, settings: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+    """Runs a recording through AudioLoop. Returns latency, audio and replay stats."""
+    import sara
+
+    events = read_recording(path)
+    info = summarize(events)
+    live = ReplayLiveClient(events, speed)
+    devices = _replay_devices(events, speed)
+    if timeout is None:
+        timeout = info["duration_s"] / (speed or FAST_DEVICE_SPEED) + 30
+
+    tools = RecordedToolResults(events)
+    with tempfile.TemporaryDirectory() as project_root:
+        audio_loop = sara.AudioLoop(
+            video_mode="none",
+            live_connect=live.connect,
+            audio_interface=devices,
+            settings=settings or {},
+            project_root=project_root,
+        )
+        # Replays must not touch files, printers or lights
+        audio_loop.handle_tool_call = tools.handle_tool_call
+
+        started = time.perf_counter()
+        run_task = asyncio.create_task(audio_loop.run())
+        try:
+            deadline = started + timeout
+            while time.perf_counter() < deadline and not run_task.done():
+                session = live.session
+                if session and session.finished and audio_loop.audio_in_queue.empty():
+                    await asyncio.sleep(0.2)
+                    break
+                await asyncio.sleep(0.02)
+        finally:
+            audio_loop.stop()
+            run_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await run_task
+        elapsed = time.perf_counter() - started
+
+    session = live.session
+    return {
+        "recording": info,
+        "speed": speed,
+        "elapsed_s": round(elapsed, 2),
+        "connects": len(live.sessions),
+        "replay": session.stats() if session else {},
+        "tools": tools.stats(),
+        "latency": audio_loop.latency.snapshot(),
+        "audio": audio_loop.get_audio_stats(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or replay a recorded AudioLoop session")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info_parser = sub.add_parser("info", help="Summarize a recording")
+    info_parser.add_argument("path")
+    replay_parser = sub.add_parser("replay", help="Replay a recording through AudioLoop")
+    replay_parser.add_argument("path")
+    replay_parser.add_argument("--speed", type=float, default=1.0, help="1 = recorded pace, 0 = as fast as possible")
+    replay_parser.add_argument("--profile", action="store_true", help="Profile the replay with cProfile")
+    replay_parser.add_argument("--json", action="store_true", help="Print the raw JSON report")
+    args = parser.parse_args()
+
+    if args.command == "info":
+        print(json.dumps(summarize(read_recording(args.path)), indent=2))
+        return 0
+
+    # Replay never contacts the API; a placeholder key is enough for the clients
+    os.environ.setdefault("GEMINI_API_KEY", "offline-replay")
+    sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        report = profiler.runcall(asyncio.run, replay(args.path, speed=args.speed))
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(30)
+    else:
+        report = asyncio.run(replay(args.path, speed=args.speed))
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        replay_stats = report["replay"]
+        print(f"\nReplayed {replay_stats.get('messages_received')}/{replay_stats.get('server_messages')} server messages "
+              f"in {report['elapsed_s']}s (recorded {report['recording']['duration_s']}s, speed {args.speed})")
+        tools = report["tools"]
+        print(f"  tool calls answered from the recording: {tools['answered']} (unanswered {tools['unanswered']})")
+        for metric, snap in report["latency"].items():
+            print(f"  {metric:26} n={snap['count']:<4} p50={snap['p50_ms']}ms p95={snap['p95_ms']}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,130 @@
+"""
+Registry of concurrent AudioLoop sessions for server.py.
+
+Each operator station gets its own LiveSession with its own AudioLoop (and
+so its own Live connection, queues, CAD/web/printer agents and
+ProjectManager). A session's scratch project is `projects/.scratch/<name>`.
+A session is keyed by name. The name defaults to the sid of the client that
+started it. Clients that pass the same name to start_audio join that session
+instead of starting another one.
+
+Socket.IO clients are attached to at most one session at a time, and every
+session has its own room. Callbacks emit to the room, so output only reaches
+the clients of the session that produced it.
+
+When the last client leaves, server.py keeps the session running for a grace
+period (`expiry_task`). A client that reconnects with the same session name
+within it reattaches to the running session.
+
+`max_sessions` caps the number of concurrent sessions (0 = no cap).
+"""
+
+import time
+
+
+class SessionLimitError(RuntimeError):
+    """Raised when starting a session would exceed max_sessions."""
+
+
+class LiveSession:
+    """One AudioLoop plus the Socket.IO clients attached to it."""
+
+    def __init__(self, name: str, loop=None):
+        self.name = name
+        self.room = f"session:{name}"
+        self.loop = loop
+        self.task = None
+        self.monitor_task = None
+        self.expiry_task = None  # Pending stop while the session has no clients
+        self.sids = set()
+        self.created_at = time.time()
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def stop(self):
+        """Stops the AudioLoop and cancels its background tasks."""
+        if self.loop:
+            self.loop.stop()
+        for task in (self.task, self.monitor_task, self.expiry_task):
+            if task and not task.done():
+                task.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "clients": len(self.sids),
+            "running": self.running,
+            "expiring": self.expiry_task is not None and not self.expiry_task.done(),
+            "uptime_s": round(time.time() - self.created_at, 1),
+        }
+
+
+class SessionRegistry:
+    """Sessions by name, plus the session each Socket.IO sid is attached to."""
+
+    def __init__(self, max_sessions: int = 4):
+        self.max_sessions = max_sessions
+        self._sessions = {}
+        self._by_sid = {}
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __iter__(self):
+        return iter(list(self._sessions.values()))
+
+    def get(self, name: str):
+        return self._sessions.get(name)
+
+    def for_sid(self, sid):
+        """Session the client is attached to, or None."""
+        name = self._by_sid.get(sid)
+        return self._sessions.get(name) if name is not None else None
+
+    def loop_for(self, sid):
+        """AudioLoop of the client's session, or None."""
+        session = self.for_sid(sid)
+        return session.loop if session else None
+
+    def create(self, name: str, sid=None) -> LiveSession:
+        """Registers a new session and attaches `sid`. Raises SessionLimitError when full."""
+        if name in self._sessions:
+            raise ValueError(f"Session '{name}' already exists")
+        if self.max_sessions and len(self._sessions) >= self.max_sessions:
+            raise SessionLimitError(f"Session limit reached ({self.max_sessions} concurrent sessions)")
+        session = LiveSession(name)
+        self._sessions[name] = session
+        if sid is not None:
+            self.attach(sid, session)
+        return session
+
+    def attach(self, sid, session: LiveSession):
+        """Attaches a client to a session. A client leaves its previous session."""
+        self.detach(sid)
+        session.sids.add(sid)
+        self._by_sid[sid] = session.name
+
+    def detach(self, sid):
+        """Detaches a client. Returns the session it left, or None."""
+        name = self._by_sid.pop(sid, None)
+        session = self._sessions.get(name) if name is not None else None
+        if session:
+            session.sids.discard(sid)
+        return session
+
+    def remove(self, name: str):
+        """Unregisters a session and detaches its clients. Does not stop it. Returns it, or None."""
+        session = self._sessions.pop(name, None)
+        if session:
+            for sid in session.sids:
+                self._by_sid.pop(sid, None)
+        return session
+
+    def stats(self) -> dict:
+        return {
+            "max_sessions": self.max_sessions,
+            "active": len(self._sessions),
+            "sessions": [s.stats() for s in self._sessions.values()],
+        }
@@ -0,0 +1,184 @@
+"""
+Reconnect support for AudioLoop.run.
+
+Previously a reconnect read the last 10 chat lines into one text message
+with end_of_turn=True. The model spent a full turn answering it, and
+everything older was lost. Now there are two paths:
+
+- SessionResumption: the connect config asks the Live API for resumption
+  handles. The server sends session_resumption_update messages during the
+  session, and the newest resumable handle is kept. The next connect
+  passes it, so the server restores the conversation itself and no
+  context message is needed. A handle that fails to resume is discarded.
+- RollingContext: the fallback when there is no usable handle (first
+  connect of the process, resumption disabled, handle expired or
+  rejected). Every logged turn is kept. The recent turns stay verbatim;
+  older ones are folded into a summary of one short line per turn. Both
+  parts fit a token budget (about 4 characters per token). The context is
+  sent with end_of_turn=False, so the model takes it in without spending
+  a turn on a reply.
+"""
+
+import math
+import time
+from collections import deque
+
+from google.genai import types
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+class SessionResumption:
+    """Tracks the latest resumable Live API session handle."""
+
+    def __init__(self, enabled: bool = True, max_age_s: float = 7200.0, clock=time.time):
+        self.enabled = enabled
+        # Handles stay valid for a limited time after the session ends
+        self.max_age_s = max_age_s
+        self.clock = clock
+        self.handle = None
+        self.updated_at = None
+
+        self.updates = 0
+        self.resumed = 0
+        self.rejected = 0
+
+    def update(self, update) -> bool:
+        """Applies a session_resumption_update message. Returns True if a new handle was stored."""
+        if not self.enabled or update is None:
+            return False
+        self.updates += 1
+        if update.resumable is False or not update.new_handle:
+            # The session can't be resumed at this point (e.g. mid tool call); keep the last good handle
+            return False
+        self.handle = update.new_handle
+        self.updated_at = self.clock()
+        return True
+
+    def usable_handle(self):
+        if not self.enabled or not self.handle:
+            return None
+        if self.max_age_s and self.clock() - self.updated_at > self.max_age_s:
+            self.handle = None
+            return None
+        return self.handle
+
+    def connect_config(self, base: types.LiveConnectConfig) -> types.LiveConnectConfig:
+        """Connect config that requests handles and resumes from the stored one, if any."""
+        if not self.enabled:
+            return base
+        return base.model_copy(update={
+            "session_resumption": types.SessionResumptionConfig(handle=self.usable_handle()),
+        })
+
+    def mark_resumed(self):
+        self.resumed += 1
+
+    def reject(self):
+        """Drops the stored handle after a failed resume, so the next attempt starts fresh."""
+        if self.handle:
+            self.rejected += 1
+        self.handle = None
+        self.updated_at = None
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "has_handle": bool(self.usable_handle()),
+            "updates": self.updates,
+            "resumed": self.resumed,
+            "rejected": self.rejected,
+        }
+
+
+class RollingContext:
+    """Recent turns verbatim plus a one-line-per-turn summary of older ones, within a token budget."""
+
+    HEADER = ("System Notification: The connection was lost and has been re-established. "
+              "This is the conversation so far, for context only. Continue from where it "
+              "left off; no need to mention the reconnection unless the user asks.")
+
+    def __init__(self, token_budget: int = 2000, summary_share: float = 0.3, summary_line_chars: int = 160):
+        self.token_budget = token_budget
+        self.summary_budget = int(token_budget * summary_share)
+        self.recent_budget = token_budget - self.summary_budget
+        self.summary_line_chars = summary_line_chars
+        self._recent = deque()       # (sender, text, tokens)
+        self._recent_tokens = 0
+        self._summary = deque()      # (line, tokens)
+        self._summary_tokens = 0
+
+        self.turns_added = 0
+        self.turns_summarized = 0
+        self.summary_lines_dropped = 0
+
+    def __len__(self):
+        return len(self._recent) + len(self._summary)
+
+    def add_turn(self, sender: str, text: str):
+        text = " ".join(text.split())
+        if not text:
+            return
+        line = f"[{sender}]: {text}"
+        tokens = estimate_tokens(line)
+        self._recent.append((sender, text, tokens))
+        self._recent_tokens += tokens
+        self.turns_added += 1
+        self._compact()
+
+    def extend(self, entries):
+        """Seeds from chat history entries ({"sender", "text"}), oldest first."""
+        for entry in entries:
+            self.add_turn(entry.get("sender", "Unknown"), entry.get("text", ""))
+
+    def _summarize(self, sender, text) -> str:
+        # Extractive: the first sentence, clipped
+        first = text.split(". ")[0]
+        if len(first) > self.summary_line_chars:
+            first = first[:self.summary_line_chars - 3].rstrip() + "..."
+        return f"- {sender}: {first}"
+
+    def _compact(self):
+        # Keep the newest turn verbatim even if it alone exceeds the recent budget
+        while self._recent_tokens > self.recent_budget and len(self._recent) > 1:
+            sender, text, tokens = self._recent.popleft()
+            self._recent_tokens -= tokens
+            line = self._summarize(sender, text)
+            line_tokens = estimate_tokens(line)
+            self._summary.append((line, line_tokens))
+            self._summary_tokens += line_tokens
+            self.turns_summarized += 1
+        while self._summary_tokens > self.summary_budget and self._summary:
+            _, line_tokens = self._summary.popleft()
+            self._summary_tokens -= line_tokens
+            self.summary_lines_dropped += 1
+
+    @property
+    def tokens(self) -> int:
+        return self._recent_tokens + self._summary_tokens
+
+    def build_message(self):
+        """The context message to send after a fresh (non-resumed) reconnect, or None if empty."""
+        if not len(self):
+            return None
+        parts = [self.HEADER]
+        if self._summary:
+            parts.append("Summary of earlier conversation:\n" + "\n".join(line for line, _ in self._summary))
+        if self._recent:
+            parts.append("Recent turns:\n" + "\n".join(f"[{s}]: {t}" for s, t, _ in self._recent))
+        return "\n\n".join(parts)
+
+    def stats(self) -> dict:
+        return {
+            "recent_turns": len(self._recent),
+            "summary_lines": len(self._summary),
+            "tokens": self.tokens,
+            "token_budget": self.token_budget,
+            "turns_added": self.turns_added,
+            "turns_summarized": self.turns_summarized,
+            "summary_lines_dropped": self.summary_lines_dropped,
+        }
@@ -0,0 +1,166 @@
+"""
+Tool-call confirmation pipeline.
+
+Tool calls that need the user's approval used to be confirmed by awaiting a
+Future inside AudioLoop.receive_audio, which stopped the Live stream (model
+audio, transcriptions) until the user clicked. The broker moves that wait
+out of the receive loop:
+
+- All calls of one tool_call message that need approval are asked as a single
+  batch (one prompt, one answer; optional per-call decisions).
+- The frontend shows one prompt at a time, so batches from later turns queue
+  up behind the one on screen.
+- A batch that is not answered within `timeout` seconds of being shown is
+  auto-denied. Batches waiting behind another prompt don't time out.
+- Calls the server cancels (tool_call_cancellation) are CANCELLED. Their
+  prompt is closed, and the other calls of that batch are WITHDRAWN: they
+  get an explicit "not run" answer, because the model still waits for
+  one.
+- `on_wait(tool, seconds, decision)` reports how long each call sat waiting.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import deque
+
+APPROVED = "approved"
+DENIED = "denied"
+TIMEOUT = "timeout"
+CANCELLED = "cancelled"
+WITHDRAWN = "withdrawn"
+
+DEFAULT_CONFIRMATION_TIMEOUT = 60.0
+
+
+class _Batch:
+    def __init__(self, calls, created_at):
+        self.id = str(uuid.uuid4())
+        self.calls = calls
+        self.created_at = created_at
+        self.future = asyncio.get_running_loop().create_future()
+        self.shown = False
+        self.timer = None
+
+    def payload(self, timeout) -> dict:
+        calls = [{"call_id": fc.id, "tool": fc.name, "args": fc.args} for fc in self.calls]
+        return {
+            "id": self.id,
+            # tool/args keep the single-call shape the popup has always used
+            "tool": ", ".join(fc.name for fc in self.calls),
+            "args": self.calls[0].args if len(self.calls) == 1 else calls,
+            "calls": calls,
+            "timeout_s": timeout,
+        }
+
+
+class ConfirmationBroker:
+    """Queues confirmation batches and resolves them from user answers, timeouts or cancellations."""
+
+    def __init__(self, on_request=None, on_closed=None, on_wait=None,
+                 timeout: float = DEFAULT_CONFIRMATION_TIMEOUT, clock=time.perf_counter):
+        self.on_request = on_request   # on_request(payload): show a prompt
+        self.on_closed = on_closed     # on_closed(request_id, reason): prompt no longer valid
+        self.on_wait = on_wait         # on_wait(tool, seconds, decision)
+        self.timeout = timeout
+        self.clock = clock
+
+        self._batches = {}
+        self._queue = deque()
+        self._active = None
+
+        self.requested = 0
+        self.decisions = {APPROVED: 0, DENIED: 0, TIMEOUT: 0, CANCELLED: 0, WITHDRAWN: 0}
+
+    @property
+    def pending(self) -> int:
+        return sum(len(batch.calls) for batch in self._batches.values())
+
+    def __contains__(self, request_id) -> bool:
+        return request_id in self._batches
+
+    async def confirm(self, calls) -> list:
+        """Asks for approval of `calls` as one batch. Returns one decision per call."""
+        if not calls:
+            return []
+        batch = _Batch(list(calls), self.clock())
+        self._batches[batch.id] = batch
+        self._queue.append(batch)
+        self.requested += len(batch.calls)
+        self._show_next()
+
+        try:
+            return await asyncio.shield(batch.future)
+        except asyncio.CancelledError:
+            self._finish(batch, [CANCELLED] * len(batch.calls), reason=CANCELLED)
+            raise
+
+    def _show_next(self):
+        if self._active is not None:
+            return
+        while self._queue:
+            batch = self._queue.popleft()
+            if batch.id not in self._batches:
+                continue
+            self._active = batch
+            batch.shown = True
+            if self.timeout:
+                # The user gets the full timeout from when the prompt appears, not from when it was queued
+                batch.timer = asyncio.get_running_loop().call_later(self.timeout, self._expire, batch)
+            if self.on_request:
+                self.on_request(batch.payload(self.timeout))
+            return
+
+    def _expire(self, batch):
+        print(f"[SARA DEBUG] [CONFIRM] Request {batch.id} timed out after {self.timeout:g}s. Auto-denying.")
+        self._finish(batch, [TIMEOUT] * len(batch.calls), reason=TIMEOUT)
+
+    def _finish(self, batch, decisions, reason=None):
+        if self._batches.pop(batch.id, None) is None:
+            return
+        if batch.timer is not None:
+            batch.timer.cancel()
+        if not batch.future.done():
+            batch.future.set_result(decisions)
+        waited = self.clock() - batch.created_at
+        for fc, decision in zip(batch.calls, decisions):
+            self.decisions[decision] += 1
+            if self.on_wait:
+                self.on_wait(fc.name, waited, decision)
+        if reason and batch.shown and self.on_closed:
+            self.on_closed(batch.id, reason)
+        if self._active is batch:
+            self._active = None
+            self._show_next()
+
+    def resolve(self, request_id, confirmed, decisions=None) -> bool:
+        """User answer. `decisions` ({call_id: bool}) overrides `confirmed` per call."""
+        batch = self._batches.get(request_id)
+        if batch is None:
+            return False
+        decisions = decisions or {}
+        result = []
+        for fc in batch.calls:
+            approved = decisions.get(fc.id, confirmed)
+            result.append(APPROVED if approved else DENIED)
+        self._finish(batch, result)
+        return True
+
+    def cancel_calls(self, call_ids):
+        """Server-side cancellation (tool_call_cancellation ids): closes the prompts holding those calls."""
+        call_ids = set(call_ids or [])
+        for batch in list(self._batches.values()):
+            if any(fc.id in call_ids for fc in batch.calls):
+                # The prompt asked about the cancelled calls too, so it is closed; the rest are withdrawn, not cancelled
+                decisions = [CANCELLED if fc.id in call_ids else WITHDRAWN for fc in batch.calls]
+                self._finish(batch, decisions, reason=CANCELLED)
+
+    def cancel_all(self):
+        """Session ended: nothing can be answered any more."""
+        # Drop the queue first so cancelling the visible prompt doesn't show the next one
+        self._queue.clear()
+        for batch in list(self._batches.values()):
+            self._finish(batch, [CANCELLED] * len(batch.calls), reason=CANCELLED)
+
+    def stats(self) -> dict:
+        return {"pending": self.pending, "requested": self.requested, **self.decisions}
@@ -0,0 +1,106 @@
+"""
+Registry-based dispatcher for Live API tool calls.
+
+A single `response.tool_call` can carry several function calls. Instead of
+awaiting them one after another, the dispatcher runs independent calls
+concurrently with asyncio.gather, so the model waits for the slowest call
+rather than the sum of all of them.
+
+- Each tool is registered with a handler `async def handler(fc) -> str | None`.
+  The returned string becomes the FunctionResponse result. None means the
+  tool sends no response (fire-and-forget tools such as generate_cad).
+- Each tool has a timeout. A call that runs over it, or that raises, gets an
+  error result instead of blocking or killing the whole batch.
+- Calls with the same serial key run in their original order. Tools that
+  depend on shared state (the current project, the same light) use one.
+- Results always come back in the order the calls were made.
+"""
+
+import asyncio
+import time
+import traceback
+
+DEFAULT_TOOL_TIMEOUT = 30.0
+
+
+class _Tool:
+    def __init__(self, name, handler, timeout, serial):
+        self.name = name
+        self.handler = handler
+        self.timeout = timeout
+        self.registered_timeout = timeout
+        self.serial = serial
+
+    def serial_key(self, fc):
+        if callable(self.serial):
+            return self.serial(fc)
+        return self.serial
+
+
+class ToolDispatcher:
+    """Maps tool names to async handlers and runs batches of calls concurrently."""
+
+    def __init__(self, default_timeout: float = DEFAULT_TOOL_TIMEOUT, on_call_finished=None):
+        self.default_timeout = default_timeout
+        # on_call_finished(name, seconds, outcome) with outcome "ok", "timeout" or "error"
+        self.on_call_finished = on_call_finished
+        self._tools = {}
+
+    def register(self, name, handler, timeout=None, serial=None):
+        """`serial` is a key (or fc -> key callable); calls sharing a key never overlap."""
+        self._tools[name] = _Tool(name, handler, timeout, serial)
+
+    def set_timeouts(self, timeouts: dict):
+        """Applies {name: seconds} overrides on top of the registered timeouts."""
+        for tool in self._tools.values():
+            tool.timeout = tool.registered_timeout
+        for name, timeout in (timeouts or {}).items():
+            if name in self._tools:
+                self._tools[name].timeout = timeout
+
+    def timeout_for(self, name) -> float:
+        tool = self._tools[name]
+        return tool.timeout if tool.timeout is not None else self.default_timeout
+
+    def __contains__(self, name) -> bool:
+        return name in self._tools
+
+    @property
+    def names(self):
+        return list(self._tools)
+
+    async def _call(self, fc):
+        tool = self._tools[fc.name]
+        timeout = self.timeout_for(fc.name)
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            result = await asyncio.wait_for(tool.handler(fc), timeout)
+        except asyncio.TimeoutError:
+            outcome = "timeout"
+            print(f"[SARA DEBUG] [TOOL] '{fc.name}' timed out after {timeout:g}s")
+            result = f"Tool '{fc.name}' timed out after {timeout:g} seconds."
+        except Exception as e:
+            outcome = "error"
+            print(f"[SARA DEBUG] [ERR] Tool '{fc.name}' failed: {e}")
+            traceback.print_exc()
+            result = f"Tool '{fc.name}' failed: {e}"
+        if self.on_call_finished:
+            self.on_call_finished(fc.name, time.perf_counter() - started, outcome)
+        return result
+
+    async def run(self, calls) -> list:
+        """Runs registered calls; returns one result (str or None) per call, in call order."""
+        results = [None] * len(calls)
+        chains = {}
+        for index, fc in enumerate(calls):
+            key = self._tools[fc.name].serial_key(fc)
+            # Calls without a serial key each get their own chain
+            chains.setdefault(key if key is not None else ("call", index), []).append(index)
+
+        async def run_chain(indexes):
+            for index in indexes:
+                results[index] = await self._call(calls[index])
+
+        await asyncio.gather(*(run_chain(indexes) for indexes in chains.values()))
+        return results
@@ -0,0 +1,159 @@
+"""
+Incremental transcript building for AudioLoop.receive_audio.
+
+The Live API sends input/output transcriptions either as chunks or as the
+cumulative text of the turn so far. receive_audio used to find the new
+part with startswith() over the whole cumulative transcript, grew the chat
+buffer by string concatenation and emitted every delta straight to the
+frontend. For a long monologue that is quadratic work, and a Socket.IO
+event per transcription message.
+
+SpeakerTranscript tracks one speaker's raw transcription in O(delta): it
+keeps only the length, head and tail of the last text it saw, and decides
+whether the next text continues it by comparing those. The delta is the
+only part that gets sliced.
+
+TranscriptBuilder holds the current chat entry as a list of segments, joined
+once when the entry ends (speaker switch or end of turn) and handed to
+on_turn (ProjectManager.log_chat via AudioLoop.log_turn). Frontend
+`transcription` emits are coalesced: deltas for the same speaker collect
+for `emit_interval_s` (50 ms by default) and go out as one event. Pending
+text is flushed before a speaker switch and at turn boundaries, so the
+order is preserved.
+"""
+
+import asyncio
+
+# Characters compared at each end of the previous text to recognise a cumulative update
+_EDGE_CHARS = 32
+
+
+class SpeakerTranscript:
+    """Delta extraction for one speaker's transcription stream."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._length = 0
+        self._head = ""
+        self._tail = ""
+
+    def _continues(self, text) -> bool:
+        # Equivalent to text.startswith(previous) as long as the middle matches too,
+        # which it does for the Live API's cumulative transcripts
+        if len(text) < self._length:
+            return False
+        edge = len(self._tail)
+        return (text.startswith(self._head)
+                and text.startswith(self._tail, self._length - edge))
+
+    def feed(self, text) -> str:
+        """Returns the new part of `text`, or "" for an exact repeat."""
+        if not text:
+            return ""
+        if self._length and self._continues(text):
+            delta = text[self._length:]
+        else:
+            delta = text
+        self._length = len(text)
+        self._head = text[:_EDGE_CHARS]
+        self._tail = text[-_EDGE_CHARS:]
+        return delta
+
+
+class TranscriptBuilder:
+    """Current chat entry as segments, plus time-sliced frontend emits."""
+
+    def __init__(self, on_emit=None, on_turn=None, emit_interval_s: float = 0.05):
+        self.on_emit = on_emit            # on_emit({"sender", "text"})
+        self.on_turn = on_turn            # on_turn(sender, text) for a finished entry
+        self.emit_interval_s = emit_interval_s
+        self._speakers = {}
+        self.sender = None
+        self._segments = []
+        self._pending_sender = None
+        self._pending = []
+        self._timer = None
+
+        self.deltas = 0
+        self.emits = 0
+        self.turns = 0
+
+    def feed(self, sender, text) -> str:
+        """Adds a transcription message for `sender`. Returns the delta ("" if nothing new)."""
+        speaker = self._speakers.get(sender)
+        if speaker is None:
+            speaker = self._speakers[sender] = SpeakerTranscript()
+        delta = speaker.feed(text)
+        if not delta:
+            return ""
+        self.deltas += 1
+
+        if sender != self.sender:
+            self.end_entry()
+            self.sender = sender
+        self._segments.append(delta)
+        self._queue_emit(sender, delta)
+        return delta
+
+    @property
+    def text(self) -> str:
+        return "".join(self._segments)
+
+    def end_entry(self):
+        """Finishes the current chat entry (speaker switch): flushes emits and logs it."""
+        self.flush_emits()
+        if self.sender and self._segments:
+            text = "".join(self._segments)
+            if text.strip() and self.on_turn:
+                self.on_turn(self.sender, text)
+                self.turns += 1
+        self.sender = None
+        self._segments = []
+
+    def end_turn(self):
+        """Turn boundary: ends the current entry and resets delta tracking for every speaker."""
+        self.end_entry()
+        for speaker in self._speakers.values():
+            speaker.reset()
+
+    def _queue_emit(self, sender, delta):
+        if self.on_emit is None:
+            return
+        if self._pending and sender != self._pending_sender:
+            self.flush_emits()
+        self._pending_sender = sender
+        self._pending.append(delta)
+        if not self.emit_interval_s:
+            self.flush_emits()
+            return
+        if self._timer is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush_emits()
+                return
+            self._timer = loop.call_later(self.emit_interval_s, self.flush_emits)
+
+    def flush_emits(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        sender = self._pending_sender
+        self._pending = []
+        self._pending_sender = None
+        self.emits += 1
+        self.on_emit({"sender": sender, "text": text})
+
+    def stats(self) -> dict:
+        return {
+            "deltas": self.deltas,
+            "emits": self.emits,
+            "turns": self.turns,
+            "sender": self.sender,
+            "segments": len(self._segments),
+        }
@@ -0,0 +1,183 @@
+"""
+Voice Activity Detection engines used by AudioLoop.listen_audio.
+
+All engines work directly on the raw 16-bit little-endian mono PCM chunks read
+from the microphone. Samples are viewed with np.frombuffer (no copy) so the
+per-chunk cost stays in vectorized NumPy code instead of Python loops.
+
+Engines:
+- "energy":   plain RMS threshold (same decision the old struct/sum code made).
+- "spectral": RMS + zero-crossing rate + speech-band energy ratio, with an
+              adaptive noise floor, onset confirmation and hangover smoothing.
+"""
+
+import numpy as np
+
+DEFAULT_VAD_ENGINE = "spectral"
+DEFAULT_VAD_THRESHOLD = 800  # RMS on 16-bit samples (800 is conservative)
+
+
+def pcm_view(data) -> np.ndarray:
+    """Returns a zero-copy int16 view over a PCM byte buffer."""
+    usable = len(data) - (len(data) % 2)
+    return np.frombuffer(data, dtype="<i2", count=usable // 2)
+
+
+def pcm_rms(samples: np.ndarray) -> int:
+    """RMS level of an int16 sample view (0 for empty input)."""
+    if samples.size == 0:
+        return 0
+    return int(np.sqrt(np.mean(np.square(samples, dtype=np.float32))))
+
+
+class EnergyVAD:
+    """Simple RMS threshold detector."""
+
+    name = "energy"
+    hangover_seconds = 0.0  # Reports silence on the first quiet chunk
+
+    def __init__(self, threshold: int = DEFAULT_VAD_THRESHOLD):
+        self.threshold = threshold
+        self.level = 0
+
+    def process(self, data) -> bool:
+        """Returns True if the chunk contains speech."""
+        self.level = pcm_rms(pcm_view(data))
+        return self.level > self.threshold
+
+    def reset(self):
+        self.level = 0
+
+
+class SpectralVAD:
+    """
+    Energy + zero-crossing rate + band energy detector with hangover smoothing.
+
+    A frame is a speech candidate when its RMS is above both the configured
+    threshold and the tracked noise floor, its zero-crossing rate is in the
+    voiced range, and most of its spectral energy sits in the speech band.
+    Speech must persist for `onset_frames` before the detector reports it, and
+    the detector keeps reporting speech for `hangover_frames` after the last
+    candidate so short pauses between words don't flicker the state.
+    """
+
+    name = "spectral"
+
+    def __init__(self, sample_rate: int = 16000, threshold: int = DEFAULT_VAD_THRESHOLD,
+                 band=(300.0, 3400.0), min_band_ratio: float = 0.55,
+                 zcr_range=(0.01, 0.35), noise_factor: float = 2.5,
+                 onset_frames: int = 2, hangover_frames: int = 8):
+        self.sample_rate = sample_rate
+        self.threshold = threshold
+        self.band = band
+        self.min_band_ratio = min_band_ratio
+        self.zcr_range = zcr_range
+        self.noise_factor = noise_factor
+        self.onset_frames = onset_frames
+        self.hangover_frames = hangover_frames
+
+        # Cached per-chunk-size FFT data
+        self._band_mask = None
+        self._window = None
+        self._frame_len = 0
+
+        self.level = 0
+        self.zcr = 0.0
+        self.band_ratio = 0.0
+        self.reset()
+
+    @property
+    def hangover_seconds(self) -> float:
+        """How long the detector keeps reporting speech after it really ended (0 before the first chunk)."""
+        return self.hangover_frames * self._frame_len / self.sample_rate
+
+    def reset(self):
+        self.noise_floor = float(self.threshold) / self.noise_factor
+        self._onset_count = 0
+        self._hangover_left = 0
+        self._speaking = False
+
+    def _prepare(self, n: int):
+        if n == self._frame_len:
+            return
+        freqs = np.fft.rfftfreq(n, d=1.0 / self.sample_rate)
+        self._band_mask = (freqs >= self.band[0]) & (freqs <= self.band[1])
+        self._window = np.hanning(n).astype(np.float32)
+        self._frame_len = n
+
+    def _features(self, samples: np.ndarray):
+        n = samples.size
+        self.level = pcm_rms(samples)
+
+        # Zero-crossing rate: fraction of adjacent samples with a sign change
+        signs = np.signbit(samples)
+        self.zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / (n - 1) if n > 1 else 0.0
+
+        # Fraction of spectral power inside the speech band
+        self._prepare(n)
+        spectrum = np.fft.rfft(samples * self._window)
+        power = np.square(np.abs(spectrum))
+        total = float(power.sum())
+        self.band_ratio = float(power[self._band_mask].sum()) / total if total > 0 else 0.0
+
+    def is_candidate(self) -> bool:
+        """Frame-level decision from the last computed features (no smoothing)."""
+        gate = max(self.threshold, self.noise_floor * self.noise_factor)
+        return (
+            self.level > gate
+            and self.zcr_range[0] <= self.zcr <= self.zcr_range[1]
+            and self.band_ratio >= self.min_band_ratio
+        )
+
+    def process(self, data) -> bool:
+        """Returns True while the smoothed detector considers the user speaking."""
+        samples = pcm_view(data)
+        if samples.size == 0:
+            return self._speaking
+
+        self._features(samples)
+        candidate = self.is_candidate()
+
+        if candidate:
+            self._onset_count += 1
+            if self._onset_count >= self.onset_frames:
+                self._speaking = True
+                self._hangover_left = self.hangover_frames
+        else:
+            self._onset_count = 0
+            # Only adapt the noise floor on frames that are clearly not speech
+            if not self._speaking:
+                self.noise_floor = 0.95 * self.noise_floor + 0.05 * self.level
+            if self._hangover_left > 0:
+                self._hangover_left -= 1
+            else:
+                self._speaking = False
+
+        return self._speaking
+
+
+VAD_ENGINES = {
+    EnergyVAD.name: EnergyVAD,
+    SpectralVAD.name: SpectralVAD,
+}
+
+
+def create_vad(settings=None, sample_rate: int = 16000):
+    """
+    Builds the VAD engine selected in settings.
+
+    Settings keys:
+        vad_engine: "energy" or "spectral" (default).
+        vad_threshold: RMS threshold on 16-bit samples.
+    """
+    settings = settings or {}
+    engine = settings.get("vad_engine", DEFAULT_VAD_ENGINE)
+    threshold = settings.get("vad_threshold", DEFAULT_VAD_THRESHOLD)
+
+    if engine not in VAD_ENGINES:
+        print(f"[VAD] [WARN] Unknown VAD engine '{engine}', falling back to '{EnergyVAD.name}'.")
+        engine = EnergyVAD.name
+
+    if engine == SpectralVAD.name:
+        return SpectralVAD(sample_rate=sample_rate, threshold=threshold)
+    return EnergyVAD(threshold=threshold)
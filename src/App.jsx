@@ -108,6 +108,15 @@ function App() {
     const [selectedWebcamId, setSelectedWebcamId] = useState(() => localStorage.getItem('selectedWebcamId') || '');
     const [showSettings, setShowSettings] = useState(false);
     const [currentProject, setCurrentProject] = useState('default');
+    // Stable per window (sessionStorage survives reloads), so a reconnect reattaches to the running session
+    const [sessionName] = useState(() => {
+        let name = sessionStorage.getItem('sara_session');
+        if (!name) {
+            name = `station-${Math.random().toString(36).slice(2, 10)}`;
+            sessionStorage.setItem('sara_session', name);
+        }
+        return name;
+    });
     const [timezone, setTimezone] = useState(() => localStorage.getItem('timezone') || Intl.DateTimeFormat().resolvedOptions().timeZone || 'UTC');
 
     const handleTimezoneChange = (newTimezone) => {
@@ -340,6 +349,7 @@ function App() {
 
                 setStatus('Connecting...');
                 socket.emit('start_audio', {
+                    session: sessionName,
                     device_index: index >= 0 ? index : null,
                     device_name: deviceName,
                     muted: isMuted
@@ -369,7 +379,12 @@ function App() {
             }
         });
         socket.on('audio_data', (data) => {
-            setAiAudioData(data.data);
+            // 'binary' transport sends raw PCM as an ArrayBuffer; other modes send an array of 0-255 values
+            if (data.data instanceof ArrayBuffer) {
+                setAiAudioData(Array.from(new Uint8Array(data.data)));
+            } else {
+                setAiAudioData(data.data);
+            }
         });
         socket.on('auth_status', (data) => {
             console.log("Auth Status:", data);
@@ -448,6 +463,10 @@ function App() {
             } else if (data.status === 'failed') {
                 // Keep loading state but show error
                 setCadData({ format: 'loading' });
+            } else if (data.status === 'cancelled') {
+                // Back to the prompt input
+                setCadData(null);
+                setCadRetryInfo({ attempt: 1, maxAttempts: 3, error: null });
             }
         });
         socket.on('cad_thought', (data) => {
@@ -503,6 +522,12 @@ function App() {
             setConfirmationRequest(data);
         });
 
+        // Backend auto-denied (timeout) or withdrew a confirmation request
+        socket.on('tool_confirmation_closed', (data) => {
+            console.log("Confirmation Request Closed:", data);
+            setConfirmationRequest(prev => (prev && prev.id === data.id ? null : prev));
+        });
+
         // Handle Print Window Request (from CadWindow)
         socket.on('request_print_window', () => {
             setShowPrinterWindow(true);
@@ -661,6 +686,7 @@ function App() {
             socket.off('browser_frame');
             socket.off('transcription');
             socket.off('tool_confirmation_request');
+            socket.off('tool_confirmation_closed');
             socket.off('kasa_devices');
             socket.off('printer_list');
             socket.off('slicing_progress');
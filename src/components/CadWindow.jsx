@@ -204,11 +204,20 @@ const CadWindow = ({ data, thoughts, retryInfo = {}, onClose, socket }) => {
                             <span className="w-2 h-2 bg-green-500 rounded-full animate-pulse"></span>
                             Designer Thinking...
                         </h4>
-                        {retryInfo.attempt && (
-                            <span className={`text-xs font-mono px-2 py-0.5 rounded ${retryInfo.error ? 'bg-yellow-500/20 text-yellow-400' : 'bg-cyan-500/20 text-cyan-400'}`}>
-                                Attempt {retryInfo.attempt}/{retryInfo.maxAttempts || 3}
-                            </span>
-                        )}
+                        <div className="flex items-center gap-2">
+                            {retryInfo.attempt && (
+                                <span className={`text-xs font-mono px-2 py-0.5 rounded ${retryInfo.error ? 'bg-yellow-500/20 text-yellow-400' : 'bg-cyan-500/20 text-cyan-400'}`}>
+                                    Attempt {retryInfo.attempt}/{retryInfo.maxAttempts || 3}
+                                </span>
+                            )}
+                            {/* Stops the model stream and kills the running script */}
+                            <button
+                                onClick={() => socket && socket.emit('cancel_cad')}
+                                className="bg-red-500/20 hover:bg-red-500/50 text-red-400 text-xs font-mono px-2 py-0.5 rounded border border-red-500/30"
+                            >
+                                CANCEL
+                            </button>
+                        </div>
                     </div>
                     {retryInfo.error && (
                         <div className="mb-2 p-2 bg-red-500/10 border border-red-500/30 rounded text-red-400 text-xs font-mono">
@@ -3,6 +3,9 @@ import React from 'react';
 const ConfirmationPopup = ({ request, onConfirm, onDeny }) => {
     if (!request) return null;
 
+    // Several calls from one turn are confirmed together
+    const isBatch = request.calls && request.calls.length > 1;
+
     return (
         <div className="fixed inset-0 z-[200] flex items-center justify-center bg-black/60 backdrop-blur-sm animate-fade-in">
             <div className="relative w-full max-w-lg p-8 bg-black/90 border border-cyan-500/30 rounded-3xl shadow-[0_0_50px_rgba(34,211,238,0.15)] backdrop-blur-2xl transform transition-all scale-100">
@@ -32,7 +35,7 @@ const ConfirmationPopup = ({ request, onConfirm, onDeny }) => {
                     <div className="space-y-2">
                         <div className="bg-cyan-950/30 border border-cyan-800/50 rounded-xl overflow-hidden">
                             <div className="bg-cyan-900/40 px-4 py-2 border-b border-cyan-800/50 flex justify-between items-center">
-                                <span className="text-xs text-cyan-400 font-bold uppercase tracking-wider">Function</span>
+                                <span className="text-xs text-cyan-400 font-bold uppercase tracking-wider">{isBatch ? `Functions (${request.calls.length})` : 'Function'}</span>
                                 <span className="text-xs text-white/50 font-mono">system.call</span>
                             </div>
                             <div className="p-4">
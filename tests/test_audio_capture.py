@@ -0,0 +1,57 @@
+"""
+Tests for callback-driven audio capture.
+"""
+import pytest
+import asyncio
+
+from audio_capture import FrameRing, CallbackAudioCapture
+
+
+class TestFrameRing:
+    """Test the SPSC frame ring."""
+
+    def test_fifo_order(self):
+        ring = FrameRing(capacity=4)
+        for i in range(3):
+            assert ring.push(bytes([i]))
+        assert len(ring) == 3
+        assert [ring.pop() for _ in range(3)] == [b"\x00", b"\x01", b"\x02"]
+        assert ring.pop() is None
+
+    def test_overrun_drops_newest(self):
+        ring = FrameRing(capacity=2)
+        assert ring.push(b"a")
+        assert ring.push(b"b")
+        assert not ring.push(b"c")
+        assert ring.overruns == 1
+        assert ring.pop() == b"a"
+
+    def test_wraparound(self):
+        ring = FrameRing(capacity=3)
+        for i in range(10):
+            ring.push(i)
+            assert ring.pop() == i
+        assert len(ring) == 0
+
+    def test_clear(self):
+        ring = FrameRing(capacity=4)
+        ring.push(b"a")
+        ring.push(b"b")
+        ring.clear()
+        assert ring.pop() is None
+
+
+class TestCallbackAudioCapture:
+    """Test the callback -> asyncio hand-off without a real device."""
+
+    @pytest.mark.asyncio
+    async def test_read_wakes_on_callback_thread(self):
+        capture = CallbackAudioCapture(None, format=8, channels=1, rate=16000, frames_per_buffer=4)
+        capture._loop = asyncio.get_running_loop()
+        capture._continue_flag = 0
+
+        reader = asyncio.create_task(capture.read())
+        await asyncio.sleep(0)
+        await asyncio.to_thread(capture._callback, b"\x01" * 8, 4, None, 0)
+
+        assert await asyncio.wait_for(reader, timeout=1.0) == b"\x01" * 8
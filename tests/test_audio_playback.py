@@ -0,0 +1,110 @@
+"""
+Tests for the playback jitter buffer and interruptible player.
+"""
+import pytest
+import asyncio
+import threading
+import time
+
+from audio_playback import JitterBuffer, InterruptiblePlayer
+
+# 24 kHz, 16-bit mono -> 48 bytes per ms
+CHUNK_10MS = b"\x00" * 480
+
+
+class TestJitterBuffer:
+    """Test prebuffering, counters and clearing."""
+
+    @pytest.mark.asyncio
+    async def test_prebuffers_to_target(self):
+        buf = JitterBuffer(target_ms=30)
+        getter = asyncio.create_task(buf.get())
+        buf.put_nowait(CHUNK_10MS)
+        await asyncio.sleep(0)
+        assert not getter.done()
+        buf.put_nowait(CHUNK_10MS)
+        buf.put_nowait(CHUNK_10MS)
+        assert await asyncio.wait_for(getter, 1.0) == CHUNK_10MS
+        assert buf.depth_ms == pytest.approx(20)
+
+    @pytest.mark.asyncio
+    async def test_short_reply_starts_after_target_time(self):
+        buf = JitterBuffer(target_ms=20)
+        buf.put_nowait(CHUNK_10MS)
+        start = time.perf_counter()
+        await asyncio.wait_for(buf.get(), 1.0)
+        assert time.perf_counter() - start < 0.5
+
+    @pytest.mark.asyncio
+    async def test_underrun_counted_and_target_grows(self):
+        buf = JitterBuffer(target_ms=10, adapt_step_ms=40)
+        buf.put_nowait(CHUNK_10MS)
+        await buf.get()
+        getter = asyncio.create_task(buf.get())
+        await asyncio.sleep(0)
+        buf.put_nowait(CHUNK_10MS)
+        await asyncio.wait_for(getter, 1.0)
+        assert buf.underruns == 1
+        assert buf.target_ms == 50
+
+    @pytest.mark.asyncio
+    async def test_clear_is_not_an_underrun(self):
+        buf = JitterBuffer(target_ms=10)
+        buf.put_nowait(CHUNK_10MS)
+        await buf.get()
+        getter = asyncio.create_task(buf.get())
+        await asyncio.sleep(0)
+        buf.clear()
+        buf.put_nowait(CHUNK_10MS)
+        await asyncio.wait_for(getter, 1.0)
+        assert buf.underruns == 0
+
+    def test_overrun_drops_oldest(self):
+        buf = JitterBuffer(max_depth_ms=25)
+        for i in range(4):
+            buf.put_nowait(bytes([i]) * 480)
+        assert buf.overruns == 2
+        assert buf.get_nowait()[0] == 2
+
+    def test_clear_returns_count(self):
+        buf = JitterBuffer()
+        buf.put_nowait(CHUNK_10MS)
+        buf.put_nowait(CHUNK_10MS)
+        assert buf.clear() == 2
+        assert buf.empty()
+        assert buf.stats()["cleared_chunks"] == 2
+
+
+class SlowStream:
+    def __init__(self, delay):
+        self.delay = delay
+        self.written = 0
+        self.started = threading.Event()
+
+    def write(self, data):
+        self.started.set()
+        time.sleep(self.delay)
+        self.written += len(data)
+
+
+class TestInterruptiblePlayer:
+    """Test mid-chunk abort."""
+
+    @pytest.mark.asyncio
+    async def test_interrupt_stops_mid_chunk(self):
+        stream = SlowStream(delay=0.01)
+        player = InterruptiblePlayer(stream, bytes_per_ms=48, slice_ms=10)
+        chunk = CHUNK_10MS * 100  # 1 second of audio
+        writer = asyncio.create_task(asyncio.to_thread(player.write, chunk))
+        await asyncio.to_thread(stream.started.wait, 1.0)
+        player.interrupt()
+        assert await writer is False
+        assert stream.written < len(chunk)
+        assert player.last_barge_in_ms is not None
+
+    def test_interrupt_while_idle_does_not_abort_next_write(self):
+        stream = SlowStream(delay=0)
+        player = InterruptiblePlayer(stream, bytes_per_ms=48)
+        player.interrupt()
+        assert player.write(CHUNK_10MS) is True
+        assert stream.written == len(CHUNK_10MS)
@@ -0,0 +1,55 @@
+"""
+Tests for the model audio transport summaries.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from audio_transport import AudioVisualizerFeed
+
+SAMPLE_RATE = 24000
+
+
+def tone(freq, amplitude, n=2048):
+    t = np.arange(n) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+class TestAudioVisualizerFeed:
+    """Test level/spectrum summaries."""
+
+    def test_summary_shape(self):
+        feed = AudioVisualizerFeed(sample_rate=SAMPLE_RATE, bands=32)
+        summary = feed.compute(tone(1000, 8000))
+        assert len(summary["bands"]) == 32
+        assert all(0 <= b <= 255 for b in summary["bands"])
+        assert 0 < summary["level"] <= 255
+
+    def test_tone_peaks_in_matching_band(self):
+        feed = AudioVisualizerFeed(sample_rate=SAMPLE_RATE, bands=32)
+        low = feed.compute(tone(150, 8000))["bands"]
+        high = feed.compute(tone(6000, 8000))["bands"]
+        assert int(np.argmax(low)) < int(np.argmax(high))
+
+    def test_silence_is_zero(self):
+        feed = AudioVisualizerFeed(sample_rate=SAMPLE_RATE)
+        summary = feed.compute(bytes(4096))
+        assert summary["level"] == 0
+        assert max(summary["bands"]) == 0
+
+    def test_rate_limit(self):
+        feed = AudioVisualizerFeed(sample_rate=SAMPLE_RATE, max_rate_hz=30.0)
+        chunk = tone(440, 4000)
+        assert feed.summarize(chunk, now=10.0) is not None
+        assert feed.summarize(chunk, now=10.01) is None
+        assert feed.summarize(chunk, now=10.04) is not None
+        assert feed.chunks_seen == 3
+        assert feed.summaries_sent == 2
+
+    def test_summary_much_smaller_than_pcm(self):
+        import json
+        feed = AudioVisualizerFeed(sample_rate=SAMPLE_RATE)
+        chunk = tone(440, 4000)
+        legacy = json.dumps({"data": list(chunk)})
+        compact = json.dumps({"data": feed.compute(chunk)["bands"]})
+        assert len(compact) * 10 < len(legacy)
@@ -130,3 +130,60 @@ class TestBuild123dImport:
             print(f"build123d version: {build123d.__version__}")
         except ImportError:
             pytest.skip("build123d not installed")
+
+
+class TestCadCancel:
+    """Test cancelling an in-flight CAD request's task (what CadJobScheduler.cancel does)."""
+
+    @staticmethod
+    def hanging_client(state):
+        """A client whose stream sends one thought, then never finishes."""
+        from types import SimpleNamespace
+
+        async def stream():
+            try:
+                part = SimpleNamespace(text="thinking", thought=True)
+                yield SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+                state["streaming"].set()
+                await asyncio.Event().wait()
+            finally:
+                state["closed"] = True
+
+        async def generate_content_stream(**kwargs):
+            return stream()
+
+        return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream)))
+
+    @pytest.mark.asyncio
+    async def test_cancel_closes_stream(self, tmp_path):
+        state = {"streaming": asyncio.Event(), "closed": False}
+        agent = CadAgent()
+        agent.client = self.hanging_client(state)
+
+        task = asyncio.create_task(agent.generate_prototype("a cube", output_dir=str(tmp_path)))
+        await asyncio.wait_for(state["streaming"].wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert state["closed"]
+
+
+class TestCadMetrics:
+    """Test that each request is counted once."""
+
+    @pytest.mark.asyncio
+    async def test_iterate_fallback_counts_once(self, tmp_path):
+        from cad_agent import CAD_REQUESTS, CAD_SECONDS
+
+        agent = CadAgent()
+
+        async def no_design(prompt, output_dir):
+            return None
+
+        agent._generate = no_design
+        before = {mode: CAD_REQUESTS.value(mode=mode, result="failure") or 0 for mode in ("generate", "iterate")}
+        timed = (CAD_SECONDS.value(mode="generate") or (0, 0))[0]
+        assert await agent.iterate_prototype("taller", output_dir=str(tmp_path)) is None
+        assert CAD_REQUESTS.value(mode="iterate", result="failure") == before["iterate"] + 1
+        assert (CAD_REQUESTS.value(mode="generate", result="failure") or 0) == before["generate"]
+        assert (CAD_SECONDS.value(mode="generate") or (0, 0))[0] == timed
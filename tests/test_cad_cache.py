@@ -0,0 +1,173 @@
+"""
+Tests for the content-addressed CAD script and mesh cache.
+"""
+import asyncio
+import os
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from cad_cache import CadCache, DiskLRU, normalize_prompt
+
+
+class TestDiskLRU:
+    """Test the bounded on-disk store."""
+
+    def test_put_get(self, tmp_path):
+        store = DiskLRU(str(tmp_path), ".stl")
+        assert store.get("a") is None
+        store.put("a", b"solid a")
+        assert store.get("a") == b"solid a"
+        assert store.bytes == 7
+
+    def test_evicts_least_recently_used_by_bytes(self, tmp_path):
+        store = DiskLRU(str(tmp_path), ".stl", max_bytes=10)
+        store.put("a", b"1234")
+        store.put("b", b"1234")
+        store.get("a")
+        store.put("c", b"1234")
+        assert "b" not in store and "a" in store and "c" in store
+        assert not (tmp_path / "b.stl").exists()
+        assert store.stats()["evictions"] == 1
+
+    def test_evicts_by_entries(self, tmp_path):
+        store = DiskLRU(str(tmp_path), ".py", max_entries=2)
+        for key in "abc":
+            store.put(key, b"x")
+        assert len(store) == 2 and "a" not in store
+
+    def test_oversized_entry_not_stored(self, tmp_path):
+        store = DiskLRU(str(tmp_path), ".stl", max_bytes=4)
+        store.put("big", b"12345")
+        assert "big" not in store and store.bytes == 0
+
+    def test_reload_keeps_order_and_drops_partial_writes(self, tmp_path):
+        store = DiskLRU(str(tmp_path), ".stl")
+        store.put("old", b"1")
+        store.put("new", b"2")
+        os.utime(tmp_path / "old.stl", (1000, 1000))
+        os.utime(tmp_path / "new.stl", (2000, 2000))
+        (tmp_path / "half.stl.1.2.tmp").write_bytes(b"partial")
+
+        reloaded = DiskLRU(str(tmp_path), ".stl", max_entries=1)
+        assert "new" in reloaded and "old" not in reloaded
+        assert not (tmp_path / "half.stl.1.2.tmp").exists()
+
+
+class TestCadCacheKeys:
+    """Test what the cache keys depend on."""
+
+    def test_prompt_normalized(self, tmp_path):
+        cache = CadCache(str(tmp_path))
+        key = cache.prompt_key("generate", "A 20mm calibration cube", "model", "system")
+        assert cache.prompt_key("generate", "  a 20mm   Calibration cube. ", "model", "system") == key
+        assert cache.prompt_key("generate", "a 25mm calibration cube", "model", "system") != key
+        assert normalize_prompt("Cube!?") == "cube"
+
+    def test_model_instruction_mode_and_base(self, tmp_path):
+        cache = CadCache(str(tmp_path))
+        key = cache.prompt_key("iterate", "taller", "model", "system", "Box(1, 1, 1)")
+        assert cache.prompt_key("iterate", "taller", "other", "system", "Box(1, 1, 1)") != key
+        assert cache.prompt_key("iterate", "taller", "model", "system v2", "Box(1, 1, 1)") != key
+        assert cache.prompt_key("iterate", "taller", "model", "system", "Box(2, 2, 2)") != key
+        assert cache.prompt_key("generate", "taller", "model", "system") != key
+
+    def test_mesh_key_includes_build123d_version(self, tmp_path):
+        cache = CadCache(str(tmp_path))
+        key = cache.mesh_key("Box(1, 1, 1)")
+        cache.build123d_version = "0.0.1"
+        assert cache.mesh_key("Box(1, 1, 1)") != key
+
+    def test_hits_and_misses_counted(self, tmp_path):
+        cache = CadCache(str(tmp_path))
+        assert cache.get_mesh("script") is None
+        cache.put_mesh("script", b"solid")
+        assert cache.get_mesh("script") == b"solid"
+        assert cache.stats()["hits"]["mesh"] == 1 and cache.stats()["misses"]["mesh"] == 1
+
+
+CODE = "```python\nfrom build123d import *\nexport_stl(Box(1, 1, SIZE), 'output.stl')\n```"
+
+
+class FakeModel:
+    """Stands in for the genai client; returns a script and counts calls."""
+
+    def __init__(self, size=1):
+        self.calls = 0
+        self.size = size
+        self.aio = SimpleNamespace(models=SimpleNamespace(generate_content_stream=self.generate_content_stream))
+
+    async def generate_content_stream(self, **kwargs):
+        self.calls += 1
+        part = SimpleNamespace(text=CODE.replace("SIZE", str(self.size)), thought=False)
+
+        async def stream():
+            yield SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+        return stream()
+
+
+@pytest.fixture
+def agent(tmp_path):
+    from cad_agent import CadAgent
+    from cad_workers import ScriptResult
+
+    agent = CadAgent(cache=CadCache(str(tmp_path / "cache")))
+    agent.client = FakeModel()
+    agent.runs = 0
+
+    async def run_script(script_path, work_dir):
+        # "Executes" the script: writes the STL to the injected output path
+        agent.runs += 1
+        with open(script_path) as f:
+            output = re.search(r"'([^']+\.stl)'", f.read()).group(1)
+        with open(output, "w") as f:
+            f.write("solid fake")
+        return ScriptResult(0)
+
+    agent._run_script = run_script
+    return agent
+
+
+class TestCadAgentCache:
+    """Test that repeat requests skip the model and the script run."""
+
+    @pytest.mark.asyncio
+    async def test_repeat_request_returns_from_cache(self, agent, tmp_path):
+        first = await agent.generate_prototype("A 20mm calibration cube", output_dir=str(tmp_path / "one"))
+        assert (agent.client.calls, agent.runs) == (1, 1)
+
+        second = await agent.generate_prototype("a 20mm calibration cube.", output_dir=str(tmp_path / "two"))
+        assert (agent.client.calls, agent.runs) == (1, 1)
+        assert second["data"] == first["data"]
+        assert open(second["file_path"]).read() == "solid fake"
+        # The workspace still gets the script, so the design can be iterated on
+        assert "export_stl" in (tmp_path / "two" / "current_design.py").read_text()
+
+    @pytest.mark.asyncio
+    async def test_known_script_skips_execution(self, agent, tmp_path):
+        await agent.generate_prototype("a cube", output_dir=str(tmp_path / "one"))
+        # A different request whose answer is the same script: the model is asked, the script doesn't run again
+        await agent.generate_prototype("a small cube", output_dir=str(tmp_path / "two"))
+        assert (agent.client.calls, agent.runs) == (2, 1)
+
+    @pytest.mark.asyncio
+    async def test_iterate_keyed_by_base_design(self, agent, tmp_path):
+        for name, size in (("one", 1), ("two", 2)):
+            os.makedirs(tmp_path / name)
+            (tmp_path / name / "current_design.py").write_text(f"export_stl(Box(1, 1, {size}), 'output.stl')\n")
+        await agent.iterate_prototype("make it taller", output_dir=str(tmp_path / "one"))
+        await agent.iterate_prototype("make it taller", output_dir=str(tmp_path / "two"))
+        assert agent.client.calls == 2
+
+    @pytest.mark.asyncio
+    async def test_failed_runs_not_cached(self, agent, tmp_path):
+        from cad_workers import ScriptResult
+
+        async def failing(script_path, work_dir):
+            agent.runs += 1
+            return ScriptResult(1, "", "ValueError: bad fillet")
+
+        agent._run_script = failing
+        assert await agent.generate_prototype("a cube", output_dir=str(tmp_path / "one")) is None
+        assert len(agent.cache.scripts) == 0 and len(agent.cache.meshes) == 0
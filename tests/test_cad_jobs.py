@@ -0,0 +1,151 @@
+"""
+Tests for the CAD job scheduler and per-job workspaces.
+"""
+import asyncio
+import os
+import pytest
+
+from cad_jobs import CadJobScheduler, DESIGN_SCRIPT
+from cad_workers import CadJobCancelled
+
+
+class FakeAgent:
+    """Writes what CadAgent writes: the script (with the absolute STL path injected) and the STL."""
+
+    def __init__(self):
+        self.gates = {}
+        self.started = []
+        self.bases = {}
+
+    def gate(self, prompt):
+        return self.gates.setdefault(prompt, asyncio.Event())
+
+    async def run_job(self, job):
+        self.started.append(job.prompt)
+        base = os.path.join(job.workspace, DESIGN_SCRIPT)
+        self.bases[job.prompt] = open(base).read() if os.path.exists(base) else None
+        await self.gate(job.prompt).wait()
+        if job.prompt.startswith("fail"):
+            return None
+        stl = os.path.join(job.workspace, "output_20260101_000000.stl")
+        with open(base, "w") as f:
+            f.write(f"# {job.prompt}\nexport_stl(part, '{stl}')\n")
+        with open(stl, "w") as f:
+            f.write(f"solid {job.prompt}")
+        return {"format": "stl", "data": "", "file_path": stl}
+
+
+@pytest.fixture
+def agent():
+    return FakeAgent()
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+class TestCadJobScheduler:
+    """Test queueing, workspaces and promotion."""
+
+    @pytest.mark.asyncio
+    async def test_success_promotes_design(self, agent, tmp_path):
+        events = []
+        scheduler = CadJobScheduler(agent.run_job, on_event=events.append)
+        job = scheduler.submit("generate", "cube", str(tmp_path))
+        agent.gate("cube").set()
+        result = await job.future
+
+        assert result["file_path"] == str(tmp_path / "output_20260101_000000.stl")
+        assert open(result["file_path"]).read() == "solid cube"
+        # The promoted script is portable again: no workspace path
+        assert (tmp_path / DESIGN_SCRIPT).read_text() == "# cube\nexport_stl(part, 'output.stl')\n"
+        assert not os.path.exists(job.workspace)
+        assert [e["status"] for e in events] == ["queued", "running", "done"]
+
+    @pytest.mark.asyncio
+    async def test_failure_keeps_current_design(self, agent, tmp_path):
+        (tmp_path / DESIGN_SCRIPT).write_text("# previous\n")
+        scheduler = CadJobScheduler(agent.run_job)
+        job = scheduler.submit("iterate", "fail please", str(tmp_path))
+        agent.gate("fail please").set()
+        assert await job.future is None
+        assert job.status == "failed"
+        assert (tmp_path / DESIGN_SCRIPT).read_text() == "# previous\n"
+        assert not os.path.exists(job.workspace)
+
+    @pytest.mark.asyncio
+    async def test_overlapping_jobs_get_own_workspaces(self, agent, tmp_path):
+        scheduler = CadJobScheduler(agent.run_job, max_concurrent=2)
+        first = scheduler.submit("generate", "cube", str(tmp_path))
+        second = scheduler.submit("generate", "sphere", str(tmp_path))
+        await settle()
+        assert agent.started == ["cube", "sphere"]
+        assert first.workspace != second.workspace
+        agent.gate("sphere").set()
+        agent.gate("cube").set()
+        cube, sphere = await first.future, await second.future
+        assert open(cube["file_path"]).read() == "solid cube"
+        assert open(sphere["file_path"]).read() == "solid sphere"
+        assert cube["file_path"] != sphere["file_path"]
+        # The job that finished last is the current design
+        assert (tmp_path / DESIGN_SCRIPT).read_text().startswith("# cube")
+
+    @pytest.mark.asyncio
+    async def test_concurrency_limit_and_priority(self, agent, tmp_path):
+        scheduler = CadJobScheduler(agent.run_job, max_concurrent=1)
+        running = scheduler.submit("generate", "a", str(tmp_path))
+        low = scheduler.submit("generate", "b", str(tmp_path))
+        high = scheduler.submit("generate", "c", str(tmp_path), priority=5)
+        same = scheduler.submit("generate", "d", str(tmp_path), priority=5)
+        await settle()
+        assert agent.started == ["a"]
+        assert [job.id for job in scheduler.queued] == [high.id, same.id, low.id]
+        for prompt in "abcd":
+            agent.gate(prompt).set()
+        await asyncio.gather(running.future, low.future, high.future, same.future)
+        assert agent.started == ["a", "c", "d", "b"]
+
+    @pytest.mark.asyncio
+    async def test_iterate_starts_from_design_current_at_start(self, agent, tmp_path):
+        scheduler = CadJobScheduler(agent.run_job, max_concurrent=1)
+        generate = scheduler.submit("generate", "cube", str(tmp_path))
+        iterate = scheduler.submit("iterate", "taller", str(tmp_path))
+        agent.gate("cube").set()
+        agent.gate("taller").set()
+        await asyncio.gather(generate.future, iterate.future)
+        assert agent.bases["taller"] == "# cube\nexport_stl(part, 'output.stl')\n"
+
+    @pytest.mark.asyncio
+    async def test_cancel_queued_and_running(self, agent, tmp_path):
+        events = []
+        scheduler = CadJobScheduler(agent.run_job, max_concurrent=1, on_event=events.append)
+        running = scheduler.submit("generate", "a", str(tmp_path))
+        queued = scheduler.submit("generate", "b", str(tmp_path))
+        await settle()
+        assert scheduler.cancel(queued.id) == 1
+        with pytest.raises(CadJobCancelled):
+            await queued.future
+        assert scheduler.cancel() == 1
+        with pytest.raises(CadJobCancelled):
+            await running.future
+        assert agent.started == ["a"]
+        assert not (tmp_path / DESIGN_SCRIPT).exists()
+        assert not os.path.exists(running.workspace)
+        assert scheduler.stats()["running"] == [] and scheduler.stats()["queued"] == []
+        assert [e["status"] for e in events if e["id"] == running.id][-1] == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_cancelling_caller_cancels_job(self, agent, tmp_path):
+        scheduler = CadJobScheduler(agent.run_job)
+        caller = asyncio.create_task(scheduler.run("generate", "a", str(tmp_path)))
+        await settle()
+        caller.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await caller
+        await settle()
+        assert scheduler.stats()["recent"][0]["status"] == "cancelled"
+
+    @pytest.mark.asyncio
+    async def test_cancel_unknown_job(self, agent, tmp_path):
+        assert CadJobScheduler(agent.run_job).cancel("nope") == 0
@@ -0,0 +1,264 @@
+"""
+Tests for the warm CAD worker pool, its per-job isolation and script limits.
+"""
+import asyncio
+import os
+import sys
+import time
+import pytest
+
+from cad_workers import CadWorkerPool, ScriptLimits, run_script_subprocess
+
+
+@pytest.fixture
+async def pool():
+    # No preload keeps the tests fast; the build123d test below opts in
+    pool = CadWorkerPool(size=1, max_jobs_per_worker=3, preload=())
+    pool.start()
+    yield pool
+    await pool.close()
+
+
+def write_script(tmp_path, code, name="current_design.py"):
+    path = tmp_path / name
+    path.write_text(code)
+    return str(path)
+
+
+class TestCadWorkerPool:
+    """Test running scripts on warm workers."""
+
+    @pytest.mark.asyncio
+    async def test_runs_script_in_cwd(self, pool, tmp_path):
+        script = write_script(tmp_path, "import os, sys\nprint(os.getcwd())\nprint(sys.argv[0])\n"
+                                        "open('output.stl', 'w').write('solid')\n")
+        result = await pool.run_script(script, cwd=str(tmp_path))
+        assert result.returncode == 0
+        assert result.stdout.splitlines() == [str(tmp_path), script]
+        assert (tmp_path / "output.stl").read_text() == "solid"
+        assert result.worker_pid is not None and result.worker_pid != os.getpid()
+
+    @pytest.mark.asyncio
+    async def test_error_traceback_like_interpreter(self, pool, tmp_path):
+        script = write_script(tmp_path, "x = 1\nraise ValueError('bad fillet')\n")
+        result = await pool.run_script(script)
+        assert result.returncode == 1
+        lines = result.stderr.strip().splitlines()
+        assert lines[0] == "Traceback (most recent call last):"
+        assert lines[-1] == "ValueError: bad fillet"
+        assert "cad_workers" not in result.stderr
+
+    @pytest.mark.asyncio
+    async def test_system_exit_code(self, pool, tmp_path):
+        result = await pool.run_script(write_script(tmp_path, "import sys\nsys.exit(4)\n"))
+        assert result.returncode == 4
+
+    @pytest.mark.asyncio
+    async def test_fresh_namespace_per_job(self, pool, tmp_path):
+        await pool.run_script(write_script(tmp_path, "leftover = 1\n"))
+        result = await pool.run_script(write_script(tmp_path, "print('leftover' in globals())\n"))
+        assert result.stdout.strip() == "False"
+
+    @pytest.mark.asyncio
+    async def test_native_output_captured(self, pool, tmp_path):
+        result = await pool.run_script(write_script(tmp_path, "import os\nos.write(1, b'from C\\n')\n"))
+        assert result.returncode == 0
+        assert "from C" in result.stdout
+        # The worker is still usable afterwards (the protocol stream wasn't corrupted)
+        assert (await pool.run_script(write_script(tmp_path, "print('ok')\n"))).stdout.strip() == "ok"
+
+    @pytest.mark.asyncio
+    async def test_worker_reused_then_recycled(self, pool, tmp_path):
+        script = write_script(tmp_path, "pass\n")
+        pids = [(await pool.run_script(script)).worker_pid for _ in range(4)]
+        assert pids[0] == pids[1] == pids[2]
+        assert pids[3] != pids[0]
+        assert pool.stats()["recycled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_crash_replaces_worker(self, pool, tmp_path):
+        crashed = await pool.run_script(write_script(tmp_path, "import os\nos._exit(7)\n"))
+        assert crashed.crashed
+        assert crashed.returncode == 7
+        result = await pool.run_script(write_script(tmp_path, "print('alive')\n"))
+        assert result.stdout.strip() == "alive"
+        assert result.worker_pid != crashed.worker_pid
+        assert pool.stats()["crashes"] == 1
+
+    @pytest.mark.asyncio
+    async def test_falls_back_when_workers_cannot_start(self, tmp_path):
+        pool = CadWorkerPool(size=1, preload=(), python=str(tmp_path / "no-such-python"))
+        result = await pool.run_script(write_script(tmp_path, "print('fallback')\n"))
+        assert result.returncode == 0
+        assert result.stdout.strip() == "fallback"
+        assert result.worker_pid is None
+        assert pool.stats()["broken"]
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_recovers_when_a_worker_starts_later(self, tmp_path):
+        pool = CadWorkerPool(size=1, preload=(), python=str(tmp_path / "no-such-python"))
+        pool._spawn_backoff = 0.01
+        pool.start()
+        await wait_for(lambda: pool.broken)
+        pool.python = sys.executable
+        await wait_for(lambda: not pool.broken)
+        result = await pool.run_script(write_script(tmp_path, "print('warm')\n"))
+        assert result.stdout.strip() == "warm" and result.worker_pid is not None
+        assert pool.stats()["spawn_failures"] >= 1
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_failed_replacement_keeps_healthy_workers(self, tmp_path):
+        pool = CadWorkerPool(size=2, preload=(), max_jobs_per_worker=100)
+        pool.start()
+        await wait_for(lambda: pool.stats()["workers"] == 2)
+        spawn = pool._spawn
+
+        def failing_spawn():
+            raise OSError("no more processes")
+
+        pool._spawn = failing_spawn
+        pool._spawn_backoff = 0.05
+        await pool.run_script(write_script(tmp_path, "import os\nos._exit(3)\n"))
+        await wait_for(lambda: pool.spawn_failures >= 1)
+        assert not pool.broken
+        # Still served by the surviving warm worker, not one process per script
+        for _ in range(3):
+            assert (await pool.run_script(write_script(tmp_path, "pass\n"))).worker_pid is not None
+
+        pool._spawn = spawn
+        await wait_for(lambda: pool.stats()["workers"] == 2)
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_build123d_preloaded(self, tmp_path):
+        pytest.importorskip("build123d")
+        pool = CadWorkerPool(size=1)
+        try:
+            script = write_script(tmp_path, "from build123d import *\n"
+                                            "with BuildPart() as p:\n    Box(10, 10, 10)\n"
+                                            "export_stl(p.part, 'output.stl')\n")
+            result = await pool.run_script(script, cwd=str(tmp_path))
+            assert result.returncode == 0, result.stderr
+            assert (tmp_path / "output.stl").stat().st_size > 0
+            assert pool.stats()["import_seconds"] is not None
+        finally:
+            await pool.close()
+
+
+class TestSubprocessRunner:
+    """Test the one-process-per-script fallback."""
+
+    @pytest.mark.asyncio
+    async def test_run(self, tmp_path):
+        result = await run_script_subprocess(write_script(tmp_path, "print('hi')\nraise SystemExit(2)\n"),
+                                             cwd=str(tmp_path))
+        assert result.returncode == 2
+        assert result.stdout.strip() == "hi"
+
+
+@pytest.fixture
+async def limited_pool():
+    pool = CadWorkerPool(size=1, preload=(), limits=ScriptLimits(timeout=1.0, cpu_seconds=1, memory_mb=256))
+    pool.start()
+    yield pool
+    await pool.close()
+
+
+async def wait_for(condition, timeout=20.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        await asyncio.sleep(0.02)
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # A zombie (killed, not reaped yet) counts as gone
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(")")[-1].split()[0] != "Z"
+    except OSError:
+        return True
+
+
+# The child writes its pid, then both it and the script hang
+SPAWN_CHILD = ("import subprocess, sys, time\n"
+               "child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])\n"
+               "open('child.pid', 'w').write(str(child.pid))\n"
+               "time.sleep(60)\n")
+
+
+@pytest.mark.skipif(os.name == "nt", reason="process groups and RLIMITs are POSIX")
+class TestScriptLimits:
+    """Test timeouts, RLIMITs and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_timeout_kills_process_group(self, limited_pool, tmp_path):
+        result = await limited_pool.run_script(write_script(tmp_path, SPAWN_CHILD), cwd=str(tmp_path))
+        assert result.timed_out
+        assert result.returncode != 0
+        assert result.stderr.strip().splitlines()[-1].startswith("TimeoutError")
+        child = int((tmp_path / "child.pid").read_text())
+        await asyncio.sleep(0.2)
+        assert not pid_alive(child)
+        # A fresh worker takes over
+        assert (await limited_pool.run_script(write_script(tmp_path, "print('next')\n"))).stdout.strip() == "next"
+        assert limited_pool.stats()["timeouts"] == 1
+
+    @pytest.mark.asyncio
+    async def test_memory_limit(self, limited_pool, tmp_path):
+        result = await limited_pool.run_script(write_script(tmp_path, "block = bytearray(1024 * 1024 * 1024)\n"))
+        assert result.returncode == 1
+        assert "MemoryError" in result.stderr
+        # Each job gets the full budget again
+        result = await limited_pool.run_script(write_script(tmp_path, "block = bytearray(100 * 1024 * 1024)\n"))
+        assert result.returncode == 0, result.stderr
+
+    @pytest.mark.asyncio
+    async def test_cpu_limit(self, tmp_path):
+        pool = CadWorkerPool(size=1, preload=(), limits=ScriptLimits(timeout=10, cpu_seconds=1, memory_mb=None))
+        try:
+            result = await pool.run_script(write_script(tmp_path, "while True:\n    pass\n"))
+            assert result.crashed and not result.timed_out
+            assert "CPU time limit" in result.stderr
+            assert result.seconds < 5
+        finally:
+            await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_cancel_kills_worker(self, limited_pool, tmp_path):
+        task = asyncio.create_task(limited_pool.run_script(write_script(tmp_path, "import time\ntime.sleep(60)\n")))
+        await asyncio.sleep(0.3)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        result = await limited_pool.run_script(write_script(tmp_path, "print('after')\n"))
+        assert result.stdout.strip() == "after"
+        assert limited_pool.stats()["cancelled"] == 1
+        assert limited_pool.stats()["crashes"] == 0
+
+    @pytest.mark.asyncio
+    async def test_subprocess_timeout_kills_group(self, tmp_path):
+        limits = ScriptLimits(timeout=1.0, cpu_seconds=5, memory_mb=None)
+        result = await run_script_subprocess(write_script(tmp_path, SPAWN_CHILD), cwd=str(tmp_path), limits=limits)
+        assert result.timed_out
+        await asyncio.sleep(0.2)
+        assert not pid_alive(int((tmp_path / "child.pid").read_text()))
+
+    @pytest.mark.asyncio
+    async def test_subprocess_cancel(self, tmp_path):
+        task = asyncio.create_task(run_script_subprocess(write_script(tmp_path, SPAWN_CHILD), cwd=str(tmp_path)))
+        for _ in range(50):
+            if (tmp_path / "child.pid").exists() and (tmp_path / "child.pid").read_text():
+                break
+            await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await asyncio.sleep(0.2)
+        assert not pid_alive(int((tmp_path / "child.pid").read_text()))
@@ -0,0 +1,91 @@
+"""
+Tests for the adaptive camera frame pipeline.
+"""
+import pytest
+import base64
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from camera_capture import CameraFramePipeline, AdaptiveFrameRate, capture_backend
+
+
+def noisy_frame(seed=0, width=1280, height=720):
+    rng = np.random.default_rng(seed)
+    base = np.full((height, width, 3), 120, dtype=np.uint8)
+    noise = rng.integers(0, 3, size=base.shape, dtype=np.uint8)
+    return base + noise
+
+
+def decode(payload):
+    return cv2.imdecode(np.frombuffer(base64.b64decode(payload["data"]), np.uint8), cv2.IMREAD_COLOR)
+
+
+class TestCaptureBackend:
+    """Test per-platform backend selection."""
+
+    def test_platform_backends(self):
+        assert capture_backend("darwin") == cv2.CAP_AVFOUNDATION
+        assert capture_backend("win32") == cv2.CAP_DSHOW
+        assert capture_backend("linux") == cv2.CAP_V4L2
+        assert capture_backend("freebsd") == cv2.CAP_ANY
+
+
+class TestCameraFramePipeline:
+    """Test resizing, change detection and buffer reuse."""
+
+    def test_first_frame_is_sent_resized(self):
+        pipeline = CameraFramePipeline(max_edge=640)
+        payload = pipeline.process(noisy_frame())
+        assert decode(payload).shape[:2] == (360, 640)
+
+    def test_sensor_noise_is_not_a_change(self):
+        pipeline = CameraFramePipeline()
+        pipeline.process(noisy_frame(0))
+        assert pipeline.process(noisy_frame(1)) is None
+        assert pipeline.stats()["skipped_unchanged"] == 1
+
+    def test_scene_change_is_sent(self):
+        pipeline = CameraFramePipeline()
+        pipeline.process(noisy_frame())
+        changed = noisy_frame()
+        changed[:, :640] = 10
+        assert pipeline.process(changed) is not None
+        assert pipeline.sent == 2
+
+    def test_force_sends_unchanged_frame(self):
+        pipeline = CameraFramePipeline()
+        pipeline.process(noisy_frame())
+        assert pipeline.process(noisy_frame(), force=True) is not None
+
+    def test_resize_buffer_is_reused(self):
+        pipeline = CameraFramePipeline(max_edge=640)
+        pipeline.process(noisy_frame())
+        buffer = pipeline._resized
+        pipeline.process(noisy_frame(1))
+        assert pipeline._resized is buffer
+
+    def test_read_raises_when_camera_stops(self):
+        class DeadCamera:
+            def read(self):
+                return False, None
+        with pytest.raises(EOFError):
+            CameraFramePipeline().read(DeadCamera())
+
+
+class TestAdaptiveFrameRate:
+    """Test speaking-state rate and backoff."""
+
+    def test_speaking_is_faster_than_idle(self):
+        rate = AdaptiveFrameRate(speaking_fps=1.0, idle_fps=0.25)
+        assert rate.interval(speaking=True, backlog=False) == 1.0
+        assert rate.interval(speaking=False, backlog=False) == 4.0
+
+    def test_backlog_backs_off(self):
+        rate = AdaptiveFrameRate(speaking_fps=1.0, idle_fps=0.25, max_interval=10.0)
+        assert [rate.interval(True, True) for _ in range(5)] == [2.0, 4.0, 8.0, 10.0, 10.0]
+        rate.interval(True, False)
+        rate.interval(True, False)
+        rate.interval(True, False)
+        rate.interval(True, False)
+        assert rate.interval(True, False) == 1.0
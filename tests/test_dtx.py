@@ -0,0 +1,86 @@
+"""
+Tests for upstream silence suppression (DTX).
+"""
+import pytest
+
+from dtx import SilenceSuppressor
+
+
+def chunk(i):
+    return bytes([i % 256]) * 2048
+
+
+def make(**kwargs):
+    # 100 ms chunks keep the arithmetic readable
+    params = {"chunk_ms": 100, "preroll_ms": 300, "hangover_ms": 200, "keepalive_s": 0}
+    params.update(kwargs)
+    return SilenceSuppressor(**params)
+
+
+class TestSilenceSuppressor:
+    """Test pre-roll, hangover, keep-alive and byte accounting."""
+
+    def test_silence_is_suppressed(self):
+        dtx = make()
+        for i in range(20):
+            assert dtx.process(chunk(i), speech=False) == []
+        assert dtx.bytes_sent == 0
+        assert dtx.bytes_saved == 20 * 2048
+
+    def test_onset_flushes_preroll_in_order(self):
+        dtx = make()
+        for i in range(10):
+            dtx.process(chunk(i), speech=False)
+        sent = dtx.process(chunk(10), speech=True)
+        assert sent == [chunk(7), chunk(8), chunk(9), chunk(10)]
+        assert dtx.transmitting
+
+    def test_speech_is_sent(self):
+        dtx = make()
+        dtx.process(chunk(0), speech=True)
+        assert dtx.process(chunk(1), speech=True) == [chunk(1)]
+
+    def test_hangover_then_stop(self):
+        dtx = make()
+        dtx.process(chunk(0), speech=True)
+        assert dtx.process(chunk(1), speech=False) == [chunk(1)]
+        assert dtx.process(chunk(2), speech=False) == [chunk(2)]
+        assert dtx.process(chunk(3), speech=False) == []
+        assert not dtx.transmitting
+
+    def test_speech_during_hangover_continues_without_preroll(self):
+        dtx = make()
+        dtx.process(chunk(0), speech=True)
+        dtx.process(chunk(1), speech=False)
+        assert dtx.process(chunk(2), speech=True) == [chunk(2)]
+        assert dtx.preroll_flushed == 0
+
+    def test_keepalive_comfort_frames(self):
+        dtx = make(keepalive_s=0.5)
+        sent = []
+        for i in range(20):
+            sent += dtx.process(chunk(i), speech=False)
+        assert sent == [chunk(4), chunk(9), chunk(14), chunk(19)]
+        assert dtx.keepalives == 4
+
+    def test_no_preroll(self):
+        dtx = make(preroll_ms=0)
+        dtx.process(chunk(0), speech=False)
+        assert dtx.process(chunk(1), speech=True) == [chunk(1)]
+
+    def test_stats_and_reset(self):
+        dtx = make()
+        for i in range(10):
+            dtx.process(chunk(i), speech=False)
+        dtx.process(chunk(10), speech=True)
+        stats = dtx.stats()
+        assert stats["chunks_in"] == 11
+        assert stats["chunks_sent"] == 4
+        assert stats["chunks_suppressed"] == 7
+        assert stats["bytes_saved"] == 7 * 2048
+        assert stats["saved_ratio"] == round(7 / 11, 3)
+
+        dtx.reset()
+        assert dtx.stats()["bytes_in"] == 0
+        assert not dtx.transmitting
+        assert dtx.hangover_chunks == 2
@@ -0,0 +1,182 @@
+"""
+Tests for the bounded per-client Socket.IO emit queues.
+"""
+import asyncio
+import pytest
+
+from emit_queue import ClientEmitQueue, EmitDispatcher, LATEST
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, event, data, sid):
+        self.sent.append((sid, event, data))
+
+
+async def drain(*queues):
+    for _ in range(50):
+        if not any(len(q) for q in queues):
+            break
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+class TestClientEmitQueue:
+    """Test drop policies and bounds (queue not running unless started)."""
+
+    def test_latest_wins_replaces_queued_payload(self):
+        queue = ClientEmitQueue("a", Recorder().send)
+        for i in range(10):
+            queue.put("audio_data", {"level": i})
+        assert len(queue) == 1
+        event, data, _ = queue._pop()
+        assert (event, data) == ("audio_data", {"level": 9})
+        assert queue.stats()["dropped_by_event"] == {"audio_data": 9}
+
+    def test_lossless_keeps_order(self):
+        queue = ClientEmitQueue("a", Recorder().send)
+        for i in range(5):
+            queue.put("transcription", {"text": str(i)})
+        assert [queue._pop()[1]["text"] for _ in range(5)] == ["0", "1", "2", "3", "4"]
+        assert queue.stats()["dropped"] == 0
+
+    def test_lossless_overflow_disconnects_instead_of_dropping(self):
+        overflowed = []
+        queue = ClientEmitQueue("a", Recorder().send, max_lossless=3, on_overflow=overflowed.append)
+        for i in range(3):
+            queue.put("tool_confirmation_request", {"id": str(i)})
+        assert overflowed == [] and len(queue) == 3
+        queue.put("tool_confirmation_request", {"id": "3"})
+        assert overflowed == ["a"]
+        assert queue.overflowed and len(queue) == 0
+        assert queue.stats()["dropped"] == 0
+        # Nothing more is queued for a client that is being disconnected
+        queue.put("status", {})
+        assert len(queue) == 0
+
+    def test_latest_events_do_not_count_toward_bound(self):
+        overflowed = []
+        queue = ClientEmitQueue("a", Recorder().send, max_lossless=2, on_overflow=overflowed.append)
+        queue.put("status", {})
+        queue.put("audio_data", {"level": 1})
+        queue.put("status", {})
+        queue.put("audio_data", {"level": 2})
+        assert overflowed == [] and len(queue) == 3
+
+    def test_print_status_coalesced_per_printer(self):
+        queue = ClientEmitQueue("a", Recorder().send)
+        queue.put("print_status_update", {"printer": "k1", "progress_percent": 1})
+        queue.put("print_status_update", {"printer": "k1se", "progress_percent": 5})
+        queue.put("print_status_update", {"printer": "k1", "progress_percent": 2})
+        assert len(queue) == 2
+
+    def test_custom_policies(self):
+        queue = ClientEmitQueue("a", Recorder().send, policies={"status": LATEST})
+        queue.put("status", 1)
+        queue.put("status", 2)
+        queue.put("audio_data", 1)
+        queue.put("audio_data", 2)
+        assert len(queue) == 3
+
+    @pytest.mark.asyncio
+    async def test_events_sent_in_emit_order(self):
+        recorder = Recorder()
+        queue = ClientEmitQueue("a", recorder.send)
+        queue.put("cad_data", {"data": "stl"})
+        queue.put("audio_data", {"level": 1})
+        queue.put("status", {"msg": "done"})
+        # A replaced latest-wins payload moves behind everything emitted before it
+        queue.put("audio_data", {"level": 2})
+        queue.start()
+        await drain(queue)
+        queue.close()
+        assert [(e, d) for _, e, d in recorder.sent] == [
+            ("cad_data", {"data": "stl"}), ("status", {"msg": "done"}), ("audio_data", {"level": 2})]
+        assert queue.sent == 3
+
+    @pytest.mark.asyncio
+    async def test_holds_back_while_transport_backlogged(self):
+        recorder = Recorder()
+        backlog = {"a": 100}
+        queue = ClientEmitQueue("a", recorder.send, backlog=lambda sid: backlog[sid],
+                                max_transport_backlog=10, stall_interval=0.001)
+        queue.start()
+        for i in range(20):
+            queue.put("audio_data", {"level": i})
+            await asyncio.sleep(0.002)
+        assert recorder.sent == []
+        assert queue.stalls > 0
+
+        backlog["a"] = 0
+        await drain(queue)
+        await asyncio.sleep(0.01)
+        queue.close()
+        assert recorder.sent == [("a", "audio_data", {"level": 19})]
+
+    @pytest.mark.asyncio
+    async def test_send_errors_are_counted(self):
+        async def failing(event, data, sid):
+            raise RuntimeError("gone")
+
+        queue = ClientEmitQueue("a", failing)
+        queue.start()
+        queue.put("status", {})
+        await drain(queue)
+        queue.close()
+        assert queue.errors == 1 and queue.sent == 0
+
+
+class TestEmitDispatcher:
+    """Test fan-out to clients and client lifecycle."""
+
+    @pytest.mark.asyncio
+    async def test_emit_to_selected_clients(self):
+        recorder = Recorder()
+        dispatcher = EmitDispatcher(recorder.send)
+        dispatcher.add_client("a")
+        dispatcher.add_client("b")
+        dispatcher.emit("transcription", {"text": "x"}, to={"a"})
+        dispatcher.emit("status", {"msg": "all"})
+        await asyncio.sleep(0.01)
+        assert sorted((sid, e) for sid, e, _ in recorder.sent) == [("a", "status"), ("a", "transcription"), ("b", "status")]
+        dispatcher.remove_client("a")
+        dispatcher.remove_client("b")
+
+    @pytest.mark.asyncio
+    async def test_overflow_reported_per_client(self):
+        overflowed = []
+        dispatcher = EmitDispatcher(Recorder().send, max_lossless=2, backlog=lambda sid: 100 if sid == "slow" else 0,
+                                    on_overflow=overflowed.append)
+        dispatcher.add_client("slow")
+        dispatcher.add_client("fast")
+        for i in range(3):
+            dispatcher.emit("transcription", {"text": str(i)})
+            await asyncio.sleep(0)
+        assert overflowed == ["slow"]
+        assert dispatcher.client_stats("fast")["overflowed"] is False
+        dispatcher.remove_client("slow")
+        dispatcher.remove_client("fast")
+
+    @pytest.mark.asyncio
+    async def test_slow_client_does_not_block_others(self):
+        recorder = Recorder()
+        dispatcher = EmitDispatcher(recorder.send, backlog=lambda sid: 100 if sid == "slow" else 0,
+                                    max_transport_backlog=10)
+        dispatcher.add_client("slow")
+        dispatcher.add_client("fast")
+        dispatcher.emit("transcription", {"text": "x"}, to=["slow", "fast"])
+        await asyncio.sleep(0.01)
+        assert [sid for sid, _, _ in recorder.sent] == ["fast"]
+        stats = dispatcher.stats()
+        assert stats["clients"] == 2 and stats["depth"] == 1
+        assert stats["per_client"]["slow"]["depth"] == 1
+        dispatcher.remove_client("slow")
+        dispatcher.remove_client("fast")
+        assert "slow" not in dispatcher
+
+    def test_emit_skips_disconnected_clients(self):
+        dispatcher = EmitDispatcher(Recorder().send)
+        dispatcher.emit("status", {}, to=["gone"])
+        assert "gone" not in dispatcher
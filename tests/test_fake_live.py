@@ -0,0 +1,119 @@
+"""
+Tests for the offline Live session stand-in and fake audio devices.
+"""
+import pytest
+import asyncio
+
+np = pytest.importorskip("numpy")
+
+from fake_live import (
+    FakeLiveClient, FakeLiveSession, FakePyAudio, ScriptedTurn, synth_tone,
+    TRIGGER_SPEECH, TRIGGER_TEXT,
+)
+
+RATE = 16000
+CHUNK = 1024
+
+
+def mic(kind, ms):
+    n = int(RATE * ms / 1000.0) * 2
+    if kind == "speech":
+        tone = synth_tone(1000, RATE, freq=440.0, harmonics=4)
+        return (tone * (n // len(tone) + 1))[:n]
+    return bytes(n)
+
+
+async def send_audio(session, data):
+    for offset in range(0, len(data), CHUNK * 2):
+        await session.send(input={"data": data[offset:offset + CHUNK * 2], "mime_type": "audio/pcm"})
+
+
+async def collect_turn(session, timeout=5.0):
+    async def collect():
+        return [msg async for msg in session.receive()]
+    return await asyncio.wait_for(collect(), timeout)
+
+
+class TestFakeLiveSession:
+    """Test scripted replies and server-side turn detection."""
+
+    @pytest.mark.asyncio
+    async def test_speech_then_silence_triggers_reply(self):
+        turn = ScriptedTurn(trigger=TRIGGER_SPEECH, response_delay_ms=0, audio_ms=200,
+                            chunk_interval_ms=0, input_transcript="hola", output_transcript="listo")
+        session = FakeLiveSession([turn])
+        session.start()
+        try:
+            await send_audio(session, mic("speech", 500) + mic("silence", 400))
+            messages = await collect_turn(session)
+        finally:
+            await session.close()
+
+        audio = [m.data for m in messages if m.data]
+        assert sum(len(a) for a in audio) == int(24000 * 0.2) * 2
+        assert messages[0].server_content.input_transcription.text == "hola"
+        assert messages[-1].server_content.turn_complete
+        assert session.turns_completed == 1
+
+    @pytest.mark.asyncio
+    async def test_silence_alone_does_not_trigger(self):
+        session = FakeLiveSession([ScriptedTurn(response_delay_ms=0, audio_ms=100, chunk_interval_ms=0)])
+        session.start()
+        try:
+            await send_audio(session, mic("silence", 1000))
+            await asyncio.sleep(0.05)
+            assert session._messages.empty()
+            assert session.stats()["audio_chunks_received"] > 0
+        finally:
+            await session.close()
+
+    @pytest.mark.asyncio
+    async def test_tool_call_waits_for_response(self):
+        turn = ScriptedTurn(trigger=TRIGGER_TEXT, response_delay_ms=0, audio_ms=80, chunk_interval_ms=0,
+                            tool_calls=[{"name": "list_projects", "args": {}}])
+        session = FakeLiveSession([turn])
+        session.start()
+        try:
+            await session.send(input="hola", end_of_turn=True)
+            gen = session.receive()
+            first = await asyncio.wait_for(gen.__anext__(), 1.0)
+            call = first.tool_call.function_calls[0]
+            assert call.name == "list_projects"
+
+            await session.send_tool_response(function_responses=[{"id": call.id, "name": call.name}])
+            rest = [m async for m in gen]
+        finally:
+            await session.close()
+
+        assert rest[-1].server_content.turn_complete
+        assert session.turn_log[0]["tool_roundtrip_ms"] is not None
+        assert session.tool_responses_received == 1
+
+
+class TestFakeLiveClient:
+    """Test the connect() context manager."""
+
+    @pytest.mark.asyncio
+    async def test_connect_tracks_sessions(self):
+        client = FakeLiveClient([ScriptedTurn()])
+        async with client.connect(model="m", config={}) as session:
+            assert client.session is session
+        assert len(client.sessions) == 1
+        assert session._driver.done()
+
+
+class TestFakePyAudio:
+    """Test the fake devices."""
+
+    def test_mic_follows_pattern(self):
+        devices = FakePyAudio(mic_pattern=(("speech", 128), ("silence", 128)), speed=1000.0)
+        stream = devices.open(rate=RATE, input=True, frames_per_buffer=CHUNK)
+        levels = [np.abs(np.frombuffer(stream.read(CHUNK), dtype="<i2")).max() for _ in range(4)]
+        assert levels[0] > 0 and levels[1] > 0
+        assert levels[2] == 0 and levels[3] == 0
+
+    def test_output_counts_bytes(self):
+        devices = FakePyAudio(speed=1000.0)
+        stream = devices.open(rate=24000, output=True)
+        stream.write(bytes(4800))
+        assert devices.output_streams[0].bytes_written == 4800
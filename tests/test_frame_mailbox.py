@@ -0,0 +1,85 @@
+"""
+Tests for the latest-only video frame mailbox.
+"""
+import pytest
+import base64
+
+from frame_mailbox import FrameMailbox
+
+
+class TestFrameMailbox:
+    """Test coalescing, lazy encoding and counters."""
+
+    def test_empty_mailbox(self):
+        box = FrameMailbox()
+        assert not box.has_frame()
+        assert box.take() is None
+
+    def test_keeps_only_latest(self):
+        box = FrameMailbox()
+        for i in range(30):
+            box.put(bytes([i]) * 10)
+        payload = box.take()
+        assert base64.b64decode(payload["data"]) == bytes([29]) * 10
+        assert payload["mime_type"] == "image/jpeg"
+        assert box.stats() == {"received": 30, "dropped": 29, "sent": 1, "encoded": 1, "window": 1}
+
+    def test_encodes_only_on_take(self):
+        box = FrameMailbox()
+        box.put(b"jpeg")
+        box.put(b"jpeg2")
+        assert box.encoded == 0
+        box.take()
+        assert box.encoded == 1
+
+    def test_resending_same_frame_reuses_encoding(self):
+        box = FrameMailbox()
+        box.put(b"frame")
+        first = box.take()
+        second = box.take()
+        assert first is second
+        assert box.encoded == 1 and box.sent == 2
+
+    def test_sent_frame_is_not_counted_as_dropped(self):
+        box = FrameMailbox()
+        box.put(b"a")
+        box.take()
+        box.put(b"b")
+        assert box.dropped == 0
+
+    def test_stores_reference_without_copy(self):
+        box = FrameMailbox()
+        frame = b"x" * 100000
+        box.put(frame)
+        assert box.recent()[0] is frame
+
+    def test_base64_string_passes_through(self):
+        box = FrameMailbox()
+        encoded = base64.b64encode(b"jpeg").decode()
+        box.put(encoded)
+        assert box.take()["data"] == encoded
+        assert box.encoded == 0
+
+    def test_window_keeps_recent_frames(self):
+        box = FrameMailbox(window=3)
+        for i in range(5):
+            box.put(bytes([i]))
+        assert box.recent() == [b"\x02", b"\x03", b"\x04"]
+        assert box.dropped == 2
+
+    def test_take_specific_frame_drops_the_rest(self):
+        box = FrameMailbox(window=3)
+        for frame in (b"a", b"b", b"c"):
+            box.put(frame)
+        payload = box.take(box.recent()[1])
+        assert base64.b64decode(payload["data"]) == b"b"
+        assert box.dropped == 2
+        assert box.recent() == []
+
+    def test_skip_discards_window(self):
+        box = FrameMailbox(window=3)
+        box.put(b"a")
+        box.put(b"b")
+        box.skip()
+        assert box.dropped == 2 and box.sent == 0
+        assert not box.has_frame()
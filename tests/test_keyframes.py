@@ -0,0 +1,84 @@
+"""
+Tests for keyframe selection (sharpness + perceptual hash).
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from keyframes import KeyframeSelector, decode_gray, sharpness, dhash, hamming
+
+
+def checkerboard(size=160, square=10, shift=0):
+    y, x = np.indices((size, size))
+    return ((((x + shift) // square + y // square) % 2) * 255).astype(np.uint8)
+
+
+def gradient(size=160, horizontal=True):
+    ramp = np.linspace(0, 255, size, dtype=np.uint8)
+    return np.tile(ramp, (size, 1)) if horizontal else np.tile(ramp[:, None], (1, size))
+
+
+def jpeg(image):
+    ok, buf = cv2.imencode(".jpg", image)
+    assert ok
+    return buf.tobytes()
+
+
+class TestScores:
+    """Test the sharpness score and the difference hash."""
+
+    def test_blur_lowers_sharpness(self):
+        sharp = checkerboard()
+        blurred = cv2.GaussianBlur(sharp, (9, 9), 4)
+        assert sharpness(sharp) > sharpness(blurred) * 2
+
+    def test_hash_is_stable_under_recompression(self):
+        image = gradient()
+        a = dhash(decode_gray(jpeg(image)))
+        b = dhash(decode_gray(jpeg(cv2.GaussianBlur(image, (3, 3), 1))))
+        assert hamming(a, b) <= 6
+
+    def test_hash_changes_with_scene(self):
+        a = dhash(gradient(horizontal=True))
+        b = dhash(gradient(horizontal=True)[:, ::-1].copy())
+        assert hamming(a, b) > 32
+
+    def test_undecodable(self):
+        assert decode_gray(b"not a jpeg") is None
+        assert decode_gray(b"") is None
+
+
+class TestKeyframeSelector:
+    """Test choosing the sharpest frame and skipping unchanged scenes."""
+
+    def test_picks_sharpest_frame(self):
+        sharp = jpeg(checkerboard())
+        blurred = jpeg(cv2.GaussianBlur(checkerboard(), (15, 15), 6))
+        selector = KeyframeSelector()
+        assert selector.choose([blurred, sharp, blurred]) is sharp
+
+    def test_skips_unchanged_scene(self):
+        selector = KeyframeSelector()
+        first = jpeg(checkerboard())
+        assert selector.choose([first]) is first
+        assert selector.choose([jpeg(checkerboard())]) is None
+        assert selector.stats()["skipped_unchanged"] == 1
+
+    def test_sends_changed_scene(self):
+        selector = KeyframeSelector()
+        selector.choose([jpeg(gradient(horizontal=True))])
+        flipped = jpeg(gradient(horizontal=True)[:, ::-1].copy())
+        assert selector.choose([flipped]) is flipped
+
+    def test_reset_forgets_last_upload(self):
+        selector = KeyframeSelector()
+        frame = jpeg(checkerboard())
+        selector.choose([frame])
+        selector.reset()
+        assert selector.choose([frame]) is frame
+
+    def test_undecodable_frames_fall_back_to_newest(self):
+        selector = KeyframeSelector()
+        assert selector.choose([b"bad", b"worse"]) == b"worse"
+        assert selector.stats()["undecodable"] == 2
@@ -0,0 +1,108 @@
+"""
+Tests for voice pipeline latency tracing.
+"""
+import pytest
+
+from latency import LatencyTracer, RollingHistogram
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRollingHistogram:
+    """Test percentile reporting."""
+
+    def test_percentiles(self):
+        hist = RollingHistogram()
+        for ms in range(1, 101):
+            hist.add(ms / 1000.0)
+        snap = hist.snapshot()
+        assert snap["count"] == 100
+        assert snap["p50_ms"] == 50.0
+        assert snap["p95_ms"] == 95.0
+        assert snap["p99_ms"] == 99.0
+
+    def test_rolling_window(self):
+        hist = RollingHistogram(maxlen=3)
+        for s in (10.0, 0.001, 0.002, 0.003):
+            hist.add(s)
+        assert hist.count == 4
+        assert hist.snapshot()["p99_ms"] == 3.0
+
+    def test_empty(self):
+        assert RollingHistogram().snapshot()["p50_ms"] is None
+
+
+class TestLatencyTracer:
+    """Test per-turn marks."""
+
+    def test_full_turn(self):
+        clock = FakeClock()
+        tracer = LatencyTracer(clock=clock)
+        tracer.mark_speech_end()
+        clock.now += 0.1
+        tracer.mark_audio_sent()
+        clock.now += 0.4
+        tracer.mark_response()
+        clock.now += 0.2
+        tracer.mark_playback()
+
+        snap = tracer.snapshot()
+        assert snap["voice_to_voice"]["last_ms"] == pytest.approx(700.0)
+        assert snap["upstream_to_response"]["last_ms"] == pytest.approx(400.0)
+        assert snap["response_to_playback"]["last_ms"] == pytest.approx(200.0)
+
+    def test_only_first_response_counts(self):
+        clock = FakeClock()
+        tracer = LatencyTracer(clock=clock)
+        tracer.mark_speech_end()
+        clock.now += 0.5
+        tracer.mark_response()
+        clock.now += 1.0
+        tracer.mark_response()
+        assert tracer.snapshot()["speech_to_response"]["count"] == 1
+
+    def test_response_without_speech_ignored(self):
+        tracer = LatencyTracer()
+        tracer.mark_response()
+        tracer.mark_playback()
+        assert tracer.snapshot() == {}
+
+    def test_reply_before_vad_confirms_silence(self):
+        clock = FakeClock()
+        tracer = LatencyTracer(clock=clock)
+        tracer.mark_speech_start()
+        clock.now += 1.0
+        silence_began = clock.now
+        clock.now += 0.3
+        tracer.mark_response()
+        clock.now += 0.1
+        tracer.mark_playback()
+        clock.now += 0.1
+        tracer.mark_speech_end(at=silence_began)
+        assert tracer.snapshot()["voice_to_voice"]["last_ms"] == pytest.approx(400.0)
+
+    def test_audio_during_speech_is_not_the_reply(self):
+        clock = FakeClock()
+        tracer = LatencyTracer(clock=clock)
+        tracer.mark_speech_start()
+        tracer.mark_response()
+        tracer.mark_playback()
+        clock.now += 1.0
+        tracer.mark_speech_end()
+        assert "voice_to_voice" not in tracer.snapshot()
+
+    def test_tool_latency_per_name(self):
+        clock = FakeClock()
+        tracer = LatencyTracer(clock=clock)
+        started = tracer.tool_started()
+        clock.now += 0.25
+        tracer.tool_finished("control_light", started)
+        snap = tracer.snapshot()
+        assert snap["tool:control_light"]["last_ms"] == pytest.approx(250.0)
+        assert snap["tool_call"]["count"] == 1
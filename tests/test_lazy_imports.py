@@ -0,0 +1,105 @@
+"""
+Tests for the import-time profiler and background imports.
+"""
+import sys
+import pytest
+
+from lazy_imports import ImportProfiler, BackgroundImport
+
+
+@pytest.fixture
+def package(tmp_path, monkeypatch):
+    """A throwaway package: lazypkg/{__init__, heavy, light}.py."""
+    root = tmp_path / "lazypkg"
+    root.mkdir()
+    (root / "__init__.py").write_text("")
+    (root / "light.py").write_text("VALUE = 1\n")
+    (root / "heavy.py").write_text("import time\ntime.sleep(0.05)\nfrom . import light\n")
+    (tmp_path / "lazytop.py").write_text("import lazypkg.heavy\nfrom lazypkg import light\n")
+    (tmp_path / "lazyoptional.py").write_text(
+        "try:\n    import lazy_missing_dependency\nexcept ImportError:\n    pass\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield
+    for name in [m for m in sys.modules if m.startswith("lazy") and m != "lazy_imports"]:
+        del sys.modules[name]
+
+
+class TestImportProfiler:
+    """Test the import tree and its timings."""
+
+    def test_tree(self, package):
+        profiler = ImportProfiler().install()
+        try:
+            import lazytop  # noqa: F401
+        finally:
+            profiler.uninstall()
+        root = profiler.find("lazytop")
+        assert root is not None
+        # `import lazypkg.heavy` is one node (the package loads inside it); `from lazypkg import light` is already loaded
+        assert [child.name for child in root.children] == ["lazypkg.heavy"]
+        heavy = root.children[0]
+        assert heavy.cumulative >= 0.05
+        assert heavy.self_time >= 0.05
+        assert [child.name for child in heavy.children] == ["lazypkg.light"]
+
+    def test_from_import_submodule_gets_own_node(self, package):
+        profiler = ImportProfiler().install()
+        try:
+            from lazypkg import heavy  # noqa: F401
+        finally:
+            profiler.uninstall()
+        assert [root.name for root in profiler.roots] == ["lazypkg", "lazypkg.heavy"]
+
+    def test_failed_optional_import_not_recorded(self, package):
+        profiler = ImportProfiler().install()
+        try:
+            import lazyoptional  # noqa: F401
+        finally:
+            profiler.uninstall()
+        assert profiler.find("lazyoptional").children == []
+
+    def test_report_hides_small_imports(self, package):
+        profiler = ImportProfiler().install()
+        try:
+            import lazytop  # noqa: F401
+        finally:
+            profiler.uninstall()
+        lines = profiler.report(min_ms=20)
+        assert any(line.endswith("lazypkg.heavy") for line in lines)
+        assert not any(line.endswith("lazypkg.light") for line in lines)
+
+    def test_uninstall_restores_import(self):
+        import builtins
+        original = builtins.__import__
+        profiler = ImportProfiler().install()
+        assert builtins.__import__ != original
+        profiler.uninstall()
+        assert builtins.__import__ is original
+
+
+class TestBackgroundImport:
+    """Test importing in a worker thread."""
+
+    @pytest.mark.asyncio
+    async def test_get(self, package):
+        lazy = BackgroundImport("lazypkg.heavy")
+        assert lazy.module is None
+        module = await lazy.get()
+        assert module is sys.modules["lazypkg.heavy"]
+        assert lazy.module is module
+        assert lazy.seconds >= 0.05
+        assert await lazy.get() is module
+
+    @pytest.mark.asyncio
+    async def test_profiled(self, package):
+        profiler = ImportProfiler().install()
+        try:
+            await BackgroundImport("lazytop", profiler=profiler).get()
+        finally:
+            profiler.uninstall()
+        assert profiler.find("lazytop").cumulative >= 0.05
+
+    @pytest.mark.asyncio
+    async def test_missing_module(self):
+        with pytest.raises(ModuleNotFoundError):
+            await BackgroundImport("lazy_missing_dependency").get()
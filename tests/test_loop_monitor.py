@@ -0,0 +1,76 @@
+"""
+Tests for the event loop lag monitor and its stack sampling.
+"""
+import asyncio
+import sys
+import time
+import pytest
+
+from loop_monitor import LoopLagMonitor, describe_stack
+
+
+async def blocking_handler():
+    # Simulates a synchronous file write / directory walk on the loop
+    time.sleep(0.25)
+
+
+class TestDescribeStack:
+    """Test naming the coroutine and line from a frame."""
+
+    def test_plain_function(self):
+        def inner():
+            return describe_stack(sys._getframe())
+
+        info = describe_stack(sys._getframe())
+        assert "test_plain_function" in info["blocking_call"]
+        assert info["stack"]
+        assert "inner" in inner()["blocking_call"]
+
+    @pytest.mark.asyncio
+    async def test_coroutine_named(self):
+        async def handler():
+            return describe_stack(sys._getframe())
+
+        info = await handler()
+        assert info["coroutine"].endswith("test_coroutine_named")
+        assert "in handler" in info["location"]
+
+
+class TestLoopLagMonitor:
+    """Test lag measurement and stall detection on a real loop."""
+
+    @pytest.mark.asyncio
+    async def test_idle_loop_has_no_stalls(self):
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.1, log=False)
+        monitor.start()
+        await asyncio.sleep(0.1)
+        monitor.stop()
+        stats = monitor.stats()
+        assert stats["lag"]["count"] > 0
+        assert stats["stalls"] == 0
+
+    @pytest.mark.asyncio
+    async def test_blocking_call_is_sampled(self):
+        monitor = LoopLagMonitor(interval=0.01, threshold=0.05, log=False)
+        monitor.start()
+        await asyncio.sleep(0.03)
+        await asyncio.create_task(blocking_handler(), name="slow-handler")
+        await asyncio.sleep(0.05)
+        monitor.stop()
+
+        stats = monitor.stats()
+        assert stats["stalls"] == 1
+        stall = stats["recent_stalls"][0]
+        assert stall["lag_ms"] >= 150
+        assert stall["coroutine"] == "blocking_handler"
+        assert "test_loop_monitor.py" in stall["location"] and "blocking_handler" in stall["location"]
+        assert stall["task"] == "slow-handler"
+        assert stats["top_locations"][0]["stalls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_stop(self):
+        monitor = LoopLagMonitor(interval=0.01)
+        monitor.start()
+        assert monitor.running
+        monitor.stop()
+        assert not monitor.running
@@ -0,0 +1,99 @@
+"""
+Tests for the Prometheus text metrics registry.
+"""
+import pytest
+
+from metrics import Registry
+
+
+class TestMetrics:
+    """Test counters, gauges, histograms and the text format."""
+
+    def test_counter(self):
+        registry = Registry()
+        messages = registry.counter("live_messages_total", "Messages")
+        messages.inc()
+        messages.inc(2)
+        text = registry.render()
+        assert "# HELP live_messages_total Messages" in text
+        assert "# TYPE live_messages_total counter" in text
+        assert "live_messages_total 3\n" in text
+
+    def test_counter_cannot_go_down(self):
+        counter = Registry().counter("c_total", "c")
+        with pytest.raises(ValueError):
+            counter.inc(-1)
+
+    def test_labels(self):
+        registry = Registry()
+        emits = registry.counter("emits_total", "Emits", ["event"])
+        emits.labels(event="status").inc()
+        emits.labels("transcription").inc(5)
+        text = registry.render()
+        assert 'emits_total{event="status"} 1' in text
+        assert 'emits_total{event="transcription"} 5' in text
+        assert emits.value(event="transcription") == 5
+
+    def test_label_mismatch(self):
+        counter = Registry().counter("c_total", "c", ["tool"])
+        with pytest.raises(ValueError):
+            counter.labels(name="x")
+        with pytest.raises(ValueError):
+            counter.inc()
+
+    def test_label_values_are_escaped(self):
+        registry = Registry()
+        registry.counter("c_total", "c", ["tool"]).labels(tool='say "hi"\n').inc()
+        assert 'c_total{tool="say \\"hi\\"\\n"} 1' in registry.render()
+
+    def test_gauge(self):
+        registry = Registry()
+        depth = registry.gauge("depth", "Depth", ["session"])
+        depth.labels(session="a").set(4)
+        depth.labels(session="a").dec()
+        assert 'depth{session="a"} 3' in registry.render()
+        depth.clear()
+        assert 'depth{session="a"}' not in registry.render()
+
+    def test_histogram(self):
+        registry = Registry()
+        latency = registry.histogram("tool_seconds", "Tool latency", ["tool"], buckets=(0.1, 1.0))
+        latency.labels(tool="x").observe(0.05)
+        latency.labels(tool="x").observe(0.5)
+        latency.labels(tool="x").observe(3)
+        text = registry.render()
+        assert 'tool_seconds_bucket{tool="x",le="0.1"} 1' in text
+        assert 'tool_seconds_bucket{tool="x",le="1"} 2' in text
+        assert 'tool_seconds_bucket{tool="x",le="+Inf"} 3' in text
+        assert 'tool_seconds_sum{tool="x"} 3.55' in text
+        assert 'tool_seconds_count{tool="x"} 3' in text
+        assert latency.value(tool="x") == (3, 3.55)
+
+    def test_histogram_timer(self):
+        registry = Registry()
+        latency = registry.histogram("op_seconds", "Op latency")
+        with latency.time():
+            pass
+        assert latency.value()[0] == 1
+
+    def test_redeclare_returns_same_metric(self):
+        registry = Registry()
+        assert registry.counter("c_total", "c") is registry.counter("c_total", "c")
+        with pytest.raises(ValueError):
+            registry.gauge("c_total", "c")
+
+    def test_collectors_run_before_render(self):
+        registry = Registry()
+        depth = registry.gauge("depth", "Depth")
+        registry.add_collector(lambda: depth.set(7))
+        assert "depth 7" in registry.render()
+
+    def test_failing_collector_does_not_break_render(self):
+        registry = Registry()
+        registry.counter("c_total", "c").inc()
+
+        def broken():
+            raise RuntimeError("boom")
+
+        registry.add_collector(broken)
+        assert "c_total 1" in registry.render()
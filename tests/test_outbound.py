@@ -0,0 +1,73 @@
+"""
+Tests for the priority-aware outbound scheduler.
+"""
+import pytest
+import asyncio
+
+from outbound import OutboundScheduler, classify, LANE_AUDIO, LANE_IMAGE, LANE_TEXT
+
+AUDIO = {"data": b"\x00" * 2048, "mime_type": "audio/pcm"}
+
+
+def image(n):
+    return {"data": f"frame{n}", "mime_type": "image/jpeg"}
+
+
+class TestClassify:
+    """Test lane routing."""
+
+    def test_routes_by_mime_type(self):
+        assert classify(AUDIO) == LANE_AUDIO
+        assert classify(image(1)) == LANE_IMAGE
+        assert classify("hello") == LANE_TEXT
+        assert classify({"data": "x", "mime_type": "text/plain"}) == LANE_TEXT
+
+
+class TestOutboundScheduler:
+    """Test priority order, drop policy and metrics."""
+
+    def test_audio_before_images_and_text(self):
+        q = OutboundScheduler()
+        q.put_nowait("context")
+        q.put_nowait(image(1))
+        q.put_nowait(AUDIO)
+        assert q.get_nowait() is AUDIO
+        assert q.get_nowait()["data"] == "frame1"
+        assert q.get_nowait() == "context"
+        with pytest.raises(asyncio.QueueEmpty):
+            q.get_nowait()
+
+    def test_images_drop_oldest(self):
+        q = OutboundScheduler()
+        for n in range(5):
+            q.put_nowait(image(n))
+        assert q.qsize() == 2
+        assert q.get_nowait()["data"] == "frame3"
+        assert q.stats()[LANE_IMAGE]["dropped"] == 3
+
+    def test_text_is_lossless(self):
+        q = OutboundScheduler()
+        for n in range(50):
+            q.put_nowait(f"msg{n}")
+        assert q.stats()[LANE_TEXT]["dropped"] == 0
+        assert q.qsize() == 50
+
+    @pytest.mark.asyncio
+    async def test_put_never_blocks_and_get_waits(self):
+        q = OutboundScheduler()
+        getter = asyncio.create_task(q.get())
+        await asyncio.sleep(0)
+        assert not getter.done()
+        for _ in range(500):
+            await asyncio.wait_for(q.put(AUDIO), 0.1)
+        assert await asyncio.wait_for(getter, 1.0) is AUDIO
+
+    def test_wait_metrics(self):
+        q = OutboundScheduler()
+        q.put_nowait(AUDIO)
+        q.get_nowait()
+        stats = q.stats()[LANE_AUDIO]
+        assert stats["sent"] == 1
+        assert stats["enqueued"] == 1
+        assert stats["depth"] == 0
+        assert stats["max_wait_ms"] >= 0
@@ -20,6 +20,31 @@ MODULES = {
     "web": "test_web_agent.py",
     "auth": "test_authenticator.py",
     "tools": "test_ada_tools.py",
+    "vad": "test_vad.py",
+    "capture": "test_audio_capture.py",
+    "transport": "test_audio_transport.py",
+    "playback": "test_audio_playback.py",
+    "outbound": "test_outbound.py",
+    "latency": "test_latency.py",
+    "fake_live": "test_fake_live.py",
+    "recording": "test_session_recording.py",
+    "tool_dispatch": "test_tool_dispatch.py",
+    "confirmation": "test_tool_confirmation.py",
+    "frames": "test_frame_mailbox.py",
+    "keyframes": "test_keyframes.py",
+    "screen": "test_screen_capture.py",
+    "camera": "test_camera_capture.py",
+    "dtx": "test_dtx.py",
+    "sessions": "test_session_registry.py",
+    "emit": "test_emit_queue.py",
+    "resumption": "test_session_resumption.py",
+    "transcript": "test_transcript.py",
+    "metrics": "test_metrics.py",
+    "loop": "test_loop_monitor.py",
+    "lazy": "test_lazy_imports.py",
+    "cad_workers": "test_cad_workers.py",
+    "cad_jobs": "test_cad_jobs.py",
+    "cad_cache": "test_cad_cache.py",
 }
 
 TESTS_DIR = Path(__file__).parent
@@ -0,0 +1,84 @@
+"""
+Tests for screen capture diffing, downscaling and pacing.
+"""
+import pytest
+import base64
+
+np = pytest.importorskip("numpy")
+cv2 = pytest.importorskip("cv2")
+
+from screen_capture import ScreenCapture, ScreenPacer
+
+
+class FakeScreen:
+    """Returns a mutable BGRA frame from grab()."""
+
+    def __init__(self, width=1920, height=1080):
+        rng = np.random.default_rng(0)
+        self.frame = rng.integers(0, 255, size=(height, width, 4), dtype=np.uint8)
+
+    def __call__(self):
+        return self.frame
+
+
+def decode(payload):
+    return cv2.imdecode(np.frombuffer(base64.b64decode(payload["data"]), np.uint8), cv2.IMREAD_COLOR)
+
+
+class TestScreenCapture:
+    """Test change detection and encoding."""
+
+    def test_first_capture_is_sent_downscaled(self):
+        screen = FakeScreen()
+        capture = ScreenCapture(max_edge=640, grab=screen)
+        payload = capture.capture()
+        assert payload["mime_type"] == "image/jpeg"
+        assert decode(payload).shape[:2] == (360, 640)
+        assert capture.stats()["last_size"] == (640, 360)
+
+    def test_unchanged_screen_is_skipped(self):
+        screen = FakeScreen()
+        capture = ScreenCapture(grab=screen)
+        capture.capture()
+        assert capture.capture() is None
+        assert capture.stats()["skipped_unchanged"] == 1
+
+    def test_small_change_below_threshold_is_skipped(self):
+        screen = FakeScreen()
+        capture = ScreenCapture(grab=screen, min_changed=0.05)
+        capture.capture()
+        # A cursor-sized change touches one or two tiles out of ~2000
+        screen.frame[100:120, 100:110] = 0
+        assert capture.capture() is None
+        assert 0 < capture.last_changed < 0.05
+
+    def test_large_change_is_sent_with_dirty_box(self):
+        screen = FakeScreen()
+        capture = ScreenCapture(grab=screen)
+        capture.capture()
+        screen.frame[0:540, 0:960] = 0
+        assert capture.capture() is not None
+        x0, y0, x1, y1 = capture.last_dirty_box
+        assert (x0, y0) == (0, 0) and x1 >= 960 and y1 >= 540
+
+    def test_resolution_change_resets_baseline(self):
+        screen = FakeScreen()
+        capture = ScreenCapture(grab=screen)
+        capture.capture()
+        screen.frame = FakeScreen(1280, 720).frame
+        assert capture.capture() is not None
+
+    def test_small_screen_not_upscaled(self):
+        capture = ScreenCapture(max_edge=1280, grab=FakeScreen(800, 600))
+        capture.capture()
+        assert capture.last_size == (800, 600)
+
+
+class TestScreenPacer:
+    """Test backoff under backpressure."""
+
+    def test_backs_off_and_recovers(self):
+        pacer = ScreenPacer(interval=1.0, max_interval=8.0)
+        assert [pacer.update(True) for _ in range(5)] == [2.0, 4.0, 8.0, 8.0, 8.0]
+        assert [pacer.update(False) for _ in range(4)] == [4.0, 2.0, 1.0, 1.0]
+        assert pacer.backoffs == 5
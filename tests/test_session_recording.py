@@ -0,0 +1,172 @@
+"""
+Tests for session recording and replay.
+"""
+import pytest
+import asyncio
+import base64
+import gzip
+
+from google.genai import types
+
+from session_recording import (
+    SessionRecorder, ReplayLiveSession, RecordedToolResults, read_recording, summarize, recorded_mic,
+    KIND_HEADER, KIND_MIC, KIND_VIDEO, KIND_TEXT, KIND_SERVER, KIND_TOOL_RESULT,
+)
+
+
+def audio_message(data):
+    blob = types.Blob(data=data, mime_type="audio/pcm;rate=24000")
+    return types.LiveServerMessage(server_content=types.LiveServerContent(
+        model_turn=types.Content(role="model", parts=[types.Part(inline_data=blob)])))
+
+
+def turn_complete():
+    return types.LiveServerMessage(server_content=types.LiveServerContent(turn_complete=True))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def recording(tmp_path):
+    clock = FakeClock()
+    recorder = SessionRecorder(str(tmp_path / "session.rec"), metadata={"model": "test"}, clock=clock)
+    clock.now = 0.1
+    recorder.record_send({"data": b"\x01\x02" * 512, "mime_type": "audio/pcm"})
+    clock.now = 0.2
+    recorder.record_send({"data": base64.b64encode(b"jpeg").decode(), "mime_type": "image/jpeg"})
+    recorder.record_send("hola", end_of_turn=True)
+    clock.now = 0.5
+    recorder.record_server_message(audio_message(b"\xff\x00" * 480))
+    recorder.record_tool_response([types.FunctionResponse(id="1", name="list_projects", response={"result": "ok"})])
+    clock.now = 0.6
+    recorder.record_server_message(turn_complete())
+    recorder.close()
+    return recorder.path
+
+
+class TestSessionRecorder:
+    """Test the on-disk format round trip."""
+
+    def test_round_trip(self, recording):
+        events = read_recording(recording)
+        assert [e.kind for e in events] == [KIND_HEADER, KIND_MIC, KIND_VIDEO, KIND_TEXT, KIND_SERVER, KIND_TOOL_RESULT, KIND_SERVER]
+        assert events[0].meta["model"] == "test"
+        assert events[1].payload == b"\x01\x02" * 512
+        assert events[1].t == pytest.approx(0.1)
+        assert events[2].payload == b"jpeg"
+        assert events[3].meta == {"text": "hola", "end_of_turn": True}
+        assert events[4].server_message().data == b"\xff\x00" * 480
+        assert events[5].function_responses()[0].response == {"result": "ok"}
+        assert events[6].server_message().server_content.turn_complete
+
+    def test_audio_stored_as_raw_bytes(self, recording):
+        server = read_recording(recording)[4]
+        assert len(server.payload) == 960
+        part = server.meta["msg"]["server_content"]["model_turn"]["parts"][0]
+        assert part["inline_data"]["data"] == {"__blob__": 0}
+
+    def test_truncated_file_keeps_complete_records(self, recording, tmp_path):
+        with gzip.open(recording, "rb") as f:
+            raw = f.read()
+        truncated = tmp_path / "truncated.rec"
+        with gzip.open(truncated, "wb") as f:
+            f.write(raw[:-10])
+        events = read_recording(str(truncated))
+        assert len(events) == 6
+
+    def test_summarize(self, recording):
+        info = summarize(read_recording(recording))
+        assert info["counts"][KIND_SERVER] == 2
+        assert info["payload_bytes"][KIND_MIC] == 1024
+        assert info["duration_s"] == 0.6
+        assert recorded_mic(read_recording(recording)) == b"\x01\x02" * 512
+
+    def test_in_directory_never_overwrites(self, tmp_path):
+        first = SessionRecorder.in_directory(str(tmp_path / "recs"))
+        second = SessionRecorder.in_directory(str(tmp_path / "recs"))
+        first.close()
+        second.close()
+        assert first.path != second.path
+
+
+class TestRecordingSession:
+    """Test the recording proxy around a live session."""
+
+    @pytest.mark.asyncio
+    async def test_records_both_directions(self, tmp_path):
+        class Upstream:
+            def __init__(self):
+                self.sent = []
+
+            async def send(self, input=None, end_of_turn=False):
+                self.sent.append(input)
+
+            async def receive(self):
+                yield audio_message(b"\x00\x01")
+                yield turn_complete()
+
+        upstream = Upstream()
+        recorder = SessionRecorder(str(tmp_path / "s.rec"))
+        session = recorder.wrap(upstream)
+        await session.send(input={"data": b"\x00" * 4, "mime_type": "audio/pcm"})
+        received = [msg async for msg in session.receive()]
+        recorder.close()
+
+        assert len(upstream.sent) == 1 and len(received) == 2
+        assert session.sent is upstream.sent
+        kinds = [e.kind for e in read_recording(recorder.path)]
+        assert kinds == [KIND_HEADER, KIND_MIC, KIND_SERVER, KIND_SERVER]
+
+
+class TestReplayLiveSession:
+    """Test re-delivery of recorded server messages."""
+
+    @pytest.mark.asyncio
+    async def test_fast_replay_delivers_turns(self, recording):
+        session = ReplayLiveSession(read_recording(recording), speed=0)
+        session.start()
+        try:
+            messages = await asyncio.wait_for(_collect(session), 1.0)
+        finally:
+            await session.close()
+        assert messages[0].data == b"\xff\x00" * 480
+        assert messages[-1].server_content.turn_complete
+        assert session.finished
+
+    @pytest.mark.asyncio
+    async def test_timed_replay_follows_recording(self, recording):
+        session = ReplayLiveSession(read_recording(recording), speed=10.0)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        session.start()
+        try:
+            await asyncio.wait_for(_collect(session), 1.0)
+        finally:
+            await session.close()
+        # Last message recorded at 0.6 s, replayed at 10x
+        assert loop.time() - start >= 0.055
+
+
+class TestRecordedToolResults:
+    """Test answering replayed tool calls from the recording."""
+
+    @pytest.mark.asyncio
+    async def test_answers_with_recorded_results(self, recording):
+        tools = RecordedToolResults(read_recording(recording))
+        tool_call = types.LiveServerToolCall(function_calls=[
+            types.FunctionCall(id="1", name="list_projects", args={}),
+            types.FunctionCall(id="2", name="write_file", args={"path": "x"}),
+        ])
+        responses = await tools.handle_tool_call(tool_call)
+        assert [(r.id, r.name, r.response) for r in responses] == [("1", "list_projects", {"result": "ok"})]
+        assert tools.stats() == {"recorded": 1, "answered": 1, "unanswered": 1}
+
+
+async def _collect(session):
+    return [msg async for msg in session.receive()]
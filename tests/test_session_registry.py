@@ -0,0 +1,153 @@
+"""
+Tests for the multi-session AudioLoop registry.
+"""
+import asyncio
+import pytest
+
+from project_manager import ProjectManager, clear_scratch_projects, scratch_project_name
+from session_registry import SessionRegistry, SessionLimitError, LiveSession
+
+
+class FakeLoop:
+    def __init__(self):
+        self.stopped = False
+
+    def stop(self):
+        self.stopped = True
+
+
+class TestSessionRegistry:
+    """Test session lookup by sid, the session cap and client attachment."""
+
+    def test_create_attaches_client(self):
+        registry = SessionRegistry()
+        session = registry.create("station-1", sid="a")
+        assert registry.for_sid("a") is session
+        assert session.sids == {"a"}
+        assert session.room == "session:station-1"
+
+    def test_loop_for_sid(self):
+        registry = SessionRegistry()
+        session = registry.create("a", sid="a")
+        assert registry.loop_for("a") is None
+        session.loop = FakeLoop()
+        assert registry.loop_for("a") is session.loop
+        assert registry.loop_for("unknown") is None
+
+    def test_cap(self):
+        registry = SessionRegistry(max_sessions=2)
+        registry.create("a")
+        registry.create("b")
+        with pytest.raises(SessionLimitError):
+            registry.create("c")
+        registry.remove("a")
+        registry.create("c")
+        assert len(registry) == 2
+
+    def test_no_cap(self):
+        registry = SessionRegistry(max_sessions=0)
+        for i in range(10):
+            registry.create(str(i))
+        assert len(registry) == 10
+
+    def test_duplicate_name_rejected(self):
+        registry = SessionRegistry()
+        registry.create("a")
+        with pytest.raises(ValueError):
+            registry.create("a")
+
+    def test_shared_session(self):
+        registry = SessionRegistry()
+        session = registry.create("station", sid="a")
+        registry.attach("b", session)
+        assert registry.for_sid("b") is session
+        assert registry.detach("a") is session
+        assert session.sids == {"b"}
+
+    def test_attach_leaves_previous_session(self):
+        registry = SessionRegistry()
+        first = registry.create("one", sid="a")
+        second = registry.create("two")
+        registry.attach("a", second)
+        assert first.sids == set()
+        assert registry.for_sid("a") is second
+
+    def test_remove_detaches_clients(self):
+        registry = SessionRegistry()
+        session = registry.create("a", sid="x")
+        registry.attach("y", session)
+        assert registry.remove("a") is session
+        assert registry.for_sid("x") is None and registry.for_sid("y") is None
+        assert registry.remove("a") is None
+
+    def test_stats(self):
+        registry = SessionRegistry(max_sessions=3)
+        registry.create("a", sid="x")
+        stats = registry.stats()
+        assert stats["max_sessions"] == 3 and stats["active"] == 1
+        assert stats["sessions"][0]["name"] == "a"
+        assert stats["sessions"][0]["clients"] == 1
+
+
+class TestConcurrentSessionProjects:
+    """Test that concurrent sessions keep separate scratch projects."""
+
+    def _start(self, registry, name, root):
+        session = registry.create(name, sid=name)
+        session.loop = FakeLoop()
+        session.loop.project_manager = ProjectManager(str(root), scratch_project_name(session.name))
+        return session
+
+    def test_second_session_leaves_first_intact(self, tmp_path):
+        registry = SessionRegistry()
+        first = self._start(registry, "station-1", tmp_path).loop.project_manager
+        first.log_chat("User", "make a bracket")
+        design = first.get_current_project_path() / "cad" / "current_design.py"
+        design.write_text("export_stl(Box(1, 1, 1), 'output.stl')")
+        job = first.get_current_project_path() / "cad" / ".jobs" / "abc123"
+        job.mkdir(parents=True)
+
+        second = self._start(registry, "station-2", tmp_path).loop.project_manager
+        assert first.get_current_project_path() != second.get_current_project_path()
+        assert design.exists() and job.exists()
+        assert first.get_recent_chat_history()[-1]["text"] == "make a bracket"
+        assert second.get_recent_chat_history() == []
+        # Scratch projects are not user projects
+        assert first.list_projects() == []
+
+    def test_reconnect_keeps_scratch_work(self, tmp_path):
+        registry = SessionRegistry()
+        first = self._start(registry, "station-1", tmp_path).loop.project_manager
+        first.log_chat("User", "make a bracket")
+        registry.remove("station-1")
+
+        again = self._start(registry, "station-1", tmp_path).loop.project_manager
+        assert again.get_recent_chat_history()[-1]["text"] == "make a bracket"
+
+    def test_startup_clears_only_scratch_projects(self, tmp_path):
+        registry = SessionRegistry()
+        session = self._start(registry, "station-1", tmp_path).loop.project_manager
+        user = ProjectManager(str(tmp_path))
+        for name in ("temp_x", "temp_prints", "temperature_probe"):
+            user.create_project(name)
+        assert set(session.list_projects()) == {"temp", "temp_x", "temp_prints", "temperature_probe"}
+
+        clear_scratch_projects(str(tmp_path))
+        assert sorted(p.name for p in (tmp_path / "projects").iterdir()) == ["temp_prints", "temp_x", "temperature_probe"]
+
+
+class TestLiveSession:
+    """Test stopping a session's loop and tasks."""
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_tasks(self):
+        session = LiveSession("a", loop=FakeLoop())
+        session.task = asyncio.create_task(asyncio.sleep(10))
+        session.monitor_task = asyncio.create_task(asyncio.sleep(10))
+        session.expiry_task = asyncio.create_task(asyncio.sleep(10))
+        assert session.running and session.stats()["expiring"]
+        session.stop()
+        await asyncio.sleep(0)
+        assert session.loop.stopped
+        assert session.task.cancelled() and session.monitor_task.cancelled() and session.expiry_task.cancelled()
+        assert not session.running
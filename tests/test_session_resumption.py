@@ -0,0 +1,139 @@
+"""
+Tests for Live session resumption handles and the rolling reconnect context.
+"""
+import asyncio
+import pytest
+
+from google.genai import types
+
+from session_resumption import SessionResumption, RollingContext, estimate_tokens
+
+
+def update(handle, resumable=True):
+    return types.LiveServerSessionResumptionUpdate(new_handle=handle, resumable=resumable)
+
+
+class TestSessionResumption:
+    """Test handle tracking, expiry and connect config."""
+
+    def test_keeps_latest_resumable_handle(self):
+        state = SessionResumption()
+        assert state.update(update("h1"))
+        assert state.update(update("h2"))
+        assert state.usable_handle() == "h2"
+
+    def test_non_resumable_update_keeps_last_good_handle(self):
+        state = SessionResumption()
+        state.update(update("h1"))
+        assert not state.update(update(None, resumable=False))
+        assert state.usable_handle() == "h1"
+        assert state.updates == 2
+
+    def test_handle_expires(self):
+        now = [1000.0]
+        state = SessionResumption(max_age_s=60, clock=lambda: now[0])
+        state.update(update("h1"))
+        now[0] += 61
+        assert state.usable_handle() is None
+
+    def test_reject_drops_handle(self):
+        state = SessionResumption()
+        state.update(update("h1"))
+        state.reject()
+        assert state.usable_handle() is None
+        assert state.rejected == 1
+
+    def test_connect_config_requests_handles(self):
+        base = types.LiveConnectConfig(response_modalities=["AUDIO"])
+        state = SessionResumption()
+        config = state.connect_config(base)
+        assert config.session_resumption is not None
+        assert config.session_resumption.handle is None
+        assert base.session_resumption is None
+
+        state.update(update("h1"))
+        assert state.connect_config(base).session_resumption.handle == "h1"
+
+    def test_disabled(self):
+        base = types.LiveConnectConfig(response_modalities=["AUDIO"])
+        state = SessionResumption(enabled=False)
+        assert not state.update(update("h1"))
+        assert state.connect_config(base) is base
+        assert state.usable_handle() is None
+
+
+class TestRollingContext:
+    """Test summary folding and the token budget."""
+
+    def test_empty(self):
+        assert RollingContext().build_message() is None
+
+    def test_recent_turns_verbatim(self):
+        context = RollingContext()
+        context.add_turn("User", "Hola")
+        context.add_turn("SARA", "Hola, ¿en qué te ayudo?")
+        message = context.build_message()
+        assert "[User]: Hola" in message
+        assert "[SARA]: Hola, ¿en qué te ayudo?" in message
+        assert "Summary" not in message
+
+    def test_old_turns_are_summarized(self):
+        context = RollingContext(token_budget=200, summary_share=0.5)
+        for i in range(20):
+            context.add_turn("User", f"Turn {i}. " + "detail " * 20)
+        stats = context.stats()
+        assert stats["turns_summarized"] > 0
+        assert context.tokens <= 200
+        message = context.build_message()
+        assert "Summary of earlier conversation:" in message
+        assert "[User]: Turn 19." in message
+        # Summary lines keep only the first sentence
+        assert "- User: Turn" in message and "detail detail" not in message.split("Recent turns:")[0]
+
+    def test_budget_drops_oldest_summary_lines(self):
+        context = RollingContext(token_budget=100, summary_share=0.3)
+        for i in range(100):
+            context.add_turn("User", f"Message number {i} " + "x" * 80)
+        assert context.summary_lines_dropped > 0
+        assert context.tokens <= 100 + estimate_tokens("[User]: " + "x" * 100)
+
+    def test_newest_turn_kept_even_if_too_long(self):
+        context = RollingContext(token_budget=50)
+        context.add_turn("User", "y" * 1000)
+        assert context.stats()["recent_turns"] == 1
+
+    def test_extend_from_history(self):
+        context = RollingContext()
+        context.extend([{"sender": "User", "text": "a"}, {"sender": "SARA", "text": "b"}, {"text": ""}])
+        assert context.stats()["turns_added"] == 2
+
+
+class TestFakeLiveResumption:
+    """Test the fake Live client's resumption handles and dropped connections."""
+
+    @pytest.mark.asyncio
+    async def test_handles_and_drop(self):
+        pytest.importorskip("numpy")
+        from fake_live import FakeLiveClient, ScriptedTurn, TRIGGER_IMMEDIATE
+
+        turns = [ScriptedTurn(trigger=TRIGGER_IMMEDIATE, response_delay_ms=0, audio_ms=20, audio_chunk_ms=20)
+                 for _ in range(2)]
+        live = FakeLiveClient(turns, drop_after_turns=1)
+        base = SessionResumption().connect_config(types.LiveConnectConfig(response_modalities=["AUDIO"]))
+
+        handles = []
+        async with live.connect(config=base) as session:
+            with pytest.raises(ConnectionError):
+                while True:
+                    async for msg in session.receive():
+                        if msg.session_resumption_update:
+                            handles.append(msg.session_resumption_update.new_handle)
+        assert len(handles) == 1
+
+        resumed = SessionResumption()
+        resumed.update(update(handles[0]))
+        async with live.connect(config=resumed.connect_config(base)) as session:
+            await asyncio.wait_for(session.receive().__anext__(), 2.0)
+        assert live.resumed_handles == [None, handles[0]]
+        # The second connection continued with the remaining turn
+        assert len(live.sessions[1].turns) == 1
@@ -0,0 +1,148 @@
+"""
+Tests for the non-blocking tool confirmation broker.
+"""
+import pytest
+import asyncio
+
+from tool_confirmation import ConfirmationBroker, APPROVED, DENIED, TIMEOUT, CANCELLED, WITHDRAWN
+
+
+class Call:
+    """Minimal stand-in for types.FunctionCall."""
+
+    def __init__(self, name, call_id=None, **args):
+        self.id = call_id or f"{name}-id"
+        self.name = name
+        self.args = args
+
+
+class Recorder:
+    def __init__(self):
+        self.requests = []
+        self.closed = []
+        self.waits = []
+
+    def broker(self, **kwargs):
+        return ConfirmationBroker(
+            on_request=self.requests.append,
+            on_closed=lambda request_id, reason: self.closed.append((request_id, reason)),
+            on_wait=lambda tool, seconds, decision: self.waits.append((tool, decision)),
+            **kwargs,
+        )
+
+
+class TestConfirmationBroker:
+    """Test batching, queueing, timeouts and cancellation."""
+
+    @pytest.mark.asyncio
+    async def test_batch_is_one_prompt(self):
+        rec = Recorder()
+        broker = rec.broker()
+        task = asyncio.create_task(broker.confirm([Call("print_stl"), Call("control_light")]))
+        await asyncio.sleep(0)
+        assert len(rec.requests) == 1
+        request = rec.requests[0]
+        assert request["tool"] == "print_stl, control_light"
+        assert [c["tool"] for c in request["calls"]] == ["print_stl", "control_light"]
+
+        assert broker.resolve(request["id"], True)
+        assert await task == [APPROVED, APPROVED]
+        assert rec.waits == [("print_stl", APPROVED), ("control_light", APPROVED)]
+        assert broker.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_per_call_decisions(self):
+        rec = Recorder()
+        broker = rec.broker()
+        task = asyncio.create_task(broker.confirm([Call("a", "1"), Call("b", "2")]))
+        await asyncio.sleep(0)
+        broker.resolve(rec.requests[0]["id"], True, decisions={"2": False})
+        assert await task == [APPROVED, DENIED]
+
+    @pytest.mark.asyncio
+    async def test_single_call_keeps_legacy_shape(self):
+        rec = Recorder()
+        broker = rec.broker()
+        task = asyncio.create_task(broker.confirm([Call("write_file", path="a.txt")]))
+        await asyncio.sleep(0)
+        assert rec.requests[0]["args"] == {"path": "a.txt"}
+        broker.resolve(rec.requests[0]["id"], False)
+        assert await task == [DENIED]
+
+    @pytest.mark.asyncio
+    async def test_timeout_auto_denies(self):
+        rec = Recorder()
+        broker = rec.broker(timeout=0.05)
+        assert await broker.confirm([Call("print_stl")]) == [TIMEOUT]
+        assert rec.closed == [(rec.requests[0]["id"], TIMEOUT)]
+        assert broker.stats()[TIMEOUT] == 1
+        # A late answer is ignored
+        assert not broker.resolve(rec.requests[0]["id"], True)
+
+    @pytest.mark.asyncio
+    async def test_batches_queue_behind_visible_prompt(self):
+        rec = Recorder()
+        broker = rec.broker()
+        first = asyncio.create_task(broker.confirm([Call("a")]))
+        second = asyncio.create_task(broker.confirm([Call("b")]))
+        await asyncio.sleep(0)
+        assert len(rec.requests) == 1
+        broker.resolve(rec.requests[0]["id"], True)
+        await first
+        assert len(rec.requests) == 2 and rec.requests[1]["tool"] == "b"
+        broker.resolve(rec.requests[1]["id"], False)
+        assert await second == [DENIED]
+
+    @pytest.mark.asyncio
+    async def test_server_cancellation(self):
+        rec = Recorder()
+        broker = rec.broker()
+        task = asyncio.create_task(broker.confirm([Call("a", "call-1")]))
+        await asyncio.sleep(0)
+        broker.cancel_calls(["call-1"])
+        assert await task == [CANCELLED]
+        assert rec.closed[0][1] == CANCELLED
+
+    @pytest.mark.asyncio
+    async def test_partial_cancellation_withdraws_the_rest(self):
+        rec = Recorder()
+        broker = rec.broker()
+        task = asyncio.create_task(broker.confirm([Call("a", "call-1"), Call("b", "call-2")]))
+        await asyncio.sleep(0)
+        broker.cancel_calls(["call-1"])
+        # call-2 was not cancelled by the server; it must still be answered
+        assert await task == [CANCELLED, WITHDRAWN]
+        assert rec.closed == [(rec.requests[0]["id"], CANCELLED)]
+        assert broker.stats()[WITHDRAWN] == 1 and broker.pending == 0
+
+    @pytest.mark.asyncio
+    async def test_timeout_starts_when_shown(self):
+        rec = Recorder()
+        broker = rec.broker(timeout=0.1)
+        first = asyncio.create_task(broker.confirm([Call("a")]))
+        second = asyncio.create_task(broker.confirm([Call("b")]))
+        # The second batch waits behind the first for longer than the timeout
+        await asyncio.sleep(0.07)
+        broker.resolve(rec.requests[0]["id"], True)
+        await first
+        await asyncio.sleep(0.07)
+        assert not second.done()
+        assert broker.resolve(rec.requests[1]["id"], True)
+        assert await second == [APPROVED]
+
+    @pytest.mark.asyncio
+    async def test_cancel_all(self):
+        rec = Recorder()
+        broker = rec.broker()
+        tasks = [asyncio.create_task(broker.confirm([Call(name)])) for name in ("a", "b")]
+        await asyncio.sleep(0)
+        broker.cancel_all()
+        assert await asyncio.gather(*tasks) == [[CANCELLED], [CANCELLED]]
+        # Only the prompt that was on screen needs closing
+        assert len(rec.closed) == 1
+
+    @pytest.mark.asyncio
+    async def test_empty_batch(self):
+        rec = Recorder()
+        assert await rec.broker().confirm([]) == []
+        assert rec.requests == []
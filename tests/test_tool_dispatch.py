@@ -0,0 +1,105 @@
+"""
+Tests for the concurrent tool-call dispatcher.
+"""
+import pytest
+import asyncio
+import time
+
+from tool_dispatch import ToolDispatcher
+
+
+class Call:
+    """Minimal stand-in for types.FunctionCall."""
+
+    def __init__(self, name, **args):
+        self.id = f"{name}-id"
+        self.name = name
+        self.args = args
+
+
+def sleeper(result, seconds, log=None):
+    async def handler(fc):
+        if log is not None:
+            log.append(("start", fc.args.get("tag")))
+        await asyncio.sleep(seconds)
+        if log is not None:
+            log.append(("end", fc.args.get("tag")))
+        return result
+    return handler
+
+
+class TestToolDispatcher:
+    """Test concurrency, ordering, timeouts and error handling."""
+
+    @pytest.mark.asyncio
+    async def test_independent_calls_run_concurrently(self):
+        d = ToolDispatcher()
+        d.register("lights", sleeper("lights on", 0.2))
+        d.register("printer", sleeper("printing", 0.2))
+        started = time.perf_counter()
+        results = await d.run([Call("lights"), Call("printer")])
+        assert time.perf_counter() - started < 0.35
+        assert results == ["lights on", "printing"]
+
+    @pytest.mark.asyncio
+    async def test_results_keep_call_order(self):
+        d = ToolDispatcher()
+        d.register("slow", sleeper("slow", 0.1))
+        d.register("fast", sleeper("fast", 0.0))
+        assert await d.run([Call("slow"), Call("fast"), Call("slow")]) == ["slow", "fast", "slow"]
+
+    @pytest.mark.asyncio
+    async def test_timeout_becomes_result(self):
+        d = ToolDispatcher()
+        d.register("hang", sleeper("never", 5), timeout=0.05)
+        d.register("ok", sleeper("ok", 0))
+        results = await d.run([Call("hang"), Call("ok")])
+        assert "timed out" in results[0]
+        assert results[1] == "ok"
+
+    @pytest.mark.asyncio
+    async def test_exception_becomes_result(self):
+        async def boom(fc):
+            raise RuntimeError("printer offline")
+        outcomes = []
+        d = ToolDispatcher(on_call_finished=lambda name, seconds, outcome: outcomes.append((name, outcome)))
+        d.register("boom", boom)
+        results = await d.run([Call("boom")])
+        assert "printer offline" in results[0]
+        assert outcomes == [("boom", "error")]
+
+    @pytest.mark.asyncio
+    async def test_serial_key_preserves_order(self):
+        log = []
+        d = ToolDispatcher()
+        d.register("project", sleeper("done", 0.05, log), serial="project")
+        await d.run([Call("project", tag=1), Call("project", tag=2)])
+        assert log == [("start", 1), ("end", 1), ("start", 2), ("end", 2)]
+
+    @pytest.mark.asyncio
+    async def test_serial_key_per_argument(self):
+        log = []
+        d = ToolDispatcher()
+        d.register("light", sleeper("ok", 0.05, log), serial=lambda fc: fc.args["target"])
+        await d.run([Call("light", target="desk", tag=1), Call("light", target="lamp", tag=2),
+                     Call("light", target="desk", tag=3)])
+        # desk calls are ordered, lamp overlaps them
+        assert log.index(("end", 1)) < log.index(("start", 3))
+        assert log.index(("start", 2)) < log.index(("end", 1))
+
+    @pytest.mark.asyncio
+    async def test_none_result_passes_through(self):
+        d = ToolDispatcher()
+        d.register("fire_and_forget", sleeper(None, 0))
+        assert await d.run([Call("fire_and_forget")]) == [None]
+
+    def test_timeout_overrides(self):
+        d = ToolDispatcher(default_timeout=30)
+        d.register("print_stl", sleeper("ok", 0), timeout=300)
+        d.register("list", sleeper("ok", 0))
+        d.set_timeouts({"print_stl": 600, "unknown": 1})
+        assert d.timeout_for("print_stl") == 600
+        assert d.timeout_for("list") == 30
+        d.set_timeouts({})
+        assert d.timeout_for("print_stl") == 300
+        assert "print_stl" in d and "unknown" not in d
@@ -0,0 +1,111 @@
+"""
+Tests for incremental transcript building and batched transcription emits.
+"""
+import asyncio
+import pytest
+
+from transcript import SpeakerTranscript, TranscriptBuilder
+
+
+class Recorder:
+    def __init__(self):
+        self.emits = []
+        self.turns = []
+
+    def emit(self, data):
+        self.emits.append(data)
+
+    def turn(self, sender, text):
+        self.turns.append((sender, text))
+
+
+class TestSpeakerTranscript:
+    """Test delta extraction for cumulative and chunked transcriptions."""
+
+    def test_cumulative(self):
+        speaker = SpeakerTranscript()
+        assert speaker.feed("Hola") == "Hola"
+        assert speaker.feed("Hola, ¿qué") == ", ¿qué"
+        assert speaker.feed("Hola, ¿qué tal?") == " tal?"
+
+    def test_chunks(self):
+        speaker = SpeakerTranscript()
+        assert speaker.feed("Hola") == "Hola"
+        assert speaker.feed(" mundo") == " mundo"
+
+    def test_exact_repeat_is_skipped(self):
+        speaker = SpeakerTranscript()
+        speaker.feed("Hola mundo")
+        assert speaker.feed("Hola mundo") == ""
+
+    def test_long_cumulative(self):
+        speaker = SpeakerTranscript()
+        text = ""
+        deltas = []
+        for i in range(500):
+            text += f"palabra{i} "
+            deltas.append(speaker.feed(text))
+        assert "".join(deltas) == text
+
+    def test_reset(self):
+        speaker = SpeakerTranscript()
+        speaker.feed("Hola")
+        speaker.reset()
+        assert speaker.feed("Hola") == "Hola"
+
+
+class TestTranscriptBuilder:
+    """Test chat entries, turn boundaries and emit batching."""
+
+    def test_logs_entry_on_speaker_switch(self):
+        recorder = Recorder()
+        builder = TranscriptBuilder(on_emit=recorder.emit, on_turn=recorder.turn, emit_interval_s=0)
+        builder.feed("User", "Hola")
+        builder.feed("User", "Hola SARA")
+        assert recorder.turns == []
+        builder.feed("SARA", "Hola")
+        assert recorder.turns == [("User", "Hola SARA")]
+        builder.end_turn()
+        assert recorder.turns == [("User", "Hola SARA"), ("SARA", "Hola")]
+
+    def test_end_turn_resets_delta_tracking(self):
+        recorder = Recorder()
+        builder = TranscriptBuilder(on_turn=recorder.turn)
+        builder.feed("User", "Hola")
+        builder.end_turn()
+        assert builder.feed("User", "Hola") == "Hola"
+
+    def test_blank_entries_not_logged(self):
+        recorder = Recorder()
+        builder = TranscriptBuilder(on_turn=recorder.turn)
+        builder.feed("User", "  ")
+        builder.end_turn()
+        assert recorder.turns == []
+
+    def test_no_loop_emits_immediately(self):
+        recorder = Recorder()
+        builder = TranscriptBuilder(on_emit=recorder.emit, emit_interval_s=0.05)
+        builder.feed("User", "Hola")
+        assert recorder.emits == [{"sender": "User", "text": "Hola"}]
+
+    @pytest.mark.asyncio
+    async def test_emits_are_batched(self):
+        recorder = Recorder()
+        builder = TranscriptBuilder(on_emit=recorder.emit, emit_interval_s=0.02)
+        text = ""
+        for word in ["Hola", " que", " tal", " estas"]:
+            text += word
+            builder.feed("SARA", text)
+        assert recorder.emits == []
+        await asyncio.sleep(0.05)
+        assert recorder.emits == [{"sender": "SARA", "text": "Hola que tal estas"}]
+        assert builder.stats()["deltas"] == 4 and builder.stats()["emits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_speaker_switch_flushes_pending_in_order(self):
+        recorder = Recorder()
+        builder = TranscriptBuilder(on_emit=recorder.emit, emit_interval_s=10)
+        builder.feed("User", "Hola")
+        builder.feed("SARA", "Buenas")
+        builder.end_turn()
+        assert recorder.emits == [{"sender": "User", "text": "Hola"}, {"sender": "SARA", "text": "Buenas"}]
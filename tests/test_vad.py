@@ -0,0 +1,112 @@
+"""
+Tests for the Voice Activity Detection engines.
+"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from vad import EnergyVAD, SpectralVAD, create_vad, pcm_rms, pcm_view
+
+SAMPLE_RATE = 16000
+CHUNK = 1024
+
+
+def tone(freq, amplitude, n=CHUNK):
+    t = np.arange(n) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * freq * t)).astype("<i2").tobytes()
+
+
+def silence(n=CHUNK):
+    return bytes(n * 2)
+
+
+def white_noise(amplitude, n=CHUNK, seed=0):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-amplitude, amplitude, n).astype("<i2").tobytes()
+
+
+class TestPcmHelpers:
+    """Test PCM view and RMS helpers."""
+
+    def test_view_is_zero_copy(self):
+        data = tone(440, 1000)
+        view = pcm_view(data)
+        assert view.size == CHUNK
+        assert not view.flags.owndata
+
+    def test_view_ignores_odd_trailing_byte(self):
+        assert pcm_view(b"\x01\x00\x02").size == 1
+
+    def test_rms_matches_reference(self):
+        data = tone(440, 1000)
+        samples = pcm_view(data).astype(np.float64)
+        expected = int(np.sqrt(np.mean(samples ** 2)))
+        assert abs(pcm_rms(pcm_view(data)) - expected) <= 1
+
+    def test_rms_empty(self):
+        assert pcm_rms(pcm_view(b"")) == 0
+
+
+class TestEnergyVAD:
+    """Test the plain RMS threshold engine."""
+
+    def test_threshold(self):
+        vad = EnergyVAD(threshold=800)
+        assert vad.hangover_seconds == 0.0
+        assert vad.process(tone(440, 4000)) is True
+        assert vad.process(silence()) is False
+        assert vad.level == 0
+
+
+class TestSpectralVAD:
+    """Test the energy + ZCR + band energy engine."""
+
+    def test_voiced_tone_triggers_after_onset(self):
+        vad = SpectralVAD(sample_rate=SAMPLE_RATE, onset_frames=2)
+        voiced = tone(440, 4000)
+        assert vad.process(voiced) is False
+        assert vad.process(voiced) is True
+
+    def test_hangover_keeps_speech_through_short_pause(self):
+        vad = SpectralVAD(sample_rate=SAMPLE_RATE, onset_frames=1, hangover_frames=3)
+        assert vad.process(tone(440, 4000)) is True
+        for _ in range(3):
+            assert vad.process(silence()) is True
+        assert vad.process(silence()) is False
+
+    def test_hangover_seconds_matches_late_frames(self):
+        vad = SpectralVAD(sample_rate=SAMPLE_RATE, onset_frames=1)
+        assert vad.hangover_seconds == 0.0
+        vad.process(tone(440, 4000))
+        late = 0
+        while vad.process(silence()):
+            late += 1
+        # Speech is reported this long after it ended; listen_audio backdates speech_end by it
+        assert vad.hangover_seconds == pytest.approx(late * CHUNK / SAMPLE_RATE)
+        assert vad.hangover_seconds == pytest.approx(0.512)
+
+    def test_broadband_noise_rejected(self):
+        vad = SpectralVAD(sample_rate=SAMPLE_RATE, onset_frames=1)
+        noise = white_noise(8000)
+        assert vad.process(noise) is False
+        assert vad.zcr > 0.35
+
+    def test_low_rumble_rejected(self):
+        vad = SpectralVAD(sample_rate=SAMPLE_RATE, onset_frames=1)
+        assert vad.process(tone(60, 8000)) is False
+        assert vad.band_ratio < 0.55
+
+
+class TestCreateVad:
+    """Test engine selection from settings."""
+
+    def test_default_is_spectral(self):
+        assert isinstance(create_vad({}), SpectralVAD)
+
+    def test_energy_from_settings(self):
+        vad = create_vad({"vad_engine": "energy", "vad_threshold": 500})
+        assert isinstance(vad, EnergyVAD)
+        assert vad.threshold == 500
+
+    def test_unknown_engine_falls_back(self):
+        assert isinstance(create_vad({"vad_engine": "nope"}), EnergyVAD)